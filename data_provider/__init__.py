@@ -27,19 +27,36 @@
 6. YfinanceFetcher (Priority 4) - 来自 yfinance 库
 
 提示：优先级数字越小越优先，同优先级按初始化顺序排列
+
+共享实例：get_data_fetcher_manager() 返回进程级 DataFetcherManager，
+各数据源在请求第一次到达时才构造，缓存与熔断状态在调用方之间复用
 """
 
-from .base import BaseFetcher, DataFetcherManager
-from .efinance_fetcher import EfinanceFetcher
-from .akshare_fetcher import AkshareFetcher
-from .tushare_fetcher import TushareFetcher
-from .pytdx_fetcher import PytdxFetcher
-from .baostock_fetcher import BaostockFetcher
-from .yfinance_fetcher import YfinanceFetcher
+from .base import BaseFetcher, DataFetcherManager, get_data_fetcher_manager
+
+# 各数据源类按需导入（DataFetcherManager 默认也只在首次使用时构造数据源）
+_FETCHER_MODULES = {
+    'EfinanceFetcher': '.efinance_fetcher',
+    'AkshareFetcher': '.akshare_fetcher',
+    'TushareFetcher': '.tushare_fetcher',
+    'PytdxFetcher': '.pytdx_fetcher',
+    'BaostockFetcher': '.baostock_fetcher',
+    'YfinanceFetcher': '.yfinance_fetcher',
+}
+
+
+def __getattr__(name):
+    module = _FETCHER_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    return getattr(importlib.import_module(module, __name__), name)
+
 
 __all__ = [
     'BaseFetcher',
     'DataFetcherManager',
+    'get_data_fetcher_manager',
     'EfinanceFetcher',
     'AkshareFetcher',
     'TushareFetcher',
@@ -13,7 +13,7 @@ AkshareFetcher - 主数据源 (Priority 1)
 风险：爬虫机制易被反爬封禁
 
 防封禁策略：
-1. 每次请求前随机休眠 2-5 秒
+1. 每次 API 调用前按进程级令牌桶精确限速（所有实例、线程共享）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 4. 熔断器机制：连续失败后自动冷却
@@ -47,6 +47,10 @@ from .realtime_types import (
     get_realtime_circuit_breaker, get_chip_circuit_breaker,
     safe_float, safe_int  # 使用统一的类型转换函数
 )
+from .quote_snapshot import (
+    RealtimeQuoteSnapshot, snapshot_for_cache, AKSHARE_EM_STOCK_FIELDS, AKSHARE_EM_ETF_FIELDS,
+)
+from .snapshot_cache import SingleFlightCache
 
 
 # 保留旧的 RealtimeQuote 别名，用于向后兼容
@@ -71,18 +75,12 @@ USER_AGENTS = [
 # - 批量分析场景：通常 30 只股票在 5 分钟内分析完，20 分钟足够覆盖
 # - 实时性要求：股票分析不需要秒级实时数据，20 分钟延迟可接受
 # - 防封禁：减少 API 调用频率
-_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 1200  # 20分钟缓存有效期
-}
+# 过期后只有一个调用方刷新，其余调用方复用旧数据或等待刷新结果（single-flight）
+# 快照写入持久化缓存，定时任务/服务重启后在 TTL 内无需重新全量拉取
+_realtime_cache: SingleFlightCache = SingleFlightCache('akshare_em', ttl=1200, persist=True)
 
 # ETF 实时行情缓存
-_etf_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 1200  # 20分钟缓存有效期
-}
+_etf_realtime_cache: SingleFlightCache = SingleFlightCache('akshare_etf', ttl=1200, persist=True)
 
 
 def _is_etf_code(stock_code: str) -> bool:
@@ -168,7 +166,7 @@ class AkshareFetcher(BaseFetcher):
     数据来源：东方财富网爬虫
     
     关键策略：
-    - 每次请求前随机休眠 2.0-5.0 秒
+    - 每次 API 调用按进程级令牌桶精确限速
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -176,17 +174,11 @@ class AkshareFetcher(BaseFetcher):
     name = "AkshareFetcher"
     priority = int(os.getenv("AKSHARE_PRIORITY", "1"))
     
-    def __init__(self, sleep_min: float = 2.0, sleep_max: float = 5.0):
-        """
-        初始化 AkshareFetcher
-        
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
-        """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
+    # 每次实际 API 调用前消耗速率令牌（_enforce_rate_limit），外层只占用并发槽位
+    self_rate_limited = True
+    
+    def __init__(self):
+        """初始化 AkshareFetcher"""
         eastmoney_patch()
     
     def _set_random_user_agent(self) -> None:
@@ -209,22 +201,11 @@ class AkshareFetcher(BaseFetcher):
         """
         强制执行速率限制
         
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
+        从进程级预算注册表消耗一个本数据源的速率令牌：
+        所有 Fetcher 实例与线程共享同一个令牌桶，按令牌补充时间精确等待，
+        既不超过配置的每分钟请求数，也不额外浪费随机休眠时间
         """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-        
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
+        self._acquire_rate_token()
     
     @retry(
         stop=stop_after_attempt(3),  # 最多重试3次
@@ -729,6 +710,102 @@ class AkshareFetcher(BaseFetcher):
             else:
                 return self._get_stock_realtime_quote_em(stock_code)
     
+    def _fetch_stock_spot_em(self) -> pd.DataFrame:
+        """
+        全量拉取东财 A 股实时行情（_realtime_cache 的刷新函数）
+
+        由缓存保证同一时刻只有一个调用方执行；失败时返回空 DataFrame，缓存保留旧快照并在
+        失败退避期（failure_ttl）内不再调用本函数，避免同一轮任务对同一接口反复请求。
+        """
+        import akshare as ak
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = "akshare_em"
+
+        logger.info(f"[缓存未命中] 触发全量刷新 A股实时行情(东财)")
+        last_error: Optional[Exception] = None
+        for attempt in range(1, 3):
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
+                api_start = time.time()
+
+                df = ak.stock_zh_a_spot_em()
+
+                api_elapsed = time.time() - api_start
+                logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
+                circuit_breaker.record_success(source_key)
+                logger.info(f"[缓存更新] A股实时行情(东财) 缓存已刷新，TTL={int(_realtime_cache.ttl)}s")
+                return df
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
+                time.sleep(min(2 ** attempt, 5))
+
+        logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
+        circuit_breaker.record_failure(source_key, str(last_error))
+        return pd.DataFrame()
+
+    def _fetch_etf_spot_em(self) -> pd.DataFrame:
+        """
+        全量拉取东财 ETF 实时行情（_etf_realtime_cache 的刷新函数）
+
+        失败时返回空 DataFrame，缓存在失败退避期内不再调用本函数。
+        """
+        import akshare as ak
+        circuit_breaker = get_realtime_circuit_breaker()
+        source_key = "akshare_etf"
+
+        last_error: Optional[Exception] = None
+        for attempt in range(1, 3):
+            try:
+                # 防封禁策略
+                self._set_random_user_agent()
+                self._enforce_rate_limit()
+
+                logger.info(f"[API调用] ak.fund_etf_spot_em() 获取ETF实时行情... (attempt {attempt}/2)")
+                api_start = time.time()
+
+                df = ak.fund_etf_spot_em()
+
+                api_elapsed = time.time() - api_start
+                logger.info(f"[API返回] ak.fund_etf_spot_em 成功: 返回 {len(df)} 只ETF, 耗时 {api_elapsed:.2f}s")
+                circuit_breaker.record_success(source_key)
+                return df
+            except Exception as e:
+                last_error = e
+                logger.warning(f"[API错误] ak.fund_etf_spot_em 获取失败 (attempt {attempt}/2): {e}")
+                time.sleep(min(2 ** attempt, 5))
+
+        logger.error(f"[API错误] ak.fund_etf_spot_em 最终失败: {last_error}")
+        circuit_breaker.record_failure(source_key, str(last_error))
+        return pd.DataFrame()
+
+    def get_market_snapshot(self) -> Optional[RealtimeQuoteSnapshot]:
+        """
+        获取 A 股全市场实时行情快照（东方财富，与个股实时行情共用缓存）
+
+        缓存有效时不发起网络请求；供全市场初筛等批量场景使用
+
+        Returns:
+            RealtimeQuoteSnapshot，数据源熔断或拉取失败时返回 None
+        """
+        circuit_breaker = get_realtime_circuit_breaker()
+        if not circuit_breaker.is_available("akshare_em"):
+            logger.warning("[熔断] 数据源 akshare_em 处于熔断状态，跳过全市场快照")
+            return None
+        try:
+            df = _realtime_cache.get_or_refresh(self._fetch_stock_spot_em)
+        except Exception as e:
+            logger.error(f"[API错误] 获取全市场行情(东财)失败: {e}")
+            circuit_breaker.record_failure("akshare_em", str(e))
+            return None
+        if df is None or df.empty:
+            return None
+        return snapshot_for_cache(_realtime_cache, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+
     def _get_stock_realtime_quote_em(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取普通 A 股实时行情数据（东方财富数据源）
@@ -737,90 +814,26 @@ class AkshareFetcher(BaseFetcher):
         优点：数据最全，含量比、换手率、市盈率、市净率、总市值、流通市值等
         缺点：全量拉取，数据量大，容易超时/限流
         """
-        import akshare as ak
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "akshare_em"
         
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (_realtime_cache['data'] is not None and 
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']):
-                df = _realtime_cache['data']
-                cache_age = int(current_time - _realtime_cache['timestamp'])
-                logger.debug(f"[缓存命中] A股实时行情(东财) - 缓存年龄 {cache_age}s/{_realtime_cache['ttl']}s")
-            else:
-                # 触发全量刷新
-                logger.info(f"[缓存未命中] 触发全量刷新 A股实时行情(东财)")
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.stock_zh_a_spot_em() 获取A股实时行情... (attempt {attempt}/2)")
-                        import time as _time
-                        api_start = _time.time()
-
-                        df = ak.stock_zh_a_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(f"[API返回] ak.stock_zh_a_spot_em 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
-                        circuit_breaker.record_success(source_key)
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.stock_zh_a_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2 ** attempt, 5))
-
-                # 更新缓存：成功缓存数据；失败也缓存空数据，避免同一轮任务对同一接口反复请求
-                if df is None:
-                    logger.error(f"[API错误] ak.stock_zh_a_spot_em 最终失败: {last_error}")
-                    circuit_breaker.record_failure(source_key, str(last_error))
-                    df = pd.DataFrame()
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
-                logger.info(f"[缓存更新] A股实时行情(东财) 缓存已刷新，TTL={_realtime_cache['ttl']}s")
+            # 读取缓存（过期时由单个调用方全量刷新）
+            df = _realtime_cache.get_or_refresh(self._fetch_stock_spot_em)
 
             if df is None or df.empty:
                 logger.warning(f"[实时行情] A股实时行情数据为空，跳过 {stock_code}")
                 return None
             
-            # 查找指定股票
-            row = df[df['代码'] == stock_code]
-            if row.empty:
+            # 查找指定股票（快照按代码索引，O(1) 命中且数值列已预转换）
+            snapshot = snapshot_for_cache(
+                _realtime_cache, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS
+            )
+            quote = snapshot.get(stock_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
                 return None
             
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                source=RealtimeSource.AKSHARE_EM,
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume=safe_int(row.get('成交量')),
-                amount=safe_float(row.get('成交额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                open_price=safe_float(row.get('今开')),
-                high=safe_float(row.get('最高')),
-                low=safe_float(row.get('最低')),
-                pe_ratio=safe_float(row.get('市盈率-动态')),
-                pb_ratio=safe_float(row.get('市净率')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                change_60d=safe_float(row.get('60日涨跌幅')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-            
             logger.info(f"[实时行情-东财] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                        f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
             return quote
@@ -1038,83 +1051,26 @@ class AkshareFetcher(BaseFetcher):
         Returns:
             UnifiedRealtimeQuote 对象，获取失败返回 None
         """
-        import akshare as ak
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "akshare_etf"
         
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (_etf_realtime_cache['data'] is not None and 
-                current_time - _etf_realtime_cache['timestamp'] < _etf_realtime_cache['ttl']):
-                df = _etf_realtime_cache['data']
-                logger.debug(f"[缓存命中] 使用缓存的ETF实时行情数据")
-            else:
-                last_error: Optional[Exception] = None
-                df = None
-                for attempt in range(1, 3):
-                    try:
-                        # 防封禁策略
-                        self._set_random_user_agent()
-                        self._enforce_rate_limit()
-
-                        logger.info(f"[API调用] ak.fund_etf_spot_em() 获取ETF实时行情... (attempt {attempt}/2)")
-                        import time as _time
-                        api_start = _time.time()
-
-                        df = ak.fund_etf_spot_em()
-
-                        api_elapsed = _time.time() - api_start
-                        logger.info(f"[API返回] ak.fund_etf_spot_em 成功: 返回 {len(df)} 只ETF, 耗时 {api_elapsed:.2f}s")
-                        circuit_breaker.record_success(source_key)
-                        break
-                    except Exception as e:
-                        last_error = e
-                        logger.warning(f"[API错误] ak.fund_etf_spot_em 获取失败 (attempt {attempt}/2): {e}")
-                        time.sleep(min(2 ** attempt, 5))
-
-                if df is None:
-                    logger.error(f"[API错误] ak.fund_etf_spot_em 最终失败: {last_error}")
-                    circuit_breaker.record_failure(source_key, str(last_error))
-                    df = pd.DataFrame()
-                _etf_realtime_cache['data'] = df
-                _etf_realtime_cache['timestamp'] = current_time
+            # 读取缓存（过期时由单个调用方全量刷新）
+            df = _etf_realtime_cache.get_or_refresh(self._fetch_etf_spot_em)
 
             if df is None or df.empty:
                 logger.warning(f"[实时行情] ETF实时行情数据为空，跳过 {stock_code}")
                 return None
             
-            # 查找指定 ETF
-            row = df[df['代码'] == stock_code]
-            if row.empty:
+            # 查找指定 ETF（快照按代码索引）
+            snapshot = snapshot_for_cache(
+                _etf_realtime_cache, RealtimeSource.AKSHARE_EM, AKSHARE_EM_ETF_FIELDS
+            )
+            quote = snapshot.get(stock_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情")
                 return None
             
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            # ETF 行情数据构建
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get('名称', '')),
-                source=RealtimeSource.AKSHARE_EM,
-                price=safe_float(row.get('最新价')),
-                change_pct=safe_float(row.get('涨跌幅')),
-                change_amount=safe_float(row.get('涨跌额')),
-                volume=safe_int(row.get('成交量')),
-                amount=safe_float(row.get('成交额')),
-                volume_ratio=safe_float(row.get('量比')),
-                turnover_rate=safe_float(row.get('换手率')),
-                amplitude=safe_float(row.get('振幅')),
-                open_price=safe_float(row.get('今开')),
-                high=safe_float(row.get('最高')),
-                low=safe_float(row.get('最低')),
-                total_mv=safe_float(row.get('总市值')),
-                circ_mv=safe_float(row.get('流通市值')),
-                high_52w=safe_float(row.get('52周最高')),
-                low_52w=safe_float(row.get('52周最低')),
-            )
-            
             logger.info(f"[ETF实时行情] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                        f"换手率={quote.turnover_rate}%")
             return quote
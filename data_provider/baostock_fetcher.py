@@ -9,16 +9,17 @@ BaostockFetcher - 备用数据源 2 (Priority 3)
 优点：稳定、无配额限制
 
 关键策略：
-1. 管理 bs.login() 和 bs.logout() 生命周期
-2. 使用上下文管理器防止连接泄露
+1. 进程内长会话：只登录一次，会话失效时自动重新登录
+2. 所有查询经会话管理器加锁串行（baostock 客户端非线程安全）
 3. 失败后指数退避重试
+4. 批量接口在同一会话内拉取多只股票日线
 """
 
 import logging
 import re
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Generator
+from typing import Dict, List, Optional, Generator
 
 import pandas as pd
 from tenacity import (
@@ -30,6 +31,8 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .baostock_session import BaostockSessionManager, get_baostock_session_manager
+from .rate_limiter import fetcher_upstream, get_rate_limiter_registry
 import os
 
 logger = logging.getLogger(__name__)
@@ -55,8 +58,8 @@ class BaostockFetcher(BaseFetcher):
     数据来源：证券宝 Baostock API
     
     关键策略：
-    - 使用上下文管理器管理连接生命周期
-    - 每次请求都重新登录/登出，防止连接泄露
+    - 进程级会话管理器统一管理登录状态，避免每次请求都登录/登出
+    - 查询加锁串行，会话过期自动重新登录
     - 失败后指数退避重试
     
     Baostock 特点：
@@ -71,6 +74,7 @@ class BaostockFetcher(BaseFetcher):
     def __init__(self):
         """初始化 BaostockFetcher"""
         self._bs_module = None
+        self._session_manager: Optional[BaostockSessionManager] = None
     
     def _get_baostock(self):
         """
@@ -83,44 +87,28 @@ class BaostockFetcher(BaseFetcher):
             self._bs_module = bs
         return self._bs_module
     
+    def _get_session_manager(self) -> BaostockSessionManager:
+        """获取进程级 Baostock 会话管理器"""
+        if self._session_manager is None:
+            self._session_manager = get_baostock_session_manager(self._get_baostock)
+        return self._session_manager
+    
     @contextmanager
     def _baostock_session(self) -> Generator:
         """
-        Baostock 连接上下文管理器
+        Baostock 会话上下文管理器
         
         确保：
-        1. 进入上下文时自动登录
-        2. 退出上下文时自动登出
-        3. 异常时也能正确登出
+        1. 进入上下文时复用已登录会话（未登录或已过期时自动登录）
+        2. 上下文内独占 baostock 客户端（加锁）
+        3. 退出上下文时不再登出，会话留给后续查询
         
         使用示例：
             with self._baostock_session():
                 # 在这里执行数据查询
         """
-        bs = self._get_baostock()
-        login_result = None
-        
-        try:
-            # 登录 Baostock
-            login_result = bs.login()
-            
-            if login_result.error_code != '0':
-                raise DataFetchError(f"Baostock 登录失败: {login_result.error_msg}")
-            
-            logger.debug("Baostock 登录成功")
-            
+        with self._get_session_manager().session() as bs:
             yield bs
-            
-        finally:
-            # 确保登出，防止连接泄露
-            try:
-                logout_result = bs.logout()
-                if logout_result.error_code == '0':
-                    logger.debug("Baostock 登出成功")
-                else:
-                    logger.warning(f"Baostock 登出异常: {logout_result.error_msg}")
-            except Exception as e:
-                logger.warning(f"Baostock 登出时发生错误: {e}")
     
     def _convert_stock_code(self, stock_code: str) -> str:
         """
@@ -175,10 +163,9 @@ class BaostockFetcher(BaseFetcher):
         
         流程：
         1. 检查是否为美股（不支持）
-        2. 使用上下文管理器管理连接
-        3. 转换股票代码格式
-        4. 调用 API 查询数据
-        5. 将结果转换为 DataFrame
+        2. 转换股票代码格式
+        3. 通过会话管理器查询数据（会话失效自动重新登录）
+        4. 将结果转换为 DataFrame
         """
         # 美股不支持，抛出异常让 DataFetcherManager 切换到其他数据源
         if _is_us_code(stock_code):
@@ -189,38 +176,70 @@ class BaostockFetcher(BaseFetcher):
         
         logger.debug(f"调用 Baostock query_history_k_data_plus({bs_code}, {start_date}, {end_date})")
         
-        with self._baostock_session() as bs:
-            try:
-                # 查询日线数据
-                # adjustflag: 1-后复权，2-前复权，3-不复权
-                rs = bs.query_history_k_data_plus(
-                    code=bs_code,
-                    fields="date,open,high,low,close,volume,amount,pctChg",
-                    start_date=start_date,
-                    end_date=end_date,
-                    frequency="d",  # 日线
-                    adjustflag="2"  # 前复权
-                )
-                
-                if rs.error_code != '0':
-                    raise DataFetchError(f"Baostock 查询失败: {rs.error_msg}")
-                
-                # 转换为 DataFrame
-                data_list = []
-                while rs.next():
-                    data_list.append(rs.get_row_data())
-                
-                if not data_list:
-                    raise DataFetchError(f"Baostock 未查询到 {stock_code} 的数据")
-                
-                df = pd.DataFrame(data_list, columns=rs.fields)
-                
-                return df
-                
-            except Exception as e:
-                if isinstance(e, DataFetchError):
-                    raise
-                raise DataFetchError(f"Baostock 获取数据失败: {e}") from e
+        try:
+            return self._query_daily_history(bs_code, stock_code, start_date, end_date)
+        except DataFetchError:
+            raise
+        except Exception as e:
+            raise DataFetchError(f"Baostock 获取数据失败: {e}") from e
+    
+    def _query_daily_history(self, bs_code: str, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """查询单只股票日线（前复权），无数据时抛出 DataFetchError"""
+        # adjustflag: 1-后复权，2-前复权，3-不复权
+        fields, rows = self._get_session_manager().query_rows(
+            'query_history_k_data_plus',
+            code=bs_code,
+            fields="date,open,high,low,close,volume,amount,pctChg",
+            start_date=start_date,
+            end_date=end_date,
+            frequency="d",  # 日线
+            adjustflag="2"  # 前复权
+        )
+        if not rows:
+            raise DataFetchError(f"Baostock 未查询到 {stock_code} 的数据")
+        return pd.DataFrame(rows, columns=fields)
+    
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取日线数据（同一登录会话内依次查询）
+        
+        单只股票无数据或失败时跳过，不影响其他股票
+        
+        Args:
+            stock_codes: 股票代码列表（美股自动跳过）
+            start_date / end_date / days: 同 get_daily_data
+            
+        Returns:
+            {股票代码: 标准化并计算技术指标后的 DataFrame}
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        if start_date is None:
+            from datetime import timedelta
+            start_date = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)).strftime('%Y-%m-%d')
+        
+        results: Dict[str, pd.DataFrame] = {}
+        with get_rate_limiter_registry().limit(fetcher_upstream(self.name)):
+            for stock_code in dict.fromkeys(stock_codes):
+                if _is_us_code(stock_code):
+                    continue
+                try:
+                    raw_df = self._query_daily_history(
+                        self._convert_stock_code(stock_code), stock_code, start_date, end_date
+                    )
+                    df = self._clean_data(self._normalize_data(raw_df, stock_code))
+                    results[stock_code] = self._calculate_indicators(df)
+                except Exception as e:
+                    logger.debug(f"[{self.name}] 批量获取 {stock_code} 失败: {e}")
+        
+        logger.info(f"[{self.name}] 批量获取日线完成: {len(results)}/{len(stock_codes)} 只")
+        return results
     
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
@@ -280,24 +299,17 @@ class BaostockFetcher(BaseFetcher):
         try:
             bs_code = self._convert_stock_code(stock_code)
             
-            with self._baostock_session() as bs:
-                # 查询股票基本信息
-                rs = bs.query_stock_basic(code=bs_code)
-                
-                if rs.error_code == '0':
-                    data_list = []
-                    while rs.next():
-                        data_list.append(rs.get_row_data())
-                    
-                    if data_list:
-                        # Baostock 返回的字段：code, code_name, ipoDate, outDate, type, status
-                        fields = rs.fields
-                        name_idx = fields.index('code_name') if 'code_name' in fields else None
-                        if name_idx is not None and len(data_list[0]) > name_idx:
-                            name = data_list[0][name_idx]
-                            self._stock_name_cache[stock_code] = name
-                            logger.debug(f"Baostock 获取股票名称成功: {stock_code} -> {name}")
-                            return name
+            # 查询股票基本信息
+            fields, data_list = self._get_session_manager().query_rows('query_stock_basic', code=bs_code)
+            
+            if data_list:
+                # Baostock 返回的字段：code, code_name, ipoDate, outDate, type, status
+                name_idx = fields.index('code_name') if 'code_name' in fields else None
+                if name_idx is not None and len(data_list[0]) > name_idx:
+                    name = data_list[0][name_idx]
+                    self._stock_name_cache[stock_code] = name
+                    logger.debug(f"Baostock 获取股票名称成功: {stock_code} -> {name}")
+                    return name
                 
         except Exception as e:
             logger.warning(f"Baostock 获取股票名称失败 {stock_code}: {e}")
@@ -314,30 +326,24 @@ class BaostockFetcher(BaseFetcher):
             包含 code, name 列的 DataFrame，失败返回 None
         """
         try:
-            with self._baostock_session() as bs:
-                # 查询所有股票基本信息
-                rs = bs.query_stock_basic()
+            # 查询所有股票基本信息
+            fields, data_list = self._get_session_manager().query_rows('query_stock_basic')
+            
+            if data_list:
+                df = pd.DataFrame(data_list, columns=fields)
+                
+                # 转换代码格式（去除 sh. 或 sz. 前缀）
+                df['code'] = df['code'].apply(lambda x: x.split('.')[1] if '.' in x else x)
+                df = df.rename(columns={'code_name': 'name'})
+                
+                # 更新缓存
+                if not hasattr(self, '_stock_name_cache'):
+                    self._stock_name_cache = {}
+                for _, row in df.iterrows():
+                    self._stock_name_cache[row['code']] = row['name']
                 
-                if rs.error_code == '0':
-                    data_list = []
-                    while rs.next():
-                        data_list.append(rs.get_row_data())
-                    
-                    if data_list:
-                        df = pd.DataFrame(data_list, columns=rs.fields)
-                        
-                        # 转换代码格式（去除 sh. 或 sz. 前缀）
-                        df['code'] = df['code'].apply(lambda x: x.split('.')[1] if '.' in x else x)
-                        df = df.rename(columns={'code_name': 'name'})
-                        
-                        # 更新缓存
-                        if not hasattr(self, '_stock_name_cache'):
-                            self._stock_name_cache = {}
-                        for _, row in df.iterrows():
-                            self._stock_name_cache[row['code']] = row['name']
-                        
-                        logger.info(f"Baostock 获取股票列表成功: {len(df)} 条")
-                        return df[['code', 'name']]
+                logger.info(f"Baostock 获取股票列表成功: {len(df)} 条")
+                return df[['code', 'name']]
                 
         except Exception as e:
             logger.warning(f"Baostock 获取股票列表失败: {e}")
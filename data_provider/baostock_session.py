@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Baostock 会话管理
+===================================
+
+职责：
+1. 进程内只登录一次，多次查询复用同一会话（不再每次 login/logout）
+2. baostock 客户端基于模块级全局 socket，非线程安全：所有查询经由同一把锁串行执行
+   （包括分页读取结果的 rs.next()）
+3. 会话过期（未登录 / 网络错误）时自动重新登录并重试一次；
+   空闲超过 session_ttl 的会话使用前主动重新登录
+4. 进程退出时登出
+
+使用方式：
+    manager = get_baostock_session_manager(loader)
+    fields, rows = manager.query_rows('query_history_k_data_plus', code='sh.600519', ...)
+"""
+
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Generator, List, Optional, Tuple
+
+from .base import DataFetchError
+
+logger = logging.getLogger(__name__)
+
+# 需要重新登录的错误码：未登录 + 网络/socket 错误（10002001 ~ 10002008）
+SESSION_ERROR_CODES = frozenset({'10001001'} | {f'1000200{i}' for i in range(1, 9)})
+
+
+class BaostockSessionManager:
+    """
+    Baostock 长会话管理器
+
+    - module_loader: 返回 baostock 模块的函数（延迟导入）
+    - session_ttl: 会话空闲超过该时长（秒）后，下次使用前重新登录
+    """
+
+    def __init__(self, module_loader: Callable[[], Any], session_ttl: float = 600.0):
+        self._module_loader = module_loader
+        self.session_ttl = session_ttl
+        self._bs = None
+        self._logged_in = False
+        self._last_used = 0.0
+        self._lock = threading.RLock()
+        self.logins = 0
+
+    def _login(self) -> None:
+        bs = self._bs or self._module_loader()
+        self._bs = bs
+        if self._logged_in:
+            self._logout()
+        login_result = bs.login()
+        if login_result.error_code != '0':
+            raise DataFetchError(f"Baostock 登录失败: {login_result.error_msg}")
+        self._logged_in = True
+        self._last_used = time.time()
+        self.logins += 1
+        logger.debug("Baostock 登录成功")
+
+    def _logout(self) -> None:
+        if not self._logged_in or self._bs is None:
+            return
+        self._logged_in = False
+        try:
+            logout_result = self._bs.logout()
+            if logout_result.error_code == '0':
+                logger.debug("Baostock 登出成功")
+            else:
+                logger.warning(f"Baostock 登出异常: {logout_result.error_msg}")
+        except Exception as e:
+            logger.warning(f"Baostock 登出时发生错误: {e}")
+
+    def _ensure_login(self) -> None:
+        if not self._logged_in or time.time() - self._last_used > self.session_ttl:
+            self._login()
+
+    @contextmanager
+    def session(self) -> Generator[Any, None, None]:
+        """
+        独占使用已登录的 baostock 模块（持有锁直到退出上下文）
+
+        使用示例：
+            with manager.session() as bs:
+                rs = bs.query_stock_basic()
+        """
+        with self._lock:
+            self._ensure_login()
+            try:
+                yield self._bs
+            finally:
+                self._last_used = time.time()
+
+    def query_rows(self, method: str, **kwargs) -> Tuple[List[str], List[List[str]]]:
+        """
+        执行一次 baostock 查询并读取全部结果行
+
+        会话失效（错误码属于 SESSION_ERROR_CODES 或抛出异常）时重新登录并重试一次
+
+        Args:
+            method: baostock 查询函数名，如 'query_history_k_data_plus'
+            kwargs: 查询参数
+
+        Returns:
+            (字段列表, 结果行列表)
+
+        Raises:
+            DataFetchError: 查询失败
+        """
+        with self._lock:
+            for attempt in range(2):
+                self._ensure_login()
+                try:
+                    rs = getattr(self._bs, method)(**kwargs)
+                    rows = []
+                    if rs.error_code == '0':
+                        while rs.next():
+                            rows.append(rs.get_row_data())
+                except Exception as e:
+                    if attempt == 0:
+                        logger.warning(f"Baostock 查询异常，重新登录后重试: {e}")
+                        self._logged_in = False
+                        continue
+                    raise DataFetchError(f"Baostock 查询失败: {e}") from e
+                finally:
+                    self._last_used = time.time()
+
+                if rs.error_code in SESSION_ERROR_CODES and attempt == 0:
+                    logger.info(f"Baostock 会话失效（{rs.error_code}: {rs.error_msg}），重新登录")
+                    self._logged_in = False
+                    continue
+                if rs.error_code != '0':
+                    raise DataFetchError(f"Baostock 查询失败: {rs.error_msg}")
+                return list(rs.fields), rows
+        raise DataFetchError("Baostock 查询失败")
+
+    def close(self) -> None:
+        """登出当前会话"""
+        with self._lock:
+            self._logout()
+
+
+# === 全局会话管理器 ===
+_manager: Optional[BaostockSessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_baostock_session_manager(module_loader: Callable[[], Any]) -> BaostockSessionManager:
+    """获取进程级 Baostock 会话管理器（首次调用时创建，进程退出时登出）"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = BaostockSessionManager(module_loader)
+                atexit.register(_manager.close)
+    return _manager
+
+
+def reset_baostock_session_manager() -> None:
+    """登出并清空全局会话管理器（主要用于测试）"""
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.close()
@@ -15,11 +15,12 @@
 """
 
 import logging
-import random
+import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional, List, Tuple, Dict, Any
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
 import numpy as np
@@ -30,6 +31,14 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from .chip_cache import load_cached_chips, save_chips
+from .fetcher_health import classify_market, get_fetcher_health_tracker
+from .hedging import HEDGE_MIN_DELAY, hedged_call
+from .indicators import IndicatorState, attach_indicators, compute_price_indicators
+from .persistent_cache import PersistentMapping, STOCK_NAME_TTL, STOCK_SECTOR_TTL
+from .quote_snapshot import RealtimeQuoteSnapshot
+from .rate_limiter import fetcher_upstream, get_rate_limiter_registry
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -105,6 +114,9 @@ class BaseFetcher(ABC):
     
     name: str = "BaseFetcher"
     priority: int = 99  # 优先级数字越小越优先
+    # 是否在 _fetch_raw_data 内按每次实际 API 调用自行消耗速率令牌（_acquire_rate_token），
+    # 为 True 时 get_daily_data 外层只占用并发槽位，避免重复限速
+    self_rate_limited: bool = False
     
     @abstractmethod
     def _fetch_raw_data(self, stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
@@ -212,8 +224,11 @@ class BaseFetcher(ABC):
         logger.info(f"[{self.name}] 获取 {stock_code} 数据: {start_date} ~ {end_date}")
         
         try:
-            # Step 1: 获取原始数据
-            raw_df = self._fetch_raw_data(stock_code, start_date, end_date)
+            # Step 1: 获取原始数据（占用该数据源的全局并发/速率预算）
+            with get_rate_limiter_registry().limit(
+                fetcher_upstream(self.name), rate_limited=not self.self_rate_limited
+            ):
+                raw_df = self._fetch_raw_data(stock_code, start_date, end_date)
             
             if raw_df is None or raw_df.empty:
                 raise DataFetchError(f"[{self.name}] 未获取到 {stock_code} 的数据")
@@ -234,6 +249,114 @@ class BaseFetcher(ABC):
             logger.error(f"[{self.name}] 获取 {stock_code} 失败: {str(e)}")
             raise DataFetchError(f"[{self.name}] {stock_code}: {str(e)}") from e
     
+    def get_daily_data_incremental(
+        self,
+        stock_code: str,
+        history: pd.DataFrame,
+        end_date: Optional[str] = None,
+        state: Optional[IndicatorState] = None
+    ) -> pd.DataFrame:
+        """
+        增量获取日线数据（仅拉取 history 最后日期之后的缺口）
+
+        流程：
+        1. 以 history 最后日期的次日为起点请求数据源
+        2. 标准化、清洗，仅保留新日期的行
+        3. 基于流式指标状态（或 history 尾部）计算新行的技术指标（不重算历史行）
+
+        Args:
+            stock_code: 股票代码
+            history: 已存储的历史数据（需包含 date/close/volume 列，按日期升序）
+            end_date: 结束日期（可选，默认今天）
+            state: 推进到 history 最后日期的流式指标状态（可选）
+
+        Returns:
+            仅包含新增交易日的标准化 DataFrame（无新数据时为空）；
+            使用了流式状态时，推进后的状态位于 attrs['indicator_state']
+        """
+        from datetime import timedelta
+
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+
+        last_date = pd.to_datetime(history['date']).max()
+        start_date = (last_date + timedelta(days=1)).strftime('%Y-%m-%d')
+        if start_date > end_date:
+            return pd.DataFrame(columns=STANDARD_COLUMNS)
+
+        logger.info(f"[{self.name}] 增量获取 {stock_code} 数据: {start_date} ~ {end_date}")
+
+        with get_rate_limiter_registry().limit(
+            fetcher_upstream(self.name), rate_limited=not self.self_rate_limited
+        ):
+            raw_df = self._fetch_raw_data(stock_code, start_date, end_date)
+        if raw_df is None or raw_df.empty:
+            return pd.DataFrame(columns=STANDARD_COLUMNS)
+
+        df = self._normalize_data(raw_df, stock_code)
+        df = self._clean_data(df)
+        df = df[df['date'] > last_date].reset_index(drop=True)
+        if df.empty:
+            return df
+
+        df = self._recompute_pct_chg(history, df)
+        return self._calculate_indicators_incremental(history, df, state)
+
+    @staticmethod
+    def _recompute_pct_chg(history: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        以已存储的最后收盘价为基准重算新行涨跌幅
+
+        部分数据源在标准化时用 close.pct_change().fillna(0) 计算涨跌幅，
+        只拉取缺口时首行没有前收盘价会得到 0，因此统一按“前一收盘价”重算
+        """
+        last_close = float(history.sort_values('date')['close'].iloc[-1])
+        prev_close = new_df['close'].shift(1)
+        prev_close.iloc[0] = last_close
+        result = new_df.copy()
+        result['pct_chg'] = ((new_df['close'] / prev_close - 1) * 100).round(2)
+        return result
+
+    # 增量计算指标时需要的历史回看行数（MA20 为最长窗口）
+    INDICATOR_LOOKBACK = 20
+
+    def _calculate_indicators_incremental(
+        self,
+        history: pd.DataFrame,
+        new_df: pd.DataFrame,
+        state: Optional[IndicatorState] = None
+    ) -> pd.DataFrame:
+        """
+        仅为新行计算技术指标
+
+        - 有与 history 对齐的流式状态：逐根推进状态，每根新 K 线 O(1)，
+          推进后的状态写入结果的 attrs['indicator_state']
+        - 否则取 history 最后 INDICATOR_LOOKBACK 行与新行拼接后计算，
+          计算量为 O(回看窗口 + 新行数)，与历史长度无关。
+        """
+        indicator_cols = ['ma5', 'ma10', 'ma20', 'volume_ratio']
+        if state is not None and state.matches(pd.to_datetime(history['date']).max()):
+            state = state.copy()
+            rows = [
+                state.update(close, volume, bar_date)
+                for close, volume, bar_date in zip(
+                    new_df['close'].tolist(), new_df['volume'].tolist(), new_df['date'].tolist()
+                )
+            ]
+            result = new_df.copy()
+            result[indicator_cols] = [[row[col] for col in indicator_cols] for row in rows]
+            result.attrs['indicator_state'] = state
+            return result
+
+        tail = history[['date', 'close', 'volume']].tail(self.INDICATOR_LOOKBACK)
+        tail = tail.assign(date=pd.to_datetime(tail['date']))
+        combined = pd.concat([tail, new_df[['date', 'close', 'volume']]], ignore_index=True)
+        combined = self._calculate_indicators(combined)
+
+        result = new_df.copy()
+        result[indicator_cols] = combined[indicator_cols].tail(len(new_df)).to_numpy()
+        return result
+
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         数据清洗
@@ -272,36 +395,115 @@ class BaseFetcher(ABC):
         - MA5, MA10, MA20: 移动平均线
         - Volume_Ratio: 量比（今日成交量 / 5日平均成交量）
         """
-        df = df.copy()
-        
-        # 移动平均线
-        df['ma5'] = df['close'].rolling(window=5, min_periods=1).mean()
-        df['ma10'] = df['close'].rolling(window=10, min_periods=1).mean()
-        df['ma20'] = df['close'].rolling(window=20, min_periods=1).mean()
-        
-        # 量比：当日成交量 / 5日平均成交量
-        avg_volume_5 = df['volume'].rolling(window=5, min_periods=1).mean()
-        df['volume_ratio'] = df['volume'] / avg_volume_5.shift(1)
-        df['volume_ratio'] = df['volume_ratio'].fillna(1.0)
-        
-        # 保留2位小数
-        for col in ['ma5', 'ma10', 'ma20', 'volume_ratio']:
-            if col in df.columns:
-                df[col] = df[col].round(2)
-        
-        return df
+        # 在连续 float 数组上一次计算全部指标，整块拼接为新列
+        indicators = compute_price_indicators(
+            df['close'].to_numpy(dtype=float), df['volume'].to_numpy(dtype=float)
+        )
+        return attach_indicators(df, indicators)
     
-    @staticmethod
-    def random_sleep(min_seconds: float = 1.0, max_seconds: float = 3.0) -> None:
+    def _acquire_rate_token(self) -> float:
         """
-        智能随机休眠（Jitter）
-        
-        防封禁策略：模拟人类行为的随机延迟
-        在请求之间加入不规则的等待时间
+        按实际 API 调用消耗一个本数据源的速率令牌
+
+        令牌桶由进程级预算注册表统一维护，所有实例、所有线程共享，
+        按令牌补充时间精确等待（替代固定的随机休眠）
+
+        Returns:
+            实际等待秒数
         """
-        sleep_time = random.uniform(min_seconds, max_seconds)
-        logger.debug(f"随机休眠 {sleep_time:.2f} 秒...")
-        time.sleep(sleep_time)
+        budget = get_rate_limiter_registry().get(fetcher_upstream(self.name))
+        if budget is None:
+            return 0.0
+        waited = budget.wait_for_token()
+        if waited > 0.5:
+            logger.debug(f"[{self.name}] 速率限制等待 {waited:.2f} 秒")
+        return waited
+
+
+# DataFetcherManager 通过 hasattr 探测的可选能力（并非所有数据源都实现）
+OPTIONAL_CAPABILITIES = frozenset({
+    'get_realtime_quote',
+    'get_chip_distribution',
+    'get_stock_name',
+    'get_stock_list',
+    'get_daily_data_batch',
+    'get_industry',
+})
+
+
+def _construct_fetcher(module: str, class_name: str) -> BaseFetcher:
+    """导入数据源模块并构造实例"""
+    import importlib
+    return getattr(importlib.import_module(module, package=__package__), class_name)()
+
+
+class LazyFetcher:
+    """
+    数据源延迟构造代理
+
+    - name / priority 无需构造即可读取（用于排序、熔断与健康度统计）
+    - 声明了 capabilities 时，未实现的可选能力（OPTIONAL_CAPABILITIES）直接按不存在处理，
+      hasattr 探测不会触发构造
+    - 访问其他任何属性时才构造真实数据源（线程安全，只构造一次）
+    - 构造后 priority 以真实实例为准（如 Tushare Token 初始化失败时降级），
+      优先级变化时通过 on_init 回调通知管理器重新排序
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], BaseFetcher],
+        priority: int,
+        capabilities: Optional[frozenset] = None,
+        on_init: Optional[Callable[['LazyFetcher'], None]] = None,
+    ):
+        self.name = name
+        self._factory = factory
+        self._priority = priority
+        self._capabilities = capabilities
+        self._on_init = on_init
+        self._instance: Optional[BaseFetcher] = None
+        self._lock = threading.Lock()
+
+    @property
+    def priority(self) -> int:
+        return self._instance.priority if self._instance is not None else self._priority
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def get_instance(self) -> BaseFetcher:
+        """获取真实数据源实例（首次调用时构造）"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    start = time.time()
+                    self._instance = self._factory()
+                    logger.info(f"[数据源] {self.name} 首次使用，初始化耗时 {time.time() - start:.2f}s")
+                    if self._on_init is not None and self._instance.priority != self._priority:
+                        logger.info(f"[数据源] {self.name} 优先级变更: P{self._priority} -> P{self._instance.priority}")
+                        self._on_init(self)
+        return self._instance
+
+    def __getattr__(self, item: str) -> Any:
+        # 仅在代理自身没有该属性时调用
+        if item.startswith('__') or item in (
+            '_instance', '_factory', '_lock', '_priority', '_capabilities', '_on_init'
+        ):
+            raise AttributeError(item)
+        if (
+            self._instance is None
+            and self._capabilities is not None
+            and item in OPTIONAL_CAPABILITIES
+            and item not in self._capabilities
+        ):
+            raise AttributeError(item)
+        return getattr(self.get_instance(), item)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._instance is not None else "lazy"
+        return f"<LazyFetcher {self.name} P{self.priority} {state}>"
 
 
 class DataFetcherManager:
@@ -317,6 +519,7 @@ class DataFetcherManager:
     - 优先使用高优先级数据源
     - 失败后自动切换到下一个
     - 所有数据源都失败时抛出异常
+    - 日线数据按 (数据源, 市场) 的实测耗时与成功率动态降级，连续失败的数据源熔断跳过
     """
     
     def __init__(self, fetchers: Optional[List[BaseFetcher]] = None):
@@ -327,6 +530,9 @@ class DataFetcherManager:
             fetchers: 数据源列表（可选，默认按优先级自动创建）
         """
         self._fetchers: List[BaseFetcher] = []
+        # 批量预取的日线数据 {code: (DataFrame, 数据源名称, 结束日期)}，get_daily_data 命中后移除
+        self._daily_preload: Dict[str, Tuple[pd.DataFrame, str, str]] = {}
+        self._daily_preload_lock = threading.Lock()
         
         if fetchers:
             # 按优先级排序
@@ -335,12 +541,31 @@ class DataFetcherManager:
             # 默认数据源将在首次使用时延迟加载
             self._init_default_fetchers()
     
+    # 默认数据源：(名称, 模块, 优先级环境变量, 默认优先级, 实现的可选能力)
+    DEFAULT_FETCHER_SPECS = [
+        ("EfinanceFetcher", ".efinance_fetcher", "EFINANCE_PRIORITY", 0,
+         frozenset({'get_realtime_quote', 'get_industry'})),
+        ("AkshareFetcher", ".akshare_fetcher", "AKSHARE_PRIORITY", 1,
+         frozenset({'get_realtime_quote', 'get_chip_distribution'})),
+        ("TushareFetcher", ".tushare_fetcher", None, 2,
+         frozenset({'get_realtime_quote', 'get_stock_name', 'get_stock_list'})),
+        ("PytdxFetcher", ".pytdx_fetcher", "PYTDX_PRIORITY", 2,
+         frozenset({'get_realtime_quote', 'get_stock_name', 'get_daily_data_batch'})),
+        ("BaostockFetcher", ".baostock_fetcher", "BAOSTOCK_PRIORITY", 3,
+         frozenset({'get_stock_name', 'get_stock_list', 'get_daily_data_batch'})),
+        ("YfinanceFetcher", ".yfinance_fetcher", "YFINANCE_PRIORITY", 4,
+         frozenset({'get_realtime_quote', 'get_daily_data_batch'})),
+    ]
+
     def _init_default_fetchers(self) -> None:
         """
-        初始化默认数据源列表
+        初始化默认数据源列表（延迟构造）
+
+        列表中是 LazyFetcher 代理：排序、熔断判断只用到名称和优先级，
+        数据源模块在请求第一次真正到达该数据源时才导入并构造
 
         优先级动态调整逻辑：
-        - 如果配置了 TUSHARE_TOKEN：Tushare 优先级提升为 0（最高）
+        - 如果配置了 TUSHARE_TOKEN：Tushare 优先级提升为 -1（最高）
         - 否则按默认优先级：
           0. EfinanceFetcher (Priority 0) - 最高优先级
           1. AkshareFetcher (Priority 1)
@@ -349,41 +574,33 @@ class DataFetcherManager:
           3. BaostockFetcher (Priority 3)
           4. YfinanceFetcher (Priority 4)
         """
-        from .efinance_fetcher import EfinanceFetcher
-        from .akshare_fetcher import AkshareFetcher
-        from .tushare_fetcher import TushareFetcher
-        from .pytdx_fetcher import PytdxFetcher
-        from .baostock_fetcher import BaostockFetcher
-        from .yfinance_fetcher import YfinanceFetcher
+        import os
         from src.config import get_config
 
         config = get_config()
 
-        # 创建所有数据源实例（优先级在各 Fetcher 的 __init__ 中确定）
-        efinance = EfinanceFetcher()
-        akshare = AkshareFetcher()
-        tushare = TushareFetcher()  # 会根据 Token 配置自动调整优先级
-        pytdx = PytdxFetcher()      # 通达信数据源
-        baostock = BaostockFetcher()
-        yfinance = YfinanceFetcher()
-
-        # 初始化数据源列表
-        self._fetchers = [
-            efinance,
-            akshare,
-            tushare,
-            pytdx,
-            baostock,
-            yfinance,
-        ]
+        for name, module, priority_env, default_priority, capabilities in self.DEFAULT_FETCHER_SPECS:
+            if name == "TushareFetcher":
+                # 与 TushareFetcher._determine_priority 一致：配置 Token 时提升为最高
+                priority = -1 if config.tushare_token else default_priority
+            else:
+                priority = int(os.getenv(priority_env, str(default_priority)))
+            self._fetchers.append(LazyFetcher(
+                name, partial(_construct_fetcher, module, name), priority,
+                capabilities=capabilities, on_init=self._on_fetcher_initialized,
+            ))
 
-        # 按优先级排序（Tushare 如果配置了 Token 且初始化成功，优先级为 0）
+        # 按优先级排序（同优先级保持上表顺序）
         self._fetchers.sort(key=lambda f: f.priority)
 
         # 构建优先级说明
         priority_info = ", ".join([f"{f.name}(P{f.priority})" for f in self._fetchers])
-        logger.info(f"已初始化 {len(self._fetchers)} 个数据源（按优先级）: {priority_info}")
+        logger.info(f"已注册 {len(self._fetchers)} 个数据源（按优先级，首次使用时初始化）: {priority_info}")
     
+    def _on_fetcher_initialized(self, fetcher: LazyFetcher) -> None:
+        """延迟构造后优先级发生变化时重新排序（替换列表而非原地排序，不影响正在遍历旧列表的线程）"""
+        self._fetchers = sorted(self._fetchers, key=lambda f: f.priority)
+
     def add_fetcher(self, fetcher: BaseFetcher) -> None:
         """添加数据源并重新排序"""
         self._fetchers.append(fetcher)
@@ -394,22 +611,32 @@ class DataFetcherManager:
         stock_code: str,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        days: int = 30
+        days: int = 30,
+        incremental: bool = False
     ) -> Tuple[pd.DataFrame, str]:
         """
         获取日线数据（自动切换数据源）
         
         故障切换策略：
-        1. 从最高优先级数据源开始尝试
+        1. 从最高优先级数据源开始尝试（偏慢/不稳定的数据源降级，熔断中的数据源跳过）
         2. 捕获异常后自动切换到下一个
         3. 记录每个数据源的失败原因
         4. 所有数据源失败后抛出详细异常
         
+        增量模式（incremental=True 且未指定 start_date）：
+        - 读取数据库中已存储的窗口，仅向数据源请求最后日期之后的缺口
+        - 新行指标基于已存储尾部计算，返回“已存储 + 新增”拼接结果
+        - 返回的 DataFrame.attrs['incremental_new_rows'] 为新增行数（位于末尾）
+        - 库中历史不足时自动回退为全量拉取
+        
+        预取命中：prefetch_daily_data 批量下载过的代码（未指定 start_date 时）直接返回暂存数据
+        
         Args:
             stock_code: 股票代码
             start_date: 开始日期
             end_date: 结束日期
             days: 获取天数
+            incremental: 是否启用增量模式
             
         Returns:
             Tuple[DataFrame, str]: (数据, 成功的数据源名称)
@@ -420,9 +647,29 @@ class DataFetcherManager:
         # Normalize code (strip SH/SZ prefix etc.)
         stock_code = normalize_stock_code(stock_code)
 
+        if start_date is None:
+            preloaded = self._take_preloaded(stock_code, end_date, days)
+            if preloaded is not None:
+                return preloaded
+
+        if incremental and start_date is None:
+            result = self._get_daily_data_incremental(stock_code, end_date, days)
+            if result is not None:
+                return result
+
         errors = []
+        market, fetchers = self._ordered_fetchers(stock_code)
+        tracker = get_fetcher_health_tracker()
+
+        # 对冲模式：首选数据源超过其历史耗时分位数仍未返回时，并行请求下一个数据源
+        hedge_percentile = self._hedge_percentile()
+        if hedge_percentile is not None and len(fetchers) > 1:
+            return self._get_daily_data_hedged(
+                stock_code, start_date, end_date, days, market, fetchers, hedge_percentile
+            )
         
-        for fetcher in self._fetchers:
+        for fetcher in fetchers:
+            start = time.time()
             try:
                 logger.info(f"尝试使用 [{fetcher.name}] 获取 {stock_code}...")
                 df = fetcher.get_daily_data(
@@ -433,10 +680,13 @@ class DataFetcherManager:
                 )
                 
                 if df is not None and not df.empty:
+                    tracker.record(fetcher.name, market, True, time.time() - start)
                     logger.info(f"[{fetcher.name}] 成功获取 {stock_code}")
                     return df, fetcher.name
+                tracker.record(fetcher.name, market, False, time.time() - start, "empty result")
                     
             except Exception as e:
+                tracker.record(fetcher.name, market, False, time.time() - start, str(e))
                 error_msg = f"[{fetcher.name}] 失败: {str(e)}"
                 logger.warning(error_msg)
                 errors.append(error_msg)
@@ -448,11 +698,263 @@ class DataFetcherManager:
         logger.error(error_summary)
         raise DataFetchError(error_summary)
     
+    def _get_daily_data_hedged(
+        self,
+        stock_code: str,
+        start_date: Optional[str],
+        end_date: Optional[str],
+        days: int,
+        market: str,
+        fetchers: List[BaseFetcher],
+        percentile: float,
+    ) -> Tuple[pd.DataFrame, str]:
+        """
+        对冲模式获取日线数据：先返回有效 DataFrame 的数据源胜出，落败请求被取消或忽略
+
+        Raises:
+            DataFetchError: 所有数据源都失败时抛出
+        """
+        tracker = get_fetcher_health_tracker()
+        result = hedged_call(
+            [
+                (fetcher.name, partial(
+                    fetcher.get_daily_data,
+                    stock_code=stock_code, start_date=start_date, end_date=end_date, days=days,
+                ))
+                for fetcher in fetchers
+            ],
+            is_valid=lambda df: df is not None and not df.empty,
+            hedge_delay=lambda name: tracker.hedge_delay(name, market, percentile, HEDGE_MIN_DELAY),
+            on_result=lambda name, ok, elapsed, error: tracker.record(name, market, ok, elapsed, error),
+        )
+        if result.success:
+            logger.info(
+                f"[{result.label}] 成功获取 {stock_code}"
+                + (f"（对冲请求，已发起: {', '.join(result.launched)}）" if result.hedged else "")
+            )
+            return result.value, result.label
+
+        error_summary = f"所有数据源获取 {stock_code} 失败:\n" + "\n".join(result.errors)
+        logger.error(error_summary)
+        raise DataFetchError(error_summary)
+
+    @staticmethod
+    def _hedge_percentile() -> Optional[float]:
+        """对冲分位数（未启用对冲时返回 None）"""
+        try:
+            from src.config import get_config
+            config = get_config()
+        except Exception:
+            return None
+        if not getattr(config, 'data_hedge_enabled', False):
+            return None
+        return float(getattr(config, 'data_hedge_percentile', 90.0))
+
+    def _get_daily_data_incremental(
+        self,
+        stock_code: str,
+        end_date: Optional[str],
+        days: int
+    ) -> Optional[Tuple[pd.DataFrame, str]]:
+        """
+        增量获取日线数据（仅拉取缺口），无法增量时返回 None 由调用方回退全量
+
+        Returns:
+            Tuple[拼接后的 DataFrame, 数据源名称]，或 None
+        """
+        from datetime import timedelta
+
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        end_dt = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+        try:
+            from src.storage import get_db
+            rows = get_db().get_data_range(stock_code, end_dt - timedelta(days=days * 2), end_dt)
+        except Exception as e:
+            logger.debug(f"[增量] 读取 {stock_code} 已存储数据失败，回退全量拉取: {e}")
+            return None
+
+        if len(rows) < BaseFetcher.INDICATOR_LOOKBACK:
+            logger.debug(f"[增量] {stock_code} 已存储 {len(rows)} 条，不足以增量计算指标，回退全量拉取")
+            return None
+
+        history = pd.DataFrame([r.to_dict() for r in rows]).drop(columns=['code', 'data_source'])
+        history['date'] = pd.to_datetime(history['date'])
+        last_date = history['date'].max().date()
+        state = self.load_indicator_state(stock_code, last_date)
+
+        # 缺口内没有工作日（如周末）时无需请求数据源
+        if len(pd.bdate_range(last_date + timedelta(days=1), end_dt)) == 0:
+            logger.info(f"[增量] {stock_code} 已是最新（{last_date}），无需请求数据源")
+            history.attrs['incremental_new_rows'] = 0
+            if state is not None:
+                history.attrs['indicator_state'] = state
+            return history, "Database"
+
+        market, fetchers = self._ordered_fetchers(stock_code)
+        tracker = get_fetcher_health_tracker()
+        responded = False
+        for fetcher in fetchers:
+            start = time.time()
+            try:
+                new_df = fetcher.get_daily_data_incremental(stock_code, history, end_date, state=state)
+            except Exception as e:
+                tracker.record(fetcher.name, market, False, time.time() - start, str(e))
+                logger.warning(f"[增量] [{fetcher.name}] 获取 {stock_code} 缺口数据失败: {e}")
+                continue
+            if new_df is None or new_df.empty:
+                # 缺口内有工作日但该数据源没有新数据（可能尚未发布当日 K 线），继续尝试下一个
+                logger.info(f"[增量] [{fetcher.name}] {stock_code} 缺口内无新数据，尝试下一个数据源")
+                responded = True
+                continue
+            tracker.record(fetcher.name, market, True, time.time() - start)
+
+            new_rows = len(new_df)
+            stitched = pd.concat(
+                [history, new_df.reindex(columns=history.columns)], ignore_index=True
+            )
+            stitched.attrs['incremental_new_rows'] = new_rows
+            next_state = new_df.attrs.get('indicator_state')
+            if next_state is not None:
+                stitched.attrs['indicator_state'] = next_state
+            logger.info(f"[增量] [{fetcher.name}] {stock_code} 新增 {new_rows} 条（已存储至 {last_date}）")
+            return stitched, fetcher.name
+
+        if responded:
+            # 数据源均正常响应但没有新 K 线：已存储数据即为最新
+            logger.info(f"[增量] {stock_code} 所有数据源均无 {last_date} 之后的数据，使用已存储数据")
+            history.attrs['incremental_new_rows'] = 0
+            if state is not None:
+                history.attrs['indicator_state'] = state
+            return history, "Database"
+
+        logger.warning(f"[增量] {stock_code} 所有数据源增量获取失败，回退全量拉取")
+        return None
+
+    @staticmethod
+    def load_indicator_state(stock_code: str, last_date=None) -> Optional[IndicatorState]:
+        """
+        读取已持久化的流式指标状态
+
+        Args:
+            stock_code: 股票代码
+            last_date: 已存储历史的最后日期（可选），指定时状态必须与之对齐
+
+        Returns:
+            IndicatorState，不存在、读取失败或未对齐时返回 None
+        """
+        try:
+            from src.storage import get_db
+            data = get_db().get_indicator_states([stock_code]).get(stock_code)
+        except Exception as e:
+            logger.debug(f"[指标状态] 读取 {stock_code} 指标状态失败: {e}")
+            return None
+        if not data:
+            return None
+        state = IndicatorState.from_dict(data)
+        if last_date is not None and not state.matches(last_date):
+            logger.debug(f"[增量] {stock_code} 指标状态（{state.last_date}）与已存储数据（{last_date}）未对齐，忽略")
+            return None
+        return state
+
+    def _ordered_fetchers(self, stock_code: str) -> Tuple[str, List[BaseFetcher]]:
+        """
+        按实测表现确定日线数据源的尝试顺序
+
+        - 健康（或样本不足）的数据源保持静态优先级
+        - 偏慢 / 不稳定的数据源降级到后面
+        - 熔断中的数据源跳过；全部熔断时仍按静态优先级尝试，避免完全不可用
+
+        Returns:
+            Tuple[市场类型, 数据源列表]
+        """
+        market = classify_market(stock_code)
+        ordered, skipped = get_fetcher_health_tracker().order(self._fetchers, market)
+        if skipped:
+            logger.info(
+                f"[熔断] 跳过日线数据源 ({market}): {', '.join(f.name for f in skipped)}"
+            )
+        if not ordered:
+            logger.warning(f"[熔断] {market} 市场所有日线数据源均处于熔断状态，按默认优先级尝试")
+            return market, list(self._fetchers)
+        if [f.name for f in ordered] != [f.name for f in self._fetchers if f not in skipped]:
+            logger.debug(f"[数据源排序] {market}: {' > '.join(f.name for f in ordered)}")
+        return market, ordered
+
     @property
     def available_fetchers(self) -> List[str]:
         """返回可用数据源名称列表"""
         return [f.name for f in self._fetchers]
     
+    def prefetch_daily_data(self, stock_codes: List[str], days: int = 30) -> int:
+        """
+        批量预取境外股票（美股/港股）日线数据（在分析开始前调用）
+
+        境外股票走 YfinanceFetcher，一次 yf.download 下载全部代码，
+        结果暂存在管理器中，后续 get_daily_data 命中后直接返回（每个代码只使用一次）；
+        未预取成功的代码照常逐只获取
+
+        Args:
+            stock_codes: 待分析的股票代码列表（A股自动忽略）
+            days: 获取天数（应不小于后续单只请求的天数）
+
+        Returns:
+            预取成功的股票数量
+        """
+        foreign = [
+            code for code in dict.fromkeys(normalize_stock_code(c) for c in stock_codes)
+            if classify_market(code) in ('us', 'hk')
+        ]
+        if len(foreign) < 2:
+            return 0
+
+        fetcher = next((f for f in self._fetchers if f.name == "YfinanceFetcher"), None)
+        if fetcher is None or not hasattr(fetcher, 'get_daily_data_batch'):
+            return 0
+
+        end_date = datetime.now().strftime('%Y-%m-%d')
+        start = time.time()
+        try:
+            frames = fetcher.get_daily_data_batch(foreign, end_date=end_date, days=days)
+        except Exception as e:
+            logger.warning(f"[预取] 境外股票日线批量下载失败，将逐只获取: {e}")
+            return 0
+
+        with self._daily_preload_lock:
+            for code, df in frames.items():
+                if df is not None and not df.empty:
+                    self._daily_preload[code] = (df, fetcher.name, end_date)
+        logger.info(
+            f"[预取] 境外股票日线批量下载完成: {len(frames)}/{len(foreign)} 只，耗时 {time.time() - start:.2f}s"
+        )
+        return len(frames)
+
+    def _take_preloaded(
+        self,
+        stock_code: str,
+        end_date: Optional[str],
+        days: int
+    ) -> Optional[Tuple[pd.DataFrame, str]]:
+        """取出预取的日线数据（结束日期一致时命中），按请求天数截取窗口"""
+        if not self._daily_preload:
+            return None
+        from datetime import timedelta
+
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        with self._daily_preload_lock:
+            entry = self._daily_preload.get(stock_code)
+            if entry is None or entry[2] != end_date:
+                return None
+            del self._daily_preload[stock_code]
+
+        df, source, _ = entry
+        start_dt = datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)
+        df = df[pd.to_datetime(df['date']) >= start_dt].reset_index(drop=True)
+        if df.empty:
+            return None
+        logger.info(f"[{source}] {stock_code} 使用批量预取的日线数据（{len(df)} 条）")
+        return df, source
+
     def prefetch_realtime_quotes(self, stock_codes: List[str]) -> int:
         """
         批量预取实时行情数据（在分析开始前调用）
@@ -529,6 +1031,49 @@ class DataFetcherManager:
             logger.error(f"[预取] 批量预取异常: {e}")
             return 0
     
+    # 提供全市场快照的实时行情数据源 -> 数据源类名
+    MARKET_SNAPSHOT_SOURCES = {
+        'efinance': 'EfinanceFetcher',
+        'akshare_em': 'AkshareFetcher',
+    }
+
+    def get_market_snapshot(self) -> Optional[RealtimeQuoteSnapshot]:
+        """
+        获取 A 股全市场实时行情快照
+
+        按 realtime_source_priority 中全量数据源（efinance / akshare_em）的顺序依次尝试，
+        与个股实时行情共用同一份全量缓存，缓存有效时不发起网络请求。
+        优先级中未配置全量数据源（或实时行情被禁用）时不拉取，返回 None。
+
+        Returns:
+            非空的 RealtimeQuoteSnapshot，全部失败时返回 None
+        """
+        from src.config import get_config
+
+        config = get_config()
+        if not config.enable_realtime_quote:
+            return None
+
+        priority = [s.strip() for s in config.realtime_source_priority.lower().split(',')]
+        for source in priority:
+            fetcher_name = self.MARKET_SNAPSHOT_SOURCES.get(source)
+            if fetcher_name is None:
+                continue
+            for fetcher in self._fetchers:
+                if fetcher.name != fetcher_name:
+                    continue
+                try:
+                    snapshot = fetcher.get_market_snapshot()
+                except Exception as e:
+                    logger.warning(f"[全市场快照] {source} 获取失败: {e}")
+                    snapshot = None
+                if snapshot is not None and not snapshot.empty:
+                    logger.info(f"[全市场快照] 使用 {source}，共 {len(snapshot)} 只股票")
+                    return snapshot
+                break
+        logger.warning("[全市场快照] 无可用的全量行情数据源")
+        return None
+
     def get_realtime_quote(self, stock_code: str):
         """
         获取实时行情数据（自动故障切换）
@@ -567,7 +1112,8 @@ class DataFetcherManager:
                 if fetcher.name == "YfinanceFetcher":
                     if hasattr(fetcher, 'get_realtime_quote'):
                         try:
-                            quote = fetcher.get_realtime_quote(stock_code)
+                            with self._upstream_budget(fetcher):
+                                quote = fetcher.get_realtime_quote(stock_code)
                             if quote is not None:
                                 logger.info(f"[实时行情] 美股 {stock_code} 成功获取 (来源: yfinance)")
                                 return quote
@@ -578,7 +1124,12 @@ class DataFetcherManager:
             return None
         
         # 获取配置的数据源优先级
-        source_priority = config.realtime_source_priority.split(',')
+        source_priority = [s.strip().lower() for s in config.realtime_source_priority.split(',') if s.strip()]
+
+        # 对冲模式：首选数据源超过其历史耗时分位数仍未返回时，并行请求下一个数据源
+        hedge_percentile = self._hedge_percentile()
+        if hedge_percentile is not None and len(source_priority) > 1:
+            return self._get_realtime_quote_hedged(stock_code, source_priority, hedge_percentile)
         
         errors = []
         # primary_quote holds the first successful result; we may supplement
@@ -586,50 +1137,8 @@ class DataFetcherManager:
         primary_quote = None
         
         for source in source_priority:
-            source = source.strip().lower()
-            
             try:
-                quote = None
-                
-                if source == "efinance":
-                    # 尝试 EfinanceFetcher
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "EfinanceFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code)
-                            break
-                
-                elif source == "akshare_em":
-                    # 尝试 AkshareFetcher 东财数据源
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "AkshareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code, source="em")
-                            break
-                
-                elif source == "akshare_sina":
-                    # 尝试 AkshareFetcher 新浪数据源
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "AkshareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code, source="sina")
-                            break
-                
-                elif source in ("tencent", "akshare_qq"):
-                    # 尝试 AkshareFetcher 腾讯数据源
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "AkshareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code, source="tencent")
-                            break
-                
-                elif source == "tushare":
-                    # 尝试 TushareFetcher（需要 Tushare Pro 积分）
-                    for fetcher in self._fetchers:
-                        if fetcher.name == "TushareFetcher":
-                            if hasattr(fetcher, 'get_realtime_quote'):
-                                quote = fetcher.get_realtime_quote(stock_code)
-                            break
+                quote = self._get_realtime_quote_from_source(source, stock_code)
                 
                 if quote is not None and quote.has_basic_data():
                     if primary_quote is None:
@@ -673,6 +1182,103 @@ class DataFetcherManager:
         
         return None
 
+    def _get_realtime_quote_from_source(self, source: str, stock_code: str):
+        """
+        从指定实时行情数据源获取行情
+
+        Args:
+            source: 数据源标识（efinance / akshare_em / akshare_sina / tencent / tushare）
+            stock_code: 股票代码
+
+        Returns:
+            UnifiedRealtimeQuote 或 None（数据源不可用/未配置）
+        """
+        if source == "efinance":
+            fetcher_name, kwargs = "EfinanceFetcher", {}
+        elif source == "akshare_em":
+            # AkshareFetcher 东财数据源
+            fetcher_name, kwargs = "AkshareFetcher", {'source': "em"}
+        elif source == "akshare_sina":
+            # AkshareFetcher 新浪数据源
+            fetcher_name, kwargs = "AkshareFetcher", {'source': "sina"}
+        elif source in ("tencent", "akshare_qq"):
+            # AkshareFetcher 腾讯数据源
+            fetcher_name, kwargs = "AkshareFetcher", {'source': "tencent"}
+        elif source == "tushare":
+            # TushareFetcher（需要 Tushare Pro 积分）
+            fetcher_name, kwargs = "TushareFetcher", {}
+        else:
+            return None
+
+        for fetcher in self._fetchers:
+            if fetcher.name == fetcher_name:
+                if hasattr(fetcher, 'get_realtime_quote'):
+                    with self._upstream_budget(fetcher):
+                        return fetcher.get_realtime_quote(stock_code, **kwargs)
+                break
+        return None
+
+    @staticmethod
+    def _upstream_budget(fetcher):
+        """
+        占用数据源的上游预算（并发槽位 + 速率令牌）
+
+        自行按实际 API 调用消耗令牌的数据源（self_rate_limited）只占用并发槽位，
+        命中全量行情缓存时不消耗令牌，也不会被重复限速
+        """
+        return get_rate_limiter_registry().limit(
+            fetcher_upstream(fetcher.name), rate_limited=not getattr(fetcher, 'self_rate_limited', False)
+        )
+
+    def _get_realtime_quote_hedged(self, stock_code: str, sources: List[str], percentile: float):
+        """
+        对冲模式获取实时行情
+
+        首选数据源超过其历史耗时分位数仍未返回时并行请求下一个，先返回有效行情者作为主结果；
+        主结果缺少关键字段时，从尚未请求过的后续数据源补充一次（与顺序模式一致）
+        """
+        market = classify_market(stock_code)
+        tracker = get_fetcher_health_tracker()
+        result = hedged_call(
+            [(source, partial(self._get_realtime_quote_from_source, source, stock_code)) for source in sources],
+            is_valid=lambda quote: quote is not None and quote.has_basic_data(),
+            hedge_delay=lambda source: tracker.hedge_delay(f"realtime:{source}", market, percentile, HEDGE_MIN_DELAY),
+            on_result=lambda source, ok, elapsed, error: tracker.record(
+                f"realtime:{source}", market, ok, elapsed, error, update_breaker=False
+            ),
+        )
+        if not result.success:
+            if result.errors:
+                logger.warning(f"[实时行情] {stock_code} 所有数据源均失败，降级处理: {'; '.join(result.errors)}")
+            else:
+                logger.warning(f"[实时行情] {stock_code} 无可用数据源")
+            return None
+
+        primary_quote = result.value
+        logger.info(
+            f"[实时行情] {stock_code} 成功获取 (来源: {result.label}{', 对冲请求' if result.hedged else ''})"
+        )
+        if not self._quote_needs_supplement(primary_quote):
+            return primary_quote
+
+        logger.debug(f"[实时行情] {stock_code} 部分字段缺失，尝试从后续数据源补充")
+        remaining = [
+            source for source in sources[sources.index(result.label) + 1:]
+            if source not in result.launched
+        ]
+        for source in remaining:
+            try:
+                quote = self._get_realtime_quote_from_source(source, stock_code)
+            except Exception as e:
+                logger.warning(f"[{source}] 失败: {str(e)}")
+                continue
+            if quote is not None and quote.has_basic_data():
+                merged = self._merge_quote_fields(primary_quote, quote)
+                if merged:
+                    logger.info(f"[实时行情] {stock_code} 从 {source} 补充了缺失字段: {merged}")
+                break
+        return primary_quote
+
     # Fields worth supplementing from secondary sources when the primary
     # source returns None for them. Ordered by importance.
     _SUPPLEMENT_FIELDS = [
@@ -706,13 +1312,14 @@ class DataFetcherManager:
 
     def get_chip_distribution(self, stock_code: str):
         """
-        获取筹码分布数据（带熔断和多数据源降级）
+        获取筹码分布数据（交易日缓存 + 熔断和多数据源降级）
 
         策略：
         1. 检查配置开关
-        2. 检查熔断器状态
-        3. 依次尝试多个数据源：AkshareFetcher -> TushareFetcher -> EfinanceFetcher
-        4. 所有数据源失败则返回 None（降级兜底）
+        2. 读取 (代码, 交易日) 缓存：已覆盖最近一个已收盘交易日时直接返回，不访问筹码接口
+        3. 检查熔断器状态
+        4. 依次尝试多个数据源：AkshareFetcher -> TushareFetcher -> EfinanceFetcher，成功后写入缓存
+        5. 所有数据源失败则返回 None（降级兜底）
 
         Args:
             stock_code: 股票代码
@@ -723,7 +1330,6 @@ class DataFetcherManager:
         # Normalize code (strip SH/SZ prefix etc.)
         stock_code = normalize_stock_code(stock_code)
 
-        from .realtime_types import get_chip_circuit_breaker
         from src.config import get_config
 
         config = get_config()
@@ -733,6 +1339,20 @@ class DataFetcherManager:
             logger.debug(f"[筹码分布] 功能已禁用，跳过 {stock_code}")
             return None
 
+        cached = load_cached_chips([stock_code]).get(stock_code)
+        if cached is not None:
+            logger.debug(f"[筹码分布] {stock_code} 命中交易日缓存 (日期: {cached.date})")
+            return cached
+
+        chip = self._fetch_chip_distribution(stock_code)
+        if chip is not None:
+            save_chips([chip])
+        return chip
+
+    def _fetch_chip_distribution(self, stock_code: str):
+        """按数据源优先级请求筹码接口（不读写缓存）"""
+        from .realtime_types import get_chip_circuit_breaker
+
         circuit_breaker = get_chip_circuit_breaker()
 
         # 定义筹码数据源优先级列表
@@ -752,7 +1372,8 @@ class DataFetcherManager:
                 for fetcher in self._fetchers:
                     if fetcher.name == fetcher_name:
                         if hasattr(fetcher, 'get_chip_distribution'):
-                            chip = fetcher.get_chip_distribution(stock_code)
+                            with self._upstream_budget(fetcher):
+                                chip = fetcher.get_chip_distribution(stock_code)
                             if chip is not None:
                                 circuit_breaker.record_success(source_key)
                                 logger.info(f"[筹码分布] {stock_code} 成功获取 (来源: {fetcher_name})")
@@ -766,6 +1387,45 @@ class DataFetcherManager:
         logger.warning(f"[筹码分布] {stock_code} 所有数据源均失败")
         return None
 
+    def prewarm_chip_distributions(self, stock_codes: List[str]) -> int:
+        """
+        批量预热筹码分布缓存（供定时任务在收盘后调用）
+
+        已覆盖最近一个已收盘交易日的代码跳过，其余逐只请求筹码接口（由上游预算限流）并写入缓存，
+        预热完成后盘中请求全部命中缓存，不再访问筹码接口。
+
+        Args:
+            stock_codes: 股票代码列表
+
+        Returns:
+            本次新写入缓存的股票数
+        """
+        from src.config import get_config
+
+        if not get_config().enable_chip_distribution:
+            logger.info("[筹码预热] 筹码分布功能已禁用，跳过")
+            return 0
+
+        codes = list(dict.fromkeys(normalize_stock_code(c) for c in stock_codes if c))
+        # 美股 / 港股没有筹码分布数据
+        codes = [c for c in codes if classify_market(c) == 'cn']
+        cached = load_cached_chips(codes)
+        pending = [c for c in codes if c not in cached]
+        logger.info(f"[筹码预热] 共 {len(codes)} 只，已缓存 {len(cached)} 只，待拉取 {len(pending)} 只")
+
+        start = time.time()
+        chips = []
+        for code in pending:
+            chip = self._fetch_chip_distribution(code)
+            if chip is not None:
+                chips.append(chip)
+        saved = save_chips(chips)
+        logger.info(
+            f"[筹码预热] 完成: 成功 {len(chips)}/{len(pending)} 只，写入缓存 {saved} 条，"
+            f"耗时 {time.time() - start:.1f}s"
+        )
+        return saved
+
     def get_stock_name(self, stock_code: str) -> Optional[str]:
         """
         获取股票中文名称（自动切换数据源）
@@ -784,13 +1444,14 @@ class DataFetcherManager:
         # Normalize code (strip SH/SZ prefix etc.)
         stock_code = normalize_stock_code(stock_code)
 
-        # 1. 先检查缓存
-        if hasattr(self, '_stock_name_cache') and stock_code in self._stock_name_cache:
-            return self._stock_name_cache[stock_code]
-        
-        # 初始化缓存
+        # 初始化缓存（内存 + 持久化，跨进程共享）
         if not hasattr(self, '_stock_name_cache'):
-            self._stock_name_cache = {}
+            self._stock_name_cache = PersistentMapping('stock_name', ttl=STOCK_NAME_TTL)
+
+        # 1. 先检查缓存
+        cached_name = self._stock_name_cache.get(stock_code)
+        if cached_name:
+            return cached_name
         
         # 2. 尝试从实时行情中获取（最快）
         quote = self.get_realtime_quote(stock_code)
@@ -833,13 +1494,13 @@ class DataFetcherManager:
         result = {}
         missing_codes = set(stock_codes)
         
-        # 1. 先检查缓存
+        # 1. 先检查缓存（持久化缓存单次批量查询）
         if not hasattr(self, '_stock_name_cache'):
-            self._stock_name_cache = {}
+            self._stock_name_cache = PersistentMapping('stock_name', ttl=STOCK_NAME_TTL)
         
-        for code in stock_codes:
-            if code in self._stock_name_cache:
-                result[code] = self._stock_name_cache[code]
+        for code, name in self._stock_name_cache.get_many(stock_codes).items():
+            if name:
+                result[code] = name
                 missing_codes.discard(code)
         
         if not missing_codes:
@@ -851,14 +1512,17 @@ class DataFetcherManager:
                 try:
                     stock_list = fetcher.get_stock_list()
                     if stock_list is not None and not stock_list.empty:
+                        names = {}
                         for _, row in stock_list.iterrows():
                             code = row.get('code')
                             name = row.get('name')
                             if code and name:
-                                self._stock_name_cache[code] = name
+                                names[code] = name
                                 if code in missing_codes:
                                     result[code] = name
                                     missing_codes.discard(code)
+                        # 整表一次写入（持久化缓存单事务）
+                        self._stock_name_cache.update(names)
                         
                         if not missing_codes:
                             break
@@ -878,6 +1542,42 @@ class DataFetcherManager:
         logger.info(f"[股票名称] 批量获取完成，成功 {len(result)}/{len(stock_codes)}")
         return result
 
+    def get_stock_sector(self, stock_code: str) -> Optional[str]:
+        """
+        获取股票所属行业板块（仅 A 股，持久化缓存 30 天）
+
+        用于把同一行业的股票归并为一次行业搜索（见 SearchService.search_comprehensive_intel）
+
+        Returns:
+            行业板块名称，非 A 股或所有数据源都失败返回 None
+        """
+        stock_code = normalize_stock_code(stock_code)
+        if classify_market(stock_code) != 'cn':
+            return None
+
+        if not hasattr(self, '_stock_sector_cache'):
+            self._stock_sector_cache = PersistentMapping('stock_sector', ttl=STOCK_SECTOR_TTL)
+
+        cached = self._stock_sector_cache.get(stock_code)
+        if cached:
+            return cached
+
+        for fetcher in self._fetchers:
+            try:
+                if not hasattr(fetcher, 'get_industry'):
+                    continue
+                sector = fetcher.get_industry(stock_code)
+            except Exception as e:
+                logger.debug(f"[所属行业] {fetcher.name} 获取失败: {e}")
+                continue
+            if sector:
+                self._stock_sector_cache[stock_code] = sector
+                logger.info(f"[所属行业] 从 {fetcher.name} 获取: {stock_code} -> {sector}")
+                return sector
+
+        logger.debug(f"[所属行业] 无法获取 {stock_code} 的所属行业")
+        return None
+
     def get_main_indices(self) -> List[Dict[str, Any]]:
         """获取主要指数实时行情（自动切换数据源）"""
         for fetcher in self._fetchers:
@@ -916,3 +1616,30 @@ class DataFetcherManager:
                 logger.warning(f"[{fetcher.name}] 获取板块排行失败: {e}")
                 continue
         return [], []
+
+
+# === 全局共享管理器 ===
+_manager: Optional[DataFetcherManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_data_fetcher_manager() -> DataFetcherManager:
+    """
+    获取进程级共享的 DataFetcherManager（首次调用时创建）
+
+    Pipeline、StockService、BacktestService、API 请求等共用同一个实例，
+    各数据源只构造一次，其内部缓存与连接在调用方之间复用
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = DataFetcherManager()
+    return _manager
+
+
+def reset_data_fetcher_manager() -> None:
+    """丢弃共享的 DataFetcherManager（主要用于测试或配置变更后重建）"""
+    global _manager
+    with _manager_lock:
+        _manager = None
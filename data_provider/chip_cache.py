@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+筹码分布交易日缓存
+===================================
+
+职责：
+1. 按 (股票代码, 交易日) 将筹码分布结果持久化到 stock_chip_distribution 表（与 stock_daily 同库）
+2. 判断缓存是否覆盖“最近一个已收盘交易日”，命中时不再访问筹码接口
+
+新鲜度规则：
+- 筹码数据在收盘后（CHIP_READY_TIME）才更新，盘中及周末期望的交易日为上一个工作日
+- 缓存日期不早于期望交易日即命中
+- 节假日或上游延迟时接口返回的日期会早于期望交易日：若该记录是在期望交易日收盘后拉取的，
+  同样视为命中，避免节假日内每次请求都穿透到上游
+
+仓库没有交易日历，交易日按工作日（周一至周五）近似。
+
+使用方式：
+    cached = load_cached_chips(['600519'])
+    save_chips([chip])
+"""
+
+import logging
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .realtime_types import ChipDistribution
+
+logger = logging.getLogger(__name__)
+
+# 筹码数据就绪时间（收盘后）
+CHIP_READY_TIME = dtime(15, 30)
+
+_CHIP_FIELDS = (
+    'profit_ratio', 'avg_cost', 'cost_90_low', 'cost_90_high', 'concentration_90',
+    'cost_70_low', 'cost_70_high', 'concentration_70',
+)
+
+
+def expected_chip_date(now: Optional[datetime] = None) -> date:
+    """最近一个已收盘（筹码数据已就绪）的交易日"""
+    now = now or datetime.now()
+    day = now.date()
+    if now.time() < CHIP_READY_TIME:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def is_chip_fresh(record: Dict[str, Any], now: Optional[datetime] = None) -> bool:
+    """缓存记录是否覆盖最近一个已收盘交易日"""
+    expected = expected_chip_date(now)
+    if record.get('date') is not None and record['date'] >= expected:
+        return True
+    fetched_at = record.get('fetched_at')
+    return fetched_at is not None and fetched_at >= datetime.combine(expected, CHIP_READY_TIME)
+
+
+def _chip_date(chip: ChipDistribution, now: Optional[datetime] = None) -> date:
+    """解析筹码数据日期（缺失或无法解析时按期望交易日记录）"""
+    try:
+        if chip.date:
+            return pd.Timestamp(chip.date).date()
+    except (TypeError, ValueError):
+        pass
+    return expected_chip_date(now)
+
+
+def load_cached_chips(codes: List[str], now: Optional[datetime] = None) -> Dict[str, ChipDistribution]:
+    """
+    读取仍然新鲜的筹码分布缓存
+
+    Returns:
+        {股票代码: ChipDistribution}，无缓存、已过期或读取失败的代码不在结果中
+    """
+    try:
+        from src.storage import get_db
+        records = get_db().get_latest_chip_distributions(codes)
+    except Exception as e:
+        logger.debug(f"[筹码缓存] 读取失败: {e}")
+        return {}
+
+    chips: Dict[str, ChipDistribution] = {}
+    for code, record in records.items():
+        if not is_chip_fresh(record, now):
+            continue
+        values = {field: record.get(field) or 0.0 for field in _CHIP_FIELDS}
+        chips[code] = ChipDistribution(
+            code=code,
+            date=record['date'].strftime('%Y-%m-%d'),
+            source=record.get('source') or 'cache',
+            **values,
+        )
+    return chips
+
+
+def save_chips(chips: Iterable[ChipDistribution], now: Optional[datetime] = None) -> int:
+    """
+    保存筹码分布结果（按代码 + 交易日覆盖）
+
+    Returns:
+        保存的记录数（写入失败时为 0，不影响调用方使用本次结果）
+    """
+    records: List[Dict[str, Any]] = []
+    for chip in chips:
+        record = {field: getattr(chip, field, None) for field in _CHIP_FIELDS}
+        record.update(code=chip.code, date=_chip_date(chip, now), source=chip.source)
+        records.append(record)
+    if not records:
+        return 0
+    try:
+        from src.storage import get_db
+        return get_db().save_chip_distributions(records)
+    except Exception as e:
+        logger.warning(f"[筹码缓存] 保存失败: {e}")
+        return 0
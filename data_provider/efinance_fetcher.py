@@ -14,7 +14,7 @@ EfinanceFetcher - 优先数据源 (Priority 0)
 3. 更稳定的接口封装
 
 防封禁策略：
-1. 每次请求前随机休眠 1.5-3.0 秒
+1. 每次 API 调用前按进程级令牌桶精确限速（所有实例、线程共享）
 2. 随机轮换 User-Agent
 3. 使用 tenacity 实现指数退避重试
 4. 熔断器机制：连续失败后自动冷却
@@ -44,8 +44,10 @@ from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
 from .realtime_types import (
     UnifiedRealtimeQuote, RealtimeSource,
     get_realtime_circuit_breaker,
-    safe_float, safe_int  # 使用统一的类型转换函数
+    safe_float  # 使用统一的类型转换函数
 )
+from .quote_snapshot import RealtimeQuoteSnapshot, snapshot_for_cache, EFINANCE_STOCK_FIELDS, EFINANCE_ETF_FIELDS
+from .snapshot_cache import SingleFlightCache
 
 
 # 保留旧的类型别名，用于向后兼容
@@ -106,18 +108,12 @@ USER_AGENTS = [
 
 # 缓存实时行情数据（避免重复请求）
 # TTL 设为 10 分钟 (600秒)：批量分析场景下避免重复拉取
-_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 600  # 10分钟缓存有效期
-}
+# 过期后只有一个调用方刷新，其余调用方复用旧数据或等待刷新结果（single-flight）
+# 快照写入持久化缓存，定时任务/服务重启后在 TTL 内无需重新全量拉取
+_realtime_cache: SingleFlightCache = SingleFlightCache('efinance', ttl=600, persist=True)
 
 # ETF 实时行情缓存（与股票分开缓存）
-_etf_realtime_cache: Dict[str, Any] = {
-    'data': None,
-    'timestamp': 0,
-    'ttl': 600  # 10分钟缓存有效期
-}
+_etf_realtime_cache: SingleFlightCache = SingleFlightCache('efinance_etf', ttl=600, persist=True)
 
 
 def _is_etf_code(stock_code: str) -> bool:
@@ -164,7 +160,7 @@ class EfinanceFetcher(BaseFetcher):
     - ef.stock.get_realtime_quotes(): 获取实时行情
     
     关键策略：
-    - 每次请求前随机休眠 1.5-3.0 秒
+    - 每次 API 调用按进程级令牌桶精确限速
     - 随机 User-Agent 轮换
     - 失败后指数退避重试（最多3次）
     """
@@ -172,17 +168,11 @@ class EfinanceFetcher(BaseFetcher):
     name = "EfinanceFetcher"
     priority = int(os.getenv("EFINANCE_PRIORITY", "0"))  # 最高优先级，排在 AkshareFetcher 之前
     
-    def __init__(self, sleep_min: float = 1.5, sleep_max: float = 3.0):
-        """
-        初始化 EfinanceFetcher
-        
-        Args:
-            sleep_min: 最小休眠时间（秒）
-            sleep_max: 最大休眠时间（秒）
-        """
-        self.sleep_min = sleep_min
-        self.sleep_max = sleep_max
-        self._last_request_time: Optional[float] = None
+    # 每次实际 API 调用前消耗速率令牌（_enforce_rate_limit），外层只占用并发槽位
+    self_rate_limited = True
+    
+    def __init__(self):
+        """初始化 EfinanceFetcher"""
         eastmoney_patch()
     
     def _set_random_user_agent(self) -> None:
@@ -202,22 +192,11 @@ class EfinanceFetcher(BaseFetcher):
         """
         强制执行速率限制
         
-        策略：
-        1. 检查距离上次请求的时间间隔
-        2. 如果间隔不足，补充休眠时间
-        3. 然后再执行随机 jitter 休眠
-        """
-        if self._last_request_time is not None:
-            elapsed = time.time() - self._last_request_time
-            min_interval = self.sleep_min
-            if elapsed < min_interval:
-                additional_sleep = min_interval - elapsed
-                logger.debug(f"补充休眠 {additional_sleep:.2f} 秒")
-                time.sleep(additional_sleep)
-        
-        # 执行随机 jitter 休眠
-        self.random_sleep(self.sleep_min, self.sleep_max)
-        self._last_request_time = time.time()
+        从进程级预算注册表消耗一个本数据源的速率令牌：
+        所有 Fetcher 实例与线程共享同一个令牌桶，按令牌补充时间精确等待，
+        既不超过配置的每分钟请求数，也不额外浪费随机休眠时间
+        """
+        self._acquire_rate_token()
     
     @retry(
         stop=stop_after_attempt(1),  # 减少到1次，避免触发限流
@@ -450,6 +429,55 @@ class EfinanceFetcher(BaseFetcher):
         
         return df
     
+    def _fetch_realtime_quotes(self) -> pd.DataFrame:
+        """
+        全量拉取实时行情（_realtime_cache 的刷新函数，同一时刻只有一个调用方执行）
+
+        异常向上抛出，由调用方记录熔断失败；缓存在失败退避期（failure_ttl）内不再调用本函数。
+        """
+        import efinance as ef
+
+        logger.info(f"[缓存未命中] 触发全量刷新 实时行情(efinance)")
+        # 防封禁策略
+        self._set_random_user_agent()
+        self._enforce_rate_limit()
+
+        logger.info(f"[API调用] ef.stock.get_realtime_quotes() 获取实时行情...")
+        api_start = time.time()
+
+        # efinance 的实时行情 API
+        df = ef.stock.get_realtime_quotes()
+
+        api_elapsed = time.time() - api_start
+        logger.info(f"[API返回] ef.stock.get_realtime_quotes 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
+        get_realtime_circuit_breaker().record_success("efinance")
+        logger.info(f"[缓存更新] 实时行情(efinance) 缓存已刷新，TTL={int(_realtime_cache.ttl)}s")
+        return df
+
+    def _fetch_etf_realtime_quotes(self) -> pd.DataFrame:
+        """
+        全量拉取 ETF 实时行情（_etf_realtime_cache 的刷新函数）
+
+        异常向上抛出；缓存在失败退避期内不再调用本函数。
+        """
+        import efinance as ef
+
+        self._set_random_user_agent()
+        self._enforce_rate_limit()
+
+        logger.info("[API调用] ef.stock.get_realtime_quotes(['ETF']) 获取ETF实时行情...")
+        api_start = time.time()
+        df = ef.stock.get_realtime_quotes(['ETF'])
+        api_elapsed = time.time() - api_start
+
+        if df is not None and not df.empty:
+            logger.info(f"[API返回] ETF 实时行情成功: {len(df)} 条, 耗时 {api_elapsed:.2f}s")
+            get_realtime_circuit_breaker().record_success("efinance_etf")
+        else:
+            logger.warning(f"[API返回] ETF 实时行情为空, 耗时 {api_elapsed:.2f}s")
+            df = pd.DataFrame()
+        return df
+
     def get_realtime_quote(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取实时行情数据
@@ -467,7 +495,6 @@ class EfinanceFetcher(BaseFetcher):
         if _is_etf_code(stock_code):
             return self._get_etf_realtime_quote(stock_code)
 
-        import efinance as ef
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "efinance"
         
@@ -477,85 +504,22 @@ class EfinanceFetcher(BaseFetcher):
             return None
         
         try:
-            # 检查缓存
-            current_time = time.time()
-            if (_realtime_cache['data'] is not None and 
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']):
-                df = _realtime_cache['data']
-                cache_age = int(current_time - _realtime_cache['timestamp'])
-                logger.debug(f"[缓存命中] 实时行情(efinance) - 缓存年龄 {cache_age}s/{_realtime_cache['ttl']}s")
-            else:
-                # 触发全量刷新
-                logger.info(f"[缓存未命中] 触发全量刷新 实时行情(efinance)")
-                # 防封禁策略
-                self._set_random_user_agent()
-                self._enforce_rate_limit()
-                
-                logger.info(f"[API调用] ef.stock.get_realtime_quotes() 获取实时行情...")
-                import time as _time
-                api_start = _time.time()
-                
-                # efinance 的实时行情 API
-                df = ef.stock.get_realtime_quotes()
-                
-                api_elapsed = _time.time() - api_start
-                logger.info(f"[API返回] ef.stock.get_realtime_quotes 成功: 返回 {len(df)} 只股票, 耗时 {api_elapsed:.2f}s")
-                circuit_breaker.record_success(source_key)
-                
-                # 更新缓存
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
-                logger.info(f"[缓存更新] 实时行情(efinance) 缓存已刷新，TTL={_realtime_cache['ttl']}s")
-            
-            # 查找指定股票
+            # 读取缓存（过期时由单个调用方全量刷新）
+            df = _realtime_cache.get_or_refresh(self._fetch_realtime_quotes)
+            if df is None or df.empty:
+                logger.warning(f"[实时行情] 实时行情数据为空(efinance)，跳过 {stock_code}")
+                return None
+
+            # 查找指定股票（全量行情按代码建立快照索引，O(1) 命中）
             # efinance 返回的列名可能是 '股票代码' 或 'code'
-            code_col = '股票代码' if '股票代码' in df.columns else 'code'
-            row = df[df[code_col] == stock_code]
-            if row.empty:
+            snapshot = snapshot_for_cache(
+                _realtime_cache, RealtimeSource.EFINANCE, EFINANCE_STOCK_FIELDS, code_column=('股票代码', 'code')
+            )
+            quote = snapshot.get(stock_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到股票 {stock_code} 的实时行情")
                 return None
             
-            row = row.iloc[0]
-            
-            # 使用 realtime_types.py 中的统一转换函数
-            # 获取列名（可能是中文或英文）
-            name_col = '股票名称' if '股票名称' in df.columns else 'name'
-            price_col = '最新价' if '最新价' in df.columns else 'price'
-            pct_col = '涨跌幅' if '涨跌幅' in df.columns else 'pct_chg'
-            chg_col = '涨跌额' if '涨跌额' in df.columns else 'change'
-            vol_col = '成交量' if '成交量' in df.columns else 'volume'
-            amt_col = '成交额' if '成交额' in df.columns else 'amount'
-            turn_col = '换手率' if '换手率' in df.columns else 'turnover_rate'
-            amp_col = '振幅' if '振幅' in df.columns else 'amplitude'
-            high_col = '最高' if '最高' in df.columns else 'high'
-            low_col = '最低' if '最低' in df.columns else 'low'
-            open_col = '开盘' if '开盘' in df.columns else 'open'
-            # efinance 也返回量比、市盈率、市值等字段
-            vol_ratio_col = '量比' if '量比' in df.columns else 'volume_ratio'
-            pe_col = '市盈率' if '市盈率' in df.columns else 'pe_ratio'
-            total_mv_col = '总市值' if '总市值' in df.columns else 'total_mv'
-            circ_mv_col = '流通市值' if '流通市值' in df.columns else 'circ_mv'
-            
-            quote = UnifiedRealtimeQuote(
-                code=stock_code,
-                name=str(row.get(name_col, '')),
-                source=RealtimeSource.EFINANCE,
-                price=safe_float(row.get(price_col)),
-                change_pct=safe_float(row.get(pct_col)),
-                change_amount=safe_float(row.get(chg_col)),
-                volume=safe_int(row.get(vol_col)),
-                amount=safe_float(row.get(amt_col)),
-                turnover_rate=safe_float(row.get(turn_col)),
-                amplitude=safe_float(row.get(amp_col)),
-                high=safe_float(row.get(high_col)),
-                low=safe_float(row.get(low_col)),
-                open_price=safe_float(row.get(open_col)),
-                volume_ratio=safe_float(row.get(vol_ratio_col)),  # 量比
-                pe_ratio=safe_float(row.get(pe_col)),  # 市盈率
-                total_mv=safe_float(row.get(total_mv_col)),  # 总市值
-                circ_mv=safe_float(row.get(circ_mv_col)),  # 流通市值
-            )
-            
             logger.info(f"[实时行情-efinance] {stock_code} {quote.name}: 价格={quote.price}, 涨跌={quote.change_pct}%, "
                        f"量比={quote.volume_ratio}, 换手率={quote.turnover_rate}%")
             return quote
@@ -565,13 +529,37 @@ class EfinanceFetcher(BaseFetcher):
             circuit_breaker.record_failure(source_key, str(e))
             return None
 
+    def get_market_snapshot(self) -> Optional[RealtimeQuoteSnapshot]:
+        """
+        获取 A 股全市场实时行情快照（与个股实时行情共用缓存）
+
+        缓存有效时不发起网络请求；供全市场初筛等批量场景使用
+
+        Returns:
+            RealtimeQuoteSnapshot，数据源熔断或拉取失败时返回 None
+        """
+        circuit_breaker = get_realtime_circuit_breaker()
+        if not circuit_breaker.is_available("efinance"):
+            logger.warning("[熔断] 数据源 efinance 处于熔断状态，跳过全市场快照")
+            return None
+        try:
+            df = _realtime_cache.get_or_refresh(self._fetch_realtime_quotes)
+        except Exception as e:
+            logger.error(f"[API错误] 获取全市场行情(efinance)失败: {e}")
+            circuit_breaker.record_failure("efinance", str(e))
+            return None
+        if df is None or df.empty:
+            return None
+        return snapshot_for_cache(
+            _realtime_cache, RealtimeSource.EFINANCE, EFINANCE_STOCK_FIELDS, code_column=('股票代码', 'code')
+        )
+
     def _get_etf_realtime_quote(self, stock_code: str) -> Optional[UnifiedRealtimeQuote]:
         """
         获取 ETF 实时行情
 
         efinance 默认实时接口仅返回股票数据，ETF 需要显式传入 ['ETF']。
         """
-        import efinance as ef
         circuit_breaker = get_realtime_circuit_breaker()
         source_key = "efinance_etf"
 
@@ -580,75 +568,21 @@ class EfinanceFetcher(BaseFetcher):
             return None
 
         try:
-            current_time = time.time()
-            if (
-                _etf_realtime_cache['data'] is not None and
-                current_time - _etf_realtime_cache['timestamp'] < _etf_realtime_cache['ttl']
-            ):
-                df = _etf_realtime_cache['data']
-                cache_age = int(current_time - _etf_realtime_cache['timestamp'])
-                logger.debug(f"[缓存命中] ETF实时行情(efinance) - 缓存年龄 {cache_age}s/{_etf_realtime_cache['ttl']}s")
-            else:
-                self._set_random_user_agent()
-                self._enforce_rate_limit()
-
-                logger.info("[API调用] ef.stock.get_realtime_quotes(['ETF']) 获取ETF实时行情...")
-                import time as _time
-                api_start = _time.time()
-                df = ef.stock.get_realtime_quotes(['ETF'])
-                api_elapsed = _time.time() - api_start
-
-                if df is not None and not df.empty:
-                    logger.info(f"[API返回] ETF 实时行情成功: {len(df)} 条, 耗时 {api_elapsed:.2f}s")
-                    circuit_breaker.record_success(source_key)
-                else:
-                    logger.warning(f"[API返回] ETF 实时行情为空, 耗时 {api_elapsed:.2f}s")
-                    df = pd.DataFrame()
-
-                _etf_realtime_cache['data'] = df
-                _etf_realtime_cache['timestamp'] = current_time
+            df = _etf_realtime_cache.get_or_refresh(self._fetch_etf_realtime_quotes)
 
             if df is None or df.empty:
                 logger.warning(f"[实时行情] ETF实时行情数据为空(efinance)，跳过 {stock_code}")
                 return None
 
-            code_col = '股票代码' if '股票代码' in df.columns else 'code'
-            code_series = df[code_col].astype(str).str.zfill(6)
             target_code = str(stock_code).strip().zfill(6)
-            row = df[code_series == target_code]
-            if row.empty:
+            snapshot = snapshot_for_cache(
+                _etf_realtime_cache, RealtimeSource.EFINANCE, EFINANCE_ETF_FIELDS, code_column=('股票代码', 'code')
+            )
+            quote = snapshot.get(target_code)
+            if quote is None:
                 logger.warning(f"[API返回] 未找到 ETF {stock_code} 的实时行情(efinance)")
                 return None
 
-            row = row.iloc[0]
-            name_col = '股票名称' if '股票名称' in df.columns else 'name'
-            price_col = '最新价' if '最新价' in df.columns else 'price'
-            pct_col = '涨跌幅' if '涨跌幅' in df.columns else 'pct_chg'
-            chg_col = '涨跌额' if '涨跌额' in df.columns else 'change'
-            vol_col = '成交量' if '成交量' in df.columns else 'volume'
-            amt_col = '成交额' if '成交额' in df.columns else 'amount'
-            turn_col = '换手率' if '换手率' in df.columns else 'turnover_rate'
-            amp_col = '振幅' if '振幅' in df.columns else 'amplitude'
-            high_col = '最高' if '最高' in df.columns else 'high'
-            low_col = '最低' if '最低' in df.columns else 'low'
-            open_col = '开盘' if '开盘' in df.columns else 'open'
-
-            quote = UnifiedRealtimeQuote(
-                code=target_code,
-                name=str(row.get(name_col, '')),
-                source=RealtimeSource.EFINANCE,
-                price=safe_float(row.get(price_col)),
-                change_pct=safe_float(row.get(pct_col)),
-                change_amount=safe_float(row.get(chg_col)),
-                volume=safe_int(row.get(vol_col)),
-                amount=safe_float(row.get(amt_col)),
-                turnover_rate=safe_float(row.get(turn_col)),
-                amplitude=safe_float(row.get(amp_col)),
-                high=safe_float(row.get(high_col)),
-                low=safe_float(row.get(low_col)),
-                open_price=safe_float(row.get(open_col)),
-            )
-
             logger.info(
                 f"[ETF实时行情-efinance] {target_code} {quote.name}: "
                 f"价格={quote.price}, 涨跌={quote.change_pct}%, 换手率={quote.turnover_rate}%"
@@ -738,23 +672,9 @@ class EfinanceFetcher(BaseFetcher):
         """
         获取市场涨跌统计 (efinance)
         """
-        import efinance as ef
-
         try:
-            self._set_random_user_agent()
-            self._enforce_rate_limit()
-
-            current_time = time.time()
-            if (
-                _realtime_cache['data'] is not None and
-                current_time - _realtime_cache['timestamp'] < _realtime_cache['ttl']
-            ):
-                df = _realtime_cache['data']
-            else:
-                logger.info("[API调用] ef.stock.get_realtime_quotes() 获取市场统计...")
-                df = ef.stock.get_realtime_quotes()
-                _realtime_cache['data'] = df
-                _realtime_cache['timestamp'] = current_time
+            # 与个股实时行情共用全量快照缓存
+            df = _realtime_cache.get_or_refresh(self._fetch_realtime_quotes)
 
             if df is None or df.empty:
                 logger.warning("[API返回] 市场统计数据为空")
@@ -904,6 +824,21 @@ class EfinanceFetcher(BaseFetcher):
         except Exception as e:
             logger.error(f"[API错误] 获取 {stock_code} 所属板块失败: {e}")
             return None
+
+    def get_industry(self, stock_code: str) -> Optional[str]:
+        """
+        获取股票所属行业板块名称
+
+        东财所属板块列表的第一行为行业板块，其后为地域、概念板块
+
+        Returns:
+            行业板块名称（如“银行”），获取失败返回 None
+        """
+        df = self.get_belong_board(stock_code)
+        if df is None or '板块名称' not in df.columns:
+            return None
+        name = str(df['板块名称'].iloc[0]).strip()
+        return name or None
     
     def get_enhanced_data(self, stock_code: str, days: int = 60) -> Dict[str, Any]:
         """
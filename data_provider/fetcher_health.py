@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源健康度统计与自适应排序
+===================================
+
+职责：
+1. 按 (数据源, 市场类型) 记录滚动窗口内的耗时与成败
+2. 根据实测表现动态调整日线数据源的尝试顺序：
+   - 健康（或样本不足）的数据源保持静态优先级顺序
+   - 偏慢 / 偶发失败的数据源降级，按“期望耗时 = 平均耗时 / 成功率”排序
+   - 连续失败的数据源由熔断器暂时跳过（冷却后半开试探）
+3. 进程级全局共享，所有 DataFetcherManager 实例共用同一份统计
+
+市场类型：cn（A股）/ etf / hk（港股）/ us（美股）
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .realtime_types import CircuitBreaker, get_daily_circuit_breaker
+
+logger = logging.getLogger(__name__)
+
+
+def classify_market(stock_code: str) -> str:
+    """股票代码 -> 市场类型（cn / etf / hk / us）"""
+    from .akshare_fetcher import _is_etf_code, _is_hk_code, _is_us_code
+
+    if _is_us_code(stock_code):
+        return 'us'
+    if _is_hk_code(stock_code):
+        return 'hk'
+    if _is_etf_code(stock_code):
+        return 'etf'
+    return 'cn'
+
+
+class FetcherStats:
+    """
+    单个 (数据源, 市场) 的滚动统计
+
+    - window: 保留最近 N 次请求的 (是否成功, 耗时)
+    """
+
+    def __init__(self, window: int = 20):
+        self._samples: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.total = 0
+        self.failures = 0
+
+    def record(self, success: bool, elapsed: float) -> None:
+        self._samples.append((success, max(0.0, elapsed)))
+        self.total += 1
+        if not success:
+            self.failures += 1
+
+    @property
+    def samples(self) -> int:
+        return len(self._samples)
+
+    @property
+    def success_rate(self) -> float:
+        if not self._samples:
+            return 1.0
+        return sum(1 for ok, _ in self._samples if ok) / len(self._samples)
+
+    @property
+    def avg_latency(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(elapsed for _, elapsed in self._samples) / len(self._samples)
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        """成功请求耗时的分位数（无成功样本时返回 None）"""
+        latencies = sorted(elapsed for ok, elapsed in self._samples if ok)
+        if not latencies:
+            return None
+        index = min(len(latencies) - 1, max(0, int(round(percentile / 100.0 * len(latencies))) - 1))
+        return latencies[index]
+
+    @property
+    def successes(self) -> int:
+        return sum(1 for ok, _ in self._samples if ok)
+
+    @property
+    def expected_cost(self) -> float:
+        """期望耗时：平均耗时 / 成功率（失败越多、越慢，代价越高）"""
+        return self.avg_latency / max(self.success_rate, 0.05)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'samples': self.samples,
+            'success_rate': round(self.success_rate, 3),
+            'avg_latency': round(self.avg_latency, 3),
+            'total': self.total,
+            'failures': self.failures,
+        }
+
+
+class FetcherHealthTracker:
+    """
+    数据源健康度追踪器
+
+    - min_samples: 样本数达到该值后才参与动态排序（之前按静态优先级）
+    - slow_latency: 平均耗时超过该值（秒）视为偏慢
+    - min_success_rate: 成功率低于该值视为不稳定
+    """
+
+    # 排序分层
+    TIER_HEALTHY = 0
+    TIER_DEGRADED = 1
+    TIER_OPEN = 2
+
+    def __init__(
+        self,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        window: int = 20,
+        min_samples: int = 3,
+        slow_latency: float = 8.0,
+        min_success_rate: float = 0.8,
+    ):
+        self.circuit_breaker = circuit_breaker or get_daily_circuit_breaker()
+        self.window = window
+        self.min_samples = min_samples
+        self.slow_latency = slow_latency
+        self.min_success_rate = min_success_rate
+        self._stats: Dict[Tuple[str, str], FetcherStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def breaker_key(fetcher_name: str, market: str) -> str:
+        return f"{fetcher_name}:{market}"
+
+    def _get_stats(self, fetcher_name: str, market: str) -> FetcherStats:
+        key = (fetcher_name, market)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = FetcherStats(self.window)
+            self._stats[key] = stats
+        return stats
+
+    def record(
+        self,
+        fetcher_name: str,
+        market: str,
+        success: bool,
+        elapsed: float,
+        error: Optional[str] = None,
+        update_breaker: bool = True,
+    ) -> None:
+        """
+        记录一次请求结果
+
+        Args:
+            update_breaker: 是否同时更新日线熔断器（实时行情等自带熔断的请求只记录耗时）
+        """
+        with self._lock:
+            self._get_stats(fetcher_name, market).record(success, elapsed)
+            if not update_breaker:
+                return
+            breaker_key = self.breaker_key(fetcher_name, market)
+            if success:
+                self.circuit_breaker.record_success(breaker_key)
+            else:
+                self.circuit_breaker.record_failure(breaker_key, error)
+
+    def hedge_delay(self, fetcher_name: str, market: str, percentile: float, min_delay: float = 0.0) -> Optional[float]:
+        """
+        对冲等待时间：该数据源成功请求耗时的分位数（不低于 min_delay）
+
+        成功样本不足 min_samples 时返回 None（不对冲，避免在没有依据时成倍增加上游压力）
+        """
+        with self._lock:
+            stats = self._stats.get((fetcher_name, market))
+            if stats is None or stats.successes < self.min_samples:
+                return None
+            delay = stats.latency_percentile(percentile)
+        return None if delay is None else max(min_delay, delay)
+
+    def _tier(self, fetcher_name: str, market: str) -> Tuple[int, float]:
+        if not self.circuit_breaker.is_available(self.breaker_key(fetcher_name, market)):
+            return self.TIER_OPEN, 0.0
+        stats = self._stats.get((fetcher_name, market))
+        if stats is None or stats.samples < self.min_samples:
+            return self.TIER_HEALTHY, 0.0
+        if stats.success_rate < self.min_success_rate or stats.avg_latency > self.slow_latency:
+            return self.TIER_DEGRADED, stats.expected_cost
+        return self.TIER_HEALTHY, 0.0
+
+    def order(self, fetchers: Sequence[Any], market: str) -> Tuple[List[Any], List[Any]]:
+        """
+        按实测表现排序数据源
+
+        Args:
+            fetchers: 已按静态优先级排序的数据源列表
+            market: 市场类型
+
+        Returns:
+            (按顺序尝试的数据源, 因熔断被跳过的数据源)
+        """
+        with self._lock:
+            ranked = []
+            skipped = []
+            for index, fetcher in enumerate(fetchers):
+                tier, cost = self._tier(fetcher.name, market)
+                if tier == self.TIER_OPEN:
+                    skipped.append(fetcher)
+                else:
+                    # 健康层 cost 恒为 0，保持静态优先级；降级层按期望耗时排序
+                    ranked.append(((tier, cost, index), fetcher))
+        ranked.sort(key=lambda item: item[0])
+        return [fetcher for _, fetcher in ranked], skipped
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回所有 (数据源, 市场) 的统计：{"Fetcher:market": {...}}"""
+        with self._lock:
+            items = list(self._stats.items())
+        status = self.circuit_breaker.get_status()
+        result = {}
+        for (fetcher_name, market), stats in items:
+            key = self.breaker_key(fetcher_name, market)
+            result[key] = {**stats.to_dict(), 'circuit': status.get(key, CircuitBreaker.CLOSED)}
+        return result
+
+
+# === 全局追踪器 ===
+_tracker: Optional[FetcherHealthTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_fetcher_health_tracker() -> FetcherHealthTracker:
+    """获取进程级数据源健康度追踪器"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = FetcherHealthTracker()
+    return _tracker
+
+
+def reset_fetcher_health_tracker() -> None:
+    """重置全局追踪器（主要用于测试）"""
+    global _tracker
+    with _tracker_lock:
+        _tracker = None
+    get_daily_circuit_breaker().reset()
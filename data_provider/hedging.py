@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+对冲请求（hedged requests）
+===================================
+
+职责：
+1. 多个数据源按优先级依次尝试时控制尾延迟：
+   首选数据源在其历史耗时的某个分位数内仍未返回，则并行发起下一个数据源，
+   先返回有效结果者胜出
+2. 失败立即切换到下一个数据源（与顺序故障切换一致）
+3. 落败请求：未开始的直接取消，已在执行的忽略其结果（其耗时仍计入统计）
+
+使用方式：
+    result = hedged_call(
+        [("EfinanceFetcher", fetch_a), ("AkshareFetcher", fetch_b)],
+        is_valid=lambda df: df is not None and not df.empty,
+        hedge_delay=lambda label: 2.5,
+    )
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 对冲等待下限（秒）：避免对本身很快的数据源重复请求
+HEDGE_MIN_DELAY = 1.0
+
+
+@dataclass
+class HedgeResult(Generic[T]):
+    """对冲请求结果"""
+    label: Optional[str] = None
+    value: Optional[T] = None
+    launched: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    hedged: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.label is not None
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+    return _executor
+
+
+def hedged_call(
+    attempts: Sequence[Tuple[str, Callable[[], T]]],
+    is_valid: Callable[[T], bool],
+    hedge_delay: Callable[[str], Optional[float]],
+    on_result: Optional[Callable[[str, bool, float, Optional[str]], None]] = None,
+) -> HedgeResult[T]:
+    """
+    按顺序执行多个等价请求，超过对冲等待时间后并行发起下一个，先返回有效结果者胜出
+
+    Args:
+        attempts: [(名称, 无参请求函数)]，按优先级排序
+        is_valid: 判断结果是否有效（无效视为失败，继续尝试下一个）
+        hedge_delay: 名称 -> 对冲等待秒数；返回 None 表示该请求不对冲（等待其完成或失败）
+        on_result: 每个请求完成时回调 (名称, 是否有效, 耗时, 错误信息)，
+                   落败但仍在执行的请求完成后也会回调（在工作线程中）
+
+    Returns:
+        HedgeResult；全部失败时 success 为 False，errors 记录各请求失败原因
+    """
+    result: HedgeResult[T] = HedgeResult()
+    if not attempts:
+        return result
+
+    executor = _get_executor()
+    pending: Dict[Future, Tuple[str, float]] = {}
+    next_index = 0
+
+    def _report(label: str, started: float, future: Future) -> None:
+        if future.cancelled() or on_result is None:
+            return
+        elapsed = time.time() - started
+        try:
+            value = future.result()
+            ok = is_valid(value)
+            error = None if ok else "invalid result"
+        except Exception as e:
+            ok, error = False, str(e)
+        try:
+            on_result(label, ok, elapsed, error)
+        except Exception as e:
+            logger.debug(f"[对冲] 结果回调异常: {e}")
+
+    def _launch() -> None:
+        nonlocal next_index
+        label, func = attempts[next_index]
+        next_index += 1
+        started = time.time()
+        future = executor.submit(func)
+        pending[future] = (label, started)
+        result.launched.append(label)
+        future.add_done_callback(lambda f, l=label, s=started: _report(l, s, f))
+
+    _launch()
+    while pending:
+        # 对冲计时以最近发起、仍在执行的请求为准
+        timeout = None
+        hedge_label, hedge_started = list(pending.values())[-1]
+        delay = hedge_delay(hedge_label) if next_index < len(attempts) else None
+        if delay is not None:
+            timeout = max(0.0, hedge_started + delay - time.time())
+
+        done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # 超过对冲等待时间仍未返回：并行发起下一个
+            result.hedged = True
+            logger.info(f"[对冲] {hedge_label} 超过 {delay:.2f}s 未返回，并行请求 {attempts[next_index][0]}")
+            _launch()
+            continue
+
+        for future in done:
+            label, _ = pending.pop(future)
+            try:
+                value = future.result()
+                if is_valid(value):
+                    result.label = label
+                    result.value = value
+                    break
+                result.errors.append(f"[{label}] 返回无效结果")
+            except Exception as e:
+                result.errors.append(f"[{label}] 失败: {e}")
+
+        if result.success:
+            # 落败请求：未开始的取消，执行中的忽略
+            for future in pending:
+                future.cancel()
+            return result
+
+        # 失败立即切换：当前没有在途请求时发起下一个
+        if not pending and next_index < len(attempts):
+            _launch()
+
+    return result
+
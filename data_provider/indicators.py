@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+向量化技术指标引擎
+===================================
+
+职责：
+1. 基于 NumPy 连续 float 数组计算 MA / 量比 / MACD / RSI，不产生中间 DataFrame 拷贝
+2. 数据源层（BaseFetcher._calculate_indicators）与趋势分析（StockTrendAnalyzer）共用同一实现，
+   两处口径保持与原 pandas 实现一致：
+   - 数据源口径：ma5/ma10/ma20 不足窗口按已有数据计算（min_periods=1），量比缺失填 1.0，保留 2 位小数
+   - 趋势分析口径：均线不足窗口为 NaN，MACD 为 adjust=False 的 EMA，RSI 为简单均值口径、缺失填 50
+3. 面板模式：所有函数同时接受一维数组（单只股票）与二维数组（行=股票，列=交易日），
+   二维时各行右对齐（最新交易日在最后一列），数据不足的股票在行首以 NaN 补齐（见 stack_panel）
+4. 流式模式：IndicatorState 保存单只股票的 EMA、滑动窗口与涨跌幅窗口，
+   新增一根 K 线时 O(1) 得到新指标，无需重算全部历史（状态由 stock_indicator_state 表持久化）
+
+输入应为已清洗、按日期升序的数据（行情中间不应有 NaN）。
+
+使用方式：
+    indicators = compute_trend_indicators(df['close'].to_numpy())
+    panel = stack_panel([df['close'].to_numpy() for df in frames])
+    panel_indicators = compute_trend_indicators(panel)
+
+    state = IndicatorState.from_frame(history_df)
+    values = state.update(close, volume, bar_date)
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 数据源层输出的均线窗口
+PRICE_MA_WINDOWS = (5, 10, 20)
+# 趋势分析使用的均线窗口
+TREND_MA_WINDOWS = (5, 10, 20, 60)
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIODS = (6, 12, 24)
+
+
+def _as_float_array(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def stack_panel(series: Iterable[Sequence[float]], length: Optional[int] = None) -> np.ndarray:
+    """
+    将多只股票的序列拼成右对齐的二维面板
+
+    Args:
+        series: 每只股票一条按日期升序的序列
+        length: 面板列数（默认取最长序列长度），超出部分只保留最近 length 个交易日
+
+    Returns:
+        shape = (股票数, length) 的 float64 数组，行首不足部分为 NaN
+    """
+    arrays = [_as_float_array(s).ravel() for s in series]
+    if length is None:
+        length = max((len(a) for a in arrays), default=0)
+    panel = np.full((len(arrays), length), np.nan)
+    for i, arr in enumerate(arrays):
+        arr = arr[-length:] if length else arr[:0]
+        if len(arr):
+            panel[i, length - len(arr):] = arr
+    return panel
+
+
+def attach_indicators(df: pd.DataFrame, indicators: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    将一维指标数组作为新列拼接到 DataFrame（返回新对象，不修改原 DataFrame）
+
+    一次性拼接整块列，替代逐列赋值 / assign 产生的多次内部拷贝；同名旧列会被替换
+    """
+    stale = [col for col in indicators if col in df.columns]
+    base = df.drop(columns=stale) if stale else df
+    return pd.concat([base, pd.DataFrame(indicators, index=df.index)], axis=1)
+
+
+def rolling_mean(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    沿最后一维计算滑动均值（忽略 NaN，语义同 pandas rolling(window, min_periods).mean()）
+
+    逐窗直接求和（滑动窗口视图）而非累加和相减，避免长序列的抵消误差
+    （如 RSI 中全为 0 的跌幅窗口必须得到精确的 0）；一维按单行面板计算，
+    保证单只与面板结果逐位一致（价格保留 2 位小数时均线相等的判断不会因求和顺序翻转）
+    """
+    arr = _as_float_array(values)
+    if arr.ndim == 1:
+        return rolling_mean(arr[np.newaxis, :], window, min_periods)[0]
+    if min_periods is None:
+        min_periods = window
+    length = arr.shape[-1]
+    if length == 0:
+        return arr.copy()
+    valid = ~np.isnan(arr)
+    complete = bool(valid.all())
+    filled = arr if complete else np.where(valid, arr, 0.0)
+    pad = [(0, 0)] * (arr.ndim - 1) + [(window - 1, 0)]
+    sums = sliding_window_view(np.pad(filled, pad), window, axis=-1).sum(axis=-1)
+
+    if complete:
+        counts = np.minimum(np.arange(1, length + 1), window)
+    else:
+        counts = sliding_window_view(np.pad(valid, pad), window, axis=-1).sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = sums / counts
+    out[np.broadcast_to(counts < min_periods, out.shape)] = np.nan
+    return out
+
+
+def ema(values, span: int) -> np.ndarray:
+    """
+    沿最后一维计算指数移动平均（语义同 pandas ewm(span, adjust=False).mean()）
+
+    递推 y[t] = (1 - α) * y[t-1] + α * x[t]，α = 2 / (span + 1)，从每行第一个有效值开始；
+    一维时逐元素递推，二维时按列递推、所有股票一次向量化计算
+    """
+    arr = _as_float_array(values)
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+
+    if arr.ndim == 1:
+        out = np.empty_like(arr)
+        prev = np.nan
+        for i, x in enumerate(arr.tolist()):
+            if x != x:
+                out[i] = prev
+                continue
+            prev = x if prev != prev else decay * prev + alpha * x
+            out[i] = prev
+        return out
+
+    out = np.empty_like(arr)
+    prev = np.full(arr.shape[:-1], np.nan)
+    for i in range(arr.shape[-1]):
+        x = arr[..., i]
+        step = decay * prev + alpha * x
+        prev = np.where(np.isnan(prev), x, np.where(np.isnan(x), prev, step))
+        out[..., i] = prev
+    return out
+
+
+def compute_price_indicators(close, volume) -> Dict[str, np.ndarray]:
+    """
+    计算数据源层标准指标（BaseFetcher 口径）
+
+    Returns:
+        {'ma5', 'ma10', 'ma20', 'volume_ratio'}，均保留 2 位小数
+        - 均线不足窗口时按已有数据计算
+        - 量比 = 当日成交量 / 前 5 日平均成交量，无法计算时为 1.0
+    """
+    close = _as_float_array(close)
+    volume = _as_float_array(volume)
+
+    result = {
+        f'ma{window}': np.round(rolling_mean(close, window, min_periods=1), 2)
+        for window in PRICE_MA_WINDOWS
+    }
+
+    avg_volume_5 = rolling_mean(volume, 5, min_periods=1)
+    prev_avg = np.full_like(avg_volume_5, np.nan)
+    prev_avg[..., 1:] = avg_volume_5[..., :-1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volume_ratio = volume / prev_avg
+    volume_ratio[np.isnan(volume_ratio)] = 1.0
+    result['volume_ratio'] = np.round(volume_ratio, 2)
+    return result
+
+
+def compute_trend_indicators(
+    close,
+    macd_fast: int = MACD_FAST,
+    macd_slow: int = MACD_SLOW,
+    macd_signal: int = MACD_SIGNAL,
+    rsi_periods: Sequence[int] = RSI_PERIODS,
+) -> Dict[str, np.ndarray]:
+    """
+    计算趋势分析指标（StockTrendAnalyzer 口径）
+
+    Returns:
+        {'MA5', 'MA10', 'MA20', 'MA60', 'MACD_DIF', 'MACD_DEA', 'MACD_BAR', 'RSI_6', ...}
+        - 均线不足窗口为 NaN；数据不足 60 日的股票 MA60 使用 MA20 替代
+        - MACD_BAR = (DIF - DEA) * 2
+        - RSI 使用简单均值口径，无法计算时为 50（面板补齐位置保持 NaN）
+    """
+    close = _as_float_array(close)
+    result: Dict[str, np.ndarray] = {}
+
+    for window in TREND_MA_WINDOWS:
+        result[f'MA{window}'] = rolling_mean(close, window)
+    # 数据不足 60 日时使用 MA20 替代（面板模式按行判断）
+    short = np.count_nonzero(~np.isnan(close), axis=-1) < 60
+    if np.ndim(short) == 0:
+        if short:
+            result['MA60'] = result['MA20'].copy()
+    elif short.any():
+        result['MA60'][short] = result['MA20'][short]
+
+    dif = ema(close, macd_fast) - ema(close, macd_slow)
+    dea = ema(dif, macd_signal)
+    result['MACD_DIF'] = dif
+    result['MACD_DEA'] = dea
+    result['MACD_BAR'] = (dif - dea) * 2
+
+    # 价格变化只计算一次，三个周期共用
+    padded = np.isnan(close)
+    delta = np.full_like(close, np.nan)
+    delta[..., 1:] = close[..., 1:] - close[..., :-1]
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[padded] = np.nan
+    loss[padded] = np.nan
+    for period in rsi_periods:
+        avg_gain = rolling_mean(gain, period)
+        avg_loss = rolling_mean(loss, period)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi[np.isnan(rsi)] = 50.0
+        rsi[padded] = np.nan
+        result[f'RSI_{period}'] = rsi
+    return result
+
+
+# 流式状态保留的最近趋势指标行数（趋势分析回看到倒数第 5 根 K 线）
+STATE_RECENT_BARS = 5
+TREND_KEYS = (
+    [f'MA{window}' for window in TREND_MA_WINDOWS]
+    + ['MACD_DIF', 'MACD_DEA', 'MACD_BAR']
+    + [f'RSI_{period}' for period in RSI_PERIODS]
+)
+
+
+def _date_key(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _ema_step(prev: Optional[float], value: float, span: int) -> float:
+    if prev is None:
+        return value
+    alpha = 2.0 / (span + 1.0)
+    return (1.0 - alpha) * prev + alpha * value
+
+
+@dataclass
+class IndicatorState:
+    """
+    单只股票的流式指标状态
+
+    保存推进下一根 K 线所需的最小信息：
+    - closes / volumes：最近 60 个收盘价、最近 5 个成交量（均线与量比窗口）
+    - gains / losses：最近 24 个涨跌幅（RSI 简单均值窗口）
+    - ema_fast / ema_slow / dea：MACD 递推值
+    - recent：最近 STATE_RECENT_BARS 根 K 线的趋势指标（供趋势分析判断金叉、均线发散）
+
+    update() 的结果与对同一段历史调用 compute_price_indicators / compute_trend_indicators
+    的最后一行一致（EMA 从状态建立时的第一根 K 线开始递推）。
+    """
+
+    last_date: Optional[str] = None
+    bars: int = 0
+    closes: List[float] = field(default_factory=list)
+    volumes: List[float] = field(default_factory=list)
+    gains: List[float] = field(default_factory=list)
+    losses: List[float] = field(default_factory=list)
+    ema_fast: Optional[float] = None
+    ema_slow: Optional[float] = None
+    dea: Optional[float] = None
+    recent: List[Dict[str, float]] = field(default_factory=list)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'IndicatorState':
+        """按日期顺序回放整段历史建立状态（需包含 date / close / volume 列）"""
+        state = cls()
+        frame = df.sort_values('date') if 'date' in df.columns else df
+        for close, volume in zip(
+            frame['close'].to_numpy(dtype=float).tolist(),
+            frame['volume'].to_numpy(dtype=float).tolist(),
+        ):
+            state.update(close, volume)
+        if 'date' in frame.columns and len(frame):
+            state.last_date = _date_key(frame['date'].iloc[-1])
+        return state
+
+    def update(self, close: float, volume: float, bar_date: Any = None) -> Dict[str, float]:
+        """
+        推进一根新 K 线并返回该 K 线的全部指标
+
+        Returns:
+            数据源口径（ma5/ma10/ma20/volume_ratio）与趋势分析口径（MA5.../MACD_*/RSI_*）合并的字典
+        """
+        close = float(close)
+        volume = float(volume)
+
+        # 量比：当日成交量 / 此前 5 日平均成交量
+        prev_avg = np.float64(sum(self.volumes) / len(self.volumes)) if self.volumes else np.float64('nan')
+        with np.errstate(invalid='ignore', divide='ignore'):
+            volume_ratio = float(np.float64(volume) / prev_avg)
+        if math.isnan(volume_ratio):
+            volume_ratio = 1.0
+
+        if self.closes:
+            delta = close - self.closes[-1]
+            self.gains.append(delta if delta > 0 else 0.0)
+            self.losses.append(-delta if delta < 0 else 0.0)
+        else:
+            self.gains.append(0.0)
+            self.losses.append(0.0)
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.bars += 1
+        del self.closes[:-max(TREND_MA_WINDOWS)]
+        del self.volumes[:-5]
+        del self.gains[:-max(RSI_PERIODS)]
+        del self.losses[:-max(RSI_PERIODS)]
+
+        values: Dict[str, float] = {
+            f'ma{window}': float(np.round(self._mean(self.closes, window, partial=True), 2))
+            for window in PRICE_MA_WINDOWS
+        }
+        values['volume_ratio'] = float(np.round(volume_ratio, 2))
+
+        trend: Dict[str, float] = {
+            f'MA{window}': self._mean(self.closes, window) for window in TREND_MA_WINDOWS
+        }
+        if self.bars < 60:
+            trend['MA60'] = trend['MA20']
+
+        self.ema_fast = _ema_step(self.ema_fast, close, MACD_FAST)
+        self.ema_slow = _ema_step(self.ema_slow, close, MACD_SLOW)
+        dif = self.ema_fast - self.ema_slow
+        self.dea = _ema_step(self.dea, dif, MACD_SIGNAL)
+        trend['MACD_DIF'] = dif
+        trend['MACD_DEA'] = self.dea
+        trend['MACD_BAR'] = (dif - self.dea) * 2
+
+        for period in RSI_PERIODS:
+            trend[f'RSI_{period}'] = self._rsi(period)
+
+        self.recent.append(trend)
+        del self.recent[:-STATE_RECENT_BARS]
+        if bar_date is not None:
+            self.last_date = _date_key(bar_date)
+        values.update(trend)
+        return values
+
+    def _mean(self, window_values: List[float], window: int, partial: bool = False) -> float:
+        tail = window_values[-window:]
+        if len(tail) < window and not (partial and tail):
+            return float('nan')
+        return sum(tail) / len(tail)
+
+    def _rsi(self, period: int) -> float:
+        if self.bars < period:
+            return 50.0
+        avg_gain = sum(self.gains[-period:]) / period
+        avg_loss = sum(self.losses[-period:]) / period
+        if avg_loss == 0:
+            return 50.0 if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def copy(self) -> 'IndicatorState':
+        return IndicatorState.from_dict(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转为可 JSON 序列化的字典（NaN 以 None 表示）"""
+        return {
+            'last_date': self.last_date,
+            'bars': self.bars,
+            'closes': list(self.closes),
+            'volumes': list(self.volumes),
+            'gains': list(self.gains),
+            'losses': list(self.losses),
+            'ema_fast': self.ema_fast,
+            'ema_slow': self.ema_slow,
+            'dea': self.dea,
+            'recent': [
+                {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in row.items()}
+                for row in self.recent
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'IndicatorState':
+        return cls(
+            last_date=data.get('last_date'),
+            bars=int(data.get('bars', 0)),
+            closes=list(data.get('closes', [])),
+            volumes=list(data.get('volumes', [])),
+            gains=list(data.get('gains', [])),
+            losses=list(data.get('losses', [])),
+            ema_fast=data.get('ema_fast'),
+            ema_slow=data.get('ema_slow'),
+            dea=data.get('dea'),
+            recent=[
+                {k: (float('nan') if v is None else float(v)) for k, v in row.items()}
+                for row in data.get('recent', [])
+            ],
+        )
+
+    def matches(self, last_date: Any) -> bool:
+        """状态是否恰好推进到 last_date（与已存储历史对齐时才可继续推进）"""
+        return self.bars > 0 and self.last_date is not None and self.last_date == _date_key(last_date)
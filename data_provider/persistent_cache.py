@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+持久化缓存后端（跨进程 / 跨重启共享）
+===================================
+
+职责：
+1. 为全量行情快照、搜索结果、股票名称等缓存提供可插拔的持久化后端
+2. 默认使用 SQLite 文件（WAL 模式），CLI 定时任务、FastAPI 服务、机器人进程共享同一份热数据
+3. 每个键独立 TTL；值以 pickle + zlib 压缩存储（DataFrame 按列块序列化，体积紧凑）
+
+后端选择（CACHE_BACKEND）：
+- sqlite: 默认，文件路径由 CACHE_PATH 指定（未配置时与 DATABASE_PATH 同目录的 cache.db）
+- memory: 仅进程内有效（主要用于测试）
+- none: 关闭持久化缓存
+
+注意：缓存文件与数据库文件同属本地可信数据，不要加载来源不明的缓存文件。
+持久化缓存是尽力而为的加速手段，任何读写异常都只记录日志并按未命中处理。
+"""
+
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 股票名称几乎不变，持久化一周
+STOCK_NAME_TTL = 7 * 24 * 3600
+# 股票所属行业极少变动，持久化 30 天
+STOCK_SECTOR_TTL = 30 * 24 * 3600
+
+
+def _encode(value: Any) -> bytes:
+    return zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+def _decode(payload: bytes) -> Any:
+    return pickle.loads(zlib.decompress(payload))
+
+
+class CacheBackend(ABC):
+    """
+    持久化缓存后端抽象
+
+    所有读取方法返回 (值, 写入时间)，过期或不存在时返回 None，
+    调用方可根据写入时间自行判断是否足够新鲜（如全量快照按自身 TTL 判断）。
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """读取单个键"""
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        """批量读取，返回命中的 {键: (值, 写入时间)}"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """写入单个键（ttl 秒后过期）"""
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        """批量写入（同一 TTL）"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除单个键"""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """清理过期条目，返回清理数量"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内缓存后端（不跨进程，主要用于测试与关闭持久化时的替身）"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, float, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            return value, stored_at
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        result = {}
+        for key in keys:
+            entry = self.get(key)
+            if entry is not None:
+                result[key] = entry
+        return result
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (value, now, now + ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                del self._entries[key]
+        return len(expired)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    SQLite 文件缓存后端
+
+    - WAL 模式 + busy_timeout：多个进程可同时读写同一文件
+    - 单连接 + 进程内锁：线程安全
+    - 打开时顺带清理过期条目，文件不会无限增长
+    """
+
+    # SQLite 单条语句的变量上限保守值
+    _IN_CHUNK_SIZE = 500
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+        purged = self.purge_expired()
+        if purged:
+            logger.debug(f"[持久缓存] 清理过期条目 {purged} 条")
+
+    def _decode_row(self, key: str, payload: bytes, stored_at: float) -> Optional[Tuple[Any, float]]:
+        try:
+            return _decode(payload), stored_at
+        except Exception as e:
+            # 版本升级等原因导致无法反序列化：按未命中处理并删除
+            logger.debug(f"[持久缓存] 无法解析缓存 {key}，已丢弃: {e}")
+            self.delete(key)
+            return None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, stored_at FROM cache_entries WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"[持久缓存] 读取 {key} 失败: {e}")
+            return None
+        if row is None:
+            return None
+        return self._decode_row(key, row[0], row[1])
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, float]]:
+        keys = list(dict.fromkeys(keys))
+        rows = []
+        try:
+            with self._lock:
+                now = time.time()
+                for i in range(0, len(keys), self._IN_CHUNK_SIZE):
+                    chunk = keys[i:i + self._IN_CHUNK_SIZE]
+                    placeholders = ','.join('?' * len(chunk))
+                    rows.extend(self._conn.execute(
+                        f"SELECT key, value, stored_at FROM cache_entries "
+                        f"WHERE key IN ({placeholders}) AND expires_at > ?",
+                        (*chunk, now),
+                    ).fetchall())
+        except sqlite3.Error as e:
+            logger.debug(f"[持久缓存] 批量读取失败: {e}")
+            return {}
+
+        result = {}
+        for key, payload, stored_at in rows:
+            entry = self._decode_row(key, payload, stored_at)
+            if entry is not None:
+                result[key] = entry
+        return result
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items: Dict[str, Any], ttl: float) -> None:
+        if not items:
+            return
+        now = time.time()
+        try:
+            rows = [(key, sqlite3.Binary(_encode(value)), now, now + ttl) for key, value in items.items()]
+        except Exception as e:
+            logger.debug(f"[持久缓存] 序列化失败，跳过写入: {e}")
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"[持久缓存] 写入失败: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._lock:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.debug(f"[持久缓存] 删除 {key} 失败: {e}")
+
+    def purge_expired(self) -> int:
+        try:
+            with self._lock:
+                cursor = self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+                self._conn.commit()
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.debug(f"[持久缓存] 清理过期条目失败: {e}")
+            return 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PersistentMapping:
+    """
+    带持久化后备的字典缓存（写穿透）
+
+    用于替换各数据源中的 _stock_name_cache 等普通 dict：
+    - 读取先查内存，未命中再查持久化后端并回填内存
+    - 写入同时写内存与后端
+    """
+
+    def __init__(self, namespace: str, ttl: float, backend: Optional[CacheBackend] = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._backend = backend
+        self._data: Dict[str, Any] = {}
+
+    def _get_backend(self) -> Optional[CacheBackend]:
+        return self._backend if self._backend is not None else get_persistent_cache()
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self._data:
+            return self._data[key]
+        backend = self._get_backend()
+        if backend is not None:
+            entry = backend.get(self._key(key))
+            if entry is not None:
+                self._data[key] = entry[0]
+                return entry[0]
+        return default
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """批量读取（后端单次查询）"""
+        keys = list(keys)
+        result = {key: self._data[key] for key in keys if key in self._data}
+        missing = [key for key in keys if key not in result]
+        backend = self._get_backend()
+        if missing and backend is not None:
+            for full_key, (value, _) in backend.get_many(self._key(k) for k in missing).items():
+                key = full_key[len(self.namespace) + 1:]
+                self._data[key] = value
+                result[key] = value
+        return result
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._data[key] = value
+        backend = self._get_backend()
+        if backend is not None:
+            backend.set(self._key(key), value, self.ttl)
+
+    def update(self, items: Dict[str, Any]) -> None:
+        """批量写入（后端单次事务）"""
+        if not items:
+            return
+        self._data.update(items)
+        backend = self._get_backend()
+        if backend is not None:
+            backend.set_many({self._key(k): v for k, v in items.items()}, self.ttl)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def create_cache_backend(kind: str, path: Optional[str] = None) -> Optional[CacheBackend]:
+    """
+    按类型创建缓存后端
+
+    Args:
+        kind: sqlite / memory / none
+        path: SQLite 文件路径
+    """
+    kind = (kind or 'sqlite').strip().lower()
+    if kind in ('none', 'off', 'disabled', 'false'):
+        return None
+    if kind == 'memory':
+        return MemoryCacheBackend()
+    if kind != 'sqlite':
+        logger.warning(f"[持久缓存] 未知的缓存后端 {kind}，使用 sqlite")
+    return SQLiteCacheBackend(path or './data/cache.db')
+
+
+def resolve_cache_path(config: Any) -> str:
+    """缓存文件路径：优先 CACHE_PATH，否则与数据库同目录的 cache.db"""
+    explicit = getattr(config, 'cache_path', '') or ''
+    if explicit:
+        return explicit
+    database_path = getattr(config, 'database_path', '') or './data/stock_analysis.db'
+    return str(Path(database_path).parent / 'cache.db')
+
+
+# === 全局后端 ===
+_backend: Optional[CacheBackend] = None
+_backend_initialized = False
+_backend_lock = threading.Lock()
+
+
+def get_persistent_cache() -> Optional[CacheBackend]:
+    """获取进程级持久化缓存后端（首次调用时按全局配置初始化；关闭或初始化失败时返回 None）"""
+    global _backend, _backend_initialized
+    if not _backend_initialized:
+        with _backend_lock:
+            if not _backend_initialized:
+                try:
+                    from src.config import get_config
+                    config = get_config()
+                    _backend = create_cache_backend(
+                        getattr(config, 'cache_backend', 'sqlite'), resolve_cache_path(config)
+                    )
+                    if isinstance(_backend, SQLiteCacheBackend):
+                        logger.info(f"[持久缓存] 使用 SQLite 缓存: {_backend.path}")
+                except Exception as e:
+                    logger.warning(f"[持久缓存] 初始化失败，仅使用内存缓存: {e}")
+                    _backend = None
+                _backend_initialized = True
+    return _backend
+
+
+def reset_persistent_cache() -> None:
+    """重置全局后端（主要用于测试）"""
+    global _backend, _backend_initialized
+    with _backend_lock:
+        if isinstance(_backend, SQLiteCacheBackend):
+            _backend.close()
+        _backend = None
+        _backend_initialized = False
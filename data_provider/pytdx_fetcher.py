@@ -9,16 +9,17 @@ PytdxFetcher - 通达信数据源 (Priority 2)
 优点：实时数据、稳定、无配额限制
 
 关键策略：
-1. 多服务器自动切换
-2. 连接超时自动重连
+1. 多服务器自动切换（按实测耗时排序）
+2. 长连接池复用 TCP 连接，连接异常自动重连
 3. 失败后指数退避重试
+4. 批量接口在同一连接上拉取多只股票日线
 """
 
 import logging
 import re
 from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Generator, List, Tuple
+from typing import Dict, Optional, Generator, List, Tuple
 
 import pandas as pd
 from tenacity import (
@@ -30,6 +31,9 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .persistent_cache import PersistentMapping, STOCK_NAME_TTL
+from .rate_limiter import fetcher_upstream, get_rate_limiter_registry
+from .tdx_pool import TdxConnectionPool, get_tdx_pool
 import os
 
 logger = logging.getLogger(__name__)
@@ -55,8 +59,8 @@ class PytdxFetcher(BaseFetcher):
     数据来源：通达信行情服务器
     
     关键策略：
-    - 自动选择最优服务器
-    - 连接失败自动切换服务器
+    - 自动选择最优服务器（按实测连接/响应耗时）
+    - 长连接池复用连接，连接失败自动切换服务器
     - 失败后指数退避重试
     
     Pytdx 特点：
@@ -68,6 +72,8 @@ class PytdxFetcher(BaseFetcher):
     
     name = "PytdxFetcher"
     priority = int(os.getenv("PYTDX_PRIORITY", "2"))
+    # 长连接池大小（进程内所有 PytdxFetcher 共用）
+    pool_size = int(os.getenv("PYTDX_POOL_SIZE", "4"))
     
     # 默认通达信行情服务器列表
     DEFAULT_HOSTS = [
@@ -89,11 +95,9 @@ class PytdxFetcher(BaseFetcher):
             hosts: 服务器列表 [(host, port), ...]，默认使用内置列表
         """
         self._hosts = hosts or self.DEFAULT_HOSTS
-        self._api = None
-        self._connected = False
-        self._current_host_idx = 0
+        self._pool: Optional[TdxConnectionPool] = None
         self._stock_list_cache = None  # 股票列表缓存
-        self._stock_name_cache = {}    # 股票名称缓存 {code: name}
+        self._stock_name_cache = PersistentMapping('stock_name', ttl=STOCK_NAME_TTL)  # 股票名称缓存 {code: name}（持久化）
     
     def _get_pytdx(self):
         """
@@ -108,55 +112,36 @@ class PytdxFetcher(BaseFetcher):
             logger.warning("pytdx 未安装，请运行: pip install pytdx")
             return None
     
+    def _get_pool(self) -> TdxConnectionPool:
+        """获取通达信长连接池（延迟创建）"""
+        if self._pool is None:
+            TdxHq_API = self._get_pytdx()
+            if TdxHq_API is None:
+                raise DataFetchError("pytdx 库未安装")
+            # heartbeat: 空闲时由 pytdx 后台发送心跳包保持连接
+            self._pool = get_tdx_pool(
+                self._hosts,
+                lambda: TdxHq_API(heartbeat=True, raise_exception=True),
+                max_size=self.pool_size,
+            )
+        return self._pool
+    
     @contextmanager
     def _pytdx_session(self) -> Generator:
         """
         Pytdx 连接上下文管理器
         
-        确保：
-        1. 进入上下文时自动连接
-        2. 退出上下文时自动断开
-        3. 异常时也能正确断开
+        从长连接池借出一个已连接的 API：
+        1. 进入上下文时复用空闲连接（必要时探活或新建连接）
+        2. 退出上下文时归还连接，不再断开
+        3. 连接异常时丢弃该连接，下次借出时自动重连
         
         使用示例：
             with self._pytdx_session() as api:
                 # 在这里执行数据查询
         """
-        TdxHq_API = self._get_pytdx()
-        if TdxHq_API is None:
-            raise DataFetchError("pytdx 库未安装")
-        
-        api = TdxHq_API()
-        connected = False
-        
-        try:
-            # 尝试连接服务器（自动选择最优）
-            for i in range(len(self._hosts)):
-                host_idx = (self._current_host_idx + i) % len(self._hosts)
-                host, port = self._hosts[host_idx]
-                
-                try:
-                    if api.connect(host, port, time_out=5):
-                        connected = True
-                        self._current_host_idx = host_idx
-                        logger.debug(f"Pytdx 连接成功: {host}:{port}")
-                        break
-                except Exception as e:
-                    logger.debug(f"Pytdx 连接 {host}:{port} 失败: {e}")
-                    continue
-            
-            if not connected:
-                raise DataFetchError("Pytdx 无法连接任何服务器")
-            
+        with self._get_pool().session() as api:
             yield api
-            
-        finally:
-            # 确保断开连接
-            try:
-                api.disconnect()
-                logger.debug("Pytdx 连接已断开")
-            except Exception as e:
-                logger.warning(f"Pytdx 断开连接时出错: {e}")
     
     def _get_market_code(self, stock_code: str) -> Tuple[int, str]:
         """
@@ -201,9 +186,8 @@ class PytdxFetcher(BaseFetcher):
         
         流程：
         1. 检查是否为美股（不支持）
-        2. 使用上下文管理器管理连接
-        3. 判断市场代码
-        4. 调用 API 获取 K 线数据
+        2. 判断市场代码
+        3. 在池化连接上调用 API 获取 K 线数据（连接异常自动重连一次）
         """
         # 美股不支持，抛出异常让 DataFetcherManager 切换到其他数据源
         if _is_us_code(stock_code):
@@ -212,42 +196,120 @@ class PytdxFetcher(BaseFetcher):
         market, code = self._get_market_code(stock_code)
         
         # 计算需要获取的交易日数量（估算）
-        from datetime import datetime as dt
-        start_dt = dt.strptime(start_date, '%Y-%m-%d')
-        end_dt = dt.strptime(end_date, '%Y-%m-%d')
-        days = (end_dt - start_dt).days
-        count = min(max(days * 5 // 7 + 10, 30), 800)  # 估算交易日，最大 800 条
+        count = self._estimate_bar_count(start_date, end_date)
         
         logger.debug(f"调用 Pytdx get_security_bars(market={market}, code={code}, count={count})")
         
-        with self._pytdx_session() as api:
+        try:
+            return self._get_pool().call(
+                lambda api: self._query_daily_bars(api, market, code, count, start_date, end_date)
+            )
+        except DataFetchError:
+            raise
+        except Exception as e:
+            raise DataFetchError(f"Pytdx 获取数据失败: {e}") from e
+    
+    @staticmethod
+    def _estimate_bar_count(start_date: str, end_date: str) -> int:
+        """按日期范围估算需要的日线条数（最大 800 条）"""
+        days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days
+        return min(max(days * 5 // 7 + 10, 30), 800)
+    
+    @staticmethod
+    def _query_daily_bars(api, market: int, code: str, count: int, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        在已连接的 API 上查询日线并按日期范围过滤
+        
+        连接异常原样抛出（由连接池丢弃该连接）；无数据抛出 DataFetchError
+        """
+        # category: 9-日线, 0-5分钟, 1-15分钟, 2-30分钟, 3-1小时
+        data = api.get_security_bars(
+            category=9,  # 日线
+            market=market,
+            code=code,
+            start=0,  # 从最新开始
+            count=count
+        )
+        
+        if data is None or len(data) == 0:
+            raise DataFetchError(f"Pytdx 未查询到 {code} 的数据")
+        
+        # 转换为 DataFrame
+        df = api.to_df(data)
+        
+        # 过滤日期范围
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        return df[(df['datetime'] >= start_date) & (df['datetime'] <= end_date)]
+    
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取日线数据（同一连接上依次查询，省去逐只建连开销）
+        
+        中途连接异常时换一个连接继续剩余股票（最多重连一次）；
+        单只股票无数据或失败时跳过，不影响其他股票
+        
+        Args:
+            stock_codes: 股票代码列表（美股自动跳过）
+            start_date / end_date / days: 同 get_daily_data
+            
+        Returns:
+            {股票代码: 标准化并计算技术指标后的 DataFrame}
+        """
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        if start_date is None:
+            from datetime import timedelta
+            start_date = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)).strftime('%Y-%m-%d')
+        
+        count = self._estimate_bar_count(start_date, end_date)
+        pending = [
+            (stock_code, *self._get_market_code(stock_code))
+            for stock_code in dict.fromkeys(stock_codes) if not _is_us_code(stock_code)
+        ]
+        raw: Dict[str, pd.DataFrame] = {}
+        if not pending:
+            return {}
+        
+        with get_rate_limiter_registry().limit(fetcher_upstream(self.name)):
+            for attempt in range(2):
+                try:
+                    with self._pytdx_session() as api:
+                        while pending:
+                            stock_code, market, code = pending[0]
+                            try:
+                                raw[stock_code] = self._query_daily_bars(api, market, code, count, start_date, end_date)
+                            except DataFetchError as e:
+                                logger.debug(f"[{self.name}] 批量获取 {stock_code} 无数据: {e}")
+                            pending.pop(0)
+                    break
+                except DataFetchError as e:
+                    # 连接池无法提供连接
+                    logger.warning(f"[{self.name}] 批量获取中止: {e}")
+                    break
+                except Exception as e:
+                    if attempt == 0:
+                        logger.warning(f"[{self.name}] 批量获取连接异常，重连后继续（剩余 {len(pending)} 只）: {e}")
+                    else:
+                        logger.warning(f"[{self.name}] 批量获取失败，放弃剩余 {len(pending)} 只: {e}")
+        
+        results: Dict[str, pd.DataFrame] = {}
+        for stock_code, raw_df in raw.items():
+            if raw_df.empty:
+                continue
             try:
-                # 获取日 K 线数据
-                # category: 9-日线, 0-5分钟, 1-15分钟, 2-30分钟, 3-1小时
-                data = api.get_security_bars(
-                    category=9,  # 日线
-                    market=market,
-                    code=code,
-                    start=0,  # 从最新开始
-                    count=count
-                )
-                
-                if data is None or len(data) == 0:
-                    raise DataFetchError(f"Pytdx 未查询到 {stock_code} 的数据")
-                
-                # 转换为 DataFrame
-                df = api.to_df(data)
-                
-                # 过滤日期范围
-                df['datetime'] = pd.to_datetime(df['datetime'])
-                df = df[(df['datetime'] >= start_date) & (df['datetime'] <= end_date)]
-                
-                return df
-                
+                df = self._clean_data(self._normalize_data(raw_df, stock_code))
+                results[stock_code] = self._calculate_indicators(df)
             except Exception as e:
-                if isinstance(e, DataFetchError):
-                    raise
-                raise DataFetchError(f"Pytdx 获取数据失败: {e}") from e
+                logger.warning(f"[{self.name}] 批量获取 {stock_code} 处理失败: {e}")
+        
+        logger.info(f"[{self.name}] 批量获取日线完成: {len(results)}/{len(stock_codes)} 只")
+        return results
     
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场实时行情快照索引
+===================================
+
+设计目标：
+1. 全量行情接口（stock_zh_a_spot_em / fund_etf_spot_em / ef.stock.get_realtime_quotes）
+   刷新时一次性转换为按代码索引的结构，后续单股查询为 O(1) 哈希命中
+2. 数值列在构建时向量化转换（pd.to_numeric），避免每次查询重复 row.get + safe_float
+3. 查询结果直接返回 UnifiedRealtimeQuote（返回副本，调用方修改不影响快照）
+
+使用方式：
+    snapshot = RealtimeQuoteSnapshot(df, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS, code_column='代码')
+    quote = snapshot.get('600519')
+"""
+
+import copy
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .realtime_types import RealtimeSource, UnifiedRealtimeQuote
+from .snapshot_cache import SingleFlightCache
+
+logger = logging.getLogger(__name__)
+
+
+# 字段映射：UnifiedRealtimeQuote 字段 -> 列名（或候选列名，取第一个存在的列）
+ColumnSpec = Union[str, Sequence[str]]
+
+# 东财 A 股全量行情（ak.stock_zh_a_spot_em）
+AKSHARE_EM_STOCK_FIELDS: Dict[str, ColumnSpec] = {
+    'name': '名称',
+    'price': '最新价',
+    'change_pct': '涨跌幅',
+    'change_amount': '涨跌额',
+    'volume': '成交量',
+    'amount': '成交额',
+    'volume_ratio': '量比',
+    'turnover_rate': '换手率',
+    'amplitude': '振幅',
+    'open_price': '今开',
+    'high': '最高',
+    'low': '最低',
+    'pe_ratio': '市盈率-动态',
+    'pb_ratio': '市净率',
+    'total_mv': '总市值',
+    'circ_mv': '流通市值',
+    'change_60d': '60日涨跌幅',
+    'high_52w': '52周最高',
+    'low_52w': '52周最低',
+}
+
+# 东财 ETF 全量行情（ak.fund_etf_spot_em）
+AKSHARE_EM_ETF_FIELDS: Dict[str, ColumnSpec] = {
+    'name': '名称',
+    'price': '最新价',
+    'change_pct': '涨跌幅',
+    'change_amount': '涨跌额',
+    'volume': '成交量',
+    'amount': '成交额',
+    'volume_ratio': '量比',
+    'turnover_rate': '换手率',
+    'amplitude': '振幅',
+    'open_price': '今开',
+    'high': '最高',
+    'low': '最低',
+    'total_mv': '总市值',
+    'circ_mv': '流通市值',
+    'high_52w': '52周最高',
+    'low_52w': '52周最低',
+}
+
+# efinance 全量行情（ef.stock.get_realtime_quotes），列名可能为中文或英文
+EFINANCE_STOCK_FIELDS: Dict[str, ColumnSpec] = {
+    'name': ('股票名称', 'name'),
+    'price': ('最新价', 'price'),
+    'change_pct': ('涨跌幅', 'pct_chg'),
+    'change_amount': ('涨跌额', 'change'),
+    'volume': ('成交量', 'volume'),
+    'amount': ('成交额', 'amount'),
+    'turnover_rate': ('换手率', 'turnover_rate'),
+    'amplitude': ('振幅', 'amplitude'),
+    'high': ('最高', 'high'),
+    'low': ('最低', 'low'),
+    'open_price': ('开盘', 'open'),
+    'volume_ratio': ('量比', 'volume_ratio'),
+    'pe_ratio': ('市盈率', 'pe_ratio'),
+    'total_mv': ('总市值', 'total_mv'),
+    'circ_mv': ('流通市值', 'circ_mv'),
+}
+
+# efinance ETF 行情（ef.stock.get_realtime_quotes(['ETF'])）
+EFINANCE_ETF_FIELDS: Dict[str, ColumnSpec] = {
+    key: value for key, value in EFINANCE_STOCK_FIELDS.items()
+    if key not in ('volume_ratio', 'pe_ratio', 'total_mv', 'circ_mv')
+}
+
+# 整数字段（其余数值字段按浮点处理）
+_INT_FIELDS = {'volume'}
+
+
+def _resolve_column(columns, spec: ColumnSpec) -> Optional[str]:
+    """从候选列名中选出 DataFrame 中实际存在的列"""
+    candidates = [spec] if isinstance(spec, str) else list(spec)
+    for col in candidates:
+        if col in columns:
+            return col
+    return None
+
+
+class RealtimeQuoteSnapshot:
+    """
+    全市场实时行情快照（按代码索引）
+
+    - 构建：O(N) 向量化转换，每次全量刷新执行一次
+    - 查询：O(1) 哈希命中，首次查询某代码时构建 UnifiedRealtimeQuote 并缓存
+    """
+
+    def __init__(
+        self,
+        df: Optional[pd.DataFrame],
+        source: RealtimeSource,
+        fields: Dict[str, ColumnSpec],
+        code_column: ColumnSpec = '代码',
+        code_width: int = 6,
+        timestamp: Optional[float] = None,
+    ):
+        """
+        Args:
+            df: 全量行情 DataFrame（可为空）
+            source: 数据来源
+            fields: 字段映射（UnifiedRealtimeQuote 字段 -> 列名/候选列名）
+            code_column: 代码列名（或候选列名）
+            code_width: 代码补零宽度（A 股/ETF 为 6 位）
+            timestamp: 快照时间（默认当前时间）
+        """
+        self.source = source
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.frame = df if df is not None else pd.DataFrame()
+        self._index: Dict[str, int] = {}
+        self._names: List[str] = []
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._quotes: Dict[str, UnifiedRealtimeQuote] = {}
+
+        if self.frame.empty:
+            return
+
+        code_col = _resolve_column(self.frame.columns, code_column)
+        if code_col is None:
+            logger.warning(f"[行情快照] 未找到代码列 {code_column}，快照为空")
+            return
+
+        codes = self.frame[code_col].astype(str).str.strip()
+        if code_width:
+            codes = codes.str.zfill(code_width)
+        # 重复代码保留第一条（与原 df[mask].iloc[0] 行为一致）
+        self._index = {code: i for i, code in reversed(list(enumerate(codes.tolist())))}
+
+        name_spec = fields.get('name')
+        name_col = _resolve_column(self.frame.columns, name_spec) if name_spec else None
+        if name_col is not None:
+            self._names = self.frame[name_col].fillna('').astype(str).tolist()
+
+        for field_name, spec in fields.items():
+            if field_name == 'name':
+                continue
+            col = _resolve_column(self.frame.columns, spec)
+            if col is None:
+                continue
+            self._numeric[field_name] = pd.to_numeric(self.frame[col], errors='coerce').to_numpy(dtype=float)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._index
+
+    @property
+    def empty(self) -> bool:
+        return not self._index
+
+    @property
+    def age(self) -> float:
+        """快照年龄（秒）"""
+        return time.time() - self.timestamp
+
+    def codes(self) -> List[str]:
+        """快照中的全部代码"""
+        return list(self._index.keys())
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        导出规范化的全市场行情表（向量化，不逐只构建 UnifiedRealtimeQuote）
+
+        Returns:
+            列为 code / name 及字段映射中实际存在的数值字段（UnifiedRealtimeQuote 字段名），
+            重复代码只保留第一条
+        """
+        if not self._index:
+            return pd.DataFrame(columns=['code', 'name'])
+        rows = np.fromiter(self._index.values(), dtype=np.int64, count=len(self._index))
+        data = {
+            'code': list(self._index.keys()),
+            'name': [self._names[i] for i in rows.tolist()] if self._names else '',
+        }
+        for field_name, array in self._numeric.items():
+            data[field_name] = array[rows]
+        return pd.DataFrame(data)
+
+    def get(self, code: str) -> Optional[UnifiedRealtimeQuote]:
+        """
+        按代码查询实时行情
+
+        Returns:
+            UnifiedRealtimeQuote 副本，代码不存在返回 None
+        """
+        quote = self._quotes.get(code)
+        if quote is None:
+            row = self._index.get(code)
+            if row is None:
+                return None
+            quote = self._build_quote(code, row)
+            self._quotes[code] = quote
+        return copy.copy(quote)
+
+    def _build_quote(self, code: str, row: int) -> UnifiedRealtimeQuote:
+        values = {}
+        for field_name, array in self._numeric.items():
+            value = array[row]
+            if math.isnan(value):
+                values[field_name] = None
+            elif field_name in _INT_FIELDS:
+                values[field_name] = int(value)
+            else:
+                values[field_name] = float(value)
+        name = self._names[row] if self._names else ''
+        return UnifiedRealtimeQuote(code=code, name=name, source=self.source, **values)
+
+
+def snapshot_for_cache(
+    cache: SingleFlightCache,
+    source: RealtimeSource,
+    fields: Dict[str, ColumnSpec],
+    code_column: ColumnSpec = '代码',
+) -> RealtimeQuoteSnapshot:
+    """
+    获取与行情缓存 DataFrame 对应的快照索引（缓存刷新后首次调用时重建）
+
+    快照作为缓存的派生结构保存，通过对象身份与缓存中的 DataFrame 绑定，
+    因此任何写入缓存的路径（包括 get_market_stats 顺带刷新）都会自动触发重建。
+    """
+    def _build(df: Optional[pd.DataFrame]) -> RealtimeQuoteSnapshot:
+        build_start = time.time()
+        snapshot = RealtimeQuoteSnapshot(
+            df, source, fields, code_column=code_column, timestamp=cache.timestamp or None
+        )
+        logger.debug(
+            f"[行情快照] {source.value} 索引已重建: {len(snapshot)} 只, 耗时 {time.time() - build_start:.3f}s"
+        )
+        return snapshot
+
+    return cache.derive('quote_snapshot', _build)
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+上游资源预算（并发 + 令牌桶限速）
+===================================
+
+职责：
+1. 为每个上游（数据源、搜索引擎 Key、LLM 模型）维护独立的并发上限与速率预算
+2. 进程内全局共享，所有 DataFetcherManager / SearchService / Pipeline 实例共用同一份预算
+3. 使用令牌桶精确计算等待时间，替代固定的 sleep
+
+上游命名约定（以冒号分层）：
+- 数据源：efinance / akshare / tushare / pytdx / baostock / yfinance
+- 搜索：search:<provider>:<key指纹>，例如 search:bocha:1a2b3c4d
+- LLM：llm:<model>，例如 llm:gemini-2.5-flash
+
+未注册的分层名称会按前缀继承上一级的预算参数（各自独立计数），
+例如 search:bocha:1a2b3c4d 未注册时继承 search:bocha，再不存在则继承 search。
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶
+
+    - rate: 每秒补充的令牌数
+    - capacity: 桶容量（允许的突发请求数）
+
+    采用“预约”方式：调用方在锁内扣减令牌并算出需要等待的时长，
+    锁外休眠，因此多个线程会按到达顺序被精确地错开，而非同时醒来争抢。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity and capacity > 0 else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def reserve(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        预约令牌，返回需要等待的秒数
+
+        Args:
+            tokens: 需要的令牌数
+            max_wait: 最长可接受的等待时间，超过则不预约并返回 None
+
+        Returns:
+            需要等待的秒数（0 表示立即可用），或 None（超过 max_wait）
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            deficit = tokens - self._tokens
+            wait = deficit / self.rate if deficit > 0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                return None
+            self._tokens -= tokens
+            return wait
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        获取令牌（阻塞直到可用）
+
+        Returns:
+            是否成功获取（仅在设置 timeout 且等待超时时返回 False）
+        """
+        wait = self.reserve(tokens, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """非阻塞获取令牌"""
+        return self.reserve(tokens, max_wait=0.0) is not None
+
+
+@dataclass
+class BudgetStats:
+    """预算使用统计"""
+    acquired: int = 0
+    total_wait: float = 0.0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'acquired': self.acquired,
+            'total_wait': round(self.total_wait, 3),
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+        }
+
+
+class UpstreamBudget:
+    """
+    单个上游的资源预算
+
+    - max_concurrency: 最大同时在途请求数（0 表示不限）
+    - rate_per_minute: 每分钟最大请求数（0 表示不限）
+    - burst: 令牌桶容量（默认 1，即请求严格均匀分布）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 0,
+        rate_per_minute: float = 0,
+        burst: Optional[float] = None,
+    ):
+        self.name = name
+        self.max_concurrency = max(0, int(max_concurrency))
+        self.rate_per_minute = max(0.0, float(rate_per_minute))
+        self.burst = burst
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency) if self.max_concurrency else None
+        self.bucket = (
+            TokenBucket(self.rate_per_minute / 60.0, burst or 1.0) if self.rate_per_minute else None
+        )
+        self.stats = BudgetStats()
+        self._stats_lock = threading.Lock()
+
+    @property
+    def params(self) -> Tuple[int, float, Optional[float]]:
+        return self.max_concurrency, self.rate_per_minute, self.burst
+
+    def wait_for_token(self) -> float:
+        """仅消耗一个速率令牌（不占用并发槽位），返回实际等待秒数"""
+        if self.bucket is None:
+            return 0.0
+        start = time.monotonic()
+        self.bucket.acquire()
+        waited = time.monotonic() - start
+        with self._stats_lock:
+            self.stats.total_wait += waited
+        return waited
+
+    @contextmanager
+    def slot(self, rate_limited: bool = True) -> Iterator[None]:
+        """
+        占用一个并发槽位，并（可选）消耗一个速率令牌
+
+        Args:
+            rate_limited: 是否同时消耗速率令牌
+        """
+        start = time.monotonic()
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            if rate_limited and self.bucket is not None:
+                self.bucket.acquire()
+            waited = time.monotonic() - start
+            with self._stats_lock:
+                self.stats.acquired += 1
+                self.stats.total_wait += waited
+                self.stats.in_flight += 1
+                self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+            if waited > 1.0:
+                logger.debug(f"[预算] {self.name} 等待 {waited:.2f}s 后获得配额")
+            try:
+                yield
+            finally:
+                with self._stats_lock:
+                    self.stats.in_flight -= 1
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+
+class RateLimiterRegistry:
+    """
+    进程级上游预算注册表
+
+    - register(): 注册/更新上游预算
+    - limit(): 以上下文管理器方式占用上游配额
+    - 未注册且无前缀可继承的上游不做任何限制
+    """
+
+    def __init__(self):
+        self._budgets: Dict[str, UpstreamBudget] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        max_concurrency: int = 0,
+        rate_per_minute: float = 0,
+        burst: Optional[float] = None,
+    ) -> UpstreamBudget:
+        """
+        注册上游预算（参数未变化时复用已有实例，保留统计与在途计数）
+        """
+        with self._lock:
+            existing = self._budgets.get(name)
+            if existing is not None and existing.params == (max(0, int(max_concurrency)), max(0.0, float(rate_per_minute)), burst):
+                return existing
+            budget = UpstreamBudget(name, max_concurrency, rate_per_minute, burst)
+            self._budgets[name] = budget
+            return budget
+
+    def get(self, name: str) -> Optional[UpstreamBudget]:
+        """
+        获取上游预算；未注册时按冒号分层向上查找可继承的预算参数并自动注册
+        """
+        with self._lock:
+            budget = self._budgets.get(name)
+            if budget is not None:
+                return budget
+            parts = name.split(':')
+            for i in range(len(parts) - 1, 0, -1):
+                parent = self._budgets.get(':'.join(parts[:i]))
+                if parent is not None:
+                    budget = UpstreamBudget(name, parent.max_concurrency, parent.rate_per_minute, parent.burst)
+                    self._budgets[name] = budget
+                    return budget
+        return None
+
+    @contextmanager
+    def limit(self, name: str, rate_limited: bool = True) -> Iterator[None]:
+        """
+        占用上游配额（未配置预算时直接放行）
+
+        用法：
+            with get_rate_limiter_registry().limit("tushare"):
+                api.daily(...)
+        """
+        budget = self.get(name) if name else None
+        if budget is None:
+            yield
+            return
+        with budget.slot(rate_limited=rate_limited):
+            yield
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回所有上游的预算参数与使用统计"""
+        with self._lock:
+            budgets = list(self._budgets.values())
+        return {
+            b.name: {
+                'max_concurrency': b.max_concurrency,
+                'rate_per_minute': b.rate_per_minute,
+                **b.stats.to_dict(),
+            }
+            for b in budgets
+        }
+
+    def configure(self, config: Any) -> None:
+        """
+        根据配置注册默认上游预算
+
+        优先级：UPSTREAM_BUDGETS 显式配置 > 默认值
+        """
+        budgets = build_default_budgets(config)
+        budgets.update(parse_budget_spec(getattr(config, 'upstream_budgets', '') or ''))
+        for name, (concurrency, rpm) in budgets.items():
+            self.register(name, max_concurrency=concurrency, rate_per_minute=rpm)
+
+
+def build_default_budgets(config: Any) -> Dict[str, Tuple[int, float]]:
+    """
+    构建默认上游预算：{上游名称: (最大并发, 每分钟请求数)}
+
+    - 数据源：与各 Fetcher 原有的请求间隔保持同一量级，防止触发封禁
+    - Tushare：沿用 TUSHARE_RATE_LIMIT_PER_MINUTE
+    - 搜索：每个 API Key 单独计数，同一 Key 同时只有一个在途请求
+    - LLM：并发沿用 MAX_WORKERS；配置了 ANALYSIS_DELAY 时换算为每分钟请求数
+    """
+    llm_rpm = 0.0
+    analysis_delay = float(getattr(config, 'analysis_delay', 0) or 0)
+    if analysis_delay > 0:
+        llm_rpm = 60.0 / analysis_delay
+
+    return {
+        'efinance': (3, 40),
+        'akshare': (3, 40),
+        'tushare': (4, float(getattr(config, 'tushare_rate_limit_per_minute', 80) or 80)),
+        'pytdx': (4, 0),
+        'baostock': (1, 0),
+        'yfinance': (4, 120),
+        'search': (1, 60),
+        'llm': (max(1, int(getattr(config, 'max_workers', 3) or 3)), llm_rpm),
+    }
+
+
+def parse_budget_spec(spec: str) -> Dict[str, Tuple[int, float]]:
+    """
+    解析预算配置字符串
+
+    格式：name=并发/每分钟请求数，逗号分隔；任一项为 0 表示不限
+    例如：llm=2/15,tushare=4/80,search:bocha=1/30
+    """
+    budgets: Dict[str, Tuple[int, float]] = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item or '=' not in item:
+            continue
+        name, value = item.split('=', 1)
+        concurrency_str, _, rpm_str = value.partition('/')
+        try:
+            budgets[name.strip()] = (int(concurrency_str or 0), float(rpm_str or 0))
+        except ValueError:
+            logger.warning(f"[预算] 忽略无效配置项: {item}")
+    return budgets
+
+
+def fetcher_upstream(fetcher_name: str) -> str:
+    """数据源类名转上游名称，例如 EfinanceFetcher -> efinance"""
+    name = fetcher_name or ''
+    if name.endswith('Fetcher'):
+        name = name[:-len('Fetcher')]
+    return name.lower()
+
+
+# === 全局注册表 ===
+_registry: Optional[RateLimiterRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter_registry() -> RateLimiterRegistry:
+    """获取进程级上游预算注册表（首次调用时按全局配置初始化）"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = RateLimiterRegistry()
+                try:
+                    from src.config import get_config
+                    registry.configure(get_config())
+                except Exception as e:
+                    logger.warning(f"[预算] 加载上游预算配置失败，使用不限速模式: {e}")
+                _registry = registry
+    return _registry
+
+
+def reset_rate_limiter_registry() -> None:
+    """重置全局注册表（主要用于测试）"""
+    global _registry
+    with _registry_lock:
+        _registry = None
@@ -403,6 +403,13 @@ _chip_circuit_breaker = CircuitBreaker(
     half_open_max_calls=1
 )
 
+# 日线数据熔断器（按 "数据源:市场" 分别计数，如 EfinanceFetcher:cn）
+_daily_circuit_breaker = CircuitBreaker(
+    failure_threshold=3,      # 连续失败3次熔断
+    cooldown_seconds=300.0,   # 冷却5分钟
+    half_open_max_calls=1
+)
+
 
 def get_realtime_circuit_breaker() -> CircuitBreaker:
     """获取实时行情熔断器"""
@@ -412,3 +419,8 @@ def get_realtime_circuit_breaker() -> CircuitBreaker:
 def get_chip_circuit_breaker() -> CircuitBreaker:
     """获取筹码接口熔断器"""
     return _chip_circuit_breaker
+
+
+def get_daily_circuit_breaker() -> CircuitBreaker:
+    """获取日线数据熔断器"""
+    return _daily_circuit_breaker
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全量快照缓存（single-flight + stale-while-revalidate）
+===================================
+
+职责：
+1. 缓存全量行情等“整体刷新”的快照数据（如 stock_zh_a_spot_em 返回的全市场 DataFrame）
+2. 缓存过期时只允许一个调用方执行刷新（single-flight），其余调用方：
+   - 有可用旧值：直接返回旧值（stale-while-revalidate），不阻塞
+   - 无可用旧值：等待刷新结果，而不是各自重复请求上游
+3. 刷新失败后的 failure_ttl 秒内不再请求上游（失败退避），期间返回旧值或 None
+4. 统计命中 / 旧值命中 / 未命中 / 等待 / 刷新次数，便于观察缓存效果
+5. 可选持久化（persist=True）：刷新结果写入持久化缓存后端，
+   新进程冷启动时先读取其他进程/上次运行写入的快照，仍新鲜则不再请求上游
+
+使用方式：
+    _realtime_cache = SingleFlightCache('akshare_em', ttl=1200)
+    df = _realtime_cache.get_or_refresh(loader)
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from .persistent_cache import CacheBackend, get_persistent_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 刷新失败后的退避时长（秒）：期间不再请求上游，避免上游故障时每个调用方都重新拉取全量数据
+DEFAULT_FAILURE_TTL = 60.0
+
+
+@dataclass
+class CacheStats:
+    """缓存使用统计"""
+    hits: int = 0
+    persist_hits: int = 0
+    stale_hits: int = 0
+    backoff_hits: int = 0
+    misses: int = 0
+    waits: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    last_refresh_elapsed: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'persist_hits': self.persist_hits,
+            'stale_hits': self.stale_hits,
+            'backoff_hits': self.backoff_hits,
+            'misses': self.misses,
+            'waits': self.waits,
+            'refreshes': self.refreshes,
+            'refresh_failures': self.refresh_failures,
+            'last_refresh_elapsed': round(self.last_refresh_elapsed, 3),
+        }
+
+
+class SingleFlightCache(Generic[T]):
+    """
+    线程安全的单值快照缓存
+
+    - ttl: 新鲜期（秒），期内直接命中
+    - max_stale: 过期后仍可作为旧值返回的时长（秒，默认与 ttl 相同），
+      仅在其他调用方正在刷新或刷新失败退避期间使用；超过该时长的旧值不再返回
+    - failure_ttl: 刷新失败（loader 返回 None / 空结果或抛出异常）后的退避时长（秒），
+      期内不再调用 loader；刷新成功或 set() 写入新值后清除
+    - persist: 是否写入持久化缓存后端（键为 snapshot:<name>）
+    - backend: 指定持久化后端（默认使用全局后端）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        max_stale: Optional[float] = None,
+        persist: bool = False,
+        backend: Optional[CacheBackend] = None,
+        failure_ttl: float = DEFAULT_FAILURE_TTL,
+    ):
+        self.name = name
+        self.ttl = float(ttl)
+        self.max_stale = self.ttl if max_stale is None else max(0.0, float(max_stale))
+        self.failure_ttl = max(0.0, float(failure_ttl))
+        self.persist = persist or backend is not None
+        self._backend = backend
+        self._value: Optional[T] = None
+        self._timestamp: float = 0.0
+        self._last_failure: float = 0.0
+        self._refreshing = False
+        self._derived: Dict[str, Tuple[Any, Any]] = {}
+        self._cond = threading.Condition()
+        self._stats = CacheStats()
+        _register_cache(self)
+
+    @property
+    def timestamp(self) -> float:
+        """当前值的写入时间（无值时为 0）"""
+        return self._timestamp
+
+    def _usable_stale(self, now: float) -> bool:
+        return self._value is not None and now - self._timestamp < self.ttl + self.max_stale
+
+    def _get_backend(self) -> Optional[CacheBackend]:
+        if not self.persist:
+            return None
+        return self._backend if self._backend is not None else get_persistent_cache()
+
+    @property
+    def _persist_key(self) -> str:
+        return f"snapshot:{self.name}"
+
+    @staticmethod
+    def _is_valid(value: Any) -> bool:
+        # None 与空结果（如 loader 失败时返回的空 DataFrame）均视为刷新失败
+        return value is not None and not getattr(value, 'empty', False)
+
+    def _persist(self, value: Any) -> None:
+        backend = self._get_backend()
+        if backend is not None and self._is_valid(value):
+            backend.set(self._persist_key, value, self.ttl + self.max_stale)
+
+    def _load_persisted(self) -> Optional[Tuple[T, float]]:
+        """读取持久化快照（仅返回比内存值更新且仍在新鲜期内的快照）"""
+        backend = self._get_backend()
+        if backend is None:
+            return None
+        entry = backend.get(self._persist_key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if stored_at <= self._timestamp or time.time() - stored_at >= self.ttl:
+            return None
+        return value, stored_at
+
+    def peek(self) -> Tuple[Optional[T], float]:
+        """返回 (当前值, 写入时间)，不触发刷新、不计入统计"""
+        with self._cond:
+            return self._value, self._timestamp
+
+    def set(self, value: Optional[T], timestamp: Optional[float] = None) -> None:
+        """直接写入缓存值（例如其他接口顺带拉取了同一份全量数据）"""
+        with self._cond:
+            self._value = value
+            self._timestamp = time.time() if timestamp is None else timestamp
+            self._last_failure = 0.0
+            self._derived.clear()
+        if timestamp is None:
+            self._persist(value)
+
+    def invalidate(self) -> None:
+        """清空缓存"""
+        self.set(None, timestamp=0.0)
+
+    def get_or_refresh(self, loader: Callable[[], Optional[T]], wait_timeout: Optional[float] = 120.0) -> Optional[T]:
+        """
+        获取缓存值，过期时由当前调用方执行 loader 刷新（同一时刻只有一个刷新者）
+
+        Args:
+            loader: 刷新函数；返回 None 或空 DataFrame 视为刷新失败（保留旧值），抛出的异常原样传给刷新者
+            wait_timeout: 无可用旧值时等待其他刷新者的最长时间（None 表示一直等待）
+
+        Returns:
+            缓存值；等待超时、刷新失败或处于失败退避期且无旧值时返回 None
+        """
+        with self._cond:
+            now = time.time()
+            if self._value is not None and now - self._timestamp < self.ttl:
+                self._stats.hits += 1
+                logger.debug(
+                    f"[缓存命中] {self.name} - 缓存年龄 {int(now - self._timestamp)}s/{int(self.ttl)}s"
+                )
+                return self._value
+
+            if self._refreshing:
+                if self._usable_stale(now):
+                    self._stats.stale_hits += 1
+                    logger.debug(f"[缓存旧值] {self.name} 正在刷新，返回 {int(now - self._timestamp)}s 前的旧数据")
+                    return self._value
+
+                # 没有可用旧值：等待刷新者完成，而不是重复请求上游
+                self._stats.waits += 1
+                deadline = None if wait_timeout is None else now + wait_timeout
+                while self._refreshing:
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        logger.warning(f"[缓存] {self.name} 等待刷新超时 ({wait_timeout}s)")
+                        break
+                    self._cond.wait(remaining)
+                return self._value if self._usable_stale(time.time()) else None
+
+            if self._last_failure and now - self._last_failure < self.failure_ttl:
+                # 上次刷新刚失败：退避期内不重复请求上游
+                self._stats.backoff_hits += 1
+                logger.debug(f"[缓存] {self.name} 刷新失败退避中（{int(now - self._last_failure)}s/{int(self.failure_ttl)}s）")
+                return self._value if self._usable_stale(now) else None
+
+            self._refreshing = True
+            self._stats.misses += 1
+
+        value: Optional[T] = None
+        persisted: Optional[Tuple[T, float]] = None
+        start = time.time()
+        try:
+            # 先尝试其他进程（或上次运行）写入的持久化快照，仍新鲜则不请求上游
+            persisted = self._load_persisted()
+            if persisted is None:
+                value = loader()
+                self._persist(value)
+        finally:
+            with self._cond:
+                if persisted is not None:
+                    self._value, self._timestamp = persisted
+                    self._derived.clear()
+                    self._stats.persist_hits += 1
+                else:
+                    self._stats.last_refresh_elapsed = time.time() - start
+                    if self._is_valid(value):
+                        self._value = value
+                        self._timestamp = time.time()
+                        self._last_failure = 0.0
+                        self._derived.clear()
+                        self._stats.refreshes += 1
+                    else:
+                        self._last_failure = time.time()
+                        self._stats.refresh_failures += 1
+                self._refreshing = False
+                self._cond.notify_all()
+                result = self._value if self._usable_stale(time.time()) else None
+
+        if persisted is not None:
+            logger.debug(f"[缓存命中] {self.name} - 使用持久化快照，缓存年龄 {int(time.time() - persisted[1])}s")
+        return result
+
+    def derive(self, key: str, builder: Callable[[Optional[T]], Any]) -> Any:
+        """
+        获取基于当前缓存值派生的结构（如按代码建立的索引），缓存值更新后自动重建
+
+        Args:
+            key: 派生结构名称
+            builder: 构建函数，参数为当前缓存值
+        """
+        with self._cond:
+            value = self._value
+            cached = self._derived.get(key)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+
+        derived = builder(value)
+        with self._cond:
+            # 构建期间缓存已被刷新时不回写，下次调用按新值重建
+            if self._value is value:
+                self._derived[key] = (value, derived)
+        return derived
+
+    def stats(self) -> Dict[str, Any]:
+        """返回缓存统计"""
+        with self._cond:
+            data = self._stats.to_dict()
+            data['age'] = round(time.time() - self._timestamp, 1) if self._value is not None else None
+            data['refreshing'] = self._refreshing
+        return data
+
+
+# === 全局缓存登记（用于统一输出统计） ===
+_caches: Dict[str, SingleFlightCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _register_cache(cache: SingleFlightCache) -> None:
+    with _caches_lock:
+        _caches[cache.name] = cache
+
+
+def get_snapshot_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """返回所有全量快照缓存的统计：{缓存名称: 统计}"""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
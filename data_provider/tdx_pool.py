@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+通达信长连接池
+===================================
+
+职责：
+1. 复用已连接的 TdxHq_API 会话，避免每次查询都重新建立 TCP 连接与握手
+2. 线程安全：每个连接同一时刻只借给一个调用方，总连接数不超过 max_size
+3. 健康检查：空闲超过 check_interval 的连接借出前先发一次轻量查询探活，
+   空闲超过 idle_timeout 的连接直接关闭
+4. 服务器排序：按实测“连接耗时 + 响应耗时”（指数滑动平均）排序，
+   最近连接/查询失败的服务器在冷却期内排到最后
+5. 透明重连：查询过程中连接异常时丢弃该连接，换一个连接重试
+
+使用方式：
+    pool = get_tdx_pool(hosts, api_factory)
+    with pool.session() as api:
+        data = api.get_security_bars(9, 1, '600519', 0, 100)
+    # 或自动重连
+    data = pool.call(lambda api: api.get_security_bars(9, 1, '600519', 0, 100))
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple, TypeVar
+
+from .base import DataFetchError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+Host = Tuple[str, int]
+
+
+class HostStats:
+    """单个服务器的实测表现（指数滑动平均）"""
+
+    ALPHA = 0.3
+
+    def __init__(self):
+        self.connect_latency: Optional[float] = None
+        self.response_latency: Optional[float] = None
+        self.failures = 0
+        self.last_failure = 0.0
+
+    @classmethod
+    def _ewma(cls, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + cls.ALPHA * (sample - current)
+
+    def record_connect(self, elapsed: float) -> None:
+        self.connect_latency = self._ewma(self.connect_latency, elapsed)
+        self.failures = 0
+
+    def record_response(self, elapsed: float) -> None:
+        self.response_latency = self._ewma(self.response_latency, elapsed)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.last_failure = time.time()
+
+    @property
+    def latency(self) -> Optional[float]:
+        if self.connect_latency is None:
+            return None
+        return self.connect_latency + (self.response_latency or 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'connect_latency': None if self.connect_latency is None else round(self.connect_latency, 3),
+            'response_latency': None if self.response_latency is None else round(self.response_latency, 3),
+            'failures': self.failures,
+        }
+
+
+class _PooledConnection:
+    """连接池中的一个连接"""
+
+    def __init__(self, api: Any, host: Host):
+        self.api = api
+        self.host = host
+        self.last_used = time.time()
+
+    def close(self) -> None:
+        try:
+            self.api.disconnect()
+        except Exception as e:
+            logger.debug(f"Pytdx 断开连接 {self.host[0]}:{self.host[1]} 时出错: {e}")
+
+
+class TdxConnectionPool:
+    """
+    通达信连接池
+
+    - api_factory: 创建未连接 TdxHq_API 实例的函数
+    - max_size: 最大连接数
+    - connect_timeout: 单个服务器连接超时（秒）
+    - idle_timeout: 空闲超过该时长的连接直接关闭（秒）
+    - check_interval: 空闲超过该时长的连接借出前先探活（秒）
+    - host_cooldown: 失败服务器的冷却期（秒），期内排到最后
+    """
+
+    def __init__(
+        self,
+        hosts: Sequence[Host],
+        api_factory: Callable[[], Any],
+        max_size: int = 4,
+        connect_timeout: float = 5.0,
+        idle_timeout: float = 300.0,
+        check_interval: float = 30.0,
+        host_cooldown: float = 60.0,
+    ):
+        if not hosts:
+            raise ValueError("hosts 不能为空")
+        self.hosts: List[Host] = list(hosts)
+        self.api_factory = api_factory
+        self.max_size = max(1, int(max_size))
+        self.connect_timeout = connect_timeout
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.host_cooldown = host_cooldown
+        self._host_stats: Dict[Host, HostStats] = {host: HostStats() for host in self.hosts}
+        self._idle: List[_PooledConnection] = []
+        self._total = 0
+        self._cond = threading.Condition()
+
+    # === 服务器排序 ===
+
+    def ranked_hosts(self) -> List[Host]:
+        """
+        按实测表现排序的服务器列表
+
+        1. 冷却期内失败过的服务器排最后
+        2. 有实测耗时的服务器按耗时升序
+        3. 尚未测量的服务器保持配置顺序
+        """
+        now = time.time()
+        with self._cond:
+            ranked = []
+            for index, host in enumerate(self.hosts):
+                stats = self._host_stats[host]
+                cooling = stats.failures > 0 and now - stats.last_failure < self.host_cooldown
+                latency = stats.latency
+                ranked.append(((cooling, latency is None, latency or 0.0, index), host))
+        ranked.sort(key=lambda item: item[0])
+        return [host for _, host in ranked]
+
+    def _record_host(self, host: Host, connect: Optional[float] = None,
+                     response: Optional[float] = None, failed: bool = False) -> None:
+        with self._cond:
+            stats = self._host_stats.setdefault(host, HostStats())
+            if failed:
+                stats.record_failure()
+            if connect is not None:
+                stats.record_connect(connect)
+            if response is not None:
+                stats.record_response(response)
+
+    # === 连接管理 ===
+
+    def _connect(self) -> _PooledConnection:
+        """按排序依次尝试服务器，返回新连接"""
+        for host in self.ranked_hosts():
+            api = self.api_factory()
+            start = time.time()
+            try:
+                if api.connect(host[0], host[1], time_out=self.connect_timeout):
+                    self._record_host(host, connect=time.time() - start)
+                    logger.debug(f"Pytdx 连接成功: {host[0]}:{host[1]} ({time.time() - start:.2f}s)")
+                    return _PooledConnection(api, host)
+            except Exception as e:
+                logger.debug(f"Pytdx 连接 {host[0]}:{host[1]} 失败: {e}")
+            self._record_host(host, failed=True)
+            _PooledConnection(api, host).close()
+        raise DataFetchError("Pytdx 无法连接任何服务器")
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        """轻量查询探活（深圳市场证券数量）"""
+        start = time.time()
+        try:
+            alive = conn.api.get_security_count(0) is not None
+        except Exception as e:
+            logger.debug(f"Pytdx 连接 {conn.host[0]}:{conn.host[1]} 探活失败: {e}")
+            alive = False
+        if alive:
+            self._record_host(conn.host, response=time.time() - start)
+        else:
+            self._record_host(conn.host, failed=True)
+        return alive
+
+    def _checkout(self, timeout: Optional[float]) -> _PooledConnection:
+        deadline = None if timeout is None else time.time() + timeout
+        expired: List[_PooledConnection] = []
+        conn: Optional[_PooledConnection] = None
+        create = False
+        with self._cond:
+            while True:
+                now = time.time()
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if now - candidate.last_used > self.idle_timeout:
+                        expired.append(candidate)
+                        self._total -= 1
+                        continue
+                    conn = candidate
+                    break
+                if conn is not None:
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    create = True
+                    break
+                remaining = None if deadline is None else deadline - now
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+        for stale in expired:
+            stale.close()
+        if conn is None and not create:
+            raise DataFetchError(f"Pytdx 连接池等待超时（{self.max_size} 个连接均在使用中）")
+
+        try:
+            if conn is not None and time.time() - conn.last_used > self.check_interval and not self._is_alive(conn):
+                conn.close()
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        return conn
+
+    def _checkin(self, conn: _PooledConnection, broken: bool) -> None:
+        if broken:
+            conn.close()
+        with self._cond:
+            if broken:
+                self._total -= 1
+            else:
+                conn.last_used = time.time()
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def _connection(self, timeout: Optional[float] = 30.0) -> Generator[_PooledConnection, None, None]:
+        conn = self._checkout(timeout)
+        broken = False
+        try:
+            yield conn
+        except DataFetchError:
+            # 业务层错误（如无数据），连接本身仍可用
+            raise
+        except Exception:
+            broken = True
+            self._record_host(conn.host, failed=True)
+            raise
+        finally:
+            self._checkin(conn, broken)
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = 30.0) -> Generator[Any, None, None]:
+        """
+        借出一个已连接的 API，退出上下文时归还（连接异常时丢弃）
+
+        Args:
+            timeout: 连接池已满时等待空闲连接的最长时间（秒）
+        """
+        with self._connection(timeout) as conn:
+            yield conn.api
+
+    def call(self, func: Callable[[Any], T], retries: int = 1, timeout: Optional[float] = 30.0) -> T:
+        """
+        在池化连接上执行查询，连接异常时换一个连接重试
+
+        Args:
+            func: 参数为已连接 API 的查询函数
+            retries: 连接异常后的重试次数
+        """
+        last_error: Optional[Exception] = None
+        for attempt in range(retries + 1):
+            try:
+                with self._connection(timeout) as conn:
+                    start = time.time()
+                    result = func(conn.api)
+                    self._record_host(conn.host, response=time.time() - start)
+                    return result
+            except DataFetchError:
+                raise
+            except Exception as e:
+                last_error = e
+                if attempt < retries:
+                    logger.warning(f"Pytdx 连接异常，重连后重试 ({attempt + 1}/{retries}): {e}")
+        raise DataFetchError(f"Pytdx 查询失败: {last_error}") from last_error
+
+    def close_all(self) -> None:
+        """关闭所有空闲连接（借出中的连接归还后照常入池）"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池统计：连接数、空闲数、按排序的服务器表现"""
+        ranked = self.ranked_hosts()
+        with self._cond:
+            return {
+                'size': self._total,
+                'idle': len(self._idle),
+                'hosts': {f"{host}:{port}": self._host_stats[(host, port)].to_dict() for host, port in ranked},
+            }
+
+
+# === 全局连接池（按服务器列表区分） ===
+_pools: Dict[Tuple[Host, ...], TdxConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_tdx_pool(hosts: Sequence[Host], api_factory: Callable[[], Any], max_size: int = 4) -> TdxConnectionPool:
+    """获取进程级通达信连接池（相同服务器列表共用一个连接池）"""
+    key = tuple(hosts)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = TdxConnectionPool(hosts, api_factory, max_size=max_size)
+            _pools[key] = pool
+        return pool
+
+
+def reset_tdx_pools() -> None:
+    """关闭并清空所有连接池（主要用于测试）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
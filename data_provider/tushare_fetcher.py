@@ -9,15 +9,14 @@ TushareFetcher - 备用数据源 1 (Priority 2)
 优点：数据质量高、接口稳定
 
 流控策略：
-1. 实现"每分钟调用计数器"
-2. 超过免费配额（80次/分）时，强制休眠到下一分钟
+1. 进程级令牌桶限速（TUSHARE_RATE_LIMIT_PER_MINUTE，所有实例、线程共享）
+2. 请求按令牌补充时间均匀错开，不会在新建 Fetcher 时重置计数
 3. 使用 tenacity 实现指数退避重试
 """
 
 import json as _json
 import logging
 import re
-import time
 from datetime import datetime
 from typing import Optional, Tuple, List, Dict, Any
 
@@ -32,6 +31,8 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, RateLimitError, STANDARD_COLUMNS
+from .persistent_cache import PersistentMapping, STOCK_NAME_TTL
+from .rate_limiter import fetcher_upstream, get_rate_limiter_registry
 from .realtime_types import UnifiedRealtimeQuote
 from src.config import get_config
 import os
@@ -79,8 +80,7 @@ class TushareFetcher(BaseFetcher):
     数据来源：Tushare Pro API
     
     关键策略：
-    - 每分钟调用计数器，防止超出配额
-    - 超过 80 次/分钟时强制等待
+    - 进程级令牌桶限速，防止超出配额
     - 失败后指数退避重试
     
     配额说明（Tushare 免费用户）：
@@ -90,17 +90,18 @@ class TushareFetcher(BaseFetcher):
     
     name = "TushareFetcher"
     priority = int(os.getenv("TUSHARE_PRIORITY", "2"))  # 默认优先级，会在 __init__ 中根据配置动态调整
+    # 每次实际 API 调用前消耗速率令牌（_check_rate_limit），外层只占用并发槽位
+    self_rate_limited = True
 
     def __init__(self, rate_limit_per_minute: int = 80):
         """
         初始化 TushareFetcher
 
         Args:
-            rate_limit_per_minute: 每分钟最大请求数（默认80，Tushare免费配额）
+            rate_limit_per_minute: 每分钟最大请求数（默认80，Tushare免费配额；
+                                   仅在全局预算未配置 tushare 时使用）
         """
         self.rate_limit_per_minute = rate_limit_per_minute
-        self._call_count = 0  # 当前分钟内的调用次数
-        self._minute_start: Optional[float] = None  # 当前计数周期开始时间
         self._api: Optional[object] = None  # Tushare API 实例
 
         # 尝试初始化 API
@@ -212,42 +213,13 @@ class TushareFetcher(BaseFetcher):
         检查并执行速率限制
         
         流控策略：
-        1. 检查是否进入新的一分钟
-        2. 如果是，重置计数器
-        3. 如果当前分钟调用次数超过限制，强制休眠
+        1. 从进程级预算注册表消耗一个 tushare 速率令牌（所有实例、线程共享）
+        2. 令牌不足时精确等待到下一个令牌补充，不再按自然分钟清零计数
         """
-        current_time = time.time()
-        
-        # 检查是否需要重置计数器（新的一分钟）
-        if self._minute_start is None:
-            self._minute_start = current_time
-            self._call_count = 0
-        elif current_time - self._minute_start >= 60:
-            # 已经过了一分钟，重置计数器
-            self._minute_start = current_time
-            self._call_count = 0
-            logger.debug("速率限制计数器已重置")
-        
-        # 检查是否超过配额
-        if self._call_count >= self.rate_limit_per_minute:
-            # 计算需要等待的时间（到下一分钟）
-            elapsed = current_time - self._minute_start
-            sleep_time = max(0, 60 - elapsed) + 1  # +1 秒缓冲
-            
-            logger.warning(
-                f"Tushare 达到速率限制 ({self._call_count}/{self.rate_limit_per_minute} 次/分钟)，"
-                f"等待 {sleep_time:.1f} 秒..."
-            )
-            
-            time.sleep(sleep_time)
-            
-            # 重置计数器
-            self._minute_start = time.time()
-            self._call_count = 0
-        
-        # 增加调用计数
-        self._call_count += 1
-        logger.debug(f"Tushare 当前分钟调用次数: {self._call_count}/{self.rate_limit_per_minute}")
+        registry = get_rate_limiter_registry()
+        if registry.get(fetcher_upstream(self.name)) is None:
+            registry.register(fetcher_upstream(self.name), rate_per_minute=self.rate_limit_per_minute)
+        self._acquire_rate_token()
     
     def _convert_stock_code(self, stock_code: str) -> str:
         """
@@ -417,13 +389,14 @@ class TushareFetcher(BaseFetcher):
             logger.warning("Tushare API 未初始化，无法获取股票名称")
             return None
         
-        # 检查缓存
-        if hasattr(self, '_stock_name_cache') and stock_code in self._stock_name_cache:
-            return self._stock_name_cache[stock_code]
-        
-        # 初始化缓存
+        # 初始化缓存（内存 + 持久化，跨进程共享）
         if not hasattr(self, '_stock_name_cache'):
-            self._stock_name_cache = {}
+            self._stock_name_cache = PersistentMapping('stock_name', ttl=STOCK_NAME_TTL)
+
+        # 检查缓存
+        cached_name = self._stock_name_cache.get(stock_code)
+        if cached_name:
+            return cached_name
         
         try:
             # 速率限制检查
@@ -483,11 +456,10 @@ class TushareFetcher(BaseFetcher):
                 # 转换 ts_code 为标准代码格式
                 df['code'] = df['ts_code'].apply(lambda x: x.split('.')[0])
                 
-                # 更新缓存
+                # 更新缓存（整表一次写入）
                 if not hasattr(self, '_stock_name_cache'):
-                    self._stock_name_cache = {}
-                for _, row in df.iterrows():
-                    self._stock_name_cache[row['code']] = row['name']
+                    self._stock_name_cache = PersistentMapping('stock_name', ttl=STOCK_NAME_TTL)
+                self._stock_name_cache.update(dict(zip(df['code'], df['name'])))
                 
                 logger.info(f"Tushare 获取股票列表成功: {len(df)} 条")
                 return df[['code', 'name', 'industry', 'area', 'market']]
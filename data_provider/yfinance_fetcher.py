@@ -12,6 +12,7 @@ YfinanceFetcher - 兜底数据源 (Priority 4)
 1. 自动将 A 股代码转换为 yfinance 格式（.SS / .SZ）
 2. 处理 Yahoo Finance 的数据格式差异
 3. 失败后指数退避重试
+4. 多只股票 / 指数一次 yf.download 批量下载
 """
 
 import logging
@@ -29,6 +30,7 @@ from tenacity import (
 )
 
 from .base import BaseFetcher, DataFetchError, STANDARD_COLUMNS
+from .rate_limiter import fetcher_upstream, get_rate_limiter_registry
 from .realtime_types import UnifiedRealtimeQuote, RealtimeSource
 import os
 
@@ -167,6 +169,92 @@ class YfinanceFetcher(BaseFetcher):
                 raise
             raise DataFetchError(f"Yahoo Finance 获取数据失败: {e}") from e
     
+    @staticmethod
+    def _split_download(raw: pd.DataFrame, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        从多代码 yf.download 结果中取出单个代码的 OHLCV
+
+        兼容两种列布局：group_by='ticker' 时为 (代码, 字段)，默认为 (字段, 代码)；
+        单代码且列未分层时直接返回
+        """
+        if raw is None or raw.empty:
+            return None
+        if isinstance(raw.columns, pd.MultiIndex):
+            if symbol in raw.columns.get_level_values(0):
+                frame = raw[symbol]
+            elif symbol in raw.columns.get_level_values(1):
+                frame = raw.xs(symbol, axis=1, level=1)
+            else:
+                return None
+        else:
+            frame = raw
+        # 多市场混合下载时，各代码非交易日的行为全 NaN
+        frame = frame.dropna(how='all')
+        return None if frame.empty else frame
+
+    def get_daily_data_batch(
+        self,
+        stock_codes: List[str],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        days: int = 30,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        批量获取日线数据（一次 yf.download 下载全部代码）
+
+        下载结果按代码拆分后分别标准化、清洗并计算技术指标；
+        某个代码无数据时跳过，不影响其他代码
+
+        Args:
+            stock_codes: 股票代码列表（美股 / 港股 / A股均可）
+            start_date / end_date / days: 同 get_daily_data
+
+        Returns:
+            {股票代码: 标准化并计算技术指标后的 DataFrame}
+        """
+        if not stock_codes:
+            return {}
+
+        import yfinance as yf
+
+        if end_date is None:
+            end_date = datetime.now().strftime('%Y-%m-%d')
+        if start_date is None:
+            from datetime import timedelta
+            start_date = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=days * 2)).strftime('%Y-%m-%d')
+
+        symbols = {self._convert_stock_code(code): code for code in dict.fromkeys(stock_codes)}
+        logger.info(f"[{self.name}] 批量下载 {len(symbols)} 个代码: {start_date} ~ {end_date}")
+
+        try:
+            with get_rate_limiter_registry().limit(fetcher_upstream(self.name)):
+                raw = yf.download(
+                    tickers=list(symbols),
+                    start=start_date,
+                    end=end_date,
+                    progress=False,  # 禁止进度条
+                    auto_adjust=True,  # 自动调整价格（复权）
+                    group_by='ticker',
+                )
+        except Exception as e:
+            logger.warning(f"[{self.name}] 批量下载失败: {e}")
+            return {}
+
+        results: Dict[str, pd.DataFrame] = {}
+        for symbol, code in symbols.items():
+            frame = self._split_download(raw, symbol)
+            if frame is None:
+                logger.debug(f"[{self.name}] 批量下载结果中无 {symbol} 的数据")
+                continue
+            try:
+                df = self._clean_data(self._normalize_data(frame, code))
+                results[code] = self._calculate_indicators(df)
+            except Exception as e:
+                logger.warning(f"[{self.name}] 批量下载 {code} 处理失败: {e}")
+
+        logger.info(f"[{self.name}] 批量下载完成: {len(results)}/{len(symbols)} 个代码")
+        return results
+    
     def _normalize_data(self, df: pd.DataFrame, stock_code: str) -> pd.DataFrame:
         """
         标准化 Yahoo Finance 数据
@@ -244,12 +332,18 @@ class YfinanceFetcher(BaseFetcher):
 
         results = []
         try:
+            # 一次下载全部指数最近几个交易日的数据（不同交易所假日不同，多取几天）
+            raw = yf.download(
+                tickers=[yf_code for yf_code, _ in yf_mapping.values()],
+                period='5d',
+                progress=False,
+                auto_adjust=True,
+                group_by='ticker',
+            )
             for ak_code, (yf_code, name) in yf_mapping.items():
                 try:
-                    ticker = yf.Ticker(yf_code)
-                    # 获取最近2天数据以计算涨跌
-                    hist = ticker.history(period='2d')
-                    if hist.empty:
+                    hist = self._split_download(raw, yf_code)
+                    if hist is None:
                         continue
 
                     today = hist.iloc[-1]
@@ -546,10 +546,22 @@ def main() -> int:
             def scheduled_task():
                 run_full_analysis(config, args, stock_codes)
 
+            # 收盘后预热筹码缓存：盘中请求（WebUI / 机器人 / 定时分析）直接命中缓存
+            extra_tasks = []
+            if config.enable_chip_distribution and config.chip_prewarm_time:
+                def chip_prewarm_task():
+                    from data_provider import get_data_fetcher_manager
+                    if stock_codes is None:
+                        config.refresh_stock_list()
+                    get_data_fetcher_manager().prewarm_chip_distributions(stock_codes or config.stock_list)
+
+                extra_tasks.append(("筹码预热", config.chip_prewarm_time, chip_prewarm_task))
+
             run_with_schedule(
                 task=scheduled_task,
                 schedule_time=config.schedule_time,
-                run_immediately=should_run_immediately
+                run_immediately=should_run_immediately,
+                extra_tasks=extra_tasks
             )
             return 0
 
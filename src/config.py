@@ -81,6 +81,12 @@ class Config:
     tavily_api_keys: List[str] = field(default_factory=list)  # Tavily API Keys
     brave_api_keys: List[str] = field(default_factory=list)  # Brave Search API Keys
     serpapi_keys: List[str] = field(default_factory=list)  # SerpAPI Keys
+    # 搜索请求共享连接池：可选 HTTP/2（需安装 h2）与 429/5xx 退避重试次数
+    search_http2: bool = False
+    search_http_max_retries: int = 2
+    # 搜索结果缓存：盘中有效期（秒，盘后结果有效到下一交易时段开始）与是否持久化到 news_intel 表
+    search_cache_session_ttl: int = 1800
+    search_cache_persist: bool = True
     
     # === 通知配置（可同时配置多个，全部推送）===
     
@@ -151,6 +157,12 @@ class Config:
     # === 数据库配置 ===
     database_path: str = "./data/stock_analysis.db"
 
+    # === 持久化缓存配置（全量行情快照、搜索结果、股票名称）===
+    # 缓存后端：sqlite（默认，跨进程/重启共享）/ memory（仅进程内）/ none（关闭）
+    cache_backend: str = "sqlite"
+    # 缓存文件路径（留空则与数据库同目录的 cache.db）
+    cache_path: str = ""
+
     # 是否保存分析上下文快照（用于历史回溯）
     save_context_snapshot: bool = True
 
@@ -182,6 +194,8 @@ class Config:
     enable_realtime_quote: bool = True
     # 筹码分布开关（该接口不稳定，云端部署建议关闭）
     enable_chip_distribution: bool = True
+    # 定时任务模式下收盘后预热筹码缓存的时间（HH:MM，空字符串表示不预热）
+    chip_prewarm_time: str = "16:00"
     # 实时行情数据源优先级（逗号分隔）
     # 推荐顺序：tencent > akshare_sina > efinance > akshare_em > tushare
     # - tencent: 腾讯财经，有量比/换手率/市盈率等，单股查询稳定（推荐）
@@ -204,6 +218,25 @@ class Config:
     
     # Tushare 每分钟最大请求数（免费配额）
     tushare_rate_limit_per_minute: int = 80
+
+    # 上游资源预算（覆盖默认值）：name=并发/每分钟请求数，逗号分隔
+    # 例如：llm=2/15,tushare=4/80,search:bocha=1/30
+    upstream_budgets: str = ""
+    # 同时在途的股票任务数（各上游由独立预算限流，此值可远大于 max_workers）
+    pipeline_stock_concurrency: int = 16
+    # 数据源对冲请求：首选数据源超过其历史耗时分位数仍未返回时，并行请求下一个数据源
+    data_hedge_enabled: bool = False
+    data_hedge_percentile: float = 90.0
+
+    # === 全市场初筛配置 ===
+    # 启用后先用全量行情快照 + 批量趋势规则打分，只有入选的股票进入搜索与 LLM 分析
+    screener_enabled: bool = False
+    # 初筛范围：watchlist（仅自选股）/ market（全市场 A 股 + 自选股）
+    screener_universe: str = "watchlist"
+    # 入选数量上限（0 表示不限）
+    screener_top_k: int = 20
+    # 入选最低综合评分（0-100，0 表示不设门槛）
+    screener_min_score: float = 0.0
     
     # 重试配置
     max_retries: int = 3
@@ -372,6 +405,10 @@ class Config:
             tavily_api_keys=tavily_api_keys,
             brave_api_keys=brave_api_keys,
             serpapi_keys=serpapi_keys,
+            search_http2=os.getenv('SEARCH_HTTP2', 'false').lower() == 'true',
+            search_http_max_retries=int(os.getenv('SEARCH_HTTP_MAX_RETRIES', '2')),
+            search_cache_session_ttl=int(os.getenv('SEARCH_CACHE_SESSION_TTL', '1800')),
+            search_cache_persist=os.getenv('SEARCH_CACHE_PERSIST', 'true').lower() == 'true',
             wechat_webhook_url=os.getenv('WECHAT_WEBHOOK_URL'),
             feishu_webhook_url=os.getenv('FEISHU_WEBHOOK_URL'),
             telegram_bot_token=os.getenv('TELEGRAM_BOT_TOKEN'),
@@ -407,6 +444,8 @@ class Config:
             ],
             markdown_to_image_max_chars=int(os.getenv('MARKDOWN_TO_IMAGE_MAX_CHARS', '15000')),
             database_path=os.getenv('DATABASE_PATH', './data/stock_analysis.db'),
+            cache_backend=os.getenv('CACHE_BACKEND', 'sqlite'),
+            cache_path=os.getenv('CACHE_PATH', ''),
             save_context_snapshot=os.getenv('SAVE_CONTEXT_SNAPSHOT', 'true').lower() == 'true',
             backtest_enabled=os.getenv('BACKTEST_ENABLED', 'true').lower() == 'true',
             backtest_eval_window_days=int(os.getenv('BACKTEST_EVAL_WINDOW_DAYS', '10')),
@@ -452,6 +491,7 @@ class Config:
             # 实时行情增强数据配置
             enable_realtime_quote=os.getenv('ENABLE_REALTIME_QUOTE', 'true').lower() == 'true',
             enable_chip_distribution=os.getenv('ENABLE_CHIP_DISTRIBUTION', 'true').lower() == 'true',
+            chip_prewarm_time=os.getenv('CHIP_PREWARM_TIME', '16:00').strip(),
             # 实时行情数据源优先级：
             # - tencent: 腾讯财经，有量比/换手率/PE/PB等，单股查询稳定（推荐）
             # - akshare_sina: 新浪财经，基本行情稳定，但无量比
@@ -459,7 +499,17 @@ class Config:
             # - tushare: Tushare Pro，需要2000积分，数据全面
             realtime_source_priority=cls._resolve_realtime_source_priority(),
             realtime_cache_ttl=int(os.getenv('REALTIME_CACHE_TTL', '600')),
-            circuit_breaker_cooldown=int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '300'))
+            circuit_breaker_cooldown=int(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '300')),
+            # 上游资源预算与股票任务并发
+            upstream_budgets=os.getenv('UPSTREAM_BUDGETS', ''),
+            pipeline_stock_concurrency=int(os.getenv('PIPELINE_STOCK_CONCURRENCY', '16')),
+            data_hedge_enabled=os.getenv('DATA_HEDGE_ENABLED', 'false').lower() == 'true',
+            data_hedge_percentile=float(os.getenv('DATA_HEDGE_PERCENTILE', '90')),
+            # 全市场初筛
+            screener_enabled=os.getenv('SCREENER_ENABLED', 'false').lower() == 'true',
+            screener_universe=os.getenv('SCREENER_UNIVERSE', 'watchlist').strip().lower(),
+            screener_top_k=int(os.getenv('SCREENER_TOP_K', '20')),
+            screener_min_score=float(os.getenv('SCREENER_MIN_SCORE', '0')),
         )
     
     @classmethod
@@ -16,12 +16,18 @@ import time
 import uuid
 from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import date
+from datetime import date, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 
 from src.config import get_config, Config
+from src.core.screener import TREND_HISTORY_DAYS, MarketScreener
+from src.core.stage_graph import StageGraph
 from src.storage import get_db
-from data_provider import DataFetcherManager
+from data_provider import get_data_fetcher_manager
+from data_provider.fetcher_health import get_fetcher_health_tracker
+from data_provider.indicators import IndicatorState
+from data_provider.rate_limiter import get_rate_limiter_registry
+from data_provider.snapshot_cache import get_snapshot_cache_stats
 from data_provider.realtime_types import ChipDistribution
 from src.analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
 from src.notification import NotificationService, NotificationChannel
@@ -58,7 +64,7 @@ class StockAnalysisPipeline:
         
         Args:
             config: 配置对象（可选，默认使用全局配置）
-            max_workers: 最大并发线程数（可选，默认从配置读取）
+            max_workers: 最大并发线程数（可选，默认从配置读取；作为股票任务并发下限）
         """
         self.config = config or get_config()
         self.max_workers = max_workers or self.config.max_workers
@@ -69,9 +75,12 @@ class StockAnalysisPipeline:
             self.config.save_context_snapshot if save_context_snapshot is None else save_context_snapshot
         )
         
+        # 本轮运行的数据新鲜度快照 {code: 最新数据日期或 None}，由 run() 批量生成
+        self._latest_dates: Optional[Dict[str, Optional[date]]] = None
+
         # 初始化各模块
         self.db = get_db()
-        self.fetcher_manager = DataFetcherManager()
+        self.fetcher_manager = get_data_fetcher_manager()
         # 不再单独创建 akshare_fetcher，统一使用 fetcher_manager 获取增强数据
         self.trend_analyzer = StockTrendAnalyzer()  # 趋势分析器
         self.analyzer = GeminiAnalyzer()
@@ -101,6 +110,11 @@ class StockAnalysisPipeline:
         else:
             logger.warning("搜索服务未启用（未配置 API Key）")
     
+    # 默认拉取的交易日数
+    DEFAULT_FETCH_DAYS = 30
+    # 计算 MA20 所需的回看交易日数（增量拉取时仍需覆盖，保证均线正确）
+    INDICATOR_LOOKBACK_DAYS = 20
+
     def fetch_and_save_stock_data(
         self, 
         code: str,
@@ -110,9 +124,9 @@ class StockAnalysisPipeline:
         获取并保存单只股票数据
         
         断点续传逻辑：
-        1. 检查数据库是否已有今日数据
-        2. 如果有且不强制刷新，则跳过网络请求
-        3. 否则从数据源获取并保存
+        1. 查询数据库中该股票的最新数据日期（优先使用 run() 生成的新鲜度快照）
+        2. 如果已有今日数据且不强制刷新，则跳过网络请求
+        3. 否则仅按缺失天数（加均线回看窗口）从数据源获取并保存
         
         Args:
             code: 股票代码
@@ -123,22 +137,39 @@ class StockAnalysisPipeline:
         """
         try:
             today = date.today()
+            latest_date = self._get_latest_date(code)
             
             # 断点续传检查：如果今日数据已存在，跳过
-            if not force_refresh and self.db.has_today_data(code, today):
+            if not force_refresh and latest_date == today:
                 logger.info(f"[{code}] 今日数据已存在，跳过获取（断点续传）")
                 return True, None
             
-            # 从数据源获取数据
-            logger.info(f"[{code}] 开始从数据源获取数据...")
-            df, source_name = self.fetcher_manager.get_daily_data(code, days=30)
+            # 从数据源获取数据（仅缺失部分）
+            days = self.DEFAULT_FETCH_DAYS if force_refresh else self._resolve_fetch_days(latest_date, today)
+            logger.info(f"[{code}] 开始从数据源获取数据（最新日期: {latest_date or '无'}，拉取 {days} 天）...")
+            # 增量模式：仅向数据源请求库中最后日期之后的缺口，指标基于已存储尾部计算
+            df, source_name = self.fetcher_manager.get_daily_data(
+                code, days=days, incremental=not force_refresh
+            )
             
             if df is None or df.empty:
                 return False, "获取数据为空"
             
+            # 增量结果只需保存末尾的新增行
+            new_rows = df.attrs.get('incremental_new_rows')
+            indicator_state = df.attrs.get('indicator_state')
+            if new_rows is not None and new_rows == 0:
+                logger.info(f"[{code}] 数据源无新增交易日，跳过保存")
+                return True, None
+            if new_rows is not None:
+                df = df.tail(new_rows)
+            
             # 保存到数据库
             saved_count = self.db.save_daily_data(df, code, source_name)
             logger.info(f"[{code}] 数据保存成功（来源: {source_name}，新增 {saved_count} 条）")
+            if indicator_state is None:
+                indicator_state = self._build_indicator_state(code)
+            self._save_indicator_state(code, indicator_state)
             
             return True, None
             
@@ -146,18 +177,88 @@ class StockAnalysisPipeline:
             error_msg = f"获取/保存数据失败: {str(e)}"
             logger.error(f"[{code}] {error_msg}")
             return False, error_msg
+
+    def _build_indicator_state(self, code: str) -> Optional[IndicatorState]:
+        """
+        回放库中最近 TREND_HISTORY_DAYS 日历日的日线建立流式指标状态（失败时返回 None，不影响数据保存）
+
+        与趋势阶段读取同一窗口，MA60 与 MACD 的 EMA 起点和全量计算一致；
+        不使用本次拉取的短窗口（约 30 个交易日），否则 MA60 会退化为 MA20
+        """
+        try:
+            start_date = date.today() - timedelta(days=TREND_HISTORY_DAYS)
+            history = self.db.get_daily_history([code], start_date, columns=['date', 'close', 'volume'])
+            if history.empty:
+                return None
+            return IndicatorState.from_frame(history)
+        except Exception as e:
+            logger.debug(f"[{code}] 建立指标状态失败: {e}")
+            return None
+
+    def _save_indicator_state(self, code: str, state: Optional[IndicatorState]) -> None:
+        """持久化流式指标状态，下次增量更新时每根新 K 线 O(1) 计算指标"""
+        if state is None:
+            return
+        try:
+            self.db.save_indicator_states({code: state.to_dict()})
+        except Exception as e:
+            logger.warning(f"[{code}] 保存指标状态失败: {e}")
+
+    def _get_latest_date(self, code: str) -> Optional[date]:
+        """获取股票最新数据日期：优先读取本轮新鲜度快照，未覆盖时单独查询"""
+        if self._latest_dates is not None and code in self._latest_dates:
+            return self._latest_dates[code]
+        return self.db.get_latest_dates([code]).get(code)
+
+    @classmethod
+    def _resolve_fetch_days(cls, latest_date: Optional[date], today: date) -> int:
+        """
+        计算需要拉取的交易日数
+
+        - 库中无数据：拉取默认天数
+        - 已有数据：缺失天数（按日历日估算，不少于交易日数）+ 均线回看窗口，且不超过默认天数
+        """
+        if latest_date is None or latest_date > today:
+            return cls.DEFAULT_FETCH_DAYS
+        missing_days = max((today - latest_date).days, 1)
+        return min(cls.DEFAULT_FETCH_DAYS, missing_days + cls.INDICATOR_LOOKBACK_DAYS)
+
+    def build_freshness_index(self, stock_codes: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        批量生成数据新鲜度快照，并将自选股拆分为“已是最新”和“需要获取”两组
+
+        一次分组查询替代逐只 has_today_data 调用。
+
+        Args:
+            stock_codes: 股票代码列表
+
+        Returns:
+            Tuple[已有今日数据的代码列表, 需要获取的代码列表]
+        """
+        today = date.today()
+        try:
+            latest = self.db.get_latest_dates(stock_codes)
+        except Exception as e:
+            logger.warning(f"生成数据新鲜度索引失败，将逐只检查: {e}")
+            self._latest_dates = None
+            return [], list(stock_codes)
+
+        self._latest_dates = {code: latest.get(code) for code in stock_codes}
+        fresh = [code for code in stock_codes if latest.get(code) == today]
+        stale = [code for code in stock_codes if latest.get(code) != today]
+        return fresh, stale
     
     def analyze_stock(self, code: str, report_type: ReportType, query_id: str) -> Optional[AnalysisResult]:
         """
         分析单只股票（增强版：含量比、换手率、筹码分析、多维度情报）
         
-        流程：
+        流程（阶段依赖图，相互独立的阶段并发执行）：
         1. 获取实时行情（量比、换手率）- 通过 DataFetcherManager 自动故障切换
         2. 获取筹码分布 - 通过 DataFetcherManager 带熔断保护
-        3. 进行趋势分析（基于交易理念）
-        4. 多维度情报搜索（最新消息+风险排查+业绩预期）
-        5. 从数据库获取分析上下文
-        6. 调用 AI 进行综合分析
+        3. 读取库中日线，据此生成分析上下文（技术面数据）
+        4. 进行趋势分析（基于交易理念，使用步骤 3 读取的日线与流式指标状态）
+        5. 多维度情报搜索（最新消息+风险排查+业绩预期；名称未知时依赖步骤 1）
+        6. 调用 AI 进行综合分析（等待以上全部阶段）
         
         Args:
             query_id: 查询链路关联 id
@@ -168,105 +269,56 @@ class StockAnalysisPipeline:
             AnalysisResult 或 None（如果分析失败）
         """
         try:
-            # 获取股票名称（优先从实时行情获取真实名称）
-            stock_name = STOCK_NAME_MAP.get(code, '')
-            
-            # Step 1: 获取实时行情（量比、换手率等）- 使用统一入口，自动故障切换
-            realtime_quote = None
-            try:
-                realtime_quote = self.fetcher_manager.get_realtime_quote(code)
-                if realtime_quote:
-                    # 使用实时行情返回的真实股票名称
-                    if realtime_quote.name:
-                        stock_name = realtime_quote.name
-                    # 兼容不同数据源的字段（有些数据源可能没有 volume_ratio）
-                    volume_ratio = getattr(realtime_quote, 'volume_ratio', None)
-                    turnover_rate = getattr(realtime_quote, 'turnover_rate', None)
-                    logger.info(f"[{code}] {stock_name} 实时行情: 价格={realtime_quote.price}, "
-                              f"量比={volume_ratio}, 换手率={turnover_rate}% "
-                              f"(来源: {realtime_quote.source.value if hasattr(realtime_quote, 'source') else 'unknown'})")
-                else:
-                    logger.info(f"[{code}] 实时行情获取失败或已禁用，将使用历史数据进行分析")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取实时行情失败: {e}")
-            
-            # 如果还是没有名称，使用代码作为名称
-            if not stock_name:
-                stock_name = f'股票{code}'
-            
-            # Step 2: 获取筹码分布 - 使用统一入口，带熔断保护
-            chip_data = None
-            try:
-                chip_data = self.fetcher_manager.get_chip_distribution(code)
-                if chip_data:
-                    logger.info(f"[{code}] 筹码分布: 获利比例={chip_data.profit_ratio:.1%}, "
-                              f"90%集中度={chip_data.concentration_90:.2%}")
-                else:
-                    logger.debug(f"[{code}] 筹码分布获取失败或已禁用")
-            except Exception as e:
-                logger.warning(f"[{code}] 获取筹码分布失败: {e}")
-            
-            # Step 3: 趋势分析（基于交易理念）
-            trend_result: Optional[TrendAnalysisResult] = None
-            try:
-                # 获取历史数据进行趋势分析
-                context = self.db.get_analysis_context(code)
-                if context and 'raw_data' in context:
-                    import pandas as pd
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
-                        df = pd.DataFrame(raw_data)
-                        trend_result = self.trend_analyzer.analyze(df, code)
-                        logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
-                                  f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}")
-            except Exception as e:
-                logger.warning(f"[{code}] 趋势分析失败: {e}")
-            
-            # Step 4: 多维度情报搜索（最新消息+风险排查+业绩预期）
-            news_context = None
+            # 股票名称：优先使用实时行情返回的真实名称，其次使用静态映射
+            mapped_name = STOCK_NAME_MAP.get(code, '')
+
+            graph = StageGraph(name=code)
+            graph.add_stage("realtime", lambda deps: self._stage_realtime_quote(code))
+            graph.add_stage("chip", lambda deps: self._stage_chip_distribution(code))
+            # 分析上下文与趋势分析共用一次日线读取
+            graph.add_stage("bars", lambda deps: self._stage_daily_bars(code))
+            graph.add_stage(
+                "context",
+                lambda deps: self.db.get_analysis_context(code, history=deps["bars"]),
+                depends_on=["bars"],
+            )
+            graph.add_stage(
+                "trend", lambda deps: self._stage_trend_analysis(code, deps["bars"]), depends_on=["bars"]
+            )
             if self.search_service.is_available:
-                logger.info(f"[{code}] 开始多维度情报搜索...")
-                
-                # 使用多维度搜索（最多5次搜索）
-                intel_results = self.search_service.search_comprehensive_intel(
-                    stock_code=code,
-                    stock_name=stock_name,
-                    max_searches=5
-                )
-                
-                # 格式化情报报告
-                if intel_results:
-                    news_context = self.search_service.format_intel_report(intel_results, stock_name)
-                    total_results = sum(
-                        len(r.results) for r in intel_results.values() if r.success
+                if mapped_name:
+                    # 名称已知时情报搜索无需等待实时行情
+                    graph.add_stage(
+                        "intel",
+                        lambda deps: self._stage_intel_search(code, mapped_name, query_id),
+                    )
+                else:
+                    graph.add_stage(
+                        "intel",
+                        lambda deps: self._stage_intel_search(
+                            code, self._resolve_stock_name(code, mapped_name, deps["realtime"]), query_id
+                        ),
+                        depends_on=["realtime"],
                     )
-                    logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
-                    logger.debug(f"[{code}] 情报搜索结果:\n{news_context}")
-
-                    # 保存新闻情报到数据库（用于后续复盘与查询）
-                    try:
-                        query_context = self._build_query_context(query_id=query_id)
-                        for dim_name, response in intel_results.items():
-                            if response and response.success and response.results:
-                                self.db.save_news_intel(
-                                    code=code,
-                                    name=stock_name,
-                                    dimension=dim_name,
-                                    query=response.query,
-                                    response=response,
-                                    query_context=query_context
-                                )
-                    except Exception as e:
-                        logger.warning(f"[{code}] 保存新闻情报失败: {e}")
             else:
                 logger.info(f"[{code}] 搜索服务不可用，跳过情报搜索")
-            
-            # Step 5: 获取分析上下文（技术面数据）
-            context = self.db.get_analysis_context(code)
+
+            outputs = graph.run()
+            for stage_name, stage_result in graph.results.items():
+                if stage_result.error is not None:
+                    logger.warning(f"[{code}] 阶段 {stage_name} 执行失败: {stage_result.error}")
+            stage_timings = graph.timings()
+            logger.info(f"[{code}] 数据准备阶段耗时: {graph.format_timings()}")
+
+            realtime_quote = outputs.get("realtime")
+            chip_data: Optional[ChipDistribution] = outputs.get("chip")
+            trend_result: Optional[TrendAnalysisResult] = outputs.get("trend")
+            news_context: Optional[str] = outputs.get("intel")
+            context = outputs.get("context")
+            stock_name = self._resolve_stock_name(code, mapped_name, realtime_quote)
             
             if context is None:
                 logger.warning(f"[{code}] 无法获取历史行情数据，将仅基于新闻和实时行情分析")
-                from datetime import date
                 context = {
                     'code': code,
                     'stock_name': stock_name,
@@ -276,7 +328,7 @@ class StockAnalysisPipeline:
                     'yesterday': {}
                 }
             
-            # Step 6: 增强上下文数据（添加实时行情、筹码、趋势分析结果、股票名称）
+            # 增强上下文数据（添加实时行情、筹码、趋势分析结果、股票名称）
             enhanced_context = self._enhance_context(
                 context, 
                 realtime_quote, 
@@ -285,23 +337,27 @@ class StockAnalysisPipeline:
                 stock_name  # 传入股票名称
             )
             
-            # Step 7: 调用 AI 分析（传入增强的上下文和新闻）
-            result = self.analyzer.analyze(enhanced_context, news_context=news_context)
+            # 调用 AI 分析（传入增强的上下文和新闻），按模型占用 LLM 预算
+            llm_start = time.time()
+            with get_rate_limiter_registry().limit(self._llm_budget_name()):
+                result = self.analyzer.analyze(enhanced_context, news_context=news_context)
+            stage_timings["llm"] = round(time.time() - llm_start, 3)
 
-            # Step 7.5: 填充分析时的价格信息到 result
+            # 填充分析时的价格信息到 result
             if result:
                 realtime_data = enhanced_context.get('realtime', {})
                 result.current_price = realtime_data.get('price')
                 result.change_pct = realtime_data.get('change_pct')
 
-            # Step 8: 保存分析历史记录
+            # 保存分析历史记录
             if result:
                 try:
                     context_snapshot = self._build_context_snapshot(
                         enhanced_context=enhanced_context,
                         news_content=news_context,
                         realtime_quote=realtime_quote,
-                        chip_data=chip_data
+                        chip_data=chip_data,
+                        stage_timings=stage_timings,
                     )
                     self.db.save_analysis_history(
                         result=result,
@@ -320,6 +376,141 @@ class StockAnalysisPipeline:
             logger.error(f"[{code}] 分析失败: {e}")
             logger.exception(f"[{code}] 详细错误信息:")
             return None
+
+    def _llm_budget_name(self) -> str:
+        """LLM 上游预算名称：llm:<model>"""
+        model_name = getattr(self.analyzer, '_current_model_name', None)
+        return f"llm:{model_name}" if model_name else "llm"
+
+    @staticmethod
+    def _resolve_stock_name(code: str, mapped_name: str, realtime_quote: Any) -> str:
+        """
+        解析股票名称：实时行情名称 > 静态映射名称 > 代码占位
+        """
+        if realtime_quote is not None and getattr(realtime_quote, 'name', None):
+            return realtime_quote.name
+        return mapped_name or f'股票{code}'
+
+    def _stage_realtime_quote(self, code: str):
+        """阶段：获取实时行情（量比、换手率等）- 使用统一入口，自动故障切换"""
+        try:
+            realtime_quote = self.fetcher_manager.get_realtime_quote(code)
+        except Exception as e:
+            logger.warning(f"[{code}] 获取实时行情失败: {e}")
+            return None
+
+        if realtime_quote:
+            # 兼容不同数据源的字段（有些数据源可能没有 volume_ratio）
+            volume_ratio = getattr(realtime_quote, 'volume_ratio', None)
+            turnover_rate = getattr(realtime_quote, 'turnover_rate', None)
+            logger.info(f"[{code}] {realtime_quote.name or code} 实时行情: 价格={realtime_quote.price}, "
+                      f"量比={volume_ratio}, 换手率={turnover_rate}% "
+                      f"(来源: {realtime_quote.source.value if hasattr(realtime_quote, 'source') else 'unknown'})")
+        else:
+            logger.info(f"[{code}] 实时行情获取失败或已禁用，将使用历史数据进行分析")
+        return realtime_quote
+
+    def _stage_chip_distribution(self, code: str) -> Optional[ChipDistribution]:
+        """阶段：获取筹码分布 - 使用统一入口，带熔断保护"""
+        try:
+            chip_data = self.fetcher_manager.get_chip_distribution(code)
+        except Exception as e:
+            logger.warning(f"[{code}] 获取筹码分布失败: {e}")
+            return None
+
+        if chip_data:
+            logger.info(f"[{code}] 筹码分布: 获利比例={chip_data.profit_ratio:.1%}, "
+                      f"90%集中度={chip_data.concentration_90:.2%}")
+        else:
+            logger.debug(f"[{code}] 筹码分布获取失败或已禁用")
+        return chip_data
+
+    def _stage_daily_bars(self, code: str):
+        """阶段：读取库中最近 TREND_HISTORY_DAYS 日历日的日线（分析上下文与趋势分析共用）"""
+        start_date = date.today() - timedelta(days=TREND_HISTORY_DAYS)
+        return self.db.get_daily_history([code], start_date, columns=self.db.DAILY_COLUMNS)
+
+    def _stage_trend_analysis(self, code: str, bars=None) -> Optional[TrendAnalysisResult]:
+        """
+        阶段：趋势分析（基于交易理念）
+
+        使用库中最近 TREND_HISTORY_DAYS 日历日的日线（bars 阶段已读取时直接复用）；
+        流式指标状态与最后一根 K 线对齐时直接取用状态中的指标，否则由分析器全量计算
+        """
+        try:
+            if bars is None:
+                bars = self._stage_daily_bars(code)
+            df = bars.drop(columns=['code'])
+            if df.empty:
+                logger.info(f"[{code}] 库中无日线数据，跳过趋势分析")
+                return None
+            state = self.fetcher_manager.load_indicator_state(code)
+            if state is not None and state.bars < len(df):
+                # 状态回放的 K 线少于库中窗口（如由较短的历史建立）：全量计算更准确
+                logger.debug(f"[{code}] 指标状态仅覆盖 {state.bars} 根 K 线（库中 {len(df)} 根），改为全量计算")
+                state = None
+            trend_result = self.trend_analyzer.analyze(df, code, state=state)
+            logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
+                      f"买入信号={trend_result.buy_signal.value}, 评分={trend_result.signal_score}")
+            return trend_result
+        except Exception as e:
+            logger.warning(f"[{code}] 趋势分析失败: {e}")
+        return None
+
+    def _stage_intel_search(self, code: str, stock_name: str, query_id: str) -> Optional[str]:
+        """阶段：多维度情报搜索（最新消息+风险排查+业绩预期），返回格式化后的情报报告"""
+        logger.info(f"[{code}] 开始多维度情报搜索...")
+
+        # 所属行业：同行业股票的行业分析维度共享一次搜索
+        sector = None
+        try:
+            sector = self.fetcher_manager.get_stock_sector(code)
+        except Exception as e:
+            logger.debug(f"[{code}] 获取所属行业失败: {e}")
+
+        # 使用多维度搜索（最多5次搜索）；新结果由搜索缓存连同查询上下文写入 news_intel
+        query_context = self._build_query_context(query_id=query_id)
+        intel_results = self.search_service.search_comprehensive_intel(
+            stock_code=code,
+            stock_name=stock_name,
+            max_searches=5,
+            sector=sector,
+            query_context=query_context
+        )
+        if not intel_results:
+            return None
+
+        # 格式化情报报告
+        news_context = self.search_service.format_intel_report(intel_results, stock_name)
+        total_results = sum(
+            len(r.results) for r in intel_results.values() if r.success
+        )
+        logger.info(f"[{code}] 情报搜索完成: 共 {total_results} 条结果")
+        logger.debug(f"[{code}] 情报搜索结果:\n{news_context}")
+
+        # 搜索缓存不持久化时由此保存新闻情报（用于后续复盘与查询）
+        # 命中缓存的结果在首次抓取时已保存，重复保存会刷新 fetched_at 并延长缓存有效期，只追加 query_id 关联
+        if self.search_service.persists_results:
+            return news_context
+        try:
+            for dim_name, response in intel_results.items():
+                if not (response and response.success and response.results):
+                    continue
+                if response.from_cache:
+                    self.db.link_news_intel(code, response.query, dim_name, response, query_context=query_context)
+                else:
+                    self.db.save_news_intel(
+                        code=code,
+                        name=stock_name,
+                        dimension=dim_name,
+                        query=response.query,
+                        response=response,
+                        query_context=query_context
+                    )
+        except Exception as e:
+            logger.warning(f"[{code}] 保存新闻情报失败: {e}")
+
+        return news_context
     
     def _enhance_context(
         self,
@@ -426,7 +617,8 @@ class StockAnalysisPipeline:
         enhanced_context: Dict[str, Any],
         news_content: Optional[str],
         realtime_quote: Any,
-        chip_data: Optional[ChipDistribution]
+        chip_data: Optional[ChipDistribution],
+        stage_timings: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
         """
         构建分析上下文快照
@@ -436,6 +628,7 @@ class StockAnalysisPipeline:
             "news_content": news_content,
             "realtime_quote_raw": self._safe_to_dict(realtime_quote),
             "chip_distribution_raw": self._safe_to_dict(chip_data),
+            "stage_timings": stage_timings or {},
         }
 
     @staticmethod
@@ -600,7 +793,7 @@ class StockAnalysisPipeline:
         4. 发送通知
         
         Args:
-            stock_codes: 股票代码列表（可选，默认使用配置中的自选股）
+            stock_codes: 股票代码列表（可选，默认使用配置中的自选股；仅默认自选股会经过全市场初筛）
             dry_run: 是否仅获取数据不分析
             send_notification: 是否发送推送通知
             
@@ -610,17 +803,38 @@ class StockAnalysisPipeline:
         start_time = time.time()
         
         # 使用配置中的股票列表
-        if stock_codes is None:
+        from_watchlist = stock_codes is None
+        if from_watchlist:
             self.config.refresh_stock_list()
             stock_codes = self.config.stock_list
         
         if not stock_codes:
             logger.error("未配置自选股列表，请在 .env 文件中设置 STOCK_LIST")
             return []
+
+        # === 全市场初筛：只有入选的股票进入搜索 + LLM 分析 ===
+        # 仅对配置的自选股生效：显式指定的股票（--stocks / 机器人批量命令）全部分析，dry-run 只拉数据不筛选
+        if from_watchlist and not dry_run and getattr(self.config, 'screener_enabled', False):
+            stock_codes = self._stage_market_screen(stock_codes)
+            if not stock_codes:
+                logger.info("初筛后没有入选的股票，本轮不进行分析")
+                return []
         
+        stock_concurrency = self._resolve_stock_concurrency(len(stock_codes))
         logger.info(f"===== 开始分析 {len(stock_codes)} 只股票 =====")
         logger.info(f"股票列表: {', '.join(stock_codes)}")
-        logger.info(f"并发数: {self.max_workers}, 模式: {'仅获取数据' if dry_run else '完整分析'}")
+        logger.info(
+            f"在途股票任务数: {stock_concurrency}（各上游按独立预算限流）, "
+            f"模式: {'仅获取数据' if dry_run else '完整分析'}"
+        )
+        
+        # === 数据新鲜度索引：一次查询拆分“已是最新”和“需要获取” ===
+        fresh_codes, stale_codes = self.build_freshness_index(stock_codes)
+        logger.info(f"数据新鲜度: {len(fresh_codes)} 只已有今日数据，{len(stale_codes)} 只需要获取")
+        
+        # === 批量预取境外股票日线（一次 yf.download 覆盖全部美股/港股）===
+        if stale_codes:
+            self.fetcher_manager.prefetch_daily_data(stale_codes, days=self.DEFAULT_FETCH_DAYS)
         
         # === 批量预取实时行情（优化：避免每只股票都触发全量拉取）===
         # 只有股票数量 >= 5 时才进行预取，少量股票直接逐个查询更高效
@@ -634,17 +848,16 @@ class StockAnalysisPipeline:
         # Issue #119: 从配置读取报告类型
         report_type_str = getattr(self.config, 'report_type', 'simple').lower()
         report_type = ReportType.FULL if report_type_str == 'full' else ReportType.SIMPLE
-        # Issue #128: 从配置读取分析间隔
-        analysis_delay = getattr(self.config, 'analysis_delay', 0)
 
         if single_stock_notify:
             logger.info(f"已启用单股推送模式：每分析完一只股票立即推送（报告类型: {report_type_str}）")
         
         results: List[AnalysisResult] = []
         
-        # 使用线程池并发处理
-        # 注意：max_workers 设置较低（默认3）以避免触发反爬
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        # 使用线程池并发处理股票任务
+        # 防封禁/防限流由各上游（数据源、搜索 Key、LLM 模型）的独立预算保证，
+        # 股票任务按阶段向对应预算申请配额（Issue #128 的 analysis_delay 已折算为 LLM 速率预算）
+        with ThreadPoolExecutor(max_workers=stock_concurrency) as executor:
             # 提交任务
             future_to_code = {
                 executor.submit(
@@ -659,28 +872,27 @@ class StockAnalysisPipeline:
             }
             
             # 收集结果
-            for idx, future in enumerate(as_completed(future_to_code)):
+            for future in as_completed(future_to_code):
                 code = future_to_code[future]
                 try:
                     result = future.result()
                     if result:
                         results.append(result)
-
-                    # Issue #128: 分析间隔 - 在个股分析和大盘分析之间添加延迟
-                    if idx < len(stock_codes) - 1 and analysis_delay > 0:
-                        logger.debug(f"等待 {analysis_delay} 秒后继续下一只股票...")
-                        time.sleep(analysis_delay)
-
                 except Exception as e:
                     logger.error(f"[{code}] 任务执行失败: {e}")
+
+        # 新鲜度快照仅对本轮有效
+        self._latest_dates = None
         
         # 统计
         elapsed_time = time.time() - start_time
         
         # dry-run 模式下，数据获取成功即视为成功
         if dry_run:
-            # 检查哪些股票的数据今天已存在
-            success_count = sum(1 for code in stock_codes if self.db.has_today_data(code))
+            # 检查哪些股票的数据今天已存在（一次分组查询）
+            today = date.today()
+            latest_dates = self.db.get_latest_dates(stock_codes)
+            success_count = sum(1 for code in stock_codes if latest_dates.get(code) == today)
             fail_count = len(stock_codes) - success_count
         else:
             success_count = len(results)
@@ -688,6 +900,23 @@ class StockAnalysisPipeline:
         
         logger.info("===== 分析完成 =====")
         logger.info(f"成功: {success_count}, 失败: {fail_count}, 耗时: {elapsed_time:.2f} 秒")
+        for upstream, stats in get_rate_limiter_registry().stats().items():
+            if stats['acquired']:
+                logger.debug(
+                    f"[预算] {upstream}: 请求 {stats['acquired']} 次, 峰值并发 {stats['peak_in_flight']}, "
+                    f"累计等待 {stats['total_wait']:.2f}s"
+                )
+        for source, stats in get_fetcher_health_tracker().stats().items():
+            logger.debug(
+                f"[数据源] {source}: 成功率 {stats['success_rate']:.0%}, 平均耗时 {stats['avg_latency']:.2f}s, "
+                f"熔断状态 {stats['circuit']}"
+            )
+        for cache_name, stats in get_snapshot_cache_stats().items():
+            if stats['hits'] or stats['misses']:
+                logger.debug(
+                    f"[快照缓存] {cache_name}: 命中 {stats['hits']}, 旧值命中 {stats['stale_hits']}, "
+                    f"刷新 {stats['refreshes']}/{stats['misses']}, 等待 {stats['waits']}"
+                )
         
         # 发送通知（单股推送模式下跳过汇总推送，避免重复）
         if results and send_notification and not dry_run:
@@ -700,6 +929,42 @@ class StockAnalysisPipeline:
         
         return results
     
+    def _stage_market_screen(self, stock_codes: List[str]) -> List[str]:
+        """
+        全市场初筛阶段：用全量行情快照 + 批量趋势规则打分，返回进入完整分析的股票
+
+        快照不可用（未配置全量数据源、熔断或拉取失败）时保留原列表，不因初筛漏掉分析。
+        """
+        try:
+            result = MarketScreener(
+                self.fetcher_manager, self.db, self.trend_analyzer, self.config
+            ).screen(stock_codes)
+        except Exception as e:
+            logger.warning(f"[初筛] 执行失败，分析全部 {len(stock_codes)} 只股票: {e}")
+            return stock_codes
+        if result is None:
+            logger.warning(f"[初筛] 全市场快照不可用，分析全部 {len(stock_codes)} 只股票")
+            return stock_codes
+        if result.admitted:
+            logger.info(
+                "[初筛] 入选: " + ", ".join(
+                    f"{code}({result.scores[code]})" if code in result.scores else code
+                    for code in result.admitted
+                )
+            )
+        return result.admitted
+
+    def _resolve_stock_concurrency(self, stock_count: int) -> int:
+        """
+        计算同时在途的股票任务数
+
+        不再以 max_workers 限制整只股票的并发：各上游由独立预算限流，
+        在途任务数只需保证廉价数据源能被打满，同时不超过股票数量。
+        """
+        configured = getattr(self.config, 'pipeline_stock_concurrency', 0) or 0
+        concurrency = max(self.max_workers, configured)
+        return max(1, min(concurrency, stock_count))
+
     def _send_notifications(self, results: List[AnalysisResult], skip_push: bool = False) -> None:
         """
         发送分析结果通知
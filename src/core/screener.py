@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 全市场初筛
+===================================
+
+职责：
+1. 在搜索 + LLM 分析之前，用已缓存的全市场行情快照（efinance / akshare_em）为股票打分
+2. 对快照评分靠前的候选股票，读取库中日线并用 StockTrendAnalyzer.analyze_batch 批量计算趋势评分
+3. 按综合评分门槛与 Top-K 选出进入 analyze_stock 的股票
+
+成本由 O(股票数 × LLM) 降为 O(全市场 × 向量运算) + O(K × LLM)。
+
+评分口径（0-100）：
+- 快照评分：涨跌幅（40）+ 量比（30）+ 换手率（30），温和放量上涨得分最高，
+  大涨 / 巨量 / 过度换手按“不追高”原则降分
+- 综合评分：有 20 日以上日线时 = 趋势评分 × 0.6 + 快照评分 × 0.4，否则为快照评分
+- 排序：进入趋势评分的候选池（快照评分前 Top-K × 5）整体排在池外股票之前，
+  两组各自按评分降序，避免混合评分与纯快照评分在同一尺度上比较
+- 趋势规则基于库中已有日线，不额外请求数据源
+
+使用方式：
+    screener = MarketScreener(fetcher_manager, db, trend_analyzer, config)
+    result = screener.screen(stock_codes)
+    if result is not None:
+        stock_codes = result.admitted
+"""
+
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config, get_config
+from src.stock_analyzer import StockTrendAnalyzer
+
+logger = logging.getLogger(__name__)
+
+
+# 快照评分分段线性映射：字段 -> (取值节点, 得分节点)，字段缺失或为 NaN 时该项得 0 分
+SNAPSHOT_SCORE_CURVES = {
+    'change_pct': ([-5.0, 0.0, 3.0, 6.0, 10.0], [0.0, 15.0, 40.0, 30.0, 10.0]),
+    'volume_ratio': ([0.5, 1.0, 2.0, 5.0, 10.0], [0.0, 10.0, 30.0, 25.0, 10.0]),
+    'turnover_rate': ([0.5, 2.0, 8.0, 20.0], [0.0, 15.0, 30.0, 10.0]),
+}
+# 综合评分中趋势评分的权重
+TREND_WEIGHT = 0.6
+# 进入趋势评分的候选数 = Top-K × 该倍数（Top-K 不限时全部候选）
+TREND_POOL_FACTOR = 5
+# 趋势评分读取的日历日数（覆盖 MA60 与 MACD 预热）
+TREND_HISTORY_DAYS = 180
+# 趋势评分所需的最少交易日数（与 StockTrendAnalyzer 一致）
+TREND_MIN_BARS = 20
+
+
+@dataclass
+class ScreenResult:
+    """初筛结果"""
+
+    admitted: List[str] = field(default_factory=list)      # 入选代码（按综合评分降序，无法评分的代码在最后）
+    scores: Dict[str, float] = field(default_factory=dict)  # 参与评分的代码 -> 综合评分
+    passthrough: List[str] = field(default_factory=list)   # 快照中不存在（港美股 / ETF 等）直接放行的自选股
+    universe_size: int = 0                                 # 参与评分的股票数
+    elapsed: float = 0.0                                   # 耗时（秒）
+
+
+def score_snapshot(frame: pd.DataFrame) -> np.ndarray:
+    """
+    向量化计算快照评分（0-100）
+
+    Args:
+        frame: RealtimeQuoteSnapshot.to_frame() 格式的行情表
+
+    Returns:
+        与 frame 行对齐的评分数组
+    """
+    score = np.zeros(len(frame))
+    for column, (xs, ys) in SNAPSHOT_SCORE_CURVES.items():
+        if column not in frame.columns:
+            continue
+        values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+        part = np.interp(values, xs, ys)
+        score += np.where(np.isnan(values), 0.0, part)
+    return score
+
+
+class MarketScreener:
+    """
+    全市场初筛器
+
+    快照不可用时 screen() 返回 None，调用方应保留原股票列表（不因初筛失败漏掉分析）。
+    """
+
+    def __init__(
+        self,
+        fetcher_manager,
+        db,
+        trend_analyzer: Optional[StockTrendAnalyzer] = None,
+        config: Optional[Config] = None,
+    ):
+        self.fetcher_manager = fetcher_manager
+        self.db = db
+        self.trend_analyzer = trend_analyzer or StockTrendAnalyzer()
+        self.config = config or get_config()
+
+    def screen(self, stock_codes: List[str]) -> Optional[ScreenResult]:
+        """
+        对自选股（或全市场）打分并选出进入完整分析的股票
+
+        Args:
+            stock_codes: 自选股代码列表
+
+        Returns:
+            ScreenResult，全市场快照不可用时返回 None
+        """
+        start = time.time()
+        snapshot = self.fetcher_manager.get_market_snapshot()
+        if snapshot is None or snapshot.empty:
+            return None
+
+        frame = snapshot.to_frame()
+        in_snapshot = set(frame['code'])
+        passthrough = [code for code in stock_codes if code not in in_snapshot]
+
+        if self.config.screener_universe == 'market':
+            watchlist = set(stock_codes)
+            keep = frame['code'].isin(watchlist) | self._tradable_mask(frame)
+            frame = frame[keep]
+        else:
+            frame = frame[frame['code'].isin(set(stock_codes))]
+        frame = frame.reset_index(drop=True)
+
+        scores = pd.Series(score_snapshot(frame), index=frame['code'].to_numpy())
+        pool = self._trend_pool(scores)
+        scores = self._blend_trend_scores(scores, pool)
+
+        min_score = self.config.screener_min_score
+        in_pool = scores.index.isin(pool)
+        ranked = pd.concat([
+            scores[in_pool].sort_values(ascending=False, kind='stable'),
+            scores[~in_pool].sort_values(ascending=False, kind='stable'),
+        ])
+        if min_score > 0:
+            ranked = ranked[ranked >= min_score]
+        top_k = self.config.screener_top_k
+        if top_k > 0:
+            ranked = ranked.head(top_k)
+
+        result = ScreenResult(
+            admitted=list(ranked.index) + passthrough,
+            scores={code: round(float(value), 1) for code, value in scores.items()},
+            passthrough=passthrough,
+            universe_size=len(scores),
+            elapsed=time.time() - start,
+        )
+        logger.info(
+            f"[初筛] 评分 {result.universe_size} 只，入选 {len(ranked)} 只"
+            f"（Top-K={top_k or '不限'}, 门槛={min_score or '无'}），"
+            f"直接放行 {len(passthrough)} 只，耗时 {result.elapsed:.2f}s"
+        )
+        return result
+
+    @staticmethod
+    def _tradable_mask(frame: pd.DataFrame) -> pd.Series:
+        """全市场模式下的可交易股票：有最新价且非 ST / 退市整理"""
+        if 'price' in frame.columns:
+            tradable = pd.to_numeric(frame['price'], errors='coerce') > 0
+        else:
+            tradable = pd.Series(True, index=frame.index)
+        return tradable & ~frame['name'].astype(str).str.contains('ST|退', regex=True)
+
+    def _trend_pool(self, scores: pd.Series) -> pd.Index:
+        """进入趋势评分的候选：快照评分前 Top-K × TREND_POOL_FACTOR（Top-K 不限时全部）"""
+        top_k = self.config.screener_top_k
+        if top_k <= 0:
+            return scores.index
+        return scores.nlargest(top_k * TREND_POOL_FACTOR).index
+
+    def _blend_trend_scores(self, scores: pd.Series, pool: pd.Index) -> pd.Series:
+        """为候选池计算趋势评分并合成综合评分（无足够日线的股票保留快照评分）"""
+        if scores.empty or pool.empty:
+            return scores
+        start_date = date.today() - timedelta(days=TREND_HISTORY_DAYS)
+        try:
+            history = self.db.get_daily_history(list(pool), start_date)
+        except Exception as e:
+            logger.warning(f"[初筛] 读取历史日线失败，仅使用快照评分: {e}")
+            return scores
+        if history.empty:
+            return scores
+
+        bars = history.groupby('code')['close'].count()
+        ready = set(bars[bars >= TREND_MIN_BARS].index)
+        history = history[history['code'].isin(ready)]
+        if history.empty:
+            return scores
+
+        trend = self.trend_analyzer.analyze_batch(history)
+        blended = scores.copy()
+        for code, result in trend.items():
+            if code in blended.index:
+                blended[code] = TREND_WEIGHT * result.signal_score + (1 - TREND_WEIGHT) * scores[code]
+        logger.debug(f"[初筛] 趋势评分 {len(trend)} 只（候选 {len(pool)} 只）")
+        return blended
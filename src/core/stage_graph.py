@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 阶段依赖图执行器
+===================================
+
+职责：
+1. 将单只股票的分析流程建模为小型依赖图（DAG）
+2. 相互独立的 I/O 阶段并发执行，仅在依赖就绪后启动下游阶段
+3. 记录每个阶段的耗时与异常，便于定位慢阶段
+
+使用示例：
+    graph = StageGraph(name="600519")
+    graph.add_stage("realtime", lambda deps: fetch_quote())
+    graph.add_stage("context", lambda deps: load_context())
+    graph.add_stage("trend", lambda deps: analyze(deps["context"]), depends_on=["context"])
+    results = graph.run()
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageResult:
+    """单个阶段的执行结果"""
+    name: str
+    value: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0        # 阶段自身耗时（秒）
+    finished_at: float = 0.0    # 相对图启动时刻的完成时间（秒）
+    skipped: bool = False       # 上游失败导致未执行
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and not self.skipped
+
+
+@dataclass
+class _Stage:
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends_on: List[str] = field(default_factory=list)
+    required: bool = False
+
+
+class StageGraph:
+    """
+    阶段依赖图
+
+    - 每个阶段是一个接收依赖结果字典的可调用对象：func(deps) -> value
+    - 依赖的阶段失败时，下游阶段仍会执行，对应依赖值为 None
+      （与原串行流程一致：单个阶段失败不影响整体分析）
+    - 仅当依赖被标记为 required 且失败时，下游阶段才会被跳过
+    """
+
+    def __init__(self, name: str = "", max_workers: Optional[int] = None):
+        """
+        Args:
+            name: 图名称（一般为股票代码，用于日志）
+            max_workers: 并发线程数（默认等于阶段数）
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self._stages: Dict[str, _Stage] = {}
+        self.results: Dict[str, StageResult] = {}
+        self.total_elapsed: float = 0.0
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Dict[str, Any]], Any],
+        depends_on: Optional[Iterable[str]] = None,
+        required: bool = False,
+    ) -> "StageGraph":
+        """
+        注册阶段
+
+        Args:
+            name: 阶段名称（唯一）
+            func: 阶段函数，参数为 {依赖阶段名: 结果值}
+            depends_on: 依赖的阶段名称列表（必须已注册）
+            required: 失败时是否跳过所有下游阶段
+        """
+        if name in self._stages:
+            raise ValueError(f"阶段已存在: {name}")
+        deps = list(depends_on or [])
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"阶段 {name} 依赖未注册的阶段: {dep}")
+        self._stages[name] = _Stage(name=name, func=func, depends_on=deps, required=required)
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """
+        执行依赖图，返回 {阶段名: 结果值}（失败/跳过的阶段值为 None）
+
+        阶段内部异常会被捕获并记录到 self.results[name].error，不会向外抛出。
+        """
+        self.results = {}
+        if not self._stages:
+            return {}
+
+        start = time.time()
+        pending: Dict[str, _Stage] = dict(self._stages)
+        running: Dict[Future, str] = {}
+        workers = self.max_workers or len(self._stages)
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"stage-{self.name}") as executor:
+            while pending or running:
+                # 提交所有依赖已就绪的阶段
+                for stage_name in list(pending):
+                    stage = pending[stage_name]
+                    if not all(dep in self.results for dep in stage.depends_on):
+                        continue
+                    pending.pop(stage_name)
+
+                    failed_required = [
+                        dep for dep in stage.depends_on
+                        if not self.results[dep].success and self._stages[dep].required
+                    ]
+                    if failed_required:
+                        logger.debug(f"[{self.name}] 阶段 {stage_name} 跳过（上游失败: {failed_required}）")
+                        self.results[stage_name] = StageResult(
+                            name=stage_name, skipped=True, finished_at=time.time() - start
+                        )
+                        continue
+
+                    deps = {dep: self.results[dep].value for dep in stage.depends_on}
+                    running[executor.submit(self._run_stage, stage, deps, start)] = stage_name
+
+                if not running:
+                    if pending:
+                        # 跳过的阶段可能解锁了新的阶段，继续下一轮提交
+                        continue
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage_name = running.pop(future)
+                    self.results[stage_name] = future.result()
+
+        self.total_elapsed = time.time() - start
+        return {name: result.value for name, result in self.results.items()}
+
+    @staticmethod
+    def _run_stage(stage: _Stage, deps: Dict[str, Any], graph_start: float) -> StageResult:
+        stage_start = time.time()
+        try:
+            value = stage.func(deps)
+            error = None
+        except Exception as e:
+            value = None
+            error = e
+        now = time.time()
+        return StageResult(
+            name=stage.name,
+            value=value,
+            error=error,
+            elapsed=now - stage_start,
+            finished_at=now - graph_start,
+        )
+
+    def timings(self) -> Dict[str, float]:
+        """返回各阶段耗时（秒，保留3位小数）"""
+        return {name: round(result.elapsed, 3) for name, result in self.results.items()}
+
+    def format_timings(self) -> str:
+        """格式化耗时摘要，例如：realtime=0.52s, chip=1.30s | 总计 1.31s（串行 1.82s）"""
+        parts = [f"{name}={result.elapsed:.2f}s" for name, result in self.results.items()]
+        serial = sum(result.elapsed for result in self.results.values())
+        return f"{', '.join(parts)} | 总计 {self.total_elapsed:.2f}s（串行 {serial:.2f}s）"
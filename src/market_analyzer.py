@@ -20,7 +20,7 @@ import pandas as pd
 
 from src.config import get_config
 from src.search_service import SearchService
-from data_provider.base import DataFetcherManager
+from data_provider.base import get_data_fetcher_manager
 
 logger = logging.getLogger(__name__)
 
@@ -98,7 +98,7 @@ class MarketAnalyzer:
         self.config = get_config()
         self.search_service = search_service
         self.analyzer = analyzer
-        self.data_manager = DataFetcherManager()
+        self.data_manager = get_data_fetcher_manager()
 
     def get_market_overview(self) -> MarketOverview:
         """
@@ -250,13 +250,8 @@ class MarketAnalyzer:
             logger.info("[大盘] 开始搜索市场新闻...")
             
             for query in search_queries:
-                # 使用 search_stock_news 方法，传入"大盘"作为股票名
-                response = self.search_service.search_stock_news(
-                    stock_code="market",
-                    stock_name="大盘",
-                    max_results=3,
-                    focus_keywords=query.split()
-                )
+                # 市场新闻与个股无关，同一查询当日只搜索一次（Web / Bot / 定时任务共享）
+                response = self.search_service.search_market_news(query, max_results=3)
                 if response and response.results:
                     all_news.extend(response.results)
                     logger.info(f"[大盘] 搜索 '{query}' 获取 {len(response.results)} 条结果")
@@ -19,7 +19,7 @@ import sys
 import time
 import threading
 from datetime import datetime
-from typing import Callable, Optional
+from typing import Callable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +100,25 @@ class Scheduler:
             logger.info("立即执行一次任务...")
             self._safe_run_task()
     
+    def add_daily_task(self, task: Callable, at_time: str, name: str):
+        """
+        追加每日定时执行的辅助任务（如收盘后预热缓存），与主任务共用调度循环
+
+        Args:
+            task: 要执行的任务函数（无参数）
+            at_time: 每日执行时间，格式 "HH:MM"
+            name: 任务名称（用于日志）
+        """
+        def _run():
+            try:
+                logger.info(f"定时任务[{name}]开始执行 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                task()
+            except Exception as e:
+                logger.exception(f"定时任务[{name}]执行失败: {e}")
+
+        self.schedule.every().day.at(at_time).do(_run)
+        logger.info(f"已设置每日定时任务[{name}]，执行时间: {at_time}")
+
     def _safe_run_task(self):
         """安全执行任务（带异常捕获）"""
         if self._task_callback is None:
@@ -153,7 +172,8 @@ class Scheduler:
 def run_with_schedule(
     task: Callable,
     schedule_time: str = "18:00",
-    run_immediately: bool = True
+    run_immediately: bool = True,
+    extra_tasks: Optional[List[Tuple[str, str, Callable]]] = None
 ):
     """
     便捷函数：使用定时调度运行任务
@@ -162,8 +182,11 @@ def run_with_schedule(
         task: 要执行的任务函数
         schedule_time: 每日执行时间
         run_immediately: 是否立即执行一次
+        extra_tasks: 额外的每日任务列表 [(名称, 执行时间, 任务函数)]
     """
     scheduler = Scheduler(schedule_time=schedule_time)
+    for name, at_time, extra_task in extra_tasks or []:
+        scheduler.add_daily_task(extra_task, at_time, name)
     scheduler.set_daily_task(task, run_immediately=run_immediately)
     scheduler.run()
 
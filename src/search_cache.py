@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+搜索结果两级缓存
+===================================
+
+职责：
+1. 内存 LRU 在前、news_intel 表在后：同一查询在 Web / Bot / 定时任务 / 多个进程之间共享，
+   重复分析同一股票不再消耗付费搜索配额
+2. 按交易时段计算有效期：盘中获取的结果 SEARCH_CACHE_SESSION_TTL 秒后过期（新闻变化快），
+   盘前 / 午休 / 盘后 / 周末获取的结果一直有效到下一个交易时段开始
+3. 行业 / 大盘等跨股票共享的维度（DAILY_DIMENSIONS）按自然日缓存，同一查询当日只搜索一次
+4. get_or_load 合并并发请求：同一 (查询, 维度) 同时只有一个调用方实际搜索，其余等待其结果
+5. 仅缓存成功且有结果的响应；写入缓存时同时写入 news_intel（含 query_context），调用方无需再次保存；
+   命中缓存时把已入库的新闻关联到本次股票与 query_id（news_intel_links），历史记录仍能按 query_id 查到新闻，
+   跨股票共享的行业结果也能按各成员股票代码查到
+
+缓存键为 (维度, 查询, 时间范围 days)；max_results 不进入键：缓存结果条数（或抓取时请求的条数）
+不少于本次请求时命中并截取前 max_results 条，否则视为未命中重新搜索。
+
+持久层复用 news_intel 表（query / dimension / fetched_at），按 (查询, 维度) 取最近一次抓取的记录还原响应。
+news_intel 不记录 days 与 max_results：还原时忽略 days，按还原条数判断是否满足 max_results。
+news_intel 按 URL 去重，同一链接被其他查询再次命中时归属最新的查询，因此还原的条数可能少于原始结果。
+
+仓库没有交易日历，交易日按工作日（周一至周五）近似。
+
+使用方式：
+    cache = get_search_cache()
+    response = cache.get(query, 'latest_news', '600519')
+    cache.put(query, 'latest_news', response, '600519', '贵州茅台', max_results=3)
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 各市场交易时段（本地时间，距当日 0 点的分钟数；美股夜盘跨零点）
+MARKET_SESSIONS: Dict[str, Tuple[Tuple[int, int], ...]] = {
+    'cn': ((9 * 60 + 30, 11 * 60 + 30), (13 * 60, 15 * 60)),
+    'hk': ((9 * 60 + 30, 12 * 60), (13 * 60, 16 * 60)),
+    'us': ((21 * 60 + 30, 28 * 60),),
+}
+# 盘中缓存时间（秒）
+DEFAULT_SESSION_TTL = 1800
+# 与个股无关、当日内基本不变的维度：按自然日缓存
+DAILY_DIMENSIONS = frozenset({'industry', 'market_news'})
+# get_or_load 等待其他调用方搜索结果的最长时间（秒）
+LOAD_WAIT_TIMEOUT = 60.0
+# 内存 LRU 容量
+DEFAULT_MAX_ENTRIES = 500
+# 同一次搜索写入 news_intel 的各条记录 fetched_at 相差很小，按此窗口归为同一批
+_BATCH_WINDOW = timedelta(minutes=1)
+
+
+def _session_windows(day: date, market: str) -> List[Tuple[datetime, datetime]]:
+    if day.weekday() >= 5:
+        return []
+    base = datetime.combine(day, dtime())
+    return [
+        (base + timedelta(minutes=start), base + timedelta(minutes=end))
+        for start, end in MARKET_SESSIONS.get(market, MARKET_SESSIONS['cn'])
+    ]
+
+
+def in_trading_session(moment: datetime, market: str = 'cn') -> bool:
+    """moment 是否处于交易时段内"""
+    for offset in (0, 1):  # 前一天的夜盘可能跨零点
+        for start, end in _session_windows(moment.date() - timedelta(days=offset), market):
+            if start <= moment < end:
+                return True
+    return False
+
+
+def next_session_start(moment: datetime, market: str = 'cn') -> datetime:
+    """moment 之后最近一个交易时段的开始时间"""
+    for offset in range(8):
+        for start, _ in _session_windows(moment.date() + timedelta(days=offset), market):
+            if start > moment:
+                return start
+    return moment + timedelta(days=1)
+
+
+def search_cache_expiry(
+    fetched_at: datetime,
+    market: str = 'cn',
+    session_ttl: int = DEFAULT_SESSION_TTL,
+    daily: bool = False,
+) -> datetime:
+    """
+    搜索结果的过期时间
+
+    - daily=True：当日有效（到次日 0 点）
+    - 盘中获取：session_ttl 秒后过期
+    - 其余时间获取：到下一个交易时段开始
+    """
+    if daily:
+        return datetime.combine(fetched_at.date() + timedelta(days=1), dtime())
+    if in_trading_session(fetched_at, market):
+        return fetched_at + timedelta(seconds=session_ttl)
+    return next_session_start(fetched_at, market)
+
+
+def _market_of(stock_code: str) -> str:
+    try:
+        from data_provider.fetcher_health import classify_market
+        market = classify_market(stock_code)
+    except Exception:
+        return 'cn'
+    return market if market in MARKET_SESSIONS else 'cn'
+
+
+class SearchCache:
+    """
+    搜索结果两级缓存（线程安全）
+
+    - 内存层：{(维度, 查询, days): (过期时间, SearchResponse, 抓取时请求的条数)}，
+      超过 max_entries 时淘汰最久未使用的条目
+    - 持久层：news_intel 表；use_db=False 时只使用内存层
+    """
+
+    def __init__(
+        self,
+        session_ttl: int = DEFAULT_SESSION_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        use_db: bool = True,
+    ):
+        self.session_ttl = session_ttl
+        self.max_entries = max(1, max_entries)
+        self.use_db = use_db
+        self._entries: 'OrderedDict[Tuple[Any, ...], Tuple[datetime, object, Optional[int]]]' = OrderedDict()
+        self._loading: Dict[Tuple[Any, ...], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        query: str,
+        dimension: str,
+        stock_code: str,
+        now: Optional[datetime] = None,
+        max_results: Optional[int] = None,
+        days: Optional[int] = None,
+    ):
+        """
+        读取缓存（内存未命中时查 news_intel，命中后回填内存）
+
+        Args:
+            max_results: 本次请求的结果条数（缓存条数不足时视为未命中）
+            days: 本次请求的时间范围（进入缓存键）
+
+        Returns:
+            from_cache=True 的 SearchResponse；未命中或已过期返回 None
+        """
+        now = now or datetime.now()
+        key = (dimension, query, days)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, response, fetched_max = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                elif self._covers(response, fetched_max, max_results):
+                    self._entries.move_to_end(key)
+                    return self._truncate(response, max_results)
+                else:
+                    return None
+
+        if not self.use_db:
+            return None
+        restored = self._load_from_db(query, dimension, stock_code, now)
+        if restored is None:
+            return None
+        expires_at, response = restored
+        if not self._covers(response, None, max_results):
+            return None
+        self._remember(key, expires_at, response, None)
+        return self._truncate(response, max_results)
+
+    def put(
+        self,
+        query: str,
+        dimension: str,
+        response,
+        stock_code: str,
+        stock_name: str = '',
+        now: Optional[datetime] = None,
+        max_results: Optional[int] = None,
+        days: Optional[int] = None,
+        query_context: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        写入缓存（仅成功且有结果的响应；同时写入 news_intel）
+
+        Args:
+            max_results: 抓取时请求的结果条数
+            days: 抓取时请求的时间范围
+            query_context: 写入 news_intel 的查询上下文（平台、用户、query_id 等）
+        """
+        if response is None or not response.success or not response.results or response.from_cache:
+            return
+        now = now or datetime.now()
+        expires_at = self._expiry(now, dimension, stock_code)
+        self._remember((dimension, query, days), expires_at, replace(response, from_cache=True), max_results)
+
+        if not self.use_db:
+            return
+        try:
+            from src.storage import get_db
+            get_db().save_news_intel(
+                code=stock_code, name=stock_name, dimension=dimension, query=query, response=response,
+                query_context=query_context,
+            )
+        except Exception as e:
+            logger.warning(f"[搜索缓存] 写入 news_intel 失败: {e}")
+
+    def get_or_load(
+        self,
+        query: str,
+        dimension: str,
+        stock_code: str,
+        loader: Callable[[], object],
+        stock_name: str = '',
+        wait_timeout: float = LOAD_WAIT_TIMEOUT,
+        max_results: Optional[int] = None,
+        days: Optional[int] = None,
+        query_context: Optional[Dict[str, str]] = None,
+    ):
+        """
+        读取缓存，未命中时调用 loader 搜索并写入缓存
+
+        同一 (查询, 维度, days) 的并发调用只有第一个执行 loader，其余等待其结果；
+        首个调用方搜索失败或等待超时时，等待方各自执行一次 loader
+        """
+        cached = self.get(query, dimension, stock_code, max_results=max_results, days=days)
+        if cached is not None:
+            self.link(query, dimension, cached, stock_code, query_context)
+            return cached
+
+        key = (dimension, query, days)
+        with self._lock:
+            event = self._loading.get(key)
+            owner = event is None
+            if owner:
+                event = self._loading[key] = threading.Event()
+
+        if not owner:
+            event.wait(wait_timeout)
+            cached = self.get(query, dimension, stock_code, max_results=max_results, days=days)
+            if cached is not None:
+                self.link(query, dimension, cached, stock_code, query_context)
+                return cached
+
+        try:
+            response = loader()
+            self.put(
+                query, dimension, response, stock_code, stock_name,
+                max_results=max_results, days=days, query_context=query_context,
+            )
+            return response
+        finally:
+            if owner:
+                with self._lock:
+                    self._loading.pop(key, None)
+                event.set()
+
+    def link(
+        self,
+        query: str,
+        dimension: str,
+        response,
+        stock_code: str,
+        query_context: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        命中缓存时将已入库的结果关联到本次股票与 query_context 中的 query_id（不改动 fetched_at）
+
+        没有 query_id 时只为跨股票共享的维度（DAILY_DIMENSIONS）关联股票代码
+        """
+        if not self.use_db:
+            return
+        if not (query_context or {}).get('query_id') and dimension not in DAILY_DIMENSIONS:
+            return
+        try:
+            from src.storage import get_db
+            get_db().link_news_intel(stock_code, query, dimension, response, query_context=query_context)
+        except Exception as e:
+            logger.warning(f"[搜索缓存] 关联 news_intel 失败: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _expiry(self, fetched_at: datetime, dimension: str, stock_code: str) -> datetime:
+        return search_cache_expiry(
+            fetched_at, _market_of(stock_code), self.session_ttl, daily=dimension in DAILY_DIMENSIONS
+        )
+
+    @staticmethod
+    def _covers(response, fetched_max: Optional[int], max_results: Optional[int]) -> bool:
+        """缓存结果能否满足本次请求的条数（抓取时请求条数不少于本次，或实际条数足够）"""
+        if not max_results:
+            return True
+        return len(response.results) >= max_results or (fetched_max is not None and fetched_max >= max_results)
+
+    @staticmethod
+    def _truncate(response, max_results: Optional[int]):
+        if not max_results or len(response.results) <= max_results:
+            return response
+        return replace(response, results=response.results[:max_results])
+
+    def _remember(self, key: Tuple[Any, ...], expires_at: datetime, response, fetched_max: Optional[int]) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, response, fetched_max)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load_from_db(self, query: str, dimension: str, stock_code: str, now: datetime):
+        """从 news_intel 还原最近一次抓取的结果，返回 (过期时间, SearchResponse)"""
+        try:
+            from src.storage import get_db
+            records = get_db().get_news_intel_by_search_query(query, dimension)
+        except Exception as e:
+            logger.debug(f"[搜索缓存] 读取 news_intel 失败: {e}")
+            return None
+        if not records:
+            return None
+
+        latest = records[0].fetched_at
+        if latest is None:
+            return None
+        expires_at = self._expiry(latest, dimension, stock_code)
+        if expires_at <= now:
+            return None
+
+        from src.search_service import SearchResponse, SearchResult
+        batch = sorted(
+            (r for r in records if r.fetched_at is not None and latest - r.fetched_at <= _BATCH_WINDOW),
+            key=lambda r: r.id,
+        )
+        results = [
+            SearchResult(
+                title=r.title or '',
+                snippet=r.snippet or '',
+                url='' if (r.url or '').startswith('no-url:') else (r.url or ''),
+                source=r.source or '',
+                published_date=r.published_date.strftime('%Y-%m-%d %H:%M:%S') if r.published_date else None,
+            )
+            for r in batch
+        ]
+        logger.debug(f"[搜索缓存] news_intel 命中: {dimension} '{query}' ({len(results)} 条)")
+        response = SearchResponse(
+            query=query, results=results, provider=batch[0].provider or 'cache', from_cache=True,
+        )
+        return expires_at, response
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """获取进程内共享的搜索结果缓存（所有 SearchService 实例共用）"""
+    global _search_cache
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                from src.config import get_config
+                config = get_config()
+                _search_cache = SearchCache(
+                    session_ttl=config.search_cache_session_ttl,
+                    use_db=config.search_cache_persist,
+                )
+    return _search_cache
+
+
+def reset_search_cache() -> None:
+    """重置搜索结果缓存（用于测试）"""
+    global _search_cache
+    with _search_cache_lock:
+        _search_cache = None
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+搜索引擎 HTTP 连接池
+===================================
+
+职责：
+1. 进程内共享一个线程安全的 HTTP 会话，所有搜索引擎与网页正文抓取复用 TCP/TLS 长连接，
+   握手只发生在每条连接首次建立时
+2. 按主机设置连接池大小：搜索 API 主机单独挂载连接池（大小与并发度匹配），
+   其余主机（网页正文抓取）共用默认连接池
+3. 429 / 5xx 自动退避重试：优先遵循 Retry-After，否则指数退避 + 随机抖动
+4. 可选 HTTP/2（SEARCH_HTTP2=true 且已安装 h2 时经 httpx 发送，同一主机单连接多路复用），
+   不可用时自动回退到 requests
+
+HTTP/2 模式下的超时 / 网络异常统一转换为 requests 的异常类型，调用方无需区分。
+
+使用方式：
+    client = get_search_http_client()
+    response = client.post('https://api.bocha.cn/v1/web-search', json=payload, timeout=10)
+"""
+
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# 搜索 API 主机的连接池大小（同一主机保持的最大空闲长连接数）
+SEARCH_HOST_POOL_SIZES: Dict[str, int] = {
+    'api.bocha.cn': 16,
+    'api.tavily.com': 16,
+    'serpapi.com': 16,
+    'api.search.brave.com': 16,
+}
+# 其它主机（网页正文抓取）：缓存的主机数与每个主机的连接数
+DEFAULT_POOL_HOSTS = 32
+DEFAULT_POOL_SIZE = 4
+# 触发退避重试的状态码
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+# 最大重试次数（不含首次请求）
+DEFAULT_MAX_RETRIES = 2
+# 指数退避基数与上限（秒）
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 10.0
+
+
+def retry_delay(response: Any, attempt: int) -> float:
+    """
+    计算第 attempt 次重试前的等待时间（秒）
+
+    - Retry-After 为秒数时直接遵循（不超过 BACKOFF_MAX）
+    - 否则指数退避：BACKOFF_BASE * 2^attempt，再乘以 [0.5, 1.0) 的随机抖动，
+      避免多个线程在同一时刻一起重试
+    """
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), BACKOFF_MAX)
+        except ValueError:
+            pass  # HTTP-date 格式按指数退避处理
+    delay = min(BACKOFF_BASE * (2 ** attempt), BACKOFF_MAX)
+    return delay * (0.5 + random.random() / 2)
+
+
+def _connect_retry() -> Retry:
+    """连接层只重试一次建连失败；状态码重试（含 Retry-After）统一由 SearchHttpClient.request 处理"""
+    return Retry(total=1, read=False, status=0, respect_retry_after_header=False)
+
+
+class SearchHttpClient:
+    """
+    共享 HTTP 客户端（线程安全）
+
+    连接池全部在构造时挂载，之后只读；requests.Session 并发发送请求由 urllib3 连接池加锁保证安全。
+    """
+
+    def __init__(
+        self,
+        http2: bool = False,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        host_pool_sizes: Optional[Dict[str, int]] = None,
+    ):
+        self.max_retries = max(0, max_retries)
+        self._host_pool_sizes = dict(SEARCH_HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes)
+
+        self.session = requests.Session()
+        default_adapter = HTTPAdapter(
+            pool_connections=DEFAULT_POOL_HOSTS, pool_maxsize=DEFAULT_POOL_SIZE, max_retries=_connect_retry()
+        )
+        self.session.mount('http://', default_adapter)
+        self.session.mount('https://', default_adapter)
+        # 搜索 API 主机挂载独立大小的连接池（按最长前缀匹配，优先于默认连接池）
+        for host, size in self._host_pool_sizes.items():
+            self.session.mount(
+                f"https://{host}", HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=_connect_retry())
+            )
+
+        self._http2_client = self._create_http2_client() if http2 else None
+
+    def _create_http2_client(self):
+        """创建 HTTP/2 客户端（缺少 h2 依赖时返回 None，回退到 requests）"""
+        try:
+            import h2  # noqa: F401  httpx 的 HTTP/2 支持依赖 h2
+            import httpx
+        except ImportError:
+            logger.warning("[HTTP] 未安装 h2，HTTP/2 不可用，回退到 HTTP/1.1（pip install httpx[http2]）")
+            return None
+        # HTTP/2 同一主机单连接多路复用，保持的空闲连接数只需覆盖主机数
+        keepalive = max([DEFAULT_POOL_HOSTS, *self._host_pool_sizes.values()])
+        return httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=keepalive),
+        )
+
+    @property
+    def http2_enabled(self) -> bool:
+        return self._http2_client is not None
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> Any:
+        if self._http2_client is None:
+            return self.session.request(method, url, **kwargs)
+
+        import httpx
+        try:
+            return self._http2_client.request(method, url, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def request(self, method: str, url: str, max_retries: Optional[int] = None, **kwargs: Any) -> Any:
+        """
+        发送请求，遇到 429 / 5xx 时退避重试
+
+        Returns:
+            最后一次的响应（重试耗尽后仍为 429 / 5xx 时原样返回，由调用方解析错误信息）
+        """
+        retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            response = self._send(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= retries:
+                return response
+            delay = retry_delay(response, attempt)
+            attempt += 1
+            logger.info(
+                f"[HTTP] {urlsplit(url).hostname} 返回 {response.status_code}，"
+                f"{delay:.1f}s 后第 {attempt}/{retries} 次重试"
+            )
+            response.close()
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> Any:
+        return self.request('POST', url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+        if self._http2_client is not None:
+            self._http2_client.close()
+
+
+_client: Optional[SearchHttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_search_http_client() -> SearchHttpClient:
+    """获取进程内共享的 HTTP 客户端（首次调用时按配置创建）"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from src.config import get_config
+                config = get_config()
+                _client = SearchHttpClient(
+                    http2=getattr(config, 'search_http2', False),
+                    max_retries=getattr(config, 'search_http_max_retries', DEFAULT_MAX_RETRIES),
+                )
+    return _client
+
+
+def reset_search_http_client() -> None:
+    """关闭并重置共享 HTTP 客户端（主要用于测试）"""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
@@ -11,34 +11,80 @@ A股自选股智能分析系统 - 搜索服务模块
 4. 搜索结果缓存和格式化
 """
 
+import hashlib
 import logging
 import random
+import threading
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from dataclasses import dataclass, field
+from functools import partial
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple
 from itertools import cycle
 import requests
 from newspaper import Article, Config
 
+from data_provider.persistent_cache import PersistentMapping
+from data_provider.rate_limiter import get_rate_limiter_registry
+from src.search_cache import SearchCache, get_search_cache
+from src.search_http import get_search_http_client
+
 logger = logging.getLogger(__name__)
 
 
+# 网页正文抓取（SerpAPI 结果增强）
+ARTICLE_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+# 全进程同时抓取的网页数上限
+ARTICLE_FETCH_WORKERS = 8
+# 单次增强的总等待时间（秒），超时未完成的结果先返回摘要，后台抓取完成后仍会写入缓存
+ARTICLE_FETCH_DEADLINE = 3.0
+# 正文缓存时间：同一 URL 跨股票、跨天反复出现，正文基本不变
+ARTICLE_CACHE_TTL = 7 * 24 * 3600
+# 多维度情报搜索每个维度的结果条数
+INTEL_MAX_RESULTS = 3
+
+_article_executor: Optional[ThreadPoolExecutor] = None
+_article_lock = threading.Lock()
+# 网页正文缓存 {url: 正文}（持久化，仅缓存成功提取的正文）
+_article_cache = PersistentMapping('article', ttl=ARTICLE_CACHE_TTL)
+
+
+def _get_article_executor() -> ThreadPoolExecutor:
+    """网页抓取共用的有界线程池"""
+    global _article_executor
+    if _article_executor is None:
+        with _article_lock:
+            if _article_executor is None:
+                _article_executor = ThreadPoolExecutor(
+                    max_workers=ARTICLE_FETCH_WORKERS, thread_name_prefix="article_fetch"
+                )
+    return _article_executor
+
+
 def fetch_url_content(url: str, timeout: int = 5) -> str:
     """
-    获取 URL 网页正文内容 (使用 newspaper3k)
+    获取 URL 网页正文内容（共用连接池下载，newspaper3k 解析）
     """
     try:
-        # 配置 newspaper3k
+        # 共用搜索连接池（不做 429 退避，正文抓取受总时限约束）
+        response = get_search_http_client().session.get(
+            url, headers={'User-Agent': ARTICLE_USER_AGENT}, timeout=timeout
+        )
+        response.raise_for_status()
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding
+
+        # 配置 newspaper3k（只解析已下载的 HTML）
         config = Config()
-        config.browser_user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        config.browser_user_agent = ARTICLE_USER_AGENT
         config.request_timeout = timeout
         config.fetch_images = False  # 不下载图片
         config.memoize_articles = False # 不缓存
 
         article = Article(url, config=config, language='zh') # 默认中文，但也支持其他
-        article.download()
+        article.download(input_html=response.text)
         article.parse()
 
         # 获取正文
@@ -55,6 +101,67 @@ def fetch_url_content(url: str, timeout: int = 5) -> str:
     return ""
 
 
+def _fetch_and_cache_article(url: str) -> str:
+    content = fetch_url_content(url)
+    if content:
+        _article_cache[url] = content
+    return content
+
+
+def _attach_article(result: 'SearchResult', content: str) -> None:
+    """将正文拼接到摘要后（保留原摘要，总长度不超过 1000）"""
+    if len(content) > 500:
+        snippet = f"{result.snippet}\n\n【网页详情】\n{content[:500]}..."
+    else:
+        snippet = f"{result.snippet}\n\n【网页详情】\n{content}"
+    result.snippet = snippet[:1000]
+
+
+def enrich_article_bodies(results: List['SearchResult'], deadline: float = ARTICLE_FETCH_DEADLINE) -> int:
+    """
+    并发抓取搜索结果的网页正文并拼接到摘要（原地修改）
+
+    - 先查正文缓存，命中的结果直接拼接
+    - 未命中的 URL 提交到全局有界线程池并发抓取，最多等待 deadline 秒
+    - 超时未完成的结果保留原摘要立即返回；后台抓取完成后写入缓存，供后续搜索使用
+
+    Args:
+        results: 需要增强的搜索结果
+        deadline: 总等待时间（秒）
+
+    Returns:
+        成功拼接正文的结果数
+    """
+    urls = list(dict.fromkeys(r.url for r in results if r.url))
+    if not urls:
+        return 0
+
+    contents: Dict[str, str] = {url: text for url, text in _article_cache.get_many(urls).items() if text}
+    pending = [url for url in urls if url not in contents]
+    if pending:
+        executor = _get_article_executor()
+        futures = {executor.submit(_fetch_and_cache_article, url): url for url in pending}
+        done, not_done = wait(futures, timeout=max(0.0, deadline))
+        for future in done:
+            try:
+                text = future.result()
+            except Exception as e:
+                logger.debug(f"[正文抓取] {futures[future]} 失败: {e}")
+                continue
+            if text:
+                contents[futures[future]] = text
+        if not_done:
+            logger.debug(f"[正文抓取] {len(not_done)}/{len(pending)} 个网页超过 {deadline:.1f}s 未完成，先返回摘要")
+
+    enriched = 0
+    for result in results:
+        content = contents.get(result.url)
+        if content:
+            _attach_article(result, content)
+            enriched += 1
+    return enriched
+
+
 @dataclass
 class SearchResult:
     """搜索结果数据类"""
@@ -79,6 +186,7 @@ class SearchResponse:
     success: bool = True
     error_message: Optional[str] = None
     search_time: float = 0.0  # 搜索耗时（秒）
+    from_cache: bool = False  # 是否来自搜索结果缓存
     
     def to_context(self, max_results: int = 5) -> str:
         """将搜索结果转换为可用于 AI 分析的上下文"""
@@ -117,6 +225,11 @@ class BaseSearchProvider(ABC):
     def is_available(self) -> bool:
         """检查是否有可用的 API Key"""
         return bool(self._api_keys)
+
+    @property
+    def key_count(self) -> int:
+        """已配置的 API Key 数量"""
+        return len(self._api_keys)
     
     def _get_next_key(self) -> Optional[str]:
         """
@@ -151,6 +264,11 @@ class BaseSearchProvider(ABC):
         self._key_errors[key] = self._key_errors.get(key, 0) + 1
         logger.warning(f"[{self._name}] API Key {key[:8]}... 错误计数: {self._key_errors[key]}")
     
+    def _budget_name(self, api_key: str) -> str:
+        """上游预算名称：search:<provider>:<key指纹>（不暴露 Key 明文）"""
+        fingerprint = hashlib.sha1(api_key.encode('utf-8')).hexdigest()[:8]
+        return f"search:{self._name.lower()}:{fingerprint}"
+    
     @abstractmethod
     def _do_search(self, query: str, api_key: str, max_results: int, days: int = 7) -> SearchResponse:
         """执行搜索（子类实现）"""
@@ -180,7 +298,9 @@ class BaseSearchProvider(ABC):
         
         start_time = time.time()
         try:
-            response = self._do_search(query, api_key, max_results, days=days)
+            # 每个 API Key 独立的并发/速率预算（search:<provider>:<key指纹>）
+            with get_rate_limiter_registry().limit(self._budget_name(api_key)):
+                response = self._do_search(query, api_key, max_results, days=days)
             response.search_time = time.time() - start_time
             
             if response.success:
@@ -216,35 +336,54 @@ class TavilySearchProvider(BaseSearchProvider):
     
     文档：https://docs.tavily.com/
     """
+
+    API_ENDPOINT = "https://api.tavily.com/search"
     
     def __init__(self, api_keys: List[str]):
         super().__init__(api_keys, "Tavily")
+
+    @staticmethod
+    def _parse_error(response) -> str:
+        """解析 Tavily 错误响应（429 / 432 / 433 为频率或额度限制）"""
+        try:
+            detail = response.json().get('detail', response.text)
+            if isinstance(detail, dict):
+                detail = detail.get('error', detail)
+        except ValueError:
+            detail = response.text
+        if response.status_code in (429, 432, 433):
+            return f"API 配额已用尽: {detail}"
+        if response.status_code == 401:
+            return f"API KEY无效: {detail}"
+        return f"HTTP {response.status_code}: {detail}"
     
     def _do_search(self, query: str, api_key: str, max_results: int, days: int = 7) -> SearchResponse:
-        """执行 Tavily 搜索"""
-        try:
-            from tavily import TavilyClient
-        except ImportError:
-            return SearchResponse(
-                query=query,
-                results=[],
-                provider=self.name,
-                success=False,
-                error_message="tavily-python 未安装，请运行: pip install tavily-python"
-            )
-        
+        """执行 Tavily 搜索（REST API，经共享连接池发送）"""
         try:
-            client = TavilyClient(api_key=api_key)
-            
             # 执行搜索（优化：使用advanced深度、限制最近几天）
-            response = client.search(
-                query=query,
-                search_depth="advanced",  # advanced 获取更多结果
-                max_results=max_results,
-                include_answer=False,
-                include_raw_content=False,
-                days=days,  # 搜索最近天数的内容
+            payload = {
+                "query": query,
+                "search_depth": "advanced",  # advanced 获取更多结果
+                "max_results": max_results,
+                "include_answer": False,
+                "include_raw_content": False,
+                "days": days,  # 搜索最近天数的内容
+            }
+            http_response = get_search_http_client().post(
+                self.API_ENDPOINT,
+                headers={'Authorization': f'Bearer {api_key}'},
+                json=payload,
+                timeout=30,
             )
+            if http_response.status_code != 200:
+                return SearchResponse(
+                    query=query,
+                    results=[],
+                    provider=self.name,
+                    success=False,
+                    error_message=self._parse_error(http_response)
+                )
+            response = http_response.json()
             
             # 记录原始响应到日志
             logger.info(f"[Tavily] 搜索完成，query='{query}', 返回 {len(response.get('results', []))} 条结果")
@@ -305,23 +444,33 @@ class SerpAPISearchProvider(BaseSearchProvider):
     
     文档：https://serpapi.com/baidu-search-api?utm_source=github_daily_stock_analysis
     """
+
+    API_ENDPOINT = "https://serpapi.com/search.json"
+
+    # 知识图谱 / 精选回答 / 相关问题的来源标记（不抓取网页正文）
+    SPECIAL_SOURCES = ("Google Knowledge Graph", "Google Answer Box", "Google Related Questions")
     
     def __init__(self, api_keys: List[str]):
         super().__init__(api_keys, "SerpAPI")
+
+    def search(self, query: str, max_results: int = 5, days: int = 7) -> SearchResponse:
+        """
+        执行搜索，并在释放 API Key 配额后并发增强自然搜索结果的网页正文
+
+        正文抓取有总时限（ARTICLE_FETCH_DEADLINE），超时的结果直接返回摘要
+        """
+        response = super().search(query, max_results=max_results, days=days)
+        if response.success:
+            organic = [r for r in response.results if r.source not in self.SPECIAL_SOURCES]
+            enrich_start = time.time()
+            enriched = enrich_article_bodies(organic)
+            logger.debug(
+                f"[{self.name}] 正文增强 {enriched}/{len(organic)} 条，耗时 {time.time() - enrich_start:.2f}s"
+            )
+        return response
     
     def _do_search(self, query: str, api_key: str, max_results: int, days: int = 7) -> SearchResponse:
-        """执行 SerpAPI 搜索"""
-        try:
-            from serpapi import GoogleSearch
-        except ImportError:
-            return SearchResponse(
-                query=query,
-                results=[],
-                provider=self.name,
-                success=False,
-                error_message="google-search-results 未安装，请运行: pip install google-search-results"
-            )
-        
+        """执行 SerpAPI 搜索（REST API，经共享连接池发送）"""
         try:
             # 确定时间范围参数 tbs
             tbs = "qdr:w"  # 默认一周
@@ -346,8 +495,18 @@ class SerpAPISearchProvider(BaseSearchProvider):
                 "num": max_results # 请求的结果数量，注意：Google API有时不严格遵守
             }
             
-            search = GoogleSearch(params)
-            response = search.get_dict()
+            http_response = get_search_http_client().get(self.API_ENDPOINT, params=params, timeout=30)
+            response = http_response.json()
+            if http_response.status_code != 200 or response.get('error'):
+                error_msg = response.get('error') or f"HTTP {http_response.status_code}"
+                logger.warning(f"[SerpAPI] 搜索失败: {error_msg}")
+                return SearchResponse(
+                    query=query,
+                    results=[],
+                    provider=self.name,
+                    success=False,
+                    error_message=error_msg
+                )
             
             # 记录原始响应到日志
             logger.debug(f"[SerpAPI] 原始响应 keys: {response.keys()}")
@@ -374,7 +533,7 @@ class SerpAPISearchProvider(BaseSearchProvider):
                     title=f"[知识图谱] {title}",
                     snippet=snippet,
                     url=kg.get('source', {}).get('link', ''),
-                    source="Google Knowledge Graph"
+                    source=self.SPECIAL_SOURCES[0]
                 ))
                 
             # 2. 解析 Answer Box (精选回答/行情卡片)
@@ -419,7 +578,7 @@ class SerpAPISearchProvider(BaseSearchProvider):
                         title=f"[精选回答] {ab_title}",
                         snippet=ab_snippet,
                         url=ab.get('link', '') or ab.get('displayed_link', ''),
-                        source="Google Answer Box"
+                        source=self.SPECIAL_SOURCES[1]
                     ))
 
             # 3. 解析 Related Questions (相关问题)
@@ -434,37 +593,18 @@ class SerpAPISearchProvider(BaseSearchProvider):
                         title=f"[相关问题] {question}",
                         snippet=snippet,
                         url=link,
-                        source="Google Related Questions"
+                        source=self.SPECIAL_SOURCES[2]
                      ))
 
             # 4. 解析 Organic Results (自然搜索结果)
             organic_results = response.get('organic_results', [])
 
+            # 网页正文由 search() 在释放 Key 配额后统一增强（见 enrich_article_bodies）
             for item in organic_results[:max_results]:
                 link = item.get('link', '')
-                snippet = item.get('snippet', '')
-
-                # 增强：如果需要，解析网页正文
-                # 策略：如果摘要太短，或者为了获取更多信息，可以请求网页
-                # 这里我们对所有结果尝试获取正文，但为了性能，仅获取前1000字符
-                content = ""
-                if link:
-                   try:
-                       fetched_content = fetch_url_content(link, timeout=5)
-                       if fetched_content:
-                           # 如果获取到了正文，将其拼接到 snippet 中，或者替换 snippet
-                           # 这里选择拼接，保留原摘要
-                           content = fetched_content
-                           if len(content) > 500:
-                               snippet = f"{snippet}\n\n【网页详情】\n{content[:500]}..."
-                           else:
-                               snippet = f"{snippet}\n\n【网页详情】\n{content}"
-                   except Exception as e:
-                       logger.debug(f"[SerpAPI] Fetch content failed: {e}")
-
                 results.append(SearchResult(
                     title=item.get('title', ''),
-                    snippet=snippet[:1000], # 限制总长度
+                    snippet=item.get('snippet', '')[:1000], # 限制总长度
                     url=link,
                     source=item.get('source', self._extract_domain(link)),
                     published_date=item.get('date'),
@@ -557,7 +697,7 @@ class BochaSearchProvider(BaseSearchProvider):
             }
             
             # 执行搜索
-            response = requests.post(url, headers=headers, json=payload, timeout=10)
+            response = get_search_http_client().post(url, headers=headers, json=payload, timeout=10)
             
             # 检查HTTP状态码
             if response.status_code != 200:
@@ -743,7 +883,7 @@ class BraveSearchProvider(BaseSearchProvider):
             }
 
             # 执行搜索（GET 请求）
-            response = requests.get(
+            response = get_search_http_client().get(
                 self.API_ENDPOINT,
                 headers=headers,
                 params=params,
@@ -907,6 +1047,7 @@ class SearchService:
         tavily_keys: Optional[List[str]] = None,
         brave_keys: Optional[List[str]] = None,
         serpapi_keys: Optional[List[str]] = None,
+        cache: Optional[SearchCache] = None,
     ):
         """
         初始化搜索服务
@@ -916,6 +1057,7 @@ class SearchService:
             tavily_keys: Tavily API Key 列表
             brave_keys: Brave Search API Key 列表
             serpapi_keys: SerpAPI Key 列表
+            cache: 搜索结果缓存（默认使用进程内共享的两级缓存）
         """
         self._providers: List[BaseSearchProvider] = []
 
@@ -943,10 +1085,8 @@ class SearchService:
         if not self._providers:
             logger.warning("未配置任何搜索引擎 API Key，新闻搜索功能将不可用")
 
-        # In-memory search result cache: {cache_key: (timestamp, SearchResponse)}
-        self._cache: Dict[str, Tuple[float, 'SearchResponse']] = {}
-        # Default cache TTL in seconds (10 minutes)
-        self._cache_ttl: int = 600
+        # 搜索结果两级缓存（内存 LRU + news_intel 表，按交易时段过期）
+        self._cache = cache if cache is not None else get_search_cache()
     
     @staticmethod
     def _is_foreign_stock(stock_code: str) -> bool:
@@ -969,39 +1109,78 @@ class SearchService:
         """检查是否有可用的搜索引擎"""
         return any(p.is_available for p in self._providers)
 
-    def _cache_key(self, query: str, max_results: int, days: int) -> str:
-        """Build a cache key from query parameters."""
-        return f"{query}|{max_results}|{days}"
+    @staticmethod
+    def _news_search_days() -> int:
+        """
+        智能确定新闻搜索时间范围
 
-    def _get_cached(self, key: str) -> Optional['SearchResponse']:
-        """Return cached SearchResponse if still valid, else None."""
-        entry = self._cache.get(key)
-        if entry is None:
-            return None
-        ts, response = entry
-        if time.time() - ts > self._cache_ttl:
-            del self._cache[key]
-            return None
-        logger.debug(f"Search cache hit: {key[:60]}...")
-        return response
+        策略：
+        1. 周二至周五：搜索近1天（24小时）
+        2. 周六、周日：搜索近2-3天（覆盖周末）
+        3. 周一：搜索近3天（覆盖周末）
+        """
+        today_weekday = datetime.now().weekday()
+        if today_weekday == 0: # 周一
+            return 3
+        elif today_weekday >= 5: # 周六(5)、周日(6)
+            return 2
+        else: # 周二(1) - 周五(4)
+            return 1
 
-    def _put_cache(self, key: str, response: 'SearchResponse') -> None:
-        """Store a successful SearchResponse in cache."""
-        # Hard cap: evict oldest entries when cache exceeds limit
-        _MAX_CACHE_SIZE = 500
-        if len(self._cache) >= _MAX_CACHE_SIZE:
-            now = time.time()
-            # First pass: remove expired entries
-            expired = [k for k, (ts, _) in self._cache.items() if now - ts > self._cache_ttl]
-            for k in expired:
-                del self._cache[k]
-            # Second pass: if still over limit, evict oldest entries (FIFO)
-            if len(self._cache) >= _MAX_CACHE_SIZE:
-                excess = len(self._cache) - _MAX_CACHE_SIZE + 1
-                oldest = sorted(self._cache.keys(), key=lambda k: self._cache[k][0])[:excess]
-                for k in oldest:
-                    del self._cache[k]
-        self._cache[key] = (time.time(), response)
+    def _search_first_available(self, query: str, max_results: int, days: int = 7) -> SearchResponse:
+        """依次尝试各个搜索引擎，返回第一个成功且有结果的响应"""
+        for provider in self._providers:
+            if not provider.is_available:
+                continue
+            response = provider.search(query, max_results, days=days)
+            if response.success and response.results:
+                return response
+            logger.warning(f"{provider.name} 搜索失败: {response.error_message}，尝试下一个引擎")
+        return SearchResponse(
+            query=query,
+            results=[],
+            provider="None",
+            success=False,
+            error_message="所有搜索引擎都不可用或搜索失败"
+        )
+
+    @property
+    def persists_results(self) -> bool:
+        """搜索结果写入缓存时是否同时写入 news_intel（为 False 时调用方需自行保存）"""
+        return self._cache.use_db
+
+    def _get_cached(
+        self,
+        query: str,
+        dimension: str,
+        stock_code: str,
+        max_results: Optional[int] = None,
+        days: Optional[int] = None,
+        query_context: Optional[Dict[str, str]] = None,
+    ) -> Optional['SearchResponse']:
+        """读取搜索结果缓存（未命中返回 None；命中时已入库的结果关联到 query_context 中的 query_id）"""
+        cached = self._cache.get(query, dimension, stock_code, max_results=max_results, days=days)
+        if cached is not None:
+            logger.debug(f"[搜索缓存] 命中: {dimension} '{query[:60]}'")
+            self._cache.link(query, dimension, cached, stock_code, query_context)
+        return cached
+
+    def _put_cache(
+        self,
+        query: str,
+        dimension: str,
+        response: 'SearchResponse',
+        stock_code: str,
+        stock_name: str = '',
+        max_results: Optional[int] = None,
+        days: Optional[int] = None,
+        query_context: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """写入搜索结果缓存（仅成功且有结果的响应，持久化时连同 query_context 写入 news_intel）"""
+        self._cache.put(
+            query, dimension, response, stock_code, stock_name,
+            max_results=max_results, days=days, query_context=query_context,
+        )
     
     def search_stock_news(
         self,
@@ -1022,18 +1201,7 @@ class SearchService:
         Returns:
             SearchResponse 对象
         """
-        # 智能确定搜索时间范围
-        # 策略：
-        # 1. 周二至周五：搜索近1天（24小时）
-        # 2. 周六、周日：搜索近2-3天（覆盖周末）
-        # 3. 周一：搜索近3天（覆盖周末）
-        today_weekday = datetime.now().weekday()
-        if today_weekday == 0: # 周一
-            search_days = 3
-        elif today_weekday >= 5: # 周六(5)、周日(6)
-            search_days = 2
-        else: # 周二(1) - 周五(4)
-            search_days = 1
+        search_days = self._news_search_days()
 
         # 构建搜索查询（优化搜索效果）
         is_foreign = self._is_foreign_stock(stock_code)
@@ -1049,9 +1217,8 @@ class SearchService:
 
         logger.info(f"搜索股票新闻: {stock_name}({stock_code}), query='{query}', 时间范围: 近{search_days}天")
 
-        # Check cache first
-        cache_key = self._cache_key(query, max_results, search_days)
-        cached = self._get_cached(cache_key)
+        # 优先使用搜索结果缓存
+        cached = self._get_cached(query, 'stock_news', stock_code, max_results=max_results, days=search_days)
         if cached is not None:
             logger.info(f"使用缓存搜索结果: {stock_name}({stock_code})")
             return cached
@@ -1065,7 +1232,10 @@ class SearchService:
             
             if response.success and response.results:
                 logger.info(f"使用 {provider.name} 搜索成功")
-                self._put_cache(cache_key, response)
+                self._put_cache(
+                    query, 'stock_news', response, stock_code, stock_name,
+                    max_results=max_results, days=search_days,
+                )
                 return response
             else:
                 logger.warning(f"{provider.name} 搜索失败: {response.error_message}，尝试下一个引擎")
@@ -1109,6 +1279,10 @@ class SearchService:
         query = f"{stock_name} ({event_query})"
         
         logger.info(f"搜索股票事件: {stock_name}({stock_code}) - {event_types}")
+
+        cached = self._get_cached(query, 'events', stock_code, max_results=5)
+        if cached is not None:
+            return cached
         
         # 依次尝试各个搜索引擎
         for provider in self._providers:
@@ -1118,6 +1292,7 @@ class SearchService:
             response = provider.search(query, max_results=5)
             
             if response.success:
+                self._put_cache(query, 'events', response, stock_code, stock_name, max_results=5)
                 return response
         
         return SearchResponse(
@@ -1128,30 +1303,89 @@ class SearchService:
             error_message="事件搜索失败"
         )
     
+    def search_sector_intel(
+        self,
+        sector: str,
+        stock_code: str = '',
+        stock_name: str = '',
+        max_results: int = 3,
+        query_context: Optional[Dict[str, str]] = None
+    ) -> SearchResponse:
+        """
+        行业分析搜索（按行业归并，跨股票共享）
+
+        同一行业当日只搜索一次，并发分析同行业的多只股票时只有一个实际发出请求，
+        其余复用同一结果写入各自的情报报告；news_intel 以首个股票代码入库，
+        其余股票命中缓存时追加关联（news_intel_links），按各自代码均可查到
+
+        Args:
+            sector: 行业板块名称
+            stock_code: 本次分析的股票代码（用于 news_intel 记录与关联）
+            stock_name: 触发搜索的股票名称
+            max_results: 最大返回结果数
+            query_context: 写入 news_intel 的查询上下文（可选）
+        """
+        query = f"{sector} 行业 竞争格局 龙头公司 市场份额 行业前景"
+        return self._cache.get_or_load(
+            query, 'industry', stock_code or 'sector',
+            lambda: self._search_first_available(query, max_results),
+            stock_name=stock_name,
+            max_results=max_results,
+            query_context=query_context,
+        )
+
+    def search_market_news(self, query: str, max_results: int = 3) -> SearchResponse:
+        """
+        大盘 / 市场新闻搜索（与个股无关，当日只搜索一次）
+
+        Args:
+            query: 搜索关键词
+            max_results: 最大返回结果数
+        """
+        search_days = self._news_search_days()
+        return self._cache.get_or_load(
+            query, 'market_news', 'market',
+            lambda: self._search_first_available(query, max_results, days=search_days),
+            stock_name='大盘',
+            max_results=max_results,
+            days=search_days,
+        )
+
     def search_comprehensive_intel(
         self,
         stock_code: str,
         stock_name: str,
-        max_searches: int = 3
+        max_searches: int = 3,
+        sector: Optional[str] = None,
+        query_context: Optional[Dict[str, str]] = None
     ) -> Dict[str, SearchResponse]:
         """
         多维度情报搜索（同时使用多个引擎、多个维度）
         
         搜索维度：
         1. 最新消息 - 近期新闻动态
-        2. 风险排查 - 减持、处罚、利空
-        3. 业绩预期 - 年报预告、业绩快报
+        2. 机构分析 - 研报、目标价、评级
+        3. 风险排查 - 减持、处罚、利空
+        4. 业绩预期 - 年报预告、业绩快报
+        5. 行业分析 - 竞争格局、行业前景
+
+        各维度并发执行：每个搜索引擎的每个 API Key 一个通道，通道内串行、通道间并发，
+        结果按完成顺序收集后以维度顺序返回。
+
+        传入 sector 时，行业分析维度改为按行业搜索（见 search_sector_intel），
+        同一行业的多只股票共享一次搜索结果。
         
         Args:
             stock_code: 股票代码
             stock_name: 股票名称
             max_searches: 最大搜索次数
+            sector: 所属行业板块（可选）
+            query_context: 新搜索结果写入 news_intel、命中缓存的结果关联 query_id 时附带的查询上下文（可选）
             
         Returns:
             {维度名称: SearchResponse} 字典
         """
         results = {}
-        search_count = 0
         
         # 根据股票类型选择搜索关键词语言
         is_foreign = self._is_foreign_stock(stock_code)
@@ -1215,36 +1449,92 @@ class SearchService:
             ]
         
         logger.info(f"开始多维度情报搜索: {stock_name}({stock_code})")
-        
-        # 轮流使用不同的搜索引擎
-        provider_index = 0
-        
-        for dim in search_dimensions:
-            if search_count >= max_searches:
-                break
-            
-            # 选择搜索引擎（轮流使用）
-            available_providers = [p for p in self._providers if p.is_available]
-            if not available_providers:
-                break
-            
-            provider = available_providers[provider_index % len(available_providers)]
-            provider_index += 1
-            
-            logger.info(f"[情报搜索] {dim['desc']}: 使用 {provider.name}")
-            
-            response = provider.search(dim['query'], max_results=3)
-            results[dim['name']] = response
-            search_count += 1
-            
+
+        available_providers = [p for p in self._providers if p.is_available]
+        if not available_providers:
+            return results
+
+        # 命中缓存的维度直接返回，不占用搜索通道
+        collected: Dict[str, SearchResponse] = {}
+        pending_dimensions = []
+        sector_dim: Optional[Dict[str, str]] = None
+        for dim in search_dimensions[:max_searches]:
+            if sector and dim['name'] == 'industry':
+                sector_dim = dim
+                continue
+            cached = self._get_cached(
+                dim['query'], dim['name'], stock_code, max_results=INTEL_MAX_RESULTS, query_context=query_context
+            )
+            if cached is not None:
+                logger.info(f"[情报搜索] {dim['desc']}: 使用缓存结果")
+                collected[dim['name']] = cached
+            else:
+                pending_dimensions.append(dim)
+
+        # 各维度轮流分配给不同的搜索引擎，再按 API Key 数拆成若干通道：
+        # 每个通道同时只有一个在途请求，通道之间并发执行；
+        # 限速由各 Key 独立的上游预算（search:<provider>:<key指纹>）保证，不再固定 sleep
+        assignments: Dict[str, List[Dict[str, str]]] = {}
+        providers: Dict[str, BaseSearchProvider] = {}
+        for i, dim in enumerate(pending_dimensions):
+            provider = available_providers[i % len(available_providers)]
+            providers[provider.name] = provider
+            assignments.setdefault(provider.name, []).append(dim)
+
+        lanes: List[Tuple[BaseSearchProvider, List[Dict[str, str]]]] = []
+        for name, dims in assignments.items():
+            lane_count = min(len(dims), providers[name].key_count)
+            lanes.extend((providers[name], dims[i::lane_count]) for i in range(lane_count))
+
+        def _run_lane(provider: BaseSearchProvider, dims: List[Dict[str, str]]) -> List[Tuple[str, SearchResponse]]:
+            lane_results = []
+            for dim in dims:
+                logger.info(f"[情报搜索] {dim['desc']}: 使用 {provider.name}")
+                response = provider.search(dim['query'], max_results=INTEL_MAX_RESULTS)
+                if response.success:
+                    logger.info(f"[情报搜索] {dim['desc']}: 获取 {len(response.results)} 条结果")
+                    self._put_cache(
+                        dim['query'], dim['name'], response, stock_code, stock_name,
+                        max_results=INTEL_MAX_RESULTS, query_context=query_context,
+                    )
+                else:
+                    logger.warning(f"[情报搜索] {dim['desc']}: 搜索失败 - {response.error_message}")
+                lane_results.append((dim['name'], response))
+            return lane_results
+
+        def _run_sector(dim: Dict[str, str]) -> List[Tuple[str, SearchResponse]]:
+            response = self.search_sector_intel(
+                sector, stock_code, stock_name, max_results=INTEL_MAX_RESULTS, query_context=query_context
+            )
             if response.success:
-                logger.info(f"[情报搜索] {dim['desc']}: 获取 {len(response.results)} 条结果")
+                source = "缓存" if response.from_cache else response.provider
+                logger.info(f"[情报搜索] {dim['desc']}: 行业 {sector} 获取 {len(response.results)} 条结果（{source}）")
             else:
-                logger.warning(f"[情报搜索] {dim['desc']}: 搜索失败 - {response.error_message}")
-            
-            # 短暂延迟避免请求过快
-            time.sleep(0.5)
-        
+                logger.warning(f"[情报搜索] {dim['desc']}: 行业 {sector} 搜索失败 - {response.error_message}")
+            return [(dim['name'], response)]
+
+        tasks = [partial(_run_lane, provider, dims) for provider, dims in lanes]
+        if sector_dim is not None:
+            tasks.append(partial(_run_sector, sector_dim))
+
+        start_time = time.time()
+        if tasks:
+            with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="intel_search") as executor:
+                futures = [executor.submit(task) for task in tasks]
+                for future in as_completed(futures):
+                    try:
+                        collected.update(future.result())
+                    except Exception as e:
+                        logger.error(f"[情报搜索] 搜索通道异常: {e}")
+
+        # 按维度原有顺序返回
+        for dim in search_dimensions:
+            if dim['name'] in collected:
+                results[dim['name']] = collected[dim['name']]
+        logger.info(
+            f"[情报搜索] {stock_name}({stock_code}) 完成 {len(results)} 个维度，"
+            f"{len(lanes)} 个通道并发，耗时 {time.time() - start_time:.2f}s"
+        )
         return results
     
     def format_intel_report(self, intel_results: Dict[str, SearchResponse], stock_name: str) -> str:
@@ -1372,6 +1662,16 @@ class SearchService:
             query = keyword_template.format(name=stock_name, code=stock_code)
             
             logger.info(f"[增强搜索] 第 {i+1}/{max_attempts} 次搜索: {query}")
+
+            cached = self._get_cached(query, 'price', stock_code, max_results=3)
+            if cached is not None:
+                for result in cached.results:
+                    if result.url not in seen_urls:
+                        seen_urls.add(result.url)
+                        all_results.append(result)
+                if cached.provider not in successful_providers:
+                    successful_providers.append(cached.provider)
+                continue
             
             # 依次尝试各个搜索引擎
             for provider in self._providers:
@@ -1382,6 +1682,7 @@ class SearchService:
                     response = provider.search(query, max_results=3)
                     
                     if response.success and response.results:
+                        self._put_cache(query, 'price', response, stock_code, stock_name, max_results=3)
                         # 去重并添加结果
                         for result in response.results:
                             if result.url not in seen_urls:
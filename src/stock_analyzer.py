@@ -18,12 +18,20 @@
 
 import logging
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Mapping, Tuple, Union
 from enum import Enum
 
 import pandas as pd
 import numpy as np
 
+from data_provider.indicators import (
+    STATE_RECENT_BARS,
+    TREND_KEYS,
+    IndicatorState,
+    attach_indicators,
+    compute_trend_indicators,
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -77,6 +85,48 @@ class RSIStatus(Enum):
     OVERSOLD = "超卖"         # RSI < 30
 
 
+# 趋势状态 -> (均线排列描述, 趋势强度)
+TREND_DESCRIPTIONS: Dict[TrendStatus, Tuple[str, int]] = {
+    TrendStatus.STRONG_BULL: ("强势多头排列，均线发散上行", 90),
+    TrendStatus.BULL: ("多头排列 MA5>MA10>MA20", 75),
+    TrendStatus.WEAK_BULL: ("弱势多头，MA5>MA10 但 MA10≤MA20", 55),
+    TrendStatus.CONSOLIDATION: ("均线缠绕，趋势不明", 50),
+    TrendStatus.WEAK_BEAR: ("弱势空头，MA5<MA10 但 MA10≥MA20", 40),
+    TrendStatus.BEAR: ("空头排列 MA5<MA10<MA20", 25),
+    TrendStatus.STRONG_BEAR: ("强势空头排列，均线发散下行", 10),
+}
+
+# 量能状态 -> 量能趋势描述
+VOLUME_DESCRIPTIONS: Dict[VolumeStatus, str] = {
+    VolumeStatus.HEAVY_VOLUME_UP: "放量上涨，多头力量强劲",
+    VolumeStatus.HEAVY_VOLUME_DOWN: "放量下跌，注意风险",
+    VolumeStatus.SHRINK_VOLUME_UP: "缩量上涨，上攻动能不足",
+    VolumeStatus.SHRINK_VOLUME_DOWN: "缩量回调，洗盘特征明显（好）",
+    VolumeStatus.NORMAL: "量能正常",
+}
+
+# MACD 判断分支（按优先级排列）-> (状态, 信号描述)
+MACD_CASES: List[Tuple[MACDStatus, str]] = [
+    (MACDStatus.GOLDEN_CROSS_ZERO, "⭐ 零轴上金叉，强烈买入信号！"),
+    (MACDStatus.CROSSING_UP, "⚡ DIF上穿零轴，趋势转强"),
+    (MACDStatus.GOLDEN_CROSS, "✅ 金叉，趋势向上"),
+    (MACDStatus.DEATH_CROSS, "❌ 死叉，趋势向下"),
+    (MACDStatus.CROSSING_DOWN, "⚠️ DIF下穿零轴，趋势转弱"),
+    (MACDStatus.BULLISH, "✓ 多头排列，持续上涨"),
+    (MACDStatus.BEARISH, "⚠ 空头排列，持续下跌"),
+    (MACDStatus.BULLISH, " MACD 中性区域"),
+]
+
+# RSI 状态 -> 信号描述模板（参数为 RSI(12)）
+RSI_SIGNAL_TEMPLATES: Dict[RSIStatus, str] = {
+    RSIStatus.OVERBOUGHT: "⚠️ RSI超买({:.1f}>70)，短期回调风险高",
+    RSIStatus.STRONG_BUY: "✅ RSI强势({:.1f})，多头力量充足",
+    RSIStatus.NEUTRAL: " RSI中性({:.1f})，震荡整理中",
+    RSIStatus.WEAK: "⚡ RSI弱势({:.1f})，关注反弹",
+    RSIStatus.OVERSOLD: "⭐ RSI超卖({:.1f}<30)，反弹机会大",
+}
+
+
 @dataclass
 class TrendAnalysisResult:
     """趋势分析结果"""
@@ -201,33 +251,46 @@ class StockTrendAnalyzer:
         """初始化分析器"""
         pass
     
-    def analyze(self, df: pd.DataFrame, code: str) -> TrendAnalysisResult:
+    def analyze(
+        self,
+        df: pd.DataFrame,
+        code: str,
+        state: Optional[IndicatorState] = None
+    ) -> TrendAnalysisResult:
         """
         分析股票趋势
         
         Args:
             df: 包含 OHLCV 数据的 DataFrame
             code: 股票代码
+            state: 推进到 df 最后交易日的流式指标状态（可选）。提供时直接取用状态中
+                   最近几根 K 线的指标，df 只需包含最近约 20 个交易日
             
         Returns:
             TrendAnalysisResult 分析结果
         """
         result = TrendAnalysisResult(code=code)
-        
-        if df is None or df.empty or len(df) < 20:
+
+        if df is not None and not df.empty:
+            # 确保数据按日期排序
+            df = df.sort_values('date').reset_index(drop=True)
+            if state is not None and (
+                len(df) < STATE_RECENT_BARS or not state.matches(df['date'].iloc[-1])
+            ):
+                logger.debug(f"{code} 指标状态（{state.last_date}）与行情不匹配，改为全量计算")
+                state = None
+
+        bars = state.bars if state is not None else (0 if df is None else len(df))
+        if df is None or df.empty or bars < 20:
             logger.warning(f"{code} 数据不足，无法进行趋势分析")
             result.risk_factors.append("数据不足，无法完成分析")
             return result
         
-        # 确保数据按日期排序
-        df = df.sort_values('date').reset_index(drop=True)
-        
-        # 计算均线
-        df = self._calculate_mas(df)
-
-        # 计算 MACD 和 RSI
-        df = self._calculate_macd(df)
-        df = self._calculate_rsi(df)
+        # 一次计算均线、MACD 和 RSI（有流式状态时直接取用）
+        if state is not None:
+            df = self._indicators_from_state(df, state)
+        else:
+            df = self._calculate_indicators(df)
 
         # 获取最新数据
         latest = df.iloc[-1]
@@ -260,81 +323,293 @@ class StockTrendAnalyzer:
 
         return result
     
-    def _calculate_mas(self, df: pd.DataFrame) -> pd.DataFrame:
-        """计算均线"""
-        df = df.copy()
-        df['MA5'] = df['close'].rolling(window=5).mean()
-        df['MA10'] = df['close'].rolling(window=10).mean()
-        df['MA20'] = df['close'].rolling(window=20).mean()
-        if len(df) >= 60:
-            df['MA60'] = df['close'].rolling(window=60).mean()
-        else:
-            df['MA60'] = df['MA20']  # 数据不足时使用 MA20 替代
-        return df
+    # 批量分析所需的行情列
+    BATCH_COLUMNS = ['date', 'high', 'close', 'volume']
 
-    def _calculate_macd(self, df: pd.DataFrame) -> pd.DataFrame:
+    def analyze_batch(
+        self,
+        data: Union[pd.DataFrame, Mapping[str, pd.DataFrame]]
+    ) -> Dict[str, TrendAnalysisResult]:
         """
-        计算 MACD 指标
+        批量分析多只股票趋势（横截面向量化）
 
-        公式：
-        - EMA(12)：12日指数移动平均
-        - EMA(26)：26日指数移动平均
-        - DIF = EMA(12) - EMA(26)
-        - DEA = EMA(DIF, 9)
-        - MACD = (DIF - DEA) * 2
-        """
-        df = df.copy()
+        所有股票拼成右对齐的二维面板（行=股票，列=交易日），指标与趋势/量能/支撑/MACD/RSI
+        规则判断均在面板上一次完成，仅最后逐只生成结果对象与评分理由。
+        结果与逐只调用 analyze() 一致，可用于全市场（约 5000 只）快速筛选。
 
-        # 计算快慢线 EMA
-        ema_fast = df['close'].ewm(span=self.MACD_FAST, adjust=False).mean()
-        ema_slow = df['close'].ewm(span=self.MACD_SLOW, adjust=False).mean()
+        Args:
+            data: 长表 DataFrame（包含 code/date/high/close/volume 列），
+                  或 {股票代码: 单只股票 DataFrame}
 
-        # 计算快线 DIF
-        df['MACD_DIF'] = ema_fast - ema_slow
+        Returns:
+            {股票代码: TrendAnalysisResult}
+        """
+        requested = list(data.keys()) if isinstance(data, Mapping) else []
+        codes, panels = self._build_panels(data)
+        results: Dict[str, TrendAnalysisResult] = {}
+
+        bars = np.count_nonzero(~np.isnan(panels['close']), axis=1) if codes else np.zeros(0, dtype=int)
+        ready = bars >= 20
+        if ready.any():
+            ready_codes = [code for code, ok in zip(codes, ready) if ok]
+            ready_panels = {key: panel[ready] for key, panel in panels.items()}
+            for result in self._analyze_panel(ready_codes, ready_panels, bars[ready]):
+                results[result.code] = result
+
+        for code in list(dict.fromkeys(requested + codes)):
+            if code not in results:
+                logger.warning(f"{code} 数据不足，无法进行趋势分析")
+                result = TrendAnalysisResult(code=code)
+                result.risk_factors.append("数据不足，无法完成分析")
+                results[code] = result
+        return results
+
+    @classmethod
+    def _build_panels(
+        cls,
+        data: Union[pd.DataFrame, Mapping[str, pd.DataFrame]]
+    ) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """将长表或分股票 DataFrame 转为右对齐的 high/close/volume 面板"""
+        if isinstance(data, Mapping):
+            frames = [
+                df[cls.BATCH_COLUMNS].assign(code=code)
+                for code, df in data.items()
+                if df is not None and not df.empty
+            ]
+            if not frames:
+                return [], {}
+            long_df = pd.concat(frames, ignore_index=True)
+        else:
+            if data is None or data.empty:
+                return [], {}
+            long_df = data[['code'] + cls.BATCH_COLUMNS]
+
+        long_df = long_df.sort_values(['code', 'date'], kind='stable')
+        code_index, codes = pd.factorize(long_df['code'], sort=False)
+        # 每行距该股票最新交易日的位置，决定其在面板中的列
+        from_end = long_df.groupby('code', sort=False).cumcount(ascending=False).to_numpy()
+        length = int(from_end.max()) + 1
+        column = length - 1 - from_end
+
+        panels = {}
+        for key in ('high', 'close', 'volume'):
+            panel = np.full((len(codes), length), np.nan)
+            panel[code_index, column] = long_df[key].to_numpy(dtype=float)
+            panels[key] = panel
+        return list(codes), panels
+
+    def _analyze_panel(
+        self,
+        codes: List[str],
+        panels: Dict[str, np.ndarray],
+        bars: np.ndarray
+    ) -> List[TrendAnalysisResult]:
+        """在面板上向量化执行全部规则判断（各股票至少 20 个交易日）"""
+        close, high, volume = panels['close'], panels['high'], panels['volume']
+        ind = compute_trend_indicators(
+            close,
+            macd_fast=self.MACD_FAST,
+            macd_slow=self.MACD_SLOW,
+            macd_signal=self.MACD_SIGNAL,
+            rsi_periods=(self.RSI_SHORT, self.RSI_MID, self.RSI_LONG),
+        )
+        price = close[:, -1]
+        ma5, ma10, ma20, ma60 = (ind[key][:, -1] for key in ('MA5', 'MA10', 'MA20', 'MA60'))
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # 1. 趋势判断（与 _analyze_trend 相同的分支顺序）
+            prev_ma5, prev_ma20 = ind['MA5'][:, -5], ind['MA20'][:, -5]
+            bull_curr = np.where(ma20 > 0, (ma5 - ma20) / ma20 * 100, 0.0)
+            bull_prev = np.where(prev_ma20 > 0, (prev_ma5 - prev_ma20) / prev_ma20 * 100, 0.0)
+            bear_curr = np.where(ma5 > 0, (ma20 - ma5) / ma5 * 100, 0.0)
+            bear_prev = np.where(prev_ma5 > 0, (prev_ma20 - prev_ma5) / prev_ma5 * 100, 0.0)
+            bull = (ma5 > ma10) & (ma10 > ma20)
+            bear = (ma5 < ma10) & (ma10 < ma20)
+            trend_codes = np.select(
+                [
+                    bull & (bull_curr > bull_prev) & (bull_curr > 5),
+                    bull,
+                    (ma5 > ma10) & (ma10 <= ma20),
+                    bear & (bear_curr > bear_prev) & (bear_curr > 5),
+                    bear,
+                    (ma5 < ma10) & (ma10 >= ma20),
+                ],
+                [0, 1, 2, 3, 4, 5],
+                default=6,
+            )
+
+            # 2. 乖离率
+            bias = {
+                window: np.where(ma > 0, (price - ma) / ma * 100, 0.0)
+                for window, ma in ((5, ma5), (10, ma10), (20, ma20))
+            }
+
+            # 3. 量能
+            vol_5d_avg = volume[:, -6:-1].mean(axis=1)
+            volume_ratio = np.where(vol_5d_avg > 0, volume[:, -1] / vol_5d_avg, 0.0)
+            price_change = (price - close[:, -2]) / close[:, -2] * 100
+            rising = price_change > 0
+            volume_codes = np.select(
+                [
+                    (volume_ratio >= self.VOLUME_HEAVY_RATIO) & rising,
+                    volume_ratio >= self.VOLUME_HEAVY_RATIO,
+                    (volume_ratio <= self.VOLUME_SHRINK_RATIO) & rising,
+                    volume_ratio <= self.VOLUME_SHRINK_RATIO,
+                ],
+                [0, 1, 2, 3],
+                default=4,
+            )
+
+            # 4. 支撑压力
+            support_ma5 = (ma5 > 0) & (np.abs(price - ma5) / ma5 <= self.MA_SUPPORT_TOLERANCE) & (price >= ma5)
+            support_ma10 = (ma10 > 0) & (np.abs(price - ma10) / ma10 <= self.MA_SUPPORT_TOLERANCE) & (price >= ma10)
+            support_ma20 = (ma20 > 0) & (price >= ma20)
+            recent_high = high[:, -20:].max(axis=1)
+
+        # 5. MACD
+        dif, dea, bar = (ind[key][:, -1] for key in ('MACD_DIF', 'MACD_DEA', 'MACD_BAR'))
+        prev_dif = ind['MACD_DIF'][:, -2]
+        prev_gap = prev_dif - ind['MACD_DEA'][:, -2]
+        curr_gap = dif - dea
+        golden = (prev_gap <= 0) & (curr_gap > 0)
+        macd_codes = np.select(
+            [
+                golden & (dif > 0),
+                (prev_dif <= 0) & (dif > 0),
+                golden,
+                (prev_gap >= 0) & (curr_gap < 0),
+                (prev_dif >= 0) & (dif < 0),
+                (dif > 0) & (dea > 0),
+                (dif < 0) & (dea < 0),
+            ],
+            list(range(7)),
+            default=7,
+        )
+        macd_ready = bars >= self.MACD_SLOW
+
+        # 6. RSI
+        rsi = {period: ind[f'RSI_{period}'][:, -1] for period in (self.RSI_SHORT, self.RSI_MID, self.RSI_LONG)}
+        rsi_mid = rsi[self.RSI_MID]
+        rsi_codes = np.select(
+            [rsi_mid > self.RSI_OVERBOUGHT, rsi_mid > 60, rsi_mid >= 40, rsi_mid >= self.RSI_OVERSOLD],
+            [0, 1, 2, 3],
+            default=4,
+        )
+        rsi_ready = bars >= self.RSI_LONG
+
+        trend_statuses = [
+            TrendStatus.STRONG_BULL, TrendStatus.BULL, TrendStatus.WEAK_BULL,
+            TrendStatus.STRONG_BEAR, TrendStatus.BEAR, TrendStatus.WEAK_BEAR,
+            TrendStatus.CONSOLIDATION,
+        ]
+        volume_statuses = [
+            VolumeStatus.HEAVY_VOLUME_UP, VolumeStatus.HEAVY_VOLUME_DOWN,
+            VolumeStatus.SHRINK_VOLUME_UP, VolumeStatus.SHRINK_VOLUME_DOWN,
+            VolumeStatus.NORMAL,
+        ]
+        rsi_statuses = [
+            RSIStatus.OVERBOUGHT, RSIStatus.STRONG_BUY, RSIStatus.NEUTRAL,
+            RSIStatus.WEAK, RSIStatus.OVERSOLD,
+        ]
 
-        # 计算信号线 DEA
-        df['MACD_DEA'] = df['MACD_DIF'].ewm(span=self.MACD_SIGNAL, adjust=False).mean()
+        # 逐只生成结果对象（仅做取值与文本拼装）
+        results = []
+        for i, code in enumerate(codes):
+            result = TrendAnalysisResult(code=code)
+            result.current_price = float(price[i])
+            result.ma5, result.ma10, result.ma20 = float(ma5[i]), float(ma10[i]), float(ma20[i])
+            result.ma60 = float(ma60[i])
+            self._set_trend(result, trend_statuses[trend_codes[i]])
+            result.bias_ma5, result.bias_ma10, result.bias_ma20 = (float(bias[w][i]) for w in (5, 10, 20))
+
+            result.volume_ratio_5d = float(volume_ratio[i])
+            self._set_volume(result, volume_statuses[volume_codes[i]])
+
+            result.support_ma5, result.support_ma10 = bool(support_ma5[i]), bool(support_ma10[i])
+            if result.support_ma5:
+                result.support_levels.append(result.ma5)
+            if result.support_ma10 and result.ma10 not in result.support_levels:
+                result.support_levels.append(result.ma10)
+            if support_ma20[i]:
+                result.support_levels.append(result.ma20)
+            if recent_high[i] > price[i]:
+                result.resistance_levels.append(float(recent_high[i]))
+
+            if macd_ready[i]:
+                result.macd_dif, result.macd_dea, result.macd_bar = float(dif[i]), float(dea[i]), float(bar[i])
+                self._set_macd(result, int(macd_codes[i]))
+            else:
+                result.macd_signal = "数据不足"
 
-        # 计算柱状图
-        df['MACD_BAR'] = (df['MACD_DIF'] - df['MACD_DEA']) * 2
+            if rsi_ready[i]:
+                result.rsi_6, result.rsi_12, result.rsi_24 = (float(rsi[p][i]) for p in rsi)
+                self._set_rsi(result, rsi_statuses[rsi_codes[i]])
+            else:
+                result.rsi_signal = "数据不足"
 
-        return df
+            self._generate_signal(result)
+            results.append(result)
+        return results
 
-    def _calculate_rsi(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        计算 RSI 指标
+        计算均线、MACD 与 RSI（共用 data_provider.indicators 向量化实现）
 
         公式：
-        - RS = 平均上涨幅度 / 平均下跌幅度
-        - RSI = 100 - (100 / (1 + RS))
+        - MA5/10/20/60：简单移动平均，数据不足 60 日时 MA60 使用 MA20 替代
+        - DIF = EMA(12) - EMA(26)，DEA = EMA(DIF, 9)，MACD = (DIF - DEA) * 2
+        - RSI = 100 - (100 / (1 + RS))，RS = 平均上涨幅度 / 平均下跌幅度
         """
-        df = df.copy()
+        indicators = compute_trend_indicators(
+            df['close'].to_numpy(dtype=float),
+            macd_fast=self.MACD_FAST,
+            macd_slow=self.MACD_SLOW,
+            macd_signal=self.MACD_SIGNAL,
+            rsi_periods=(self.RSI_SHORT, self.RSI_MID, self.RSI_LONG),
+        )
+        return attach_indicators(df, indicators)
+
+    @staticmethod
+    def _indicators_from_state(df: pd.DataFrame, state: IndicatorState) -> pd.DataFrame:
+        """
+        用流式状态中最近几根 K 线的指标填充 df 末尾（更早的行为 NaN，分析规则不会读取）
 
-        for period in [self.RSI_SHORT, self.RSI_MID, self.RSI_LONG]:
-            # 计算价格变化
-            delta = df['close'].diff()
+        attrs['history_bars'] 记录状态覆盖的总 K 线数，供数据充足性判断使用
+        """
+        recent = state.recent[-len(df):]
+        columns = {key: np.full(len(df), np.nan) for key in TREND_KEYS}
+        for offset, values in enumerate(recent, start=len(df) - len(recent)):
+            for key, value in values.items():
+                if key in columns:
+                    columns[key][offset] = value
+        df = attach_indicators(df, columns)
+        df.attrs['history_bars'] = state.bars
+        return df
 
-            # 分离上涨和下跌
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
+    @staticmethod
+    def _history_bars(df: pd.DataFrame) -> int:
+        """指标所基于的历史 K 线数（来自流式状态时可能多于 df 行数）"""
+        return int(df.attrs.get('history_bars', len(df)))
 
-            # 计算平均涨跌幅
-            avg_gain = gain.rolling(window=period).mean()
-            avg_loss = loss.rolling(window=period).mean()
+    @staticmethod
+    def _set_trend(result: TrendAnalysisResult, status: TrendStatus) -> None:
+        result.trend_status = status
+        result.ma_alignment, result.trend_strength = TREND_DESCRIPTIONS[status]
 
-            # 计算 RS 和 RSI
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
+    @staticmethod
+    def _set_volume(result: TrendAnalysisResult, status: VolumeStatus) -> None:
+        result.volume_status = status
+        result.volume_trend = VOLUME_DESCRIPTIONS[status]
 
-            # 填充 NaN 值
-            rsi = rsi.fillna(50)  # 默认中性值
+    @staticmethod
+    def _set_macd(result: TrendAnalysisResult, case: int) -> None:
+        result.macd_status, result.macd_signal = MACD_CASES[case]
 
-            # 添加到 DataFrame
-            col_name = f'RSI_{period}'
-            df[col_name] = rsi
+    @staticmethod
+    def _set_rsi(result: TrendAnalysisResult, status: RSIStatus) -> None:
+        result.rsi_status = status
+        result.rsi_signal = RSI_SIGNAL_TEMPLATES[status].format(result.rsi_12)
 
-        return df
-    
     def _analyze_trend(self, df: pd.DataFrame, result: TrendAnalysisResult) -> None:
         """
         分析趋势状态
@@ -351,18 +626,12 @@ class StockTrendAnalyzer:
             curr_spread = (ma5 - ma20) / ma20 * 100 if ma20 > 0 else 0
             
             if curr_spread > prev_spread and curr_spread > 5:
-                result.trend_status = TrendStatus.STRONG_BULL
-                result.ma_alignment = "强势多头排列，均线发散上行"
-                result.trend_strength = 90
+                self._set_trend(result, TrendStatus.STRONG_BULL)
             else:
-                result.trend_status = TrendStatus.BULL
-                result.ma_alignment = "多头排列 MA5>MA10>MA20"
-                result.trend_strength = 75
+                self._set_trend(result, TrendStatus.BULL)
                 
         elif ma5 > ma10 and ma10 <= ma20:
-            result.trend_status = TrendStatus.WEAK_BULL
-            result.ma_alignment = "弱势多头，MA5>MA10 但 MA10≤MA20"
-            result.trend_strength = 55
+            self._set_trend(result, TrendStatus.WEAK_BULL)
             
         elif ma5 < ma10 < ma20:
             prev = df.iloc[-5] if len(df) >= 5 else df.iloc[-1]
@@ -370,23 +639,15 @@ class StockTrendAnalyzer:
             curr_spread = (ma20 - ma5) / ma5 * 100 if ma5 > 0 else 0
             
             if curr_spread > prev_spread and curr_spread > 5:
-                result.trend_status = TrendStatus.STRONG_BEAR
-                result.ma_alignment = "强势空头排列，均线发散下行"
-                result.trend_strength = 10
+                self._set_trend(result, TrendStatus.STRONG_BEAR)
             else:
-                result.trend_status = TrendStatus.BEAR
-                result.ma_alignment = "空头排列 MA5<MA10<MA20"
-                result.trend_strength = 25
+                self._set_trend(result, TrendStatus.BEAR)
                 
         elif ma5 < ma10 and ma10 >= ma20:
-            result.trend_status = TrendStatus.WEAK_BEAR
-            result.ma_alignment = "弱势空头，MA5<MA10 但 MA10≥MA20"
-            result.trend_strength = 40
+            self._set_trend(result, TrendStatus.WEAK_BEAR)
             
         else:
-            result.trend_status = TrendStatus.CONSOLIDATION
-            result.ma_alignment = "均线缠绕，趋势不明"
-            result.trend_strength = 50
+            self._set_trend(result, TrendStatus.CONSOLIDATION)
     
     def _calculate_bias(self, result: TrendAnalysisResult) -> None:
         """
@@ -427,21 +688,16 @@ class StockTrendAnalyzer:
         # 量能状态判断
         if result.volume_ratio_5d >= self.VOLUME_HEAVY_RATIO:
             if price_change > 0:
-                result.volume_status = VolumeStatus.HEAVY_VOLUME_UP
-                result.volume_trend = "放量上涨，多头力量强劲"
+                self._set_volume(result, VolumeStatus.HEAVY_VOLUME_UP)
             else:
-                result.volume_status = VolumeStatus.HEAVY_VOLUME_DOWN
-                result.volume_trend = "放量下跌，注意风险"
+                self._set_volume(result, VolumeStatus.HEAVY_VOLUME_DOWN)
         elif result.volume_ratio_5d <= self.VOLUME_SHRINK_RATIO:
             if price_change > 0:
-                result.volume_status = VolumeStatus.SHRINK_VOLUME_UP
-                result.volume_trend = "缩量上涨，上攻动能不足"
+                self._set_volume(result, VolumeStatus.SHRINK_VOLUME_UP)
             else:
-                result.volume_status = VolumeStatus.SHRINK_VOLUME_DOWN
-                result.volume_trend = "缩量回调，洗盘特征明显（好）"
+                self._set_volume(result, VolumeStatus.SHRINK_VOLUME_DOWN)
         else:
-            result.volume_status = VolumeStatus.NORMAL
-            result.volume_trend = "量能正常"
+            self._set_volume(result, VolumeStatus.NORMAL)
     
     def _analyze_support_resistance(self, df: pd.DataFrame, result: TrendAnalysisResult) -> None:
         """
@@ -485,7 +741,7 @@ class StockTrendAnalyzer:
         - 金叉：DIF 上穿 DEA
         - 死叉：DIF 下穿 DEA
         """
-        if len(df) < self.MACD_SLOW:
+        if self._history_bars(df) < self.MACD_SLOW:
             result.macd_signal = "数据不足"
             return
 
@@ -515,29 +771,21 @@ class StockTrendAnalyzer:
 
         # 判断 MACD 状态
         if is_golden_cross and curr_zero > 0:
-            result.macd_status = MACDStatus.GOLDEN_CROSS_ZERO
-            result.macd_signal = "⭐ 零轴上金叉，强烈买入信号！"
+            self._set_macd(result, 0)
         elif is_crossing_up:
-            result.macd_status = MACDStatus.CROSSING_UP
-            result.macd_signal = "⚡ DIF上穿零轴，趋势转强"
+            self._set_macd(result, 1)
         elif is_golden_cross:
-            result.macd_status = MACDStatus.GOLDEN_CROSS
-            result.macd_signal = "✅ 金叉，趋势向上"
+            self._set_macd(result, 2)
         elif is_death_cross:
-            result.macd_status = MACDStatus.DEATH_CROSS
-            result.macd_signal = "❌ 死叉，趋势向下"
+            self._set_macd(result, 3)
         elif is_crossing_down:
-            result.macd_status = MACDStatus.CROSSING_DOWN
-            result.macd_signal = "⚠️ DIF下穿零轴，趋势转弱"
+            self._set_macd(result, 4)
         elif result.macd_dif > 0 and result.macd_dea > 0:
-            result.macd_status = MACDStatus.BULLISH
-            result.macd_signal = "✓ 多头排列，持续上涨"
+            self._set_macd(result, 5)
         elif result.macd_dif < 0 and result.macd_dea < 0:
-            result.macd_status = MACDStatus.BEARISH
-            result.macd_signal = "⚠ 空头排列，持续下跌"
+            self._set_macd(result, 6)
         else:
-            result.macd_status = MACDStatus.BULLISH
-            result.macd_signal = " MACD 中性区域"
+            self._set_macd(result, 7)
 
     def _analyze_rsi(self, df: pd.DataFrame, result: TrendAnalysisResult) -> None:
         """
@@ -548,7 +796,7 @@ class StockTrendAnalyzer:
         - RSI < 30：超卖，关注反弹
         - 40-60：中性区域
         """
-        if len(df) < self.RSI_LONG:
+        if self._history_bars(df) < self.RSI_LONG:
             result.rsi_signal = "数据不足"
             return
 
@@ -564,20 +812,15 @@ class StockTrendAnalyzer:
 
         # 判断 RSI 状态
         if rsi_mid > self.RSI_OVERBOUGHT:
-            result.rsi_status = RSIStatus.OVERBOUGHT
-            result.rsi_signal = f"⚠️ RSI超买({rsi_mid:.1f}>70)，短期回调风险高"
+            self._set_rsi(result, RSIStatus.OVERBOUGHT)
         elif rsi_mid > 60:
-            result.rsi_status = RSIStatus.STRONG_BUY
-            result.rsi_signal = f"✅ RSI强势({rsi_mid:.1f})，多头力量充足"
+            self._set_rsi(result, RSIStatus.STRONG_BUY)
         elif rsi_mid >= 40:
-            result.rsi_status = RSIStatus.NEUTRAL
-            result.rsi_signal = f" RSI中性({rsi_mid:.1f})，震荡整理中"
+            self._set_rsi(result, RSIStatus.NEUTRAL)
         elif rsi_mid >= self.RSI_OVERSOLD:
-            result.rsi_status = RSIStatus.WEAK
-            result.rsi_signal = f"⚡ RSI弱势({rsi_mid:.1f})，关注反弹"
+            self._set_rsi(result, RSIStatus.WEAK)
         else:
-            result.rsi_status = RSIStatus.OVERSOLD
-            result.rsi_signal = f"⭐ RSI超卖({rsi_mid:.1f}<30)，反弹机会大"
+            self._set_rsi(result, RSIStatus.OVERSOLD)
 
     def _generate_signal(self, result: TrendAnalysisResult) -> None:
         """
@@ -35,6 +35,7 @@ from sqlalchemy import (
     Text,
     select,
     and_,
+    or_,
     desc,
 )
 from sqlalchemy.orm import (
@@ -128,6 +129,64 @@ class StockDaily(Base):
         }
 
 
+class StockIndicatorState(Base):
+    """
+    流式技术指标状态模型
+
+    每只股票一行，保存推进到 date 为止的 EMA、滑动窗口与涨跌幅窗口（JSON），
+    新增 K 线时据此 O(1) 计算指标，无需重算全部历史
+    """
+    __tablename__ = 'stock_indicator_state'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String(10), nullable=False, unique=True, index=True)
+
+    # 状态已推进到的最后交易日（与 stock_daily 最新日期一致时才可继续推进）
+    date = Column(Date, nullable=False)
+    state_json = Column(Text, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    def __repr__(self) -> str:
+        return f"<StockIndicatorState(code={self.code}, date={self.date})>"
+
+
+class StockChipDistribution(Base):
+    """
+    筹码分布缓存模型
+
+    按 (股票代码, 交易日) 保存筹码分布结果；筹码数据每个交易日收盘后才变化，
+    同一交易日内的重复请求直接读取本表，不再访问不稳定的筹码接口
+    """
+    __tablename__ = 'stock_chip_distribution'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String(10), nullable=False, index=True)
+
+    # 筹码数据对应的交易日
+    date = Column(Date, nullable=False, index=True)
+
+    profit_ratio = Column(Float)
+    avg_cost = Column(Float)
+    cost_90_low = Column(Float)
+    cost_90_high = Column(Float)
+    concentration_90 = Column(Float)
+    cost_70_low = Column(Float)
+    cost_70_high = Column(Float)
+    concentration_70 = Column(Float)
+
+    # 数据来源与拉取时间（拉取时间用于判断节假日 / 上游延迟时是否已在收盘后取过数）
+    source = Column(String(50))
+    fetched_at = Column(DateTime, default=datetime.now, index=True)
+
+    __table_args__ = (
+        UniqueConstraint('code', 'date', name='uix_chip_code_date'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<StockChipDistribution(code={self.code}, date={self.date})>"
+
+
 class NewsIntel(Base):
     """
     新闻情报数据模型
@@ -170,12 +229,37 @@ class NewsIntel(Base):
     __table_args__ = (
         UniqueConstraint('url', name='uix_news_url'),
         Index('ix_news_code_pub', 'code', 'published_date'),
+        Index('ix_news_query_dim', 'query', 'dimension'),
     )
 
     def __repr__(self) -> str:
         return f"<NewsIntel(code={self.code}, title={self.title[:20]}...)>"
 
 
+class NewsIntelLink(Base):
+    """
+    新闻情报与股票 / 查询的关联模型
+
+    news_intel 按 URL 去重，每条新闻只记录首个股票代码与 query_id；
+    同一新闻再被其他股票或分析使用（命中搜索缓存、行业搜索结果分发给同行业股票）时
+    在此追加关联（无 query_id 时为空字符串），不改动新闻本身
+    """
+    __tablename__ = 'news_intel_links'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    news_id = Column(Integer, ForeignKey('news_intel.id'), nullable=False, index=True)
+    code = Column(String(10), nullable=False, index=True)
+    query_id = Column(String(64), nullable=False, default='', index=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('news_id', 'code', 'query_id', name='uix_news_link'),
+    )
+
+    def __repr__(self) -> str:
+        return f"<NewsIntelLink(news_id={self.news_id}, code={self.code}, query_id={self.query_id})>"
+
+
 class AnalysisHistory(Base):
     """
     分析结果历史记录模型
@@ -491,16 +575,52 @@ class DatabaseManager:
             target_date = date.today()
         
         with self.get_session() as session:
+            # 仅查询主键，避免为存在性判断加载整行 ORM 对象
             result = session.execute(
-                select(StockDaily).where(
+                select(StockDaily.id).where(
                     and_(
                         StockDaily.code == code,
                         StockDaily.date == target_date
                     )
-                )
-            ).scalar_one_or_none()
+                ).limit(1)
+            ).first()
             
             return result is not None
+
+    # IN 查询单批最大代码数（避免超出 SQLite 绑定参数上限）
+    _IN_QUERY_CHUNK_SIZE = 500
+
+    def get_latest_dates(self, codes: List[str]) -> Dict[str, date]:
+        """
+        批量获取多只股票的最新数据日期（新鲜度索引）
+
+        单条分组查询：SELECT code, MAX(date) FROM stock_daily WHERE code IN (...) GROUP BY code
+
+        Args:
+            codes: 股票代码列表
+
+        Returns:
+            {股票代码: 最新数据日期}，库中无数据的代码不在结果中
+        """
+        from sqlalchemy import func
+
+        unique_codes = list(dict.fromkeys(c for c in codes if c))
+        if not unique_codes:
+            return {}
+
+        latest: Dict[str, date] = {}
+        with self.get_session() as session:
+            for start in range(0, len(unique_codes), self._IN_QUERY_CHUNK_SIZE):
+                chunk = unique_codes[start:start + self._IN_QUERY_CHUNK_SIZE]
+                rows = session.execute(
+                    select(StockDaily.code, func.max(StockDaily.date))
+                    .where(StockDaily.code.in_(chunk))
+                    .group_by(StockDaily.code)
+                ).all()
+                for code, latest_date in rows:
+                    if latest_date is not None:
+                        latest[code] = latest_date
+        return latest
     
     def get_latest_data(
         self, 
@@ -529,6 +649,173 @@ class DatabaseManager:
             
             return list(results)
 
+    def get_indicator_states(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量读取流式指标状态
+
+        Args:
+            codes: 股票代码列表
+
+        Returns:
+            {股票代码: 状态字典（IndicatorState.to_dict() 格式）}，无状态或解析失败的代码不在结果中
+        """
+        unique_codes = list(dict.fromkeys(c for c in codes if c))
+        if not unique_codes:
+            return {}
+
+        states: Dict[str, Dict[str, Any]] = {}
+        with self.get_session() as session:
+            for start in range(0, len(unique_codes), self._IN_QUERY_CHUNK_SIZE):
+                chunk = unique_codes[start:start + self._IN_QUERY_CHUNK_SIZE]
+                rows = session.execute(
+                    select(StockIndicatorState.code, StockIndicatorState.state_json)
+                    .where(StockIndicatorState.code.in_(chunk))
+                ).all()
+                for code, state_json in rows:
+                    try:
+                        states[code] = json.loads(state_json)
+                    except (TypeError, ValueError) as e:
+                        logger.warning(f"解析 {code} 指标状态失败，忽略: {e}")
+        return states
+
+    def save_indicator_states(self, states: Dict[str, Dict[str, Any]]) -> int:
+        """
+        批量保存流式指标状态（按代码覆盖）
+
+        Args:
+            states: {股票代码: 状态字典（需包含 last_date）}
+
+        Returns:
+            保存的状态数
+        """
+        items = {
+            code: state for code, state in states.items()
+            if code and state and state.get('last_date')
+        }
+        if not items:
+            return 0
+
+        with self.get_session() as session:
+            try:
+                existing = {
+                    row.code: row
+                    for row in session.execute(
+                        select(StockIndicatorState)
+                        .where(StockIndicatorState.code.in_(list(items.keys())))
+                    ).scalars().all()
+                }
+                for code, state in items.items():
+                    state_date = datetime.strptime(state['last_date'], '%Y-%m-%d').date()
+                    state_json = json.dumps(state, ensure_ascii=False)
+                    row = existing.get(code)
+                    if row is None:
+                        session.add(StockIndicatorState(code=code, date=state_date, state_json=state_json))
+                    else:
+                        row.date = state_date
+                        row.state_json = state_json
+                        row.updated_at = datetime.now()
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存指标状态失败（{len(items)} 只股票）: {e}")
+                raise
+        return len(items)
+
+    # 筹码分布缓存的数值列
+    _CHIP_VALUE_COLUMNS = [
+        'profit_ratio', 'avg_cost', 'cost_90_low', 'cost_90_high', 'concentration_90',
+        'cost_70_low', 'cost_70_high', 'concentration_70',
+    ]
+
+    def get_latest_chip_distributions(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量读取每只股票最新交易日的筹码分布缓存
+
+        Args:
+            codes: 股票代码列表
+
+        Returns:
+            {股票代码: {date, source, fetched_at, 各筹码字段}}，无缓存的代码不在结果中
+        """
+        from sqlalchemy import func
+
+        unique_codes = list(dict.fromkeys(c for c in codes if c))
+        if not unique_codes:
+            return {}
+
+        chips: Dict[str, Dict[str, Any]] = {}
+        with self.get_session() as session:
+            for start in range(0, len(unique_codes), self._IN_QUERY_CHUNK_SIZE):
+                chunk = unique_codes[start:start + self._IN_QUERY_CHUNK_SIZE]
+                latest = (
+                    select(StockChipDistribution.code, func.max(StockChipDistribution.date).label('max_date'))
+                    .where(StockChipDistribution.code.in_(chunk))
+                    .group_by(StockChipDistribution.code)
+                    .subquery()
+                )
+                rows = session.execute(
+                    select(StockChipDistribution).join(
+                        latest,
+                        and_(
+                            StockChipDistribution.code == latest.c.code,
+                            StockChipDistribution.date == latest.c.max_date,
+                        ),
+                    )
+                ).scalars().all()
+                for row in rows:
+                    record = {col: getattr(row, col) for col in self._CHIP_VALUE_COLUMNS}
+                    record.update(date=row.date, source=row.source, fetched_at=row.fetched_at)
+                    chips[row.code] = record
+        return chips
+
+    def save_chip_distributions(self, records: List[Dict[str, Any]]) -> int:
+        """
+        批量保存筹码分布缓存（按代码 + 交易日覆盖）
+
+        Args:
+            records: 记录列表，需包含 code / date（date 类型），其余为筹码字段与 source
+
+        Returns:
+            保存的记录数
+        """
+        items = {
+            (record['code'], record['date']): record
+            for record in records if record.get('code') and record.get('date')
+        }
+        if not items:
+            return 0
+
+        now = datetime.now()
+        codes = list({code for code, _ in items})
+        with self.get_session() as session:
+            try:
+                existing = {
+                    (row.code, row.date): row
+                    for row in session.execute(
+                        select(StockChipDistribution).where(
+                            and_(
+                                StockChipDistribution.code.in_(codes),
+                                StockChipDistribution.date.in_(list({d for _, d in items})),
+                            )
+                        )
+                    ).scalars().all()
+                }
+                for key, record in items.items():
+                    row = existing.get(key)
+                    if row is None:
+                        row = StockChipDistribution(code=key[0], date=key[1])
+                        session.add(row)
+                    for col in self._CHIP_VALUE_COLUMNS:
+                        setattr(row, col, record.get(col))
+                    row.source = record.get('source')
+                    row.fetched_at = now
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"保存筹码分布缓存失败（{len(items)} 条）: {e}")
+                raise
+        return len(items)
+
     def save_news_intel(
         self,
         code: str,
@@ -614,6 +901,8 @@ class DatabaseManager:
                             existing.requester_query = (
                                 query_context.get("requester_query") or existing.requester_query
                             )
+                        if existing.code != code or (current_query_id and existing.query_id != current_query_id):
+                            self._link_news_intel(session, existing.id, code, current_query_id)
                     else:
                         try:
                             with session.begin_nested():
@@ -655,18 +944,88 @@ class DatabaseManager:
 
         return saved_count
 
+    def link_news_intel(
+        self,
+        code: str,
+        query: str,
+        dimension: str,
+        response: 'SearchResponse',
+        query_context: Optional[Dict[str, str]] = None
+    ) -> int:
+        """
+        将已入库的新闻关联到本次股票与查询（命中搜索缓存时使用）
+
+        只追加关联，不改动新闻内容与 fetched_at（后者决定缓存有效期）；
+        新闻已属于该股票且无需关联新的 query_id 时跳过
+
+        Returns:
+            新增关联数
+        """
+        query_id = ((query_context or {}).get("query_id") or "").strip()
+        if not response or not response.results:
+            return 0
+
+        urls = [(item.url or '').strip() for item in response.results]
+        titles = [(item.title or '').strip() for item in response.results if not (item.url or '').strip()]
+        conditions = [NewsIntel.url.in_([url for url in urls if url])]
+        if titles:
+            # 无 URL 的新闻以兜底键入库（含首次抓取时的股票代码），按查询与标题匹配
+            conditions.append(and_(
+                NewsIntel.query == query,
+                NewsIntel.dimension == dimension,
+                NewsIntel.title.in_(titles),
+                NewsIntel.url.like('no-url:%'),
+            ))
+
+        linked = 0
+        with self.get_session() as session:
+            try:
+                records = session.execute(select(NewsIntel).where(or_(*conditions))).scalars().all()
+                for record in records:
+                    if record.code == code and (not query_id or record.query_id == query_id):
+                        continue
+                    linked += self._link_news_intel(session, record.id, code, query_id)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error(f"关联新闻情报失败: {e}")
+                raise
+
+        return linked
+
+    @staticmethod
+    def _link_news_intel(session: Session, news_id: int, code: str, query_id: str) -> int:
+        """追加一条新闻关联（已存在时跳过），返回新增数"""
+        exists = session.execute(
+            select(NewsIntelLink.id).where(and_(
+                NewsIntelLink.news_id == news_id,
+                NewsIntelLink.code == code,
+                NewsIntelLink.query_id == query_id,
+            ))
+        ).first()
+        if exists:
+            return 0
+        try:
+            with session.begin_nested():
+                session.add(NewsIntelLink(news_id=news_id, code=code, query_id=query_id))
+                session.flush()
+        except IntegrityError:
+            return 0
+        return 1
+
     def get_recent_news(self, code: str, days: int = 7, limit: int = 20) -> List[NewsIntel]:
         """
-        获取指定股票最近 N 天的新闻情报
+        获取指定股票最近 N 天的新闻情报（含关联到该股票的共享新闻，如行业搜索结果）
         """
         cutoff_date = datetime.now() - timedelta(days=days)
 
         with self.get_session() as session:
+            linked_ids = select(NewsIntelLink.news_id).where(NewsIntelLink.code == code)
             results = session.execute(
                 select(NewsIntel)
                 .where(
                     and_(
-                        NewsIntel.code == code,
+                        or_(NewsIntel.code == code, NewsIntel.id.in_(linked_ids)),
                         NewsIntel.fetched_at >= cutoff_date
                     )
                 )
@@ -676,9 +1035,35 @@ class DatabaseManager:
 
             return list(results)
 
+    def get_news_intel_by_search_query(
+        self,
+        query: str,
+        dimension: Optional[str] = None,
+        limit: int = 50
+    ) -> List[NewsIntel]:
+        """
+        根据搜索查询（及维度）获取最近抓取的新闻情报（搜索结果缓存的持久层）
+
+        Returns:
+            NewsIntel 列表（按抓取时间倒序）
+        """
+        conditions = [NewsIntel.query == query]
+        if dimension is not None:
+            conditions.append(NewsIntel.dimension == dimension)
+
+        with self.get_session() as session:
+            results = session.execute(
+                select(NewsIntel)
+                .where(and_(*conditions))
+                .order_by(desc(NewsIntel.fetched_at), NewsIntel.id)
+                .limit(limit)
+            ).scalars().all()
+
+            return list(results)
+
     def get_news_intel_by_query_id(self, query_id: str, limit: int = 20) -> List[NewsIntel]:
         """
-        根据 query_id 获取新闻情报列表
+        根据 query_id 获取新闻情报列表（含命中搜索缓存时追加关联的新闻）
 
         Args:
             query_id: 分析记录唯一标识
@@ -690,9 +1075,10 @@ class DatabaseManager:
         from sqlalchemy import func
 
         with self.get_session() as session:
+            linked_ids = select(NewsIntelLink.news_id).where(NewsIntelLink.query_id == query_id)
             results = session.execute(
                 select(NewsIntel)
-                .where(NewsIntel.query_id == query_id)
+                .where(or_(NewsIntel.query_id == query_id, NewsIntel.id.in_(linked_ids)))
                 .order_by(
                     desc(func.coalesce(NewsIntel.published_date, NewsIntel.fetched_at)),
                     desc(NewsIntel.fetched_at)
@@ -874,6 +1260,52 @@ class DatabaseManager:
             
             return list(results)
     
+    def get_daily_history(
+        self,
+        codes: List[str],
+        start_date: date,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        批量读取多只股票自 start_date 起的日线（长表，供批量趋势分析使用）
+
+        按代码分批 IN 查询，只读取需要的列，不构建 ORM 对象
+
+        Args:
+            codes: 股票代码列表
+            start_date: 开始日期（含）
+            columns: 需要的行情列（默认 date/high/close/volume）
+
+        Returns:
+            列为 code + columns 的 DataFrame，按代码、日期升序
+        """
+        columns = columns or ['date', 'high', 'close', 'volume']
+        unique_codes = list(dict.fromkeys(c for c in codes if c))
+        if not unique_codes:
+            return pd.DataFrame(columns=['code'] + columns)
+
+        selected = [StockDaily.code] + [getattr(StockDaily, col) for col in columns]
+        rows: List[Any] = []
+        with self.get_session() as session:
+            for start in range(0, len(unique_codes), self._IN_QUERY_CHUNK_SIZE):
+                chunk = unique_codes[start:start + self._IN_QUERY_CHUNK_SIZE]
+                rows.extend(session.execute(
+                    select(*selected)
+                    .where(and_(StockDaily.code.in_(chunk), StockDaily.date >= start_date))
+                    .order_by(StockDaily.code, StockDaily.date)
+                ).all())
+        return pd.DataFrame(rows, columns=['code'] + columns)
+
+    # stock_daily 中由 DataFrame 写入的数值列
+    _DAILY_VALUE_COLUMNS = [
+        'open', 'high', 'low', 'close', 'volume', 'amount', 'pct_chg',
+        'ma5', 'ma10', 'ma20', 'volume_ratio',
+    ]
+    # 分析上下文（StockDaily.to_dict）所需的日线列，供 get_daily_history 一次读取后共用
+    DAILY_COLUMNS = ['date'] + _DAILY_VALUE_COLUMNS + ['data_source']
+    # 单条 INSERT 语句的最大行数（SQLite 绑定参数上限为 32766，每行 15 个参数）
+    _UPSERT_CHUNK_SIZE = 500
+
     def save_daily_data(
         self, 
         df: pd.DataFrame, 
@@ -884,8 +1316,7 @@ class DatabaseManager:
         保存日线数据到数据库
         
         策略：
-        - 使用 UPSERT 逻辑（存在则更新，不存在则插入）
-        - 跳过已存在的数据，避免重复
+        - 批量 UPSERT（存在则更新，不存在则插入），详见 upsert_daily_data
         
         Args:
             df: 包含日线数据的 DataFrame
@@ -893,86 +1324,198 @@ class DatabaseManager:
             data_source: 数据来源名称
             
         Returns:
-            新增/更新的记录数
+            新增的记录数
         """
         if df is None or df.empty:
             logger.warning(f"保存数据为空，跳过 {code}")
             return 0
-        
-        saved_count = 0
-        
+
+        inserted, _ = self.upsert_daily_data(df, code, data_source)
+        return inserted
+
+    def upsert_daily_data(
+        self,
+        df: pd.DataFrame,
+        code: str,
+        data_source: str = "Unknown"
+    ) -> Tuple[int, int]:
+        """
+        批量保存单只股票的日线数据
+
+        Args:
+            df: 包含日线数据的 DataFrame
+            code: 股票代码
+            data_source: 数据来源名称
+
+        Returns:
+            Tuple[新增条数, 更新条数]
+        """
+        stats = self.save_daily_data_batch([(code, df, data_source)])
+        return stats.get(code, (0, 0))
+
+    def save_daily_data_batch(
+        self,
+        items: List[Tuple[str, pd.DataFrame, str]]
+    ) -> Dict[str, Tuple[int, int]]:
+        """
+        批量保存多只股票的日线数据（单个事务）
+
+        策略：
+        - 直接从 DataFrame 列构建记录，不逐行查询
+        - SQLite / PostgreSQL 使用原生 INSERT ... ON CONFLICT(code, date) DO UPDATE
+        - 其他数据库退化为批量 INSERT + 批量 UPDATE
+        - 新增/更新条数由一次 (code, date) 存在性查询得出
+
+        Args:
+            items: [(股票代码, DataFrame, 数据来源), ...]
+
+        Returns:
+            {股票代码: (新增条数, 更新条数)}
+        """
+        records: List[Dict[str, Any]] = []
+        per_code_dates: Dict[str, List[date]] = {}
+        for code, df, data_source in items:
+            code_records = self._build_daily_records(df, code, data_source)
+            if not code_records:
+                logger.warning(f"保存数据为空，跳过 {code}")
+                continue
+            records.extend(code_records)
+            per_code_dates[code] = [r['date'] for r in code_records]
+
+        if not records:
+            return {}
+
+        stats: Dict[str, Tuple[int, int]] = {}
         with self.get_session() as session:
             try:
-                for _, row in df.iterrows():
-                    # 解析日期
-                    row_date = row.get('date')
-                    if isinstance(row_date, str):
-                        row_date = datetime.strptime(row_date, '%Y-%m-%d').date()
-                    elif isinstance(row_date, datetime):
-                        row_date = row_date.date()
-                    elif isinstance(row_date, pd.Timestamp):
-                        row_date = row_date.date()
-                    
-                    # 检查是否已存在
-                    existing = session.execute(
-                        select(StockDaily).where(
-                            and_(
-                                StockDaily.code == code,
-                                StockDaily.date == row_date
-                            )
-                        )
-                    ).scalar_one_or_none()
-                    
-                    if existing:
-                        # 更新现有记录
-                        existing.open = row.get('open')
-                        existing.high = row.get('high')
-                        existing.low = row.get('low')
-                        existing.close = row.get('close')
-                        existing.volume = row.get('volume')
-                        existing.amount = row.get('amount')
-                        existing.pct_chg = row.get('pct_chg')
-                        existing.ma5 = row.get('ma5')
-                        existing.ma10 = row.get('ma10')
-                        existing.ma20 = row.get('ma20')
-                        existing.volume_ratio = row.get('volume_ratio')
-                        existing.data_source = data_source
-                        existing.updated_at = datetime.now()
-                    else:
-                        # 创建新记录
-                        record = StockDaily(
-                            code=code,
-                            date=row_date,
-                            open=row.get('open'),
-                            high=row.get('high'),
-                            low=row.get('low'),
-                            close=row.get('close'),
-                            volume=row.get('volume'),
-                            amount=row.get('amount'),
-                            pct_chg=row.get('pct_chg'),
-                            ma5=row.get('ma5'),
-                            ma10=row.get('ma10'),
-                            ma20=row.get('ma20'),
-                            volume_ratio=row.get('volume_ratio'),
-                            data_source=data_source,
-                        )
-                        session.add(record)
-                        saved_count += 1
-                
+                existing = self._load_existing_daily_keys(session, per_code_dates)
+                for code, dates in per_code_dates.items():
+                    updated = sum(1 for d in dates if (code, d) in existing)
+                    stats[code] = (len(dates) - updated, updated)
+
+                dialect = self._engine.dialect.name
+                if dialect in ('sqlite', 'postgresql'):
+                    self._execute_native_upsert(session, dialect, records)
+                else:
+                    self._execute_fallback_upsert(session, records, existing)
+
                 session.commit()
-                logger.info(f"保存 {code} 数据成功，新增 {saved_count} 条")
-                
             except Exception as e:
                 session.rollback()
-                logger.error(f"保存 {code} 数据失败: {e}")
+                logger.error(f"批量保存日线数据失败（{len(per_code_dates)} 只股票）: {e}")
                 raise
-        
-        return saved_count
+
+        for code, (inserted, updated) in stats.items():
+            logger.info(f"保存 {code} 数据成功，新增 {inserted} 条，更新 {updated} 条")
+        return stats
+
+    def _build_daily_records(
+        self,
+        df: pd.DataFrame,
+        code: str,
+        data_source: str
+    ) -> List[Dict[str, Any]]:
+        """
+        将 DataFrame 向量化转换为 stock_daily 记录列表
+
+        - 日期统一转为 date 类型，同一日期保留最后一条
+        - 缺失列补 None，NaN 转为 None
+        """
+        if df is None or df.empty or 'date' not in df.columns:
+            return []
+
+        frame = df.reindex(columns=['date'] + self._DAILY_VALUE_COLUMNS)
+        frame['date'] = pd.to_datetime(frame['date'], errors='coerce').dt.date
+        frame = frame.dropna(subset=['date']).drop_duplicates(subset=['date'], keep='last')
+        if frame.empty:
+            return []
+
+        values = frame[self._DAILY_VALUE_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        frame[self._DAILY_VALUE_COLUMNS] = values.astype(object).where(values.notna(), None)
+        frame['code'] = code
+        frame['data_source'] = data_source
+        return frame.to_dict('records')
+
+    @staticmethod
+    def _load_existing_daily_keys(
+        session: Session,
+        per_code_dates: Dict[str, List[date]]
+    ) -> set:
+        """一次查询取回批次日期范围内已存在的 (code, date) 键"""
+        all_dates = [d for dates in per_code_dates.values() for d in dates]
+        rows = session.execute(
+            select(StockDaily.code, StockDaily.date).where(
+                and_(
+                    StockDaily.code.in_(list(per_code_dates.keys())),
+                    StockDaily.date >= min(all_dates),
+                    StockDaily.date <= max(all_dates),
+                )
+            )
+        ).all()
+        return {(row[0], row[1]) for row in rows}
+
+    def _execute_native_upsert(
+        self,
+        session: Session,
+        dialect: str,
+        records: List[Dict[str, Any]]
+    ) -> None:
+        """SQLite / PostgreSQL 原生 INSERT ... ON CONFLICT(code, date) DO UPDATE"""
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        for start in range(0, len(records), self._UPSERT_CHUNK_SIZE):
+            chunk = records[start:start + self._UPSERT_CHUNK_SIZE]
+            stmt = dialect_insert(StockDaily).values(chunk)
+            update_columns = {col: stmt.excluded[col] for col in self._DAILY_VALUE_COLUMNS}
+            update_columns['data_source'] = stmt.excluded.data_source
+            update_columns['updated_at'] = datetime.now()
+            session.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=['code', 'date'],
+                    set_=update_columns,
+                )
+            )
+
+    def _execute_fallback_upsert(
+        self,
+        session: Session,
+        records: List[Dict[str, Any]],
+        existing: set
+    ) -> None:
+        """不支持 ON CONFLICT 的数据库：按存在性拆分为批量 INSERT 与批量 UPDATE"""
+        from sqlalchemy import bindparam, insert, update
+
+        new_records = [r for r in records if (r['code'], r['date']) not in existing]
+        old_records = [r for r in records if (r['code'], r['date']) in existing]
+
+        if new_records:
+            session.execute(insert(StockDaily), new_records)
+        if old_records:
+            stmt = (
+                update(StockDaily)
+                .where(
+                    and_(
+                        StockDaily.code == bindparam('b_code'),
+                        StockDaily.date == bindparam('b_date'),
+                    )
+                )
+                .values(
+                    **{col: bindparam(f'b_{col}') for col in self._DAILY_VALUE_COLUMNS},
+                    data_source=bindparam('b_data_source'),
+                    updated_at=datetime.now(),
+                )
+            )
+            params = [{f'b_{key}': value for key, value in r.items()} for r in old_records]
+            session.connection().execute(stmt, params)
     
     def get_analysis_context(
         self, 
         code: str,
-        target_date: Optional[date] = None
+        target_date: Optional[date] = None,
+        history: Optional[pd.DataFrame] = None
     ) -> Optional[Dict[str, Any]]:
         """
         获取分析所需的上下文数据
@@ -982,6 +1525,8 @@ class DatabaseManager:
         Args:
             code: 股票代码
             target_date: 目标日期（默认今天）
+            history: 已读取的日线（get_daily_history 按 DAILY_COLUMNS 读取，日期升序）；
+                     提供且非空时取末尾两行，不再查询数据库
             
         Returns:
             包含今日数据、昨日对比等信息的字典
@@ -990,7 +1535,17 @@ class DatabaseManager:
             target_date = date.today()
         
         # 获取最近2天数据
-        recent_data = self.get_latest_data(code, days=2)
+        if history is not None and not history.empty:
+            recent_data = [
+                StockDaily(**{
+                    key: None if not isinstance(value, str) and pd.isna(value) else value
+                    for key, value in row.items()
+                    if key != 'code'
+                }, code=code)
+                for row in history.tail(2).iloc[::-1].to_dict('records')
+            ]
+        else:
+            recent_data = self.get_latest_data(code, days=2)
         
         if not recent_data:
             logger.warning(f"未找到 {code} 的数据")
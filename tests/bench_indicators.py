@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+技术指标计算微基准
+===================================
+
+职责：
+1. 对比原 pandas 实现（逐只、多次 DataFrame 拷贝）与向量化引擎的单只 / 面板模式耗时
+
+运行方式（不属于 pytest 用例）：
+    python tests/bench_indicators.py [股票数] [交易日数]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.indicators import (
+    attach_indicators,
+    compute_price_indicators,
+    compute_trend_indicators,
+    stack_panel,
+)
+
+
+def _pandas_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    """原 BaseFetcher + StockTrendAnalyzer 的 pandas 计算路径"""
+    df = df.copy()
+    df['ma5'] = df['close'].rolling(window=5, min_periods=1).mean()
+    df['ma10'] = df['close'].rolling(window=10, min_periods=1).mean()
+    df['ma20'] = df['close'].rolling(window=20, min_periods=1).mean()
+    avg_volume_5 = df['volume'].rolling(window=5, min_periods=1).mean()
+    df['volume_ratio'] = (df['volume'] / avg_volume_5.shift(1)).fillna(1.0)
+    for col in ['ma5', 'ma10', 'ma20', 'volume_ratio']:
+        df[col] = df[col].round(2)
+
+    df = df.copy()
+    for window in (5, 10, 20, 60):
+        df[f'MA{window}'] = df['close'].rolling(window=window).mean()
+    df = df.copy()
+    ema_fast = df['close'].ewm(span=12, adjust=False).mean()
+    ema_slow = df['close'].ewm(span=26, adjust=False).mean()
+    df['MACD_DIF'] = ema_fast - ema_slow
+    df['MACD_DEA'] = df['MACD_DIF'].ewm(span=9, adjust=False).mean()
+    df['MACD_BAR'] = (df['MACD_DIF'] - df['MACD_DEA']) * 2
+    df = df.copy()
+    for period in (6, 12, 24):
+        delta = df['close'].diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+        rs = gain.rolling(window=period).mean() / loss.rolling(window=period).mean()
+        df[f'RSI_{period}'] = (100 - (100 / (1 + rs))).fillna(50)
+    return df
+
+
+def _engine_indicators(df: pd.DataFrame) -> pd.DataFrame:
+    close = df['close'].to_numpy(dtype=float)
+    volume = df['volume'].to_numpy(dtype=float)
+    indicators = compute_price_indicators(close, volume)
+    indicators.update(compute_trend_indicators(close))
+    return attach_indicators(df, indicators)
+
+
+def _timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(stocks: int = 500, days: int = 250) -> None:
+    rng = np.random.default_rng(0)
+    frames = [
+        pd.DataFrame({
+            'close': 20 + np.cumsum(rng.normal(0, 0.3, days)),
+            'volume': rng.uniform(1e5, 5e5, days),
+        })
+        for _ in range(stocks)
+    ]
+
+    baseline = _timed(lambda: [_pandas_indicators(df) for df in frames])
+    single = _timed(lambda: [_engine_indicators(df) for df in frames])
+
+    def _panel():
+        close = stack_panel(df['close'].to_numpy() for df in frames)
+        volume = stack_panel(df['volume'].to_numpy() for df in frames)
+        compute_price_indicators(close, volume)
+        compute_trend_indicators(close)
+
+    panel = _timed(_panel)
+
+    print(f"{stocks} 只股票 x {days} 个交易日")
+    print(f"  pandas 逐只:   {baseline * 1000:8.1f} ms")
+    print(f"  引擎逐只:      {single * 1000:8.1f} ms  ({baseline / single:5.1f}x)")
+    print(f"  引擎面板:      {panel * 1000:8.1f} ms  ({baseline / panel:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
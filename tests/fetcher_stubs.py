@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+测试用假数据源
+===================================
+
+职责：
+1. 为数据源管理器相关测试提供统一的可控假数据源（成败 / 耗时 / 调用计数 / 自行限速）
+"""
+
+import time
+
+import pandas as pd
+
+from data_provider.base import BaseFetcher
+
+
+class StubFetcher(BaseFetcher):
+    """
+    可控成败与耗时的假数据源
+
+    Args:
+        name: 数据源名称
+        priority: 优先级
+        delay: 每次请求的耗时（秒）
+        fail: 是否每次请求都抛出异常
+        self_paced: 是否按 API 调用自行消耗速率令牌（self_rate_limited）
+    """
+
+    def __init__(
+        self,
+        name: str = "StubFetcher",
+        priority: int = 0,
+        delay: float = 0.0,
+        fail: bool = False,
+        self_paced: bool = False,
+    ):
+        self.name = name
+        self.priority = priority
+        self.delay = delay
+        self.fail = fail
+        self.self_rate_limited = self_paced
+        self.calls = 0
+
+    def _fetch_raw_data(self, stock_code, start_date, end_date):
+        self.calls += 1
+        if self.self_rate_limited:
+            self._acquire_rate_token()
+        if self.delay:
+            time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        dates = pd.bdate_range(end=end_date, periods=5)
+        return pd.DataFrame({
+            'date': dates,
+            'open': 1.0, 'high': 1.0, 'low': 1.0, 'close': 1.0,
+            'volume': 100.0, 'amount': 100.0, 'pct_chg': 0.0,
+        })
+
+    def _normalize_data(self, df, stock_code):
+        return df
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+网页正文并发增强单元测试
+===================================
+
+职责：
+1. 验证正文并发抓取、拼接格式与按 URL 缓存
+2. 验证超过总时限时先返回摘要，后台抓取完成后写入缓存
+3. 验证 SerpAPI 只对自然搜索结果增强正文
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+import unittest.mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.search_service as search_service
+from data_provider.persistent_cache import MemoryCacheBackend, PersistentMapping
+from data_provider.rate_limiter import get_rate_limiter_registry, reset_rate_limiter_registry
+from src.search_service import (
+    SearchResponse,
+    SearchResult,
+    SerpAPISearchProvider,
+    enrich_article_bodies,
+)
+
+
+def _result(url, snippet='摘要'):
+    return SearchResult(title=url, snippet=snippet, url=url, source='example.com')
+
+
+class ArticleEnrichmentTestCase(unittest.TestCase):
+    """enrich_article_bodies 测试"""
+
+    def setUp(self) -> None:
+        self.calls = []
+        self._lock = threading.Lock()
+        self.delays = {}
+        cache = PersistentMapping('article', ttl=60, backend=MemoryCacheBackend())
+        patches = [
+            unittest.mock.patch.object(search_service, '_article_cache', cache),
+            unittest.mock.patch.object(search_service, 'fetch_url_content', side_effect=self._fake_fetch),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cache = cache
+
+    def _fake_fetch(self, url, timeout=5):
+        with self._lock:
+            self.calls.append(url)
+        time.sleep(self.delays.get(url, 0.2))
+        return '' if 'empty' in url else f"{url} 正文" * 10
+
+    def test_concurrent_and_cached(self) -> None:
+        results = [_result(f"https://a.com/{i}") for i in range(4)] + [_result('https://a.com/empty')]
+        start = time.time()
+        self.assertEqual(enrich_article_bodies(results, deadline=2.0), 4)
+        self.assertLess(time.time() - start, 0.6)
+        self.assertTrue(results[0].snippet.startswith('摘要\n\n【网页详情】\nhttps://a.com/0 正文'))
+        self.assertEqual(results[-1].snippet, '摘要')
+
+        # 第二次：成功的正文命中缓存，空正文不缓存、会重新抓取
+        again = [_result(f"https://a.com/{i}") for i in range(4)] + [_result('https://a.com/empty')]
+        self.calls.clear()
+        self.assertEqual(enrich_article_bodies(again), 4)
+        self.assertEqual(self.calls, ['https://a.com/empty'])
+
+    def test_deadline_returns_snippets(self) -> None:
+        self.delays['https://slow.com/1'] = 0.6
+        results = [_result('https://fast.com/1'), _result('https://slow.com/1')]
+        start = time.time()
+        self.assertEqual(enrich_article_bodies(results, deadline=0.3), 1)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(results[1].snippet, '摘要')
+
+        # 后台抓取完成后写入缓存
+        time.sleep(0.5)
+        self.assertIn('https://slow.com/1', self.cache)
+
+    def test_serpapi_enriches_organic_only(self) -> None:
+        reset_rate_limiter_registry()
+        self.addCleanup(reset_rate_limiter_registry)
+        get_rate_limiter_registry().register('search', max_concurrency=1, rate_per_minute=0)
+
+        provider = SerpAPISearchProvider(['key'])
+        response = SearchResponse(query='q', provider='SerpAPI', results=[
+            SearchResult(title='[相关问题] q', snippet='答', url='https://q.com/1', source='Google Related Questions'),
+            _result('https://a.com/organic'),
+        ])
+        with unittest.mock.patch.object(provider, '_do_search', return_value=response):
+            result = provider.search('q')
+        self.assertEqual(self.calls, ['https://a.com/organic'])
+        self.assertEqual(result.results[0].snippet, '答')
+        self.assertIn('【网页详情】', result.results[1].snippet)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+Baostock 会话管理单元测试
+===================================
+
+职责：
+1. 验证多次查询只登录一次
+2. 验证会话失效 / 查询异常后自动重新登录
+3. 验证多线程查询串行执行与批量接口
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetchError
+from data_provider.baostock_fetcher import BaostockFetcher
+from data_provider.baostock_session import BaostockSessionManager
+
+
+class _Result:
+    def __init__(self, error_code='0', error_msg='success', fields=None, rows=None):
+        self.error_code = error_code
+        self.error_msg = error_msg
+        self.fields = fields or []
+        self._rows = list(rows or [])
+        self._current = None
+
+    def next(self):
+        if not self._rows:
+            return False
+        self._current = self._rows.pop(0)
+        return True
+
+    def get_row_data(self):
+        return self._current
+
+
+class _FakeBaostock:
+    """模拟 baostock 模块：记录登录/登出次数，可模拟会话过期与并发冲突"""
+
+    def __init__(self):
+        self.logins = 0
+        self.logouts = 0
+        self.expire_next = False
+        self.raise_next = False
+        self.active = 0
+        self.max_active = 0
+
+    def login(self):
+        self.logins += 1
+        return _Result()
+
+    def logout(self):
+        self.logouts += 1
+        return _Result()
+
+    def query_history_k_data_plus(self, code, fields, start_date, end_date, frequency, adjustflag):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        time.sleep(0.005)
+        self.active -= 1
+        if self.raise_next:
+            self.raise_next = False
+            raise OSError("socket closed")
+        if self.expire_next:
+            self.expire_next = False
+            return _Result('10001001', '用户未登录')
+        if code == 'sz.000000':
+            return _Result(fields=fields.split(','))
+        rows = [
+            [f'2024-02-{day:02d}', '1.0', '1.0', '1.0', str(1.0 + day), '100', '100', '0.5']
+            for day in range(20, 30)
+        ]
+        return _Result(fields=fields.split(','), rows=rows)
+
+    def query_stock_basic(self, code=None):
+        return _Result(fields=['code', 'code_name'], rows=[[code or 'sh.600519', '贵州茅台']])
+
+
+class BaostockSessionManagerTestCase(unittest.TestCase):
+    """BaostockSessionManager 测试"""
+
+    def setUp(self) -> None:
+        self.bs = _FakeBaostock()
+        self.manager = BaostockSessionManager(lambda: self.bs)
+
+    def _query(self, code='sh.600519'):
+        return self.manager.query_rows(
+            'query_history_k_data_plus', code=code, fields="date,close",
+            start_date='2024-02-01', end_date='2024-03-01', frequency='d', adjustflag='2',
+        )
+
+    def test_login_once(self) -> None:
+        for _ in range(5):
+            fields, rows = self._query()
+            self.assertEqual(len(rows), 10)
+        self.assertEqual(self.bs.logins, 1)
+        self.assertEqual(self.bs.logouts, 0)
+
+    def test_relogin_on_expired_session(self) -> None:
+        self._query()
+        self.bs.expire_next = True
+        _, rows = self._query()
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(self.bs.logins, 2)
+
+    def test_relogin_on_exception(self) -> None:
+        self.bs.raise_next = True
+        _, rows = self._query()
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(self.bs.logins, 2)
+
+    def test_idle_session_relogin(self) -> None:
+        self.manager.session_ttl = 0.0
+        self._query()
+        time.sleep(0.01)
+        self._query()
+        self.assertEqual(self.bs.logins, 2)
+
+    def test_queries_serialized(self) -> None:
+        threads = [threading.Thread(target=self._query) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.bs.max_active, 1)
+        self.assertEqual(self.bs.logins, 1)
+
+    def test_close_logs_out(self) -> None:
+        self._query()
+        self.manager.close()
+        self.assertEqual(self.bs.logouts, 1)
+
+
+class BaostockFetcherSessionTestCase(unittest.TestCase):
+    """BaostockFetcher 会话复用测试"""
+
+    def setUp(self) -> None:
+        self.bs = _FakeBaostock()
+        self.fetcher = BaostockFetcher()
+        self.fetcher._session_manager = BaostockSessionManager(lambda: self.bs)
+
+    def test_daily_and_name_share_session(self) -> None:
+        for _ in range(3):
+            df = self.fetcher.get_daily_data('600519', end_date='2024-03-01', days=10)
+            self.assertFalse(df.empty)
+        self.assertEqual(self.fetcher.get_stock_name('600519'), '贵州茅台')
+        self.assertEqual(self.bs.logins, 1)
+
+    def test_no_data_raises(self) -> None:
+        with self.assertRaises(DataFetchError):
+            self.fetcher.get_daily_data('000000', end_date='2024-03-01', days=10)
+
+    def test_batch(self) -> None:
+        result = self.fetcher.get_daily_data_batch(
+            ['600519', '000001', '000000', 'AAPL'], end_date='2024-03-01', days=10
+        )
+        self.assertEqual(sorted(result), ['000001', '600519'])
+        self.assertIn('ma5', result['600519'].columns)
+        self.assertEqual(self.bs.logins, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
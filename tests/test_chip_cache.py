@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+筹码分布交易日缓存单元测试
+===================================
+
+职责：
+1. 验证期望交易日与新鲜度判断（盘中 / 收盘后 / 周末 / 节假日）
+2. 验证筹码缓存按 (代码, 交易日) 持久化与读取
+3. 验证 DataFetcherManager 命中缓存时不访问筹码接口，预热跳过已缓存代码
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetcherManager
+from data_provider.chip_cache import expected_chip_date, is_chip_fresh, load_cached_chips, save_chips
+from data_provider.realtime_types import ChipDistribution, get_chip_circuit_breaker
+from src.config import Config
+from src.storage import DatabaseManager
+
+
+class ChipFreshnessTestCase(unittest.TestCase):
+    """期望交易日与新鲜度测试"""
+
+    def test_expected_chip_date(self) -> None:
+        # 2024-03-01 为周五
+        self.assertEqual(expected_chip_date(datetime(2024, 3, 1, 10, 0)), date(2024, 2, 29))
+        self.assertEqual(expected_chip_date(datetime(2024, 3, 1, 16, 0)), date(2024, 3, 1))
+        self.assertEqual(expected_chip_date(datetime(2024, 3, 3, 12, 0)), date(2024, 3, 1))
+        self.assertEqual(expected_chip_date(datetime(2024, 3, 4, 9, 30)), date(2024, 3, 1))
+
+    def test_is_chip_fresh(self) -> None:
+        now = datetime(2024, 3, 4, 10, 0)
+        self.assertTrue(is_chip_fresh({'date': date(2024, 3, 1)}, now))
+        self.assertFalse(is_chip_fresh({'date': date(2024, 2, 29)}, now))
+        # 节假日：接口只能返回更早的日期，但已在收盘后拉取过
+        holiday = {'date': date(2024, 2, 29), 'fetched_at': datetime(2024, 3, 1, 16, 0)}
+        self.assertTrue(is_chip_fresh(holiday, now))
+        holiday['fetched_at'] = datetime(2024, 3, 1, 11, 0)
+        self.assertFalse(is_chip_fresh(holiday, now))
+
+
+class _ChipFetcher:
+    name = 'AkshareFetcher'
+    priority = 0
+
+    def __init__(self):
+        self.calls = []
+
+    def get_chip_distribution(self, stock_code):
+        self.calls.append(stock_code)
+        return ChipDistribution(
+            code=stock_code, date=expected_chip_date().strftime('%Y-%m-%d'),
+            profit_ratio=0.6, avg_cost=10.0, concentration_90=0.1,
+        )
+
+
+class ChipCacheTestCase(unittest.TestCase):
+    """筹码缓存持久化与数据源管理器接入测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_chip_cache.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+        for source_key in ('akshare_chip', 'tushare_chip', 'efinance_chip'):
+            get_chip_circuit_breaker().record_success(source_key)
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_round_trip(self) -> None:
+        expected = expected_chip_date()
+        older = ChipDistribution(code='600519', date=str(expected - timedelta(days=7)), profit_ratio=0.1)
+        latest = ChipDistribution(code='600519', date=f'{expected} 00:00:00', profit_ratio=0.8, avg_cost=1500.0)
+        self.assertEqual(save_chips([older, latest]), 2)
+        # 同一交易日重复写入覆盖
+        latest.avg_cost = 1600.0
+        self.assertEqual(save_chips([latest]), 1)
+
+        cached = load_cached_chips(['600519', '000001'])
+        self.assertEqual(list(cached), ['600519'])
+        self.assertEqual(cached['600519'].date, expected.strftime('%Y-%m-%d'))
+        self.assertEqual(cached['600519'].avg_cost, 1600.0)
+        self.assertEqual(cached['600519'].profit_ratio, 0.8)
+
+    def test_manager_uses_cache(self) -> None:
+        fetcher = _ChipFetcher()
+        manager = DataFetcherManager(fetchers=[fetcher])
+        config = SimpleNamespace(enable_chip_distribution=True)
+        with unittest.mock.patch('src.config.get_config', return_value=config):
+            first = manager.get_chip_distribution('600519')
+            second = manager.get_chip_distribution('600519')
+            self.assertEqual(fetcher.calls, ['600519'])
+            self.assertEqual(second.avg_cost, first.avg_cost)
+
+            warmed = manager.prewarm_chip_distributions(['600519', '000001', 'AAPL'])
+            self.assertEqual(warmed, 1)
+            self.assertEqual(fetcher.calls, ['600519', '000001'])
+            manager.get_chip_distribution('000001')
+            self.assertEqual(fetcher.calls, ['600519', '000001'])
+
+
+if __name__ == "__main__":
+    unittest.main()
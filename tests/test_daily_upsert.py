@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 日线批量写入单元测试
+===================================
+
+职责：
+1. 验证 save_daily_data 批量 UPSERT 的新增/更新计数
+2. 验证多股票单事务写入
+3. 验证不支持 ON CONFLICT 时的降级路径
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+from src.storage import DatabaseManager
+
+
+class DailyUpsertTestCase(unittest.TestCase):
+    """日线批量写入测试"""
+
+    def setUp(self) -> None:
+        """为每个用例初始化独立数据库"""
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._db_path = os.path.join(self._temp_dir.name, "test_daily_upsert.db")
+        os.environ["DATABASE_PATH"] = self._db_path
+
+        # 重置配置与数据库单例，确保使用临时库
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        """清理资源"""
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    @staticmethod
+    def _build_df(start: str, closes) -> pd.DataFrame:
+        """构造日线 DataFrame 快捷函数"""
+        n = len(closes)
+        return pd.DataFrame({
+            'date': pd.date_range(start, periods=n),
+            'open': closes,
+            'high': closes,
+            'low': closes,
+            'close': closes,
+            'volume': [1000.0] * n,
+            'amount': [1e6] * n,
+            'pct_chg': [np.nan] * n,
+            'ma5': closes,
+            'ma10': closes,
+            'ma20': closes,
+            'volume_ratio': [1.0] * n,
+        })
+
+    def _load(self, code: str):
+        return self.db.get_data_range(code, date(2024, 1, 1), date(2024, 12, 31))
+
+    def test_save_daily_data_returns_inserted_count(self) -> None:
+        """首次写入全部为新增"""
+        saved = self.db.save_daily_data(self._build_df('2024-01-01', [1.0, 2.0, 3.0]), '600519', 'TestData')
+        self.assertEqual(saved, 3)
+
+        rows = self._load('600519')
+        self.assertEqual([r.close for r in rows], [1.0, 2.0, 3.0])
+        # NaN 写入为 NULL
+        self.assertIsNone(rows[0].pct_chg)
+
+    def test_upsert_reports_inserted_and_updated(self) -> None:
+        """重叠日期更新，新日期插入"""
+        self.db.save_daily_data(self._build_df('2024-01-01', [1.0, 2.0, 3.0]), '600519', 'First')
+        inserted, updated = self.db.upsert_daily_data(
+            self._build_df('2024-01-03', [30.0, 40.0]), '600519', 'Second'
+        )
+        self.assertEqual((inserted, updated), (1, 1))
+
+        rows = self._load('600519')
+        self.assertEqual([r.close for r in rows], [1.0, 2.0, 30.0, 40.0])
+        self.assertEqual(rows[2].data_source, 'Second')
+        self.assertEqual(rows[0].data_source, 'First')
+
+    def test_duplicate_dates_keep_last(self) -> None:
+        """同一批次内重复日期保留最后一条"""
+        df = self._build_df('2024-01-01', [1.0, 2.0])
+        df.loc[1, 'date'] = df.loc[0, 'date']
+        inserted, updated = self.db.upsert_daily_data(df, '600519', 'TestData')
+        self.assertEqual((inserted, updated), (1, 0))
+        self.assertEqual(self._load('600519')[0].close, 2.0)
+
+    def test_batch_multiple_codes(self) -> None:
+        """多只股票单事务写入"""
+        self.db.save_daily_data(self._build_df('2024-01-01', [1.0]), '000001', 'TestData')
+        stats = self.db.save_daily_data_batch([
+            ('000001', self._build_df('2024-01-01', [5.0, 6.0]), 'Batch'),
+            ('600519', self._build_df('2024-01-01', [7.0]), 'Batch'),
+            ('300750', pd.DataFrame(), 'Batch'),
+        ])
+        self.assertEqual(stats, {'000001': (1, 1), '600519': (1, 0)})
+        self.assertEqual([r.close for r in self._load('000001')], [5.0, 6.0])
+        self.assertEqual([r.close for r in self._load('600519')], [7.0])
+
+    def test_fallback_upsert_path(self) -> None:
+        """不支持 ON CONFLICT 的数据库使用 INSERT + UPDATE 降级路径"""
+        self.db.save_daily_data(self._build_df('2024-01-01', [1.0, 2.0]), '600519', 'First')
+        records = self.db._build_daily_records(self._build_df('2024-01-02', [20.0, 30.0]), '600519', 'Fallback')
+        with self.db.get_session() as session:
+            existing = self.db._load_existing_daily_keys(session, {'600519': [r['date'] for r in records]})
+            self.db._execute_fallback_upsert(session, records, existing)
+            session.commit()
+
+        rows = self._load('600519')
+        self.assertEqual([r.close for r in rows], [1.0, 20.0, 30.0])
+        self.assertEqual(rows[1].data_source, 'Fallback')
+
+
+if __name__ == "__main__":
+    unittest.main()
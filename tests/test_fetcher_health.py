@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+数据源健康度与自适应排序单元测试
+===================================
+
+职责：
+1. 验证市场类型识别
+2. 验证偏慢/不稳定数据源降级、熔断数据源跳过
+3. 验证 DataFetcherManager 日线故障切换接入统计与熔断
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetchError, DataFetcherManager
+from data_provider.fetcher_health import (
+    FetcherHealthTracker,
+    classify_market,
+    get_fetcher_health_tracker,
+    reset_fetcher_health_tracker,
+)
+from data_provider.realtime_types import CircuitBreaker
+from tests.fetcher_stubs import StubFetcher
+
+
+class ClassifyMarketTestCase(unittest.TestCase):
+    """市场类型识别测试"""
+
+    def test_markets(self) -> None:
+        self.assertEqual(classify_market('600519'), 'cn')
+        self.assertEqual(classify_market('510300'), 'etf')
+        self.assertEqual(classify_market('00700'), 'hk')
+        self.assertEqual(classify_market('AAPL'), 'us')
+
+
+class FetcherHealthTrackerTestCase(unittest.TestCase):
+    """FetcherHealthTracker 测试"""
+
+    def setUp(self) -> None:
+        self.tracker = FetcherHealthTracker(circuit_breaker=CircuitBreaker(failure_threshold=3), min_samples=3)
+        self.fetchers = [StubFetcher('A', 0), StubFetcher('B', 1), StubFetcher('C', 2)]
+
+    def _names(self, fetchers):
+        return [f.name for f in fetchers]
+
+    def test_static_order_without_samples(self) -> None:
+        ordered, skipped = self.tracker.order(self.fetchers, 'cn')
+        self.assertEqual(self._names(ordered), ['A', 'B', 'C'])
+        self.assertEqual(skipped, [])
+
+    def test_slow_fetcher_demoted(self) -> None:
+        for _ in range(3):
+            self.tracker.record('A', 'cn', True, 20.0)
+        ordered, _ = self.tracker.order(self.fetchers, 'cn')
+        self.assertEqual(self._names(ordered), ['B', 'C', 'A'])
+        # 其他市场不受影响
+        ordered, _ = self.tracker.order(self.fetchers, 'hk')
+        self.assertEqual(self._names(ordered), ['A', 'B', 'C'])
+
+    def test_degraded_sorted_by_expected_cost(self) -> None:
+        for ok in (True, False, True):
+            self.tracker.record('A', 'cn', ok, 1.0)
+        for _ in range(3):
+            self.tracker.record('B', 'cn', True, 9.0)
+        ordered, _ = self.tracker.order(self.fetchers, 'cn')
+        # A: 1.0/0.67≈1.5s，B: 9s，均降级；A 期望耗时更低
+        self.assertEqual(self._names(ordered), ['C', 'A', 'B'])
+
+    def test_circuit_open_skipped(self) -> None:
+        for _ in range(3):
+            self.tracker.record('A', 'cn', False, 0.1, "boom")
+        ordered, skipped = self.tracker.order(self.fetchers, 'cn')
+        self.assertEqual(self._names(ordered), ['B', 'C'])
+        self.assertEqual(self._names(skipped), ['A'])
+        self.assertEqual(self.tracker.stats()['A:cn']['circuit'], CircuitBreaker.OPEN)
+
+
+class ManagerAdaptiveOrderTestCase(unittest.TestCase):
+    """DataFetcherManager 日线故障切换测试"""
+
+    def setUp(self) -> None:
+        reset_fetcher_health_tracker()
+
+    def tearDown(self) -> None:
+        reset_fetcher_health_tracker()
+
+    def test_failing_primary_skipped_after_threshold(self) -> None:
+        primary = StubFetcher('PrimaryFetcher', 0, fail=True)
+        backup = StubFetcher('BackupFetcher', 1)
+        manager = DataFetcherManager(fetchers=[primary, backup])
+
+        for _ in range(3):
+            _, source = manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+            self.assertEqual(source, 'BackupFetcher')
+        self.assertEqual(primary.calls, 3)
+
+        # 熔断后不再请求主数据源
+        manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+        self.assertEqual(primary.calls, 3)
+        stats = get_fetcher_health_tracker().stats()
+        self.assertEqual(stats['PrimaryFetcher:cn']['failures'], 3)
+        self.assertEqual(stats['BackupFetcher:cn']['success_rate'], 1.0)
+
+    def test_all_open_still_tries(self) -> None:
+        only = StubFetcher('OnlyFetcher', 0, fail=True)
+        manager = DataFetcherManager(fetchers=[only])
+        for _ in range(4):
+            with self.assertRaises(DataFetchError):
+                manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+        self.assertEqual(only.calls, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
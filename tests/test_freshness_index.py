@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 数据新鲜度索引单元测试
+===================================
+
+职责：
+1. 验证 get_latest_dates 分组查询
+2. 验证拉取窗口按缺失天数收缩
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+import pandas as pd
+
+from src.config import Config
+from src.storage import DatabaseManager
+from src.core.pipeline import StockAnalysisPipeline
+
+
+class FreshnessIndexTestCase(unittest.TestCase):
+    """新鲜度索引测试"""
+
+    def setUp(self) -> None:
+        """为每个用例初始化独立数据库"""
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._db_path = os.path.join(self._temp_dir.name, "test_freshness.db")
+        os.environ["DATABASE_PATH"] = self._db_path
+
+        # 重置配置与数据库单例，确保使用临时库
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        """清理资源"""
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def _save(self, code: str, last_date: date, days: int = 3) -> None:
+        df = pd.DataFrame({
+            'date': pd.date_range(end=last_date, periods=days),
+            'close': [10.0] * days,
+            'volume': [100.0] * days,
+        })
+        self.db.save_daily_data(df, code, 'TestData')
+
+    def test_get_latest_dates_grouped(self) -> None:
+        """一次查询返回每只股票的最新日期，无数据的代码不返回"""
+        today = date.today()
+        self._save('600519', today)
+        self._save('000001', today - timedelta(days=5))
+
+        latest = self.db.get_latest_dates(['600519', '000001', '300750', '600519'])
+        self.assertEqual(latest, {'600519': today, '000001': today - timedelta(days=5)})
+        self.assertEqual(self.db.get_latest_dates([]), {})
+
+    def test_has_today_data(self) -> None:
+        """存在性检查与新鲜度索引一致"""
+        self._save('600519', date.today())
+        self.assertTrue(self.db.has_today_data('600519'))
+        self.assertFalse(self.db.has_today_data('000001'))
+
+    def test_resolve_fetch_days(self) -> None:
+        """拉取窗口按缺失天数收缩，不超过默认值"""
+        today = date(2025, 3, 10)
+        resolve = StockAnalysisPipeline._resolve_fetch_days
+        lookback = StockAnalysisPipeline.INDICATOR_LOOKBACK_DAYS
+        default = StockAnalysisPipeline.DEFAULT_FETCH_DAYS
+
+        self.assertEqual(resolve(None, today), default)
+        self.assertEqual(resolve(today - timedelta(days=1), today), 1 + lookback)
+        self.assertEqual(resolve(today - timedelta(days=3), today), 3 + lookback)
+        self.assertEqual(resolve(today - timedelta(days=60), today), default)
+
+
+if __name__ == "__main__":
+    unittest.main()
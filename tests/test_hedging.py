@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+对冲请求单元测试
+===================================
+
+职责：
+1. 验证首选请求超过对冲等待时间后并行请求下一个，先返回者胜出
+2. 验证失败立即切换、无样本时不对冲
+3. 验证 DataFetcherManager 对冲模式下的日线获取
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetchError, DataFetcherManager
+from data_provider.fetcher_health import (
+    FetcherHealthTracker,
+    FetcherStats,
+    get_fetcher_health_tracker,
+    reset_fetcher_health_tracker,
+)
+from data_provider.hedging import hedged_call
+from data_provider.realtime_types import CircuitBreaker
+from tests.fetcher_stubs import StubFetcher
+
+
+def _sleep_then(seconds, value):
+    def _call():
+        time.sleep(seconds)
+        return value
+    return _call
+
+
+def _raise(message):
+    def _call():
+        raise RuntimeError(message)
+    return _call
+
+
+class HedgedCallTestCase(unittest.TestCase):
+    """hedged_call 测试"""
+
+    def test_fast_primary_no_hedge(self) -> None:
+        result = hedged_call(
+            [('A', lambda: 1), ('B', lambda: 2)],
+            is_valid=lambda v: v is not None,
+            hedge_delay=lambda label: 1.0,
+        )
+        self.assertEqual((result.label, result.value), ('A', 1))
+        self.assertFalse(result.hedged)
+        self.assertEqual(result.launched, ['A'])
+
+    def test_slow_primary_loses_to_hedge(self) -> None:
+        start = time.time()
+        result = hedged_call(
+            [('A', _sleep_then(1.0, 'slow')), ('B', _sleep_then(0.05, 'fast'))],
+            is_valid=lambda v: v is not None,
+            hedge_delay=lambda label: 0.1,
+        )
+        self.assertEqual((result.label, result.value), ('B', 'fast'))
+        self.assertTrue(result.hedged)
+        self.assertEqual(result.launched, ['A', 'B'])
+        self.assertLess(time.time() - start, 0.8)
+
+    def test_failure_fails_over_immediately(self) -> None:
+        start = time.time()
+        result = hedged_call(
+            [('A', _raise('boom')), ('B', lambda: None), ('C', lambda: 3)],
+            is_valid=lambda v: v is not None,
+            hedge_delay=lambda label: None,
+        )
+        self.assertEqual(result.label, 'C')
+        self.assertFalse(result.hedged)
+        self.assertEqual(len(result.errors), 2)
+        self.assertLess(time.time() - start, 0.5)
+
+    def test_no_delay_waits_for_primary(self) -> None:
+        result = hedged_call(
+            [('A', _sleep_then(0.2, 'a')), ('B', lambda: 'b')],
+            is_valid=lambda v: v is not None,
+            hedge_delay=lambda label: None,
+        )
+        self.assertEqual(result.label, 'A')
+        self.assertEqual(result.launched, ['A'])
+
+    def test_all_fail(self) -> None:
+        result = hedged_call(
+            [('A', _raise('x')), ('B', _raise('y'))],
+            is_valid=lambda v: v is not None,
+            hedge_delay=lambda label: 0.05,
+        )
+        self.assertFalse(result.success)
+        self.assertEqual(len(result.errors), 2)
+
+    def test_loser_still_reported(self) -> None:
+        reported = []
+        done = threading.Event()
+
+        def _on_result(label, ok, elapsed, error):
+            reported.append((label, ok))
+            if len(reported) == 2:
+                done.set()
+
+        hedged_call(
+            [('A', _sleep_then(0.3, 'slow')), ('B', lambda: 'fast')],
+            is_valid=lambda v: v is not None,
+            hedge_delay=lambda label: 0.05,
+            on_result=_on_result,
+        )
+        self.assertTrue(done.wait(2.0))
+        self.assertEqual(sorted(reported), [('A', True), ('B', True)])
+
+
+class HedgeDelayTestCase(unittest.TestCase):
+    """对冲等待时间测试"""
+
+    def test_percentile(self) -> None:
+        stats = FetcherStats(window=20)
+        for elapsed in range(1, 11):
+            stats.record(True, float(elapsed))
+        stats.record(False, 100.0)
+        self.assertEqual(stats.latency_percentile(90), 9.0)
+        self.assertEqual(stats.latency_percentile(50), 5.0)
+
+    def test_no_delay_without_samples(self) -> None:
+        tracker = FetcherHealthTracker(circuit_breaker=CircuitBreaker(), min_samples=3)
+        tracker.record('A', 'cn', True, 0.5)
+        self.assertIsNone(tracker.hedge_delay('A', 'cn', 90))
+        for _ in range(2):
+            tracker.record('A', 'cn', True, 0.5)
+        self.assertEqual(tracker.hedge_delay('A', 'cn', 90, min_delay=1.0), 1.0)
+        self.assertEqual(tracker.hedge_delay('A', 'cn', 90), 0.5)
+
+
+class ManagerHedgedDailyTestCase(unittest.TestCase):
+    """DataFetcherManager 对冲模式测试"""
+
+    def setUp(self) -> None:
+        reset_fetcher_health_tracker()
+        patcher = mock.patch.object(DataFetcherManager, '_hedge_percentile', return_value=90.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(reset_fetcher_health_tracker)
+
+    def test_slow_primary_hedged(self) -> None:
+        primary = StubFetcher('PrimaryFetcher', 0, delay=1.5)
+        backup = StubFetcher('BackupFetcher', 1)
+        tracker = get_fetcher_health_tracker()
+        # 主数据源历史耗时约 0.2s，本次明显变慢
+        for _ in range(3):
+            tracker.record('PrimaryFetcher', 'cn', True, 0.2)
+
+        manager = DataFetcherManager(fetchers=[primary, backup])
+        start = time.time()
+        df, source = manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+        self.assertEqual(source, 'BackupFetcher')
+        self.assertFalse(df.empty)
+        self.assertLess(time.time() - start, 1.4)
+
+    def test_failover_and_all_fail(self) -> None:
+        manager = DataFetcherManager(fetchers=[
+            StubFetcher('PrimaryFetcher', 0, fail=True),
+            StubFetcher('BackupFetcher', 1),
+        ])
+        _, source = manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+        self.assertEqual(source, 'BackupFetcher')
+
+        manager = DataFetcherManager(fetchers=[
+            StubFetcher('XFetcher', 0, fail=True),
+            StubFetcher('YFetcher', 1, fail=True),
+        ])
+        with self.assertRaises(DataFetchError):
+            manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+A股自选股智能分析系统 - 日线增量拉取单元测试
+===================================
+
+职责：
+1. 验证增量模式只请求缺口日期
+2. 验证新行指标与全量计算一致
+3. 验证历史不足时回退全量拉取
+4. 验证流式指标状态的持久化与逐根推进
+5. 验证分析流水线的趋势阶段读取库中日线与流式指标状态
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+from src.storage import DatabaseManager
+from data_provider.base import BaseFetcher, DataFetcherManager
+from data_provider.indicators import IndicatorState
+from src.core.pipeline import StockAnalysisPipeline
+from src.stock_analyzer import StockTrendAnalyzer
+
+
+class _FakeFetcher(BaseFetcher):
+    """基于内存行情的假数据源，记录每次请求的日期范围"""
+
+    name = "FakeFetcher"
+    priority = 0
+
+    def __init__(self, bars: pd.DataFrame):
+        self.bars = bars
+        self.requests = []
+
+    def _fetch_raw_data(self, stock_code, start_date, end_date):
+        self.requests.append((start_date, end_date))
+        mask = (self.bars['date'] >= start_date) & (self.bars['date'] <= end_date)
+        return self.bars[mask].copy()
+
+    def _normalize_data(self, df, stock_code):
+        return df
+
+
+class _PctChangeFetcher(_FakeFetcher):
+    """与 yfinance/pytdx 标准化口径一致：涨跌幅由 close.pct_change().fillna(0) 计算"""
+
+    name = "PctChangeFetcher"
+
+    def _normalize_data(self, df, stock_code):
+        df = df.copy()
+        df['pct_chg'] = (df['close'].pct_change() * 100).fillna(0).round(2)
+        return df
+
+
+class _LaggingFetcher(_FakeFetcher):
+    """尚未发布最新 K 线的数据源：只返回 cutoff 之前的数据"""
+
+    name = "LaggingFetcher"
+
+    def __init__(self, bars: pd.DataFrame, cutoff: str):
+        super().__init__(bars[bars['date'] <= cutoff])
+
+
+class IncrementalFetchTestCase(unittest.TestCase):
+    """增量拉取测试"""
+
+    def setUp(self) -> None:
+        """为每个用例初始化独立数据库"""
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self._db_path = os.path.join(self._temp_dir.name, "test_incremental.db")
+        os.environ["DATABASE_PATH"] = self._db_path
+
+        # 重置配置与数据库单例，确保使用临时库
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+        dates = pd.bdate_range('2024-01-01', periods=40)
+        rng = np.random.default_rng(7)
+        self.bars = pd.DataFrame({
+            'date': dates.strftime('%Y-%m-%d'),
+            'open': rng.uniform(10, 11, len(dates)),
+            'high': rng.uniform(11, 12, len(dates)),
+            'low': rng.uniform(9, 10, len(dates)),
+            'close': rng.uniform(10, 11, len(dates)),
+            'volume': rng.uniform(1e5, 2e5, len(dates)),
+            'amount': rng.uniform(1e6, 2e6, len(dates)),
+            'pct_chg': rng.uniform(-1, 1, len(dates)),
+        })
+        self.end_date = self.bars['date'].iloc[-1]
+
+    def tearDown(self) -> None:
+        """清理资源"""
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def _store_until(self, fetcher: BaseFetcher, last_index: int) -> None:
+        df = fetcher.get_daily_data('600519', start_date=self.bars['date'].iloc[0],
+                                    end_date=self.bars['date'].iloc[last_index])
+        self.db.save_daily_data(df, '600519', 'Seed')
+
+    def test_incremental_requests_only_gap(self) -> None:
+        fetcher = _FakeFetcher(self.bars)
+        self._store_until(fetcher, 36)
+        fetcher.requests.clear()
+
+        manager = DataFetcherManager(fetchers=[fetcher])
+        df, source = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+
+        self.assertEqual(source, "FakeFetcher")
+        self.assertEqual(df.attrs['incremental_new_rows'], 3)
+        # 只请求已存储最后日期之后的缺口
+        self.assertEqual(len(fetcher.requests), 1)
+        self.assertGreater(fetcher.requests[0][0], self.bars['date'].iloc[36])
+
+        # 新行指标与全量计算一致
+        full = fetcher.get_daily_data('600519', start_date=self.bars['date'].iloc[0], end_date=self.end_date)
+        new_rows = df.tail(3).reset_index(drop=True)
+        expected = full.tail(3).reset_index(drop=True)
+        for col in ['close', 'ma5', 'ma10', 'ma20', 'volume_ratio']:
+            np.testing.assert_allclose(new_rows[col].astype(float), expected[col].astype(float), atol=0.01)
+
+    def test_first_gap_bar_pct_chg_uses_stored_close(self) -> None:
+        fetcher = _PctChangeFetcher(self.bars)
+        self._store_until(_FakeFetcher(self.bars), 36)
+
+        manager = DataFetcherManager(fetchers=[fetcher])
+        df, _ = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+
+        closes = self.bars['close'].to_numpy()
+        expected = np.round((closes[37:40] / closes[36:39] - 1) * 100, 2)
+        np.testing.assert_allclose(df['pct_chg'].tail(3).to_numpy(), expected, atol=0.01)
+        self.assertNotEqual(df['pct_chg'].iloc[-3], 0.0)
+
+    def test_empty_gap_falls_through_to_next_fetcher(self) -> None:
+        lagging = _LaggingFetcher(self.bars, self.bars['date'].iloc[36])
+        lagging.priority = 0
+        current = _FakeFetcher(self.bars)
+        current.priority = 1
+        self._store_until(current, 36)
+        current.requests.clear()
+
+        manager = DataFetcherManager(fetchers=[lagging, current])
+        df, source = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+
+        self.assertEqual(len(lagging.requests), 1)
+        self.assertEqual(source, "FakeFetcher")
+        self.assertEqual(df.attrs['incremental_new_rows'], 3)
+
+    def test_empty_gap_from_all_fetchers_returns_stored(self) -> None:
+        lagging = _LaggingFetcher(self.bars, self.bars['date'].iloc[36])
+        self._store_until(_FakeFetcher(self.bars), 36)
+
+        manager = DataFetcherManager(fetchers=[lagging])
+        df, source = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+
+        self.assertEqual(source, "Database")
+        self.assertEqual(df.attrs['incremental_new_rows'], 0)
+
+    def test_falls_back_to_full_when_history_short(self) -> None:
+        fetcher = _FakeFetcher(self.bars)
+        manager = DataFetcherManager(fetchers=[fetcher])
+        df, _ = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+
+        self.assertNotIn('incremental_new_rows', df.attrs)
+        self.assertEqual(len(fetcher.requests), 1)
+        self.assertGreater(len(df), 20)
+
+    def test_up_to_date_skips_request(self) -> None:
+        fetcher = _FakeFetcher(self.bars)
+        self._store_until(fetcher, 39)
+        fetcher.requests.clear()
+
+        manager = DataFetcherManager(fetchers=[fetcher])
+        # 结束日期为最后交易日后的周六：缺口内没有工作日
+        saturday = (pd.Timestamp(self.end_date) + pd.offsets.Week(weekday=5)).strftime('%Y-%m-%d')
+        df, source = manager.get_daily_data('600519', end_date=saturday, days=30, incremental=True)
+
+        self.assertEqual(source, "Database")
+        self.assertEqual(df.attrs['incremental_new_rows'], 0)
+        self.assertEqual(fetcher.requests, [])
+
+    def test_incremental_advances_stored_state(self) -> None:
+        fetcher = _FakeFetcher(self.bars)
+        self._store_until(fetcher, 36)
+        seed = fetcher.get_daily_data('600519', start_date=self.bars['date'].iloc[0],
+                                      end_date=self.bars['date'].iloc[36])
+        self.db.save_indicator_states({'600519': IndicatorState.from_frame(seed).to_dict()})
+
+        manager = DataFetcherManager(fetchers=[fetcher])
+        df, _ = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+
+        state = df.attrs['indicator_state']
+        self.assertEqual(state.last_date, self.end_date)
+        self.assertEqual(state.bars, 40)
+        full = fetcher.get_daily_data('600519', start_date=self.bars['date'].iloc[0], end_date=self.end_date)
+        for col in ['ma5', 'ma10', 'ma20', 'volume_ratio']:
+            np.testing.assert_allclose(
+                df[col].tail(3).astype(float).to_numpy(), full[col].tail(3).astype(float).to_numpy(), atol=0.01
+            )
+
+    def test_stale_state_ignored(self) -> None:
+        fetcher = _FakeFetcher(self.bars)
+        self._store_until(fetcher, 36)
+        seed = fetcher.get_daily_data('600519', start_date=self.bars['date'].iloc[0],
+                                      end_date=self.bars['date'].iloc[30])
+        self.db.save_indicator_states({'600519': IndicatorState.from_frame(seed).to_dict()})
+
+        manager = DataFetcherManager(fetchers=[fetcher])
+        df, _ = manager.get_daily_data('600519', end_date=self.end_date, days=30, incremental=True)
+        self.assertNotIn('indicator_state', df.attrs)
+        self.assertEqual(df.attrs['incremental_new_rows'], 3)
+
+    def test_indicator_state_round_trip(self) -> None:
+        state = IndicatorState.from_frame(self.bars)
+        self.assertEqual(self.db.save_indicator_states({'600519': state.to_dict()}), 1)
+        state.update(11.0, 1.5e5, '2024-03-01')
+        self.db.save_indicator_states({'600519': state.to_dict()})
+
+        loaded = IndicatorState.from_dict(self.db.get_indicator_states(['600519', '000001'])['600519'])
+        self.assertEqual(loaded.last_date, '2024-03-01')
+        self.assertEqual(loaded.to_dict(), state.to_dict())
+
+    def test_pipeline_trend_stage_uses_stored_bars_and_state(self) -> None:
+        recent = self.bars.assign(
+            date=pd.bdate_range(end=date.today(), periods=len(self.bars)).strftime('%Y-%m-%d')
+        )
+        fetcher = _FakeFetcher(recent)
+        df = fetcher.get_daily_data('600519', start_date=recent['date'].iloc[0], end_date=recent['date'].iloc[-1])
+        self.db.save_daily_data(df, '600519', 'Seed')
+        self.db.save_indicator_states({'600519': IndicatorState.from_frame(df).to_dict()})
+
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.db = self.db
+        pipeline.fetcher_manager = DataFetcherManager(fetchers=[fetcher])
+        pipeline.trend_analyzer = StockTrendAnalyzer()
+        with mock.patch.object(
+            pipeline.trend_analyzer, 'analyze', wraps=pipeline.trend_analyzer.analyze
+        ) as analyze:
+            result = pipeline._stage_trend_analysis('600519')
+
+        self.assertIsNotNone(analyze.call_args.kwargs['state'])
+        expected = StockTrendAnalyzer().analyze(df, '600519')
+        self.assertEqual(result.signal_score, expected.signal_score)
+        self.assertAlmostEqual(result.ma20, expected.ma20, places=6)
+
+    def _recent_bars(self, periods: int) -> pd.DataFrame:
+        rng = np.random.default_rng(11)
+        dates = pd.bdate_range(end=date.today(), periods=periods)
+        return pd.DataFrame({
+            'date': dates.strftime('%Y-%m-%d'),
+            'open': rng.uniform(10, 11, periods),
+            'high': rng.uniform(11, 12, periods),
+            'low': rng.uniform(9, 10, periods),
+            'close': np.linspace(10, 20, periods) + rng.uniform(-0.5, 0.5, periods),
+            'volume': rng.uniform(1e5, 2e5, periods),
+            'amount': rng.uniform(1e6, 2e6, periods),
+            'pct_chg': rng.uniform(-1, 1, periods),
+        })
+
+    def _trend_pipeline(self, fetcher: BaseFetcher) -> StockAnalysisPipeline:
+        pipeline = StockAnalysisPipeline.__new__(StockAnalysisPipeline)
+        pipeline.db = self.db
+        pipeline.fetcher_manager = DataFetcherManager(fetchers=[fetcher])
+        pipeline.trend_analyzer = StockTrendAnalyzer()
+        pipeline._latest_dates = None
+        return pipeline
+
+    def test_pipeline_state_built_from_stored_window_matches_full_history(self) -> None:
+        recent = self._recent_bars(100)
+        fetcher = _FakeFetcher(recent)
+        stored = fetcher.get_daily_data('600519', start_date=recent['date'].iloc[0], end_date=recent['date'].iloc[-3])
+        self.db.save_daily_data(stored, '600519', 'Seed')
+
+        pipeline = self._trend_pipeline(fetcher)
+        success, _ = pipeline.fetch_and_save_stock_data('600519')
+        self.assertTrue(success)
+        state = DataFetcherManager.load_indicator_state('600519')
+        self.assertEqual(state.bars, 100)
+
+        with mock.patch.object(
+            pipeline.trend_analyzer, 'analyze', wraps=pipeline.trend_analyzer.analyze
+        ) as analyze:
+            result = pipeline._stage_trend_analysis('600519')
+
+        self.assertIsNotNone(analyze.call_args.kwargs['state'])
+        full = fetcher.get_daily_data('600519', start_date=recent['date'].iloc[0], end_date=recent['date'].iloc[-1])
+        expected = StockTrendAnalyzer().analyze(full, '600519')
+        self.assertAlmostEqual(result.ma60, expected.ma60, places=6)
+        self.assertAlmostEqual(result.macd_dif, expected.macd_dif, places=6)
+        self.assertAlmostEqual(result.macd_dea, expected.macd_dea, places=6)
+
+    def test_pipeline_trend_stage_ignores_state_shorter_than_stored_window(self) -> None:
+        recent = self._recent_bars(100)
+        fetcher = _FakeFetcher(recent)
+        full = fetcher.get_daily_data('600519', start_date=recent['date'].iloc[0], end_date=recent['date'].iloc[-1])
+        self.db.save_daily_data(full, '600519', 'Seed')
+        self.db.save_indicator_states({'600519': IndicatorState.from_frame(full.tail(30)).to_dict()})
+
+        pipeline = self._trend_pipeline(fetcher)
+        with mock.patch.object(
+            pipeline.trend_analyzer, 'analyze', wraps=pipeline.trend_analyzer.analyze
+        ) as analyze:
+            result = pipeline._stage_trend_analysis('600519')
+
+        self.assertIsNone(analyze.call_args.kwargs['state'])
+        self.assertAlmostEqual(result.ma60, StockTrendAnalyzer().analyze(full, '600519').ma60, places=6)
+
+    def test_context_and_trend_share_one_bars_read(self) -> None:
+        recent = self._recent_bars(100)
+        fetcher = _FakeFetcher(recent)
+        full = fetcher.get_daily_data('600519', start_date=recent['date'].iloc[0], end_date=recent['date'].iloc[-1])
+        self.db.save_daily_data(full, '600519', 'Seed')
+
+        pipeline = self._trend_pipeline(fetcher)
+        bars = pipeline._stage_daily_bars('600519')
+        self.assertEqual(pipeline.db.get_analysis_context('600519', history=bars),
+                         pipeline.db.get_analysis_context('600519'))
+        with mock.patch.object(self.db, 'get_daily_history', side_effect=AssertionError('不应再次读取')):
+            result = pipeline._stage_trend_analysis('600519', bars)
+        self.assertAlmostEqual(result.ma60, StockTrendAnalyzer().analyze(full, '600519').ma60, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+向量化技术指标引擎单元测试
+===================================
+
+职责：
+1. 验证数据源口径 / 趋势分析口径与原 pandas 实现结果一致
+2. 验证面板模式与逐只计算结果一致
+3. 验证流式状态逐根推进与全量计算一致
+4. 验证 BaseFetcher / StockTrendAnalyzer 接入后输出列不变
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.indicators import (
+    IndicatorState,
+    attach_indicators,
+    compute_price_indicators,
+    compute_trend_indicators,
+    ema,
+    rolling_mean,
+    stack_panel,
+)
+from src.stock_analyzer import StockTrendAnalyzer
+
+
+def _random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 20 + np.cumsum(rng.normal(0, 0.3, n))
+    volume = rng.uniform(1e5, 5e5, n)
+    return close, volume
+
+
+def _reference_price(close, volume):
+    """原 BaseFetcher._calculate_indicators 的 pandas 实现"""
+    df = pd.DataFrame({'close': close, 'volume': volume})
+    out = {}
+    for window in (5, 10, 20):
+        out[f'ma{window}'] = df['close'].rolling(window=window, min_periods=1).mean().round(2)
+    avg_volume_5 = df['volume'].rolling(window=5, min_periods=1).mean()
+    out['volume_ratio'] = (df['volume'] / avg_volume_5.shift(1)).fillna(1.0).round(2)
+    return out
+
+
+def _reference_trend(close):
+    """原 StockTrendAnalyzer._calculate_mas/_calculate_macd/_calculate_rsi 的 pandas 实现"""
+    s = pd.Series(close)
+    out = {f'MA{w}': s.rolling(window=w).mean() for w in (5, 10, 20, 60)}
+    if len(s) < 60:
+        out['MA60'] = out['MA20']
+    dif = s.ewm(span=12, adjust=False).mean() - s.ewm(span=26, adjust=False).mean()
+    dea = dif.ewm(span=9, adjust=False).mean()
+    out.update(MACD_DIF=dif, MACD_DEA=dea, MACD_BAR=(dif - dea) * 2)
+    for period in (6, 12, 24):
+        delta = s.diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+        rs = gain.rolling(window=period).mean() / loss.rolling(window=period).mean()
+        out[f'RSI_{period}'] = (100 - (100 / (1 + rs))).fillna(50)
+    return out
+
+
+class IndicatorEngineTestCase(unittest.TestCase):
+    """指标计算结果与 pandas 实现对比"""
+
+    def assertSeriesClose(self, actual, expected, atol=1e-8) -> None:
+        np.testing.assert_allclose(actual, np.asarray(expected, dtype=float), atol=atol, equal_nan=True)
+
+    def test_price_indicators_match_pandas(self) -> None:
+        for n in (1, 3, 30, 250):
+            close, volume = _random_walk(n, seed=n)
+            volume[min(2, n - 1)] = 0.0
+            actual = compute_price_indicators(close, volume)
+            for key, expected in _reference_price(close, volume).items():
+                # 两位小数舍入，允许临界值差一个最小单位
+                self.assertSeriesClose(actual[key], expected, atol=0.0100001)
+
+    def test_trend_indicators_match_pandas(self) -> None:
+        for n in (20, 59, 60, 250):
+            close, _ = _random_walk(n, seed=n)
+            actual = compute_trend_indicators(close)
+            for key, expected in _reference_trend(close).items():
+                self.assertSeriesClose(actual[key], expected)
+
+    def test_flat_prices_rsi_neutral(self) -> None:
+        close = np.full(40, 10.0)
+        rsi = compute_trend_indicators(close)['RSI_6']
+        self.assertTrue(np.all(rsi == 50.0))
+        rising = np.arange(40, dtype=float)
+        self.assertEqual(compute_trend_indicators(rising)['RSI_6'][-1], 100.0)
+
+    def test_panel_matches_single(self) -> None:
+        series = [_random_walk(n, seed=n)[0] for n in (25, 80, 120)]
+        panel = stack_panel(series)
+        self.assertEqual(panel.shape, (3, 120))
+        self.assertTrue(np.isnan(panel[0, 0]))
+        result = compute_trend_indicators(panel)
+        for row, close in enumerate(series):
+            single = compute_trend_indicators(close)
+            for key, values in single.items():
+                self.assertSeriesClose(result[key][row, -len(close):], values)
+            self.assertTrue(np.isnan(result['RSI_6'][row, :120 - len(close)]).all())
+
+    def test_price_panel_without_padding(self) -> None:
+        walks = [_random_walk(30, seed=seed) for seed in range(3)]
+        result = compute_price_indicators(
+            stack_panel(w[0] for w in walks), stack_panel(w[1] for w in walks)
+        )
+        for row, (close, volume) in enumerate(walks):
+            for key, values in compute_price_indicators(close, volume).items():
+                self.assertSeriesClose(result[key][row], values)
+
+    def test_stack_panel_truncates(self) -> None:
+        panel = stack_panel([[1, 2, 3, 4], [5]], length=2)
+        np.testing.assert_array_equal(panel, [[3, 4], [np.nan, 5]])
+
+    def test_primitives(self) -> None:
+        values = np.array([np.nan, 1.0, 2.0, 3.0, 4.0])
+        self.assertSeriesClose(rolling_mean(values, 2), pd.Series(values).rolling(2).mean())
+        self.assertSeriesClose(ema(values, 3), pd.Series(values).ewm(span=3, adjust=False).mean())
+
+    def test_attach_replaces_stale_columns(self) -> None:
+        df = pd.DataFrame({'close': [1.0, 2.0], 'ma5': [0.0, 0.0]})
+        out = attach_indicators(df, {'ma5': np.array([1.0, 1.5])})
+        self.assertEqual(list(out.columns), ['close', 'ma5'])
+        self.assertEqual(out['ma5'].tolist(), [1.0, 1.5])
+        self.assertEqual(df['ma5'].tolist(), [0.0, 0.0])
+
+
+class IndicatorStateTestCase(unittest.TestCase):
+    """流式指标状态测试"""
+
+    def test_streaming_matches_batch(self) -> None:
+        close, volume = _random_walk(120, seed=3)
+        dates = pd.bdate_range(end='2024-03-01', periods=120)
+        state = IndicatorState.from_frame(pd.DataFrame({'date': dates[:80], 'close': close[:80], 'volume': volume[:80]}))
+        for i in range(80, 120):
+            values = state.update(close[i], volume[i], dates[i])
+            expected = dict(compute_price_indicators(close[:i + 1], volume[:i + 1]))
+            expected.update(compute_trend_indicators(close[:i + 1]))
+            for key, series in expected.items():
+                self.assertAlmostEqual(values[key], series[-1], places=8, msg=key)
+        self.assertEqual(state.bars, 120)
+        self.assertEqual(len(state.closes), 60)
+        self.assertTrue(state.matches('2024-03-01'))
+
+    def test_short_history(self) -> None:
+        state = IndicatorState()
+        values = state.update(10.0, 100.0)
+        self.assertEqual(values['volume_ratio'], 1.0)
+        self.assertEqual(values['RSI_6'], 50.0)
+        self.assertTrue(np.isnan(values['MA5']))
+        self.assertEqual(values['ma5'], 10.0)
+
+    def test_dict_round_trip(self) -> None:
+        close, volume = _random_walk(30)
+        state = IndicatorState.from_frame(pd.DataFrame({
+            'date': pd.bdate_range(end='2024-03-01', periods=30), 'close': close, 'volume': volume,
+        }))
+        restored = IndicatorState.from_dict(state.to_dict())
+        self.assertEqual(restored.update(20.0, 2e5), state.copy().update(20.0, 2e5))
+
+
+class IndicatorCallSitesTestCase(unittest.TestCase):
+    """BaseFetcher / StockTrendAnalyzer 接入测试"""
+
+    def test_trend_analyzer_outputs(self) -> None:
+        close, volume = _random_walk(120)
+        df = pd.DataFrame({
+            'date': pd.bdate_range(end='2024-03-01', periods=120),
+            'open': close, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+            'volume': volume,
+        })
+        result = StockTrendAnalyzer().analyze(df, '600519')
+        expected = _reference_trend(close)
+        self.assertAlmostEqual(result.ma60, expected['MA60'].iloc[-1])
+        self.assertAlmostEqual(result.macd_dif, expected['MACD_DIF'].iloc[-1])
+        self.assertAlmostEqual(result.rsi_12, expected['RSI_12'].iloc[-1])
+
+    def test_trend_analyzer_consumes_state(self) -> None:
+        close, volume = _random_walk(120, seed=5)
+        df = pd.DataFrame({
+            'date': pd.bdate_range(end='2024-03-01', periods=120),
+            'open': close, 'high': close + 0.2, 'low': close - 0.2, 'close': close,
+            'volume': volume,
+        })
+        analyzer = StockTrendAnalyzer()
+        full = analyzer.analyze(df, '600519')
+        state = IndicatorState.from_frame(df)
+        recent = analyzer.analyze(df.tail(20), '600519', state=state)
+        self.assertEqual(recent.trend_status, full.trend_status)
+        self.assertEqual(recent.macd_status, full.macd_status)
+        self.assertAlmostEqual(recent.macd_dea, full.macd_dea)
+        self.assertAlmostEqual(recent.rsi_24, full.rsi_24)
+        self.assertEqual(recent.signal_score, full.signal_score)
+
+        # 状态与行情日期不一致时回退全量计算（20 行不足以计算 MACD）
+        stale = IndicatorState.from_frame(df.iloc[:-1])
+        fallback = analyzer.analyze(df.tail(20), '600519', state=stale)
+        self.assertEqual(fallback.macd_signal, "数据不足")
+
+
+if __name__ == "__main__":
+    unittest.main()
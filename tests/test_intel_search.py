@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+多维度情报并发搜索单元测试
+===================================
+
+职责：
+1. 验证各维度并发执行、结果按维度顺序返回
+2. 验证同一搜索引擎 / API Key 通道内同时只有一个在途请求
+3. 验证 max_searches 限制与无可用搜索引擎时的返回
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.rate_limiter import get_rate_limiter_registry, reset_rate_limiter_registry
+from src.search_cache import SearchCache
+from src.search_service import BaseSearchProvider, SearchResponse, SearchResult, SearchService
+
+
+class _SlowProvider(BaseSearchProvider):
+    """固定耗时的假搜索引擎，记录每个 Key 的峰值在途请求数"""
+
+    def __init__(self, name, keys, delay=0.2):
+        super().__init__(keys, name)
+        self.delay = delay
+        self.queries = []
+        self._in_flight = {}
+        self.peak = {}
+        self._lock = threading.Lock()
+
+    def _do_search(self, query, api_key, max_results, days=7):
+        with self._lock:
+            self.queries.append(query)
+            self._in_flight[api_key] = self._in_flight.get(api_key, 0) + 1
+            self.peak[api_key] = max(self.peak.get(api_key, 0), self._in_flight[api_key])
+        time.sleep(self.delay)
+        with self._lock:
+            self._in_flight[api_key] -= 1
+        return SearchResponse(
+            query=query, provider=self.name, success=True,
+            results=[SearchResult(title=query, snippet='', url='', source=self.name)],
+        )
+
+
+class ComprehensiveIntelTestCase(unittest.TestCase):
+    """search_comprehensive_intel 并发测试"""
+
+    def setUp(self) -> None:
+        reset_rate_limiter_registry()
+        self.addCleanup(reset_rate_limiter_registry)
+        # 每个 Key 同时一个在途请求，不限速率（只验证并发结构）
+        get_rate_limiter_registry().register('search', max_concurrency=1, rate_per_minute=0)
+        self.service = SearchService(cache=SearchCache(use_db=False))
+        self.bocha = _SlowProvider('Bocha', ['k1', 'k2'])
+        self.tavily = _SlowProvider('Tavily', ['t1'])
+        self.service._providers = [self.bocha, self.tavily]
+
+    def test_dimensions_run_concurrently(self) -> None:
+        start = time.time()
+        results = self.service.search_comprehensive_intel('600519', '贵州茅台', max_searches=5)
+        elapsed = time.time() - start
+
+        self.assertEqual(
+            list(results), ['latest_news', 'market_analysis', 'risk_check', 'earnings', 'industry']
+        )
+        self.assertTrue(all(r.success for r in results.values()))
+        # Bocha 3 个维度分到 2 个 Key 通道，Tavily 2 个维度 1 个通道：约 2 × 0.2s（串行为 5 × 0.7s）
+        self.assertLess(elapsed, 0.7)
+        self.assertEqual(len(self.bocha.queries), 3)
+        self.assertEqual(len(self.tavily.queries), 2)
+        self.assertTrue(all(count == 1 for count in self.bocha.peak.values()))
+        self.assertEqual(self.tavily.peak, {'t1': 1})
+
+    def test_max_searches(self) -> None:
+        results = self.service.search_comprehensive_intel('AAPL', 'Apple', max_searches=2)
+        self.assertEqual(list(results), ['latest_news', 'market_analysis'])
+        self.assertEqual(results['market_analysis'].provider, 'Tavily')
+
+    def test_no_provider(self) -> None:
+        self.assertEqual(SearchService().search_comprehensive_intel('600519', '贵州茅台'), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+共享 DataFetcherManager 与延迟构造单元测试
+===================================
+
+职责：
+1. 验证默认数据源只注册不构造，按优先级排序；hasattr 探测可选能力不触发构造
+2. 验证请求到达时才构造对应数据源，且只构造一次
+3. 验证进程级共享管理器
+"""
+
+import os
+import sys
+import importlib
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import (
+    DataFetcherManager,
+    LazyFetcher,
+    OPTIONAL_CAPABILITIES,
+    get_data_fetcher_manager,
+    reset_data_fetcher_manager,
+)
+from data_provider.fetcher_health import reset_fetcher_health_tracker
+from tests.fetcher_stubs import StubFetcher
+
+
+def _lazy(name, priority, fail=False, counter=None):
+    def _factory():
+        if counter is not None:
+            counter.append(name)
+        time.sleep(0.01)
+        return StubFetcher(name, priority, fail=fail)
+    return LazyFetcher(name, _factory, priority)
+
+
+class LazyFetcherTestCase(unittest.TestCase):
+    """LazyFetcher 与默认数据源注册测试"""
+
+    def setUp(self) -> None:
+        reset_fetcher_health_tracker()
+        self.addCleanup(reset_fetcher_health_tracker)
+
+    def test_default_fetchers_not_constructed(self) -> None:
+        manager = DataFetcherManager()
+        self.assertEqual(len(manager.available_fetchers), 6)
+        self.assertTrue(all(not f.initialized for f in manager._fetchers))
+        priorities = [f.priority for f in manager._fetchers]
+        self.assertEqual(priorities, sorted(priorities))
+
+    def test_only_reached_fetchers_constructed(self) -> None:
+        constructed = []
+        manager = DataFetcherManager(fetchers=[
+            _lazy('AFetcher', 0, fail=True, counter=constructed),
+            _lazy('BFetcher', 1, counter=constructed),
+            _lazy('CFetcher', 2, counter=constructed),
+        ])
+        _, source = manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+        self.assertEqual(source, 'BFetcher')
+        self.assertEqual(constructed, ['AFetcher', 'BFetcher'])
+        manager.get_daily_data('600519', end_date='2024-03-01', days=5)
+        self.assertEqual(constructed, ['AFetcher', 'BFetcher'])
+
+    def test_constructed_once_under_concurrency(self) -> None:
+        constructed = []
+        proxy = _lazy('AFetcher', 0, counter=constructed)
+        threads = [threading.Thread(target=proxy.get_instance) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(constructed, ['AFetcher'])
+
+    def test_priority_follows_instance_after_construction(self) -> None:
+        proxy = LazyFetcher('AFetcher', lambda: StubFetcher('AFetcher', 5), priority=-1)
+        self.assertEqual(proxy.priority, -1)
+        proxy.get_instance()
+        self.assertEqual(proxy.priority, 5)
+
+    def test_capability_probe_does_not_construct(self) -> None:
+        manager = DataFetcherManager()
+        for fetcher in manager._fetchers:
+            for capability in OPTIONAL_CAPABILITIES - fetcher._capabilities:
+                self.assertFalse(hasattr(fetcher, capability), msg=f"{fetcher.name}.{capability}")
+        self.assertTrue(all(not f.initialized for f in manager._fetchers))
+
+    def test_declared_capabilities_match_classes(self) -> None:
+        for name, module, _, _, capabilities in DataFetcherManager.DEFAULT_FETCHER_SPECS:
+            cls = getattr(importlib.import_module(module, package='data_provider'), name)
+            implemented = {cap for cap in OPTIONAL_CAPABILITIES if hasattr(cls, cap)}
+            self.assertEqual(implemented, capabilities, msg=name)
+
+    def test_resorted_when_priority_changes_on_construction(self) -> None:
+        config = SimpleNamespace(tushare_token='token')
+        with mock.patch('src.config.get_config', return_value=config):
+            manager = DataFetcherManager()
+        self.assertEqual(manager.available_fetchers[0], 'TushareFetcher')
+
+        tushare = manager._fetchers[0]
+        # Token 已配置但 API 初始化失败：构造后优先级降为默认值
+        tushare._factory = lambda: StubFetcher('TushareFetcher', 2)
+        tushare.get_instance()
+        self.assertEqual(manager.available_fetchers[0], 'EfinanceFetcher')
+        priorities = [f.priority for f in manager._fetchers]
+        self.assertEqual(priorities, sorted(priorities))
+
+
+class SharedManagerTestCase(unittest.TestCase):
+    """进程级共享管理器测试"""
+
+    def setUp(self) -> None:
+        reset_data_fetcher_manager()
+        self.addCleanup(reset_data_fetcher_manager)
+
+    def test_shared_instance(self) -> None:
+        manager = get_data_fetcher_manager()
+        self.assertIs(get_data_fetcher_manager(), manager)
+        reset_data_fetcher_manager()
+        self.assertIsNot(get_data_fetcher_manager(), manager)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场初筛单元测试
+===================================
+
+职责：
+1. 验证行情快照导出规范化行情表
+2. 验证快照评分、Top-K / 门槛入选与无法评分代码放行
+3. 验证全市场模式过滤 ST、趋势评分合成与快照不可用时的回退
+4. 验证 DataFetcherManager.get_market_snapshot 按优先级选择全量数据源
+5. 验证 get_daily_history 批量读取日线
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetcherManager
+from data_provider.quote_snapshot import AKSHARE_EM_STOCK_FIELDS, RealtimeQuoteSnapshot
+from data_provider.realtime_types import RealtimeSource
+from src.config import Config
+from src.core.screener import MarketScreener, score_snapshot
+from src.storage import DatabaseManager
+
+
+def _snapshot():
+    df = pd.DataFrame({
+        '代码': ['600001', '600002', '600003', '600004', '600005', '600001'],
+        '名称': ['温和放量', '大跌', '平盘', '*ST退市', '涨停', '重复'],
+        '最新价': [10.0, 8.0, 5.0, 1.0, 20.0, 99.0],
+        '涨跌幅': [3.0, -6.0, 0.0, 4.0, 10.0, 0.0],
+        '量比': [2.0, 0.4, 1.0, 3.0, 8.0, 1.0],
+        '换手率': [8.0, 0.3, 2.0, 10.0, 25.0, 1.0],
+    })
+    return RealtimeQuoteSnapshot(df, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+
+
+class _FakeManager:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def get_market_snapshot(self):
+        return self.snapshot
+
+
+class _FakeDb:
+    def __init__(self, history=None):
+        self.history = history if history is not None else pd.DataFrame(columns=['code', 'date', 'high', 'close', 'volume'])
+        self.requested = None
+
+    def get_daily_history(self, codes, start_date):
+        self.requested = list(codes)
+        return self.history[self.history['code'].isin(codes)]
+
+
+def _config(**overrides):
+    values = dict(screener_universe='watchlist', screener_top_k=0, screener_min_score=0.0)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+class MarketScreenerTestCase(unittest.TestCase):
+    """MarketScreener 测试"""
+
+    def _screen(self, codes, snapshot=None, db=None, **overrides):
+        screener = MarketScreener(
+            _FakeManager(_snapshot() if snapshot is None else snapshot),
+            db or _FakeDb(), config=_config(**overrides),
+        )
+        return screener.screen(codes)
+
+    def test_to_frame(self) -> None:
+        frame = _snapshot().to_frame()
+        self.assertEqual(len(frame), 5)
+        row = frame.set_index('code').loc['600001']
+        self.assertEqual(row['name'], '温和放量')
+        self.assertEqual(row['price'], 10.0)
+        self.assertTrue(RealtimeQuoteSnapshot(None, RealtimeSource.AKSHARE_EM, {}).to_frame().empty)
+
+    def test_snapshot_score(self) -> None:
+        frame = _snapshot().to_frame().set_index('code')
+        scores = pd.Series(score_snapshot(frame), index=frame.index)
+        self.assertEqual(scores['600001'], 100.0)
+        self.assertEqual(scores['600002'], 0.0)
+        self.assertLess(scores['600005'], scores['600001'])
+        partial = pd.DataFrame({'change_pct': [np.nan, 3.0]})
+        np.testing.assert_allclose(score_snapshot(partial), [0.0, 40.0])
+
+    def test_top_k_and_threshold(self) -> None:
+        codes = ['600001', '600002', '600003', '00700']
+        result = self._screen(codes, screener_top_k=2)
+        self.assertEqual(result.admitted, ['600001', '600003', '00700'])
+        self.assertEqual(result.passthrough, ['00700'])
+        self.assertEqual(result.universe_size, 3)
+
+        result = self._screen(codes, screener_min_score=50)
+        self.assertEqual(result.admitted, ['600001', '00700'])
+
+    def test_market_universe_filters_st(self) -> None:
+        result = self._screen(['600003'], screener_universe='market')
+        self.assertNotIn('600004', result.scores)
+        self.assertEqual(result.admitted[0], '600001')
+        self.assertIn('600003', result.admitted)
+
+    def test_snapshot_unavailable(self) -> None:
+        screener = MarketScreener(_FakeManager(None), _FakeDb(), config=_config())
+        self.assertIsNone(screener.screen(['600001']))
+
+    def test_trend_score_blended(self) -> None:
+        n = 60
+        dates = pd.bdate_range(end='2024-03-01', periods=n).date
+        rising = np.linspace(10, 20, n)
+        falling = np.linspace(20, 10, n)
+        history = pd.concat([
+            pd.DataFrame({'code': '600003', 'date': dates, 'high': rising, 'close': rising, 'volume': 1e5}),
+            pd.DataFrame({'code': '600001', 'date': dates, 'high': falling, 'close': falling, 'volume': 1e5}),
+            pd.DataFrame({'code': '600002', 'date': dates[-5:], 'high': 1.0, 'close': 1.0, 'volume': 1e5}),
+        ])
+        db = _FakeDb(history)
+        snapshot_only = self._screen(['600001', '600002', '600003'])
+        result = self._screen(['600001', '600002', '600003'], db=db)
+        self.assertEqual(result.scores['600002'], snapshot_only.scores['600002'])
+        self.assertGreater(result.scores['600003'], snapshot_only.scores['600003'])
+        self.assertLess(result.scores['600001'], snapshot_only.scores['600001'])
+
+        # Top-K 时只对快照评分靠前的候选读取日线
+        self._screen(['600001', '600002', '600003'], db=db, screener_top_k=1, screener_universe='market')
+        self.assertEqual(len(db.requested), 4)
+
+    def test_trend_pool_ranked_ahead_of_snapshot_only(self) -> None:
+        n = 60
+        dates = pd.bdate_range(end='2024-03-01', periods=n).date
+        falling = np.linspace(20, 10, n)
+        # 放量下跌：趋势评分很低
+        volume = np.r_[np.full(n - 1, 1e5), 5e5]
+        history = pd.concat([
+            pd.DataFrame({'code': code, 'date': dates, 'high': falling, 'close': falling, 'volume': volume})
+            for code in ('600001', '600003')
+        ])
+        codes = ['600001', '600002', '600003', '600005']
+        with unittest.mock.patch('src.core.screener.TREND_POOL_FACTOR', 1):
+            result = self._screen(codes, db=_FakeDb(history), screener_top_k=2)
+        # 候选池（600001 / 600003）的综合评分低于池外 600005 的快照评分，仍按组优先入选
+        self.assertLess(result.scores['600003'], result.scores['600005'])
+        self.assertEqual(result.admitted, ['600001', '600003'])
+
+
+class MarketSnapshotSourceTestCase(unittest.TestCase):
+    """DataFetcherManager.get_market_snapshot 测试"""
+
+    def test_follows_realtime_priority(self) -> None:
+        empty = RealtimeQuoteSnapshot(None, RealtimeSource.EFINANCE, {})
+        manager = DataFetcherManager(fetchers=[
+            SimpleNamespace(name='EfinanceFetcher', priority=0, get_market_snapshot=lambda: empty),
+            SimpleNamespace(name='AkshareFetcher', priority=1, get_market_snapshot=_snapshot),
+        ])
+        config = SimpleNamespace(enable_realtime_quote=True, realtime_source_priority='tencent,efinance,akshare_em')
+        with unittest.mock.patch('src.config.get_config', return_value=config):
+            self.assertEqual(len(manager.get_market_snapshot()), 5)
+            config.realtime_source_priority = 'tencent,akshare_sina'
+            self.assertIsNone(manager.get_market_snapshot())
+
+
+class DailyHistoryTestCase(unittest.TestCase):
+    """get_daily_history 测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_screener.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_get_daily_history(self) -> None:
+        today = date.today()
+        for code in ('600519', '000001'):
+            self.db.save_daily_data(pd.DataFrame({
+                'date': pd.date_range(end=today, periods=5),
+                'high': 11.0, 'close': [10.0, 10.5, 11.0, 10.8, 10.9], 'volume': 100.0,
+            }), code, 'TestData')
+
+        history = self.db.get_daily_history(['600519', '000001', '300750'], today - timedelta(days=2))
+        self.assertEqual(list(history.columns), ['code', 'date', 'high', 'close', 'volume'])
+        self.assertEqual(history['code'].tolist(), ['000001'] * 3 + ['600519'] * 3)
+        self.assertEqual(history['close'].tolist()[:3], [11.0, 10.8, 10.9])
+        self.assertTrue(self.db.get_daily_history([], today).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+持久化缓存后端单元测试
+===================================
+
+职责：
+1. 验证 SQLite 后端读写、TTL 过期与跨实例（跨进程）共享
+2. 验证损坏数据按未命中处理
+3. 验证全量快照缓存冷启动读取持久化快照
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.persistent_cache import (
+    MemoryCacheBackend,
+    PersistentMapping,
+    SQLiteCacheBackend,
+    create_cache_backend,
+)
+from data_provider.snapshot_cache import SingleFlightCache
+
+
+class SQLiteCacheBackendTestCase(unittest.TestCase):
+    """SQLiteCacheBackend 测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._temp_dir.name, "cache.db")
+        self.backend = SQLiteCacheBackend(self.path)
+
+    def tearDown(self) -> None:
+        self.backend.close()
+        self._temp_dir.cleanup()
+
+    def test_dataframe_round_trip_across_instances(self) -> None:
+        df = pd.DataFrame({'代码': ['600519', '000001'], '最新价': [1500.5, 10.2]})
+        self.backend.set('snapshot:akshare_em', df, ttl=60)
+
+        # 新实例模拟另一个进程
+        other = SQLiteCacheBackend(self.path)
+        try:
+            value, stored_at = other.get('snapshot:akshare_em')
+        finally:
+            other.close()
+        pd.testing.assert_frame_equal(value, df)
+        self.assertLessEqual(stored_at, time.time())
+
+    def test_expired_entry_is_miss(self) -> None:
+        self.backend.set('search:q', 'response', ttl=-1)
+        self.assertIsNone(self.backend.get('search:q'))
+        self.assertEqual(self.backend.purge_expired(), 1)
+
+    def test_get_many_and_set_many(self) -> None:
+        self.backend.set_many({'stock_name:600519': '贵州茅台', 'stock_name:000001': '平安银行'}, ttl=60)
+        result = self.backend.get_many(['stock_name:600519', 'stock_name:000001', 'stock_name:300750'])
+        self.assertEqual({k: v for k, (v, _) in result.items()},
+                         {'stock_name:600519': '贵州茅台', 'stock_name:000001': '平安银行'})
+
+    def test_corrupted_payload_is_dropped(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "INSERT INTO cache_entries (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            ('broken', b'not-a-payload', time.time(), time.time() + 60),
+        )
+        conn.commit()
+        conn.close()
+
+        self.assertIsNone(self.backend.get('broken'))
+        self.assertEqual(self.backend.get_many(['broken']), {})
+
+
+class PersistentMappingTestCase(unittest.TestCase):
+    """PersistentMapping 测试"""
+
+    def test_write_through_and_reload(self) -> None:
+        backend = MemoryCacheBackend()
+        names = PersistentMapping('stock_name', ttl=60, backend=backend)
+        names['600519'] = '贵州茅台'
+        names.update({'000001': '平安银行'})
+
+        # 新映射（模拟新进程）从后端读取
+        fresh = PersistentMapping('stock_name', ttl=60, backend=backend)
+        self.assertIn('600519', fresh)
+        self.assertEqual(fresh['600519'], '贵州茅台')
+        self.assertEqual(fresh.get_many(['000001', '300750']), {'000001': '平安银行'})
+        # 生成器只能迭代一次：内存命中与后端查询共用同一份键列表
+        restarted = PersistentMapping('stock_name', ttl=60, backend=backend)
+        self.assertEqual(
+            restarted.get_many(code for code in ['600519', '000001', '300750']),
+            {'600519': '贵州茅台', '000001': '平安银行'},
+        )
+        with self.assertRaises(KeyError):
+            fresh['300750']
+
+
+class PersistentSnapshotTestCase(unittest.TestCase):
+    """SingleFlightCache 持久化测试"""
+
+    def test_cold_start_uses_persisted_snapshot(self) -> None:
+        backend = MemoryCacheBackend()
+        first = SingleFlightCache('test_persist_snapshot', ttl=60, backend=backend)
+        df = pd.DataFrame({'代码': ['600519']})
+        self.assertIs(first.get_or_refresh(lambda: df), df)
+
+        # 新进程：内存为空，持久化快照仍新鲜，不调用 loader
+        second = SingleFlightCache('test_persist_snapshot', ttl=60, backend=backend)
+        value = second.get_or_refresh(lambda: self.fail("不应请求上游"))
+        pd.testing.assert_frame_equal(value, df)
+        self.assertEqual(second.stats()['persist_hits'], 1)
+
+    def test_empty_result_not_persisted(self) -> None:
+        backend = MemoryCacheBackend()
+        cache = SingleFlightCache('test_persist_empty', ttl=60, backend=backend)
+        cache.get_or_refresh(pd.DataFrame)
+        self.assertIsNone(backend.get('snapshot:test_persist_empty'))
+
+    def test_disabled_backend(self) -> None:
+        self.assertIsNone(create_cache_backend('none'))
+        self.assertIsInstance(create_cache_backend('memory'), MemoryCacheBackend)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全市场实时行情快照索引单元测试
+===================================
+
+职责：
+1. 验证按代码 O(1) 查询与字段转换
+2. 验证候选列名与代码补零
+3. 验证缓存 DataFrame 替换后快照自动重建
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.quote_snapshot import (
+    AKSHARE_EM_STOCK_FIELDS,
+    EFINANCE_ETF_FIELDS,
+    RealtimeQuoteSnapshot,
+    snapshot_for_cache,
+)
+from data_provider.realtime_types import RealtimeSource
+from data_provider.snapshot_cache import SingleFlightCache
+
+
+def _akshare_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        '代码': ['600519', '000001', '600519'],
+        '名称': ['贵州茅台', '平安银行', '重复行'],
+        '最新价': [1500.5, 10.2, 1.0],
+        '涨跌幅': [1.2, '-', 0.0],
+        '成交量': [12345.0, 100.0, 1.0],
+        '量比': [0.9, np.nan, 1.0],
+    })
+
+
+class RealtimeQuoteSnapshotTestCase(unittest.TestCase):
+    """RealtimeQuoteSnapshot 测试"""
+
+    def test_lookup_and_conversion(self) -> None:
+        snapshot = RealtimeQuoteSnapshot(_akshare_frame(), RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+
+        self.assertEqual(len(snapshot), 2)
+        quote = snapshot.get('600519')
+        # 重复代码保留第一条
+        self.assertEqual(quote.name, '贵州茅台')
+        self.assertEqual(quote.price, 1500.5)
+        self.assertEqual(quote.volume, 12345)
+        self.assertIsInstance(quote.volume, int)
+        self.assertEqual(quote.source, RealtimeSource.AKSHARE_EM)
+
+        other = snapshot.get('000001')
+        # 非数值与 NaN 转为 None，缺失列保持默认值
+        self.assertIsNone(other.change_pct)
+        self.assertIsNone(other.volume_ratio)
+        self.assertIsNone(other.pe_ratio)
+        self.assertIsNone(snapshot.get('300750'))
+
+    def test_returns_independent_copies(self) -> None:
+        snapshot = RealtimeQuoteSnapshot(_akshare_frame(), RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+        first = snapshot.get('600519')
+        first.price = 0.0
+        self.assertEqual(snapshot.get('600519').price, 1500.5)
+
+    def test_candidate_columns_and_zfill(self) -> None:
+        df = pd.DataFrame({
+            'code': [510300, 159915],
+            'name': ['沪深300ETF', '创业板ETF'],
+            'price': [3.9, 2.1],
+        })
+        snapshot = RealtimeQuoteSnapshot(
+            df, RealtimeSource.EFINANCE, EFINANCE_ETF_FIELDS, code_column=('股票代码', 'code')
+        )
+        self.assertIn('510300', snapshot)
+        self.assertEqual(snapshot.get('159915').price, 2.1)
+
+    def test_empty_frame(self) -> None:
+        snapshot = RealtimeQuoteSnapshot(None, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+        self.assertTrue(snapshot.empty)
+        self.assertIsNone(snapshot.get('600519'))
+
+
+class SnapshotForCacheTestCase(unittest.TestCase):
+    """snapshot_for_cache 测试"""
+
+    def test_rebuilds_only_when_frame_replaced(self) -> None:
+        cache = SingleFlightCache('test_quote_snapshot', ttl=60)
+        cache.set(_akshare_frame(), timestamp=100.0)
+        first = snapshot_for_cache(cache, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+        self.assertIs(snapshot_for_cache(cache, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS), first)
+        self.assertEqual(first.timestamp, 100.0)
+
+        df = _akshare_frame()
+        df.loc[0, '最新价'] = 1600.0
+        cache.set(df)
+        second = snapshot_for_cache(cache, RealtimeSource.AKSHARE_EM, AKSHARE_EM_STOCK_FIELDS)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.get('600519').price, 1600.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
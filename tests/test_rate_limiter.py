@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+上游资源预算单元测试
+===================================
+
+职责：
+1. 验证令牌桶精确限速
+2. 验证并发上限
+3. 验证分层名称继承与配置解析
+4. 验证数据源按 API 调用共享令牌桶（跨实例、不重复限速），筹码与实时行情请求同样占用上游预算
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetcherManager
+from data_provider.rate_limiter import (
+    RateLimiterRegistry,
+    TokenBucket,
+    build_default_budgets,
+    fetcher_upstream,
+    get_rate_limiter_registry,
+    parse_budget_spec,
+    reset_rate_limiter_registry,
+)
+from data_provider.tushare_fetcher import TushareFetcher
+from tests.fetcher_stubs import StubFetcher
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    """TokenBucket 测试"""
+
+    def test_burst_then_paced(self) -> None:
+        bucket = TokenBucket(rate=20, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        # 桶已空，非阻塞获取失败
+        self.assertFalse(bucket.try_acquire())
+
+        start = time.monotonic()
+        bucket.acquire()
+        elapsed = time.monotonic() - start
+        # 20 个/秒 => 约 0.05s 补充一个令牌
+        self.assertGreaterEqual(elapsed, 0.03)
+        self.assertLess(elapsed, 0.2)
+
+    def test_acquire_timeout(self) -> None:
+        bucket = TokenBucket(rate=1, capacity=1)
+        self.assertTrue(bucket.acquire())
+        self.assertFalse(bucket.acquire(timeout=0.1))
+
+
+class RateLimiterRegistryTestCase(unittest.TestCase):
+    """RateLimiterRegistry 测试"""
+
+    def test_concurrency_limit(self) -> None:
+        registry = RateLimiterRegistry()
+        registry.register("baostock", max_concurrency=1)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def worker():
+            with registry.limit("baostock"):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(max(peak), 1)
+        stats = registry.stats()["baostock"]
+        self.assertEqual(stats["acquired"], 5)
+        self.assertEqual(stats["peak_in_flight"], 1)
+
+    def test_unregistered_upstream_is_unlimited(self) -> None:
+        registry = RateLimiterRegistry()
+        with registry.limit("unknown"):
+            pass
+        self.assertNotIn("unknown", registry.stats())
+
+    def test_hierarchical_names_inherit_parent_params(self) -> None:
+        registry = RateLimiterRegistry()
+        registry.register("search", max_concurrency=2, rate_per_minute=60)
+        key_a = registry.get("search:bocha:aaaa")
+        key_b = registry.get("search:bocha:bbbb")
+
+        self.assertIsNotNone(key_a)
+        self.assertEqual(key_a.max_concurrency, 2)
+        self.assertEqual(key_a.rate_per_minute, 60)
+        # 每个 Key 独立计数
+        self.assertIsNot(key_a, key_b)
+
+    def test_register_same_params_keeps_instance(self) -> None:
+        registry = RateLimiterRegistry()
+        first = registry.register("tushare", max_concurrency=4, rate_per_minute=80)
+        second = registry.register("tushare", max_concurrency=4, rate_per_minute=80)
+        self.assertIs(first, second)
+
+    def test_configure_from_config(self) -> None:
+        config = SimpleNamespace(
+            max_workers=3,
+            analysis_delay=4.0,
+            tushare_rate_limit_per_minute=80,
+            upstream_budgets="llm=2/10,pytdx=8/0",
+        )
+        registry = RateLimiterRegistry()
+        registry.configure(config)
+
+        self.assertEqual(registry.get("llm").max_concurrency, 2)
+        self.assertEqual(registry.get("llm").rate_per_minute, 10)
+        self.assertEqual(registry.get("pytdx").max_concurrency, 8)
+        self.assertEqual(registry.get("tushare").rate_per_minute, 80)
+
+
+class BudgetHelpersTestCase(unittest.TestCase):
+    """配置解析辅助函数测试"""
+
+    def test_parse_budget_spec(self) -> None:
+        budgets = parse_budget_spec("llm=2/15, search:bocha=1/30,bad,tushare=x/1")
+        self.assertEqual(budgets, {"llm": (2, 15.0), "search:bocha": (1, 30.0)})
+
+    def test_analysis_delay_converted_to_llm_rate(self) -> None:
+        budgets = build_default_budgets(SimpleNamespace(max_workers=3, analysis_delay=6.0))
+        self.assertEqual(budgets["llm"], (3, 10.0))
+
+    def test_fetcher_upstream(self) -> None:
+        self.assertEqual(fetcher_upstream("EfinanceFetcher"), "efinance")
+        self.assertEqual(fetcher_upstream("YfinanceFetcher"), "yfinance")
+
+
+
+class _QuoteStubFetcher(StubFetcher):
+    """带筹码与实时行情接口的假数据源（self_paced 时按调用自行消耗令牌）"""
+
+    def get_chip_distribution(self, stock_code):
+        if self.self_rate_limited:
+            self._acquire_rate_token()
+        return SimpleNamespace(code=stock_code)
+
+    def get_realtime_quote(self, stock_code, source=None):
+        if self.self_rate_limited:
+            self._acquire_rate_token()
+        return SimpleNamespace(code=stock_code)
+
+
+class FetcherRateTokenTestCase(unittest.TestCase):
+    """数据源共享令牌桶测试"""
+
+    def setUp(self) -> None:
+        reset_rate_limiter_registry()
+        self.addCleanup(reset_rate_limiter_registry)
+
+    def test_self_paced_fetcher_consumes_one_token_per_call(self) -> None:
+        budget = get_rate_limiter_registry().register('paced', max_concurrency=2, rate_per_minute=600)
+        fetcher = StubFetcher('PacedFetcher', self_paced=True)
+        start = time.monotonic()
+        for _ in range(3):
+            fetcher.get_daily_data('600519', end_date='2024-03-01', days=5)
+        elapsed = time.monotonic() - start
+        # 600 次/分钟 => 每个令牌 0.1s；3 次调用共等待约 0.2s（外层未重复扣减）
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertLess(elapsed, 0.38)
+        self.assertEqual(budget.stats.acquired, 3)
+
+    def test_manager_calls_take_one_token(self) -> None:
+        registry = get_rate_limiter_registry()
+        akshare = registry.register('akshare', rate_per_minute=1, burst=2)
+        efinance = registry.register('efinance', rate_per_minute=1, burst=2)
+        manager = DataFetcherManager(fetchers=[
+            _QuoteStubFetcher('AkshareFetcher', self_paced=True),
+            _QuoteStubFetcher('EfinanceFetcher', priority=1),
+        ])
+
+        # 自行限速的数据源：外层只占并发槽位，筹码请求共消耗 1 个令牌
+        self.assertIsNotNone(manager._fetch_chip_distribution('600519'))
+        self.assertTrue(akshare.bucket.try_acquire())
+        self.assertFalse(akshare.bucket.try_acquire())
+        # 单股实时行情同样计入上游预算（不自行限速的数据源由外层消耗令牌）
+        self.assertIsNotNone(manager._get_realtime_quote_from_source('efinance', '600519'))
+        self.assertTrue(efinance.bucket.try_acquire())
+        self.assertFalse(efinance.bucket.try_acquire())
+        self.assertEqual(efinance.stats.acquired, 1)
+
+    def test_tushare_limit_shared_across_instances(self) -> None:
+        get_rate_limiter_registry().register('tushare', rate_per_minute=600)
+        fetchers = [TushareFetcher(), TushareFetcher()]
+        start = time.monotonic()
+        for i in range(4):
+            fetchers[i % 2]._check_rate_limit()
+        # 新建实例不会重置计数：4 次调用至少间隔 3 个令牌
+        self.assertGreaterEqual(time.monotonic() - start, 0.28)
+
+
+if __name__ == "__main__":
+    unittest.main()
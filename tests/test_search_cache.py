@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+搜索结果两级缓存单元测试
+===================================
+
+职责：
+1. 验证交易时段判断与缓存过期时间（盘中 / 午休 / 盘后 / 周末 / 美股夜盘）
+2. 验证内存 LRU 的命中、过期、淘汰与失败结果不缓存
+3. 验证 news_intel 持久层的写入与还原，命中缓存的分析仍能按 query_id 查到新闻
+4. 验证 SearchService 各入口命中缓存时不再调用搜索引擎
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.search_cache import (
+    SearchCache,
+    in_trading_session,
+    next_session_start,
+    search_cache_expiry,
+)
+from src.search_service import BaseSearchProvider, SearchResponse, SearchResult, SearchService
+from src.services.history_service import HistoryService
+from src.storage import DatabaseManager
+
+# 2024-03-01 为周五
+FRIDAY = datetime(2024, 3, 1)
+
+
+def _response(query='q', titles=('a', 'b'), success=True):
+    return SearchResponse(
+        query=query, provider='Bocha', success=success,
+        results=[SearchResult(title=t, snippet=f'{t} 摘要', url=f'https://news.com/{t}', source='news.com') for t in titles],
+    )
+
+
+class TradingSessionTestCase(unittest.TestCase):
+    """交易时段与过期时间测试"""
+
+    def test_sessions(self) -> None:
+        self.assertTrue(in_trading_session(FRIDAY.replace(hour=10)))
+        self.assertFalse(in_trading_session(FRIDAY.replace(hour=12)))
+        self.assertTrue(in_trading_session(FRIDAY.replace(hour=15, minute=30), 'hk'))
+        # 周五美股夜盘延续到周六凌晨
+        self.assertTrue(in_trading_session(datetime(2024, 3, 2, 2, 0), 'us'))
+        self.assertFalse(in_trading_session(datetime(2024, 3, 4, 2, 0), 'us'))
+
+        self.assertEqual(next_session_start(FRIDAY.replace(hour=12)), FRIDAY.replace(hour=13))
+        self.assertEqual(next_session_start(FRIDAY.replace(hour=16)), datetime(2024, 3, 4, 9, 30))
+
+    def test_expiry(self) -> None:
+        self.assertEqual(search_cache_expiry(FRIDAY.replace(hour=10), session_ttl=600), FRIDAY.replace(hour=10, minute=10))
+        self.assertEqual(search_cache_expiry(FRIDAY.replace(hour=8)), FRIDAY.replace(hour=9, minute=30))
+        self.assertEqual(search_cache_expiry(datetime(2024, 3, 2, 12, 0)), datetime(2024, 3, 4, 9, 30))
+
+
+class MemoryCacheTestCase(unittest.TestCase):
+    """内存层测试"""
+
+    def test_hit_and_expiry(self) -> None:
+        cache = SearchCache(session_ttl=600, use_db=False)
+        now = FRIDAY.replace(hour=10)
+        cache.put('q', 'latest_news', _response(), '600519', now=now)
+        hit = cache.get('q', 'latest_news', '600519', now=now + timedelta(minutes=5))
+        self.assertTrue(hit.from_cache)
+        self.assertEqual([r.title for r in hit.results], ['a', 'b'])
+        self.assertIsNone(cache.get('q', 'risk_check', '600519', now=now))
+        self.assertIsNone(cache.get('q', 'latest_news', '600519', now=now + timedelta(minutes=11)))
+
+    def test_max_results_and_days(self) -> None:
+        cache = SearchCache(use_db=False)
+        now = FRIDAY.replace(hour=10)
+        cache.put('q', 'stock_news', _response(), '600519', now=now, max_results=2, days=3)
+        # 条数不足以满足更大的请求：视为未命中
+        self.assertIsNone(cache.get('q', 'stock_news', '600519', now=now, max_results=5, days=3))
+        # 条数足够时截取
+        hit = cache.get('q', 'stock_news', '600519', now=now, max_results=1, days=3)
+        self.assertEqual([r.title for r in hit.results], ['a'])
+        # 时间范围不同的请求不共享
+        self.assertIsNone(cache.get('q', 'stock_news', '600519', now=now, max_results=1, days=7))
+
+        # 抓取时已请求 5 条、上游只返回 2 条：同样条数的请求仍命中
+        cache.put('q2', 'stock_news', _response('q2'), '600519', now=now, max_results=5)
+        self.assertEqual(len(cache.get('q2', 'stock_news', '600519', now=now, max_results=5).results), 2)
+
+    def test_lru_and_failures(self) -> None:
+        cache = SearchCache(max_entries=2, use_db=False)
+        now = FRIDAY.replace(hour=16)
+        for query in ('q1', 'q2'):
+            cache.put(query, 'd', _response(query), '600519', now=now)
+        cache.get('q1', 'd', '600519', now=now)
+        cache.put('q3', 'd', _response('q3'), '600519', now=now)
+        self.assertIsNotNone(cache.get('q1', 'd', '600519', now=now))
+        self.assertIsNone(cache.get('q2', 'd', '600519', now=now))
+
+        cache.put('bad', 'd', _response('bad', success=False), '600519', now=now)
+        cache.put('empty', 'd', _response('empty', titles=()), '600519', now=now)
+        self.assertEqual(len(cache), 2)
+
+
+class NewsIntelBackedCacheTestCase(unittest.TestCase):
+    """news_intel 持久层测试"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_search_cache.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_restore_from_db(self) -> None:
+        SearchCache().put('茅台 最新', 'latest_news', _response('茅台 最新', ('b', 'a', 'c')), '600519', '贵州茅台')
+        self.assertEqual(len(self.db.get_news_intel_by_search_query('茅台 最新', 'latest_news')), 3)
+
+        # 新实例（模拟另一个进程 / 重启）内存为空，从 news_intel 还原
+        restored = SearchCache().get('茅台 最新', 'latest_news', '600519')
+        self.assertTrue(restored.from_cache)
+        self.assertEqual(restored.provider, 'Bocha')
+        self.assertEqual([r.title for r in restored.results], ['b', 'a', 'c'])
+        self.assertEqual(restored.results[0].url, 'https://news.com/b')
+        self.assertIsNone(SearchCache().get('茅台 最新', 'risk_check', '600519'))
+
+        # 到下一交易时段（最多一周）之后过期
+        later = datetime.now() + timedelta(days=8)
+        self.assertIsNone(SearchCache().get('茅台 最新', 'latest_news', '600519', now=later))
+
+
+    def test_put_persists_query_context_once(self) -> None:
+        cache = SearchCache()
+        cache.put(
+            '茅台 风险', 'risk_check', _response('茅台 风险'), '600519', '贵州茅台',
+            max_results=3, query_context={'query_id': 'q-1'},
+        )
+        records = self.db.get_news_intel_by_search_query('茅台 风险', 'risk_check')
+        self.assertEqual(len(records), 2)
+        self.assertEqual({r.query_id for r in records}, {'q-1'})
+        # 还原条数少于请求条数时不命中
+        self.assertIsNone(SearchCache().get('茅台 风险', 'risk_check', '600519', max_results=3))
+        self.assertEqual(len(SearchCache().get('茅台 风险', 'risk_check', '600519', max_results=2).results), 2)
+
+    def test_cache_hit_analysis_keeps_news_in_history(self) -> None:
+        provider = _CountingProvider()
+        service = SearchService(cache=SearchCache())
+        service._providers = [provider]
+        service.search_comprehensive_intel('600519', '贵州茅台', max_searches=2, query_context={'query_id': 'q-1'})
+        fetched_at = {r.url: r.fetched_at for r in self.db.get_news_intel_by_query_id('q-1')}
+        self.assertEqual(len(fetched_at), 6)
+
+        # 内存命中与（新进程）news_intel 还原都不再搜索，但新闻关联到各自的 query_id
+        service.search_comprehensive_intel('600519', '贵州茅台', max_searches=2, query_context={'query_id': 'q-2'})
+        restarted = SearchService(cache=SearchCache())
+        restarted._providers = [provider]
+        restarted.search_comprehensive_intel('600519', '贵州茅台', max_searches=2, query_context={'query_id': 'q-3'})
+        self.assertEqual(len(provider.queries), 2)
+
+        history = HistoryService(self.db)
+        for query_id in ('q-1', 'q-2', 'q-3'):
+            self.assertEqual({item['url'] for item in history.get_news_intel(query_id)}, set(fetched_at))
+        # 关联不刷新 fetched_at（缓存有效期仍按首次抓取计算），重复命中不重复关联
+        self.assertEqual({r.url: r.fetched_at for r in self.db.get_news_intel_by_query_id('q-1')}, fetched_at)
+        linked = SearchResponse(
+            query='q', provider='Bocha', success=True,
+            results=[SearchResult(title='t', snippet='', url=url, source='') for url in fetched_at],
+        )
+        self.assertEqual(self.db.link_news_intel('600519', 'q', 'latest_news', linked, {'query_id': 'q-2'}), 0)
+
+
+class _CountingProvider(BaseSearchProvider):
+    def __init__(self):
+        super().__init__(['k'], 'Bocha')
+        self.queries = []
+
+    def search(self, query, max_results=5, days=7):
+        self.queries.append(query)
+        return _response(query, (f'{query}-a', f'{query}-b', f'{query}-c'))
+
+    def _do_search(self, query, api_key, max_results, days=7):
+        raise NotImplementedError
+
+
+class SearchServiceCacheTestCase(unittest.TestCase):
+    """SearchService 入口缓存测试"""
+
+    def setUp(self) -> None:
+        self.provider = _CountingProvider()
+        self.service = SearchService(cache=SearchCache(use_db=False))
+        self.service._providers = [self.provider]
+
+    def test_entry_points_use_cache(self) -> None:
+        first = self.service.search_comprehensive_intel('600519', '贵州茅台', max_searches=5)
+        self.assertEqual(len(self.provider.queries), 5)
+        second = self.service.search_comprehensive_intel('600519', '贵州茅台', max_searches=5)
+        self.assertEqual(len(self.provider.queries), 5)
+        self.assertEqual(list(second), list(first))
+        self.assertTrue(all(r.from_cache for r in second.values()))
+
+        self.service.search_stock_news('600519', '贵州茅台')
+        self.service.search_stock_news('600519', '贵州茅台')
+        self.service.search_stock_events('600519', '贵州茅台')
+        self.service.search_stock_events('600519', '贵州茅台')
+        self.assertEqual(len(self.provider.queries), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+搜索引擎 HTTP 连接池单元测试
+===================================
+
+职责：
+1. 验证同一主机的连续请求复用同一条长连接
+2. 验证 429 按 Retry-After 退避重试、重试耗尽后返回最后的响应
+3. 验证搜索 API 主机独立的连接池大小与 HTTP/2 缺少依赖时的回退
+4. 验证 Tavily / SerpAPI 经共享客户端调用 REST API 并解析错误
+"""
+
+import os
+import sys
+import threading
+import unittest
+import unittest.mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import src.search_service as search_service
+from src.search_http import (
+    BACKOFF_MAX,
+    DEFAULT_POOL_SIZE,
+    SearchHttpClient,
+    retry_delay,
+)
+from src.search_service import SerpAPISearchProvider, TavilySearchProvider
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests += 1
+        if self.server.requests <= self.server.fail_first:
+            status, body = 429, b'slow down'
+        else:
+            status, body = 200, b'ok'
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SearchHttpClientTestCase(unittest.TestCase):
+    """SearchHttpClient 测试（本地 HTTP 服务）"""
+
+    def setUp(self) -> None:
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.connections = 0
+        self.server.requests = 0
+        self.server.fail_first = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+        self.client = SearchHttpClient()
+        self.addCleanup(self.client.close)
+
+    def test_keep_alive(self) -> None:
+        for _ in range(5):
+            self.assertEqual(self.client.get(self.url, timeout=5).text, 'ok')
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_retry_on_429(self) -> None:
+        self.server.fail_first = 2
+        response = self.client.get(self.url, timeout=5)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, 3)
+
+        self.server.requests = 0
+        response = self.client.get(self.url, timeout=5, max_retries=1)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_host_pool_sizes(self) -> None:
+        client = SearchHttpClient(host_pool_sizes={'api.bocha.cn': 12})
+        self.addCleanup(client.close)
+        self.assertEqual(client.session.get_adapter('https://api.bocha.cn/v1/web-search')._pool_maxsize, 12)
+        self.assertEqual(client.session.get_adapter('https://example.com/a')._pool_maxsize, DEFAULT_POOL_SIZE)
+
+    def test_retry_delay(self) -> None:
+        self.assertEqual(retry_delay(SimpleNamespace(headers={'Retry-After': '3'}), 0), 3.0)
+        self.assertEqual(retry_delay(SimpleNamespace(headers={'Retry-After': '600'}), 0), BACKOFF_MAX)
+        delay = retry_delay(SimpleNamespace(headers={}), 2)
+        self.assertTrue(2.0 <= delay <= 4.0)
+
+    def test_http2_fallback(self) -> None:
+        try:
+            import h2  # noqa: F401
+            self.skipTest('h2 已安装')
+        except ImportError:
+            pass
+        client = SearchHttpClient(http2=True)
+        self.addCleanup(client.close)
+        self.assertFalse(client.http2_enabled)
+
+
+def _json_response(status_code, data):
+    return SimpleNamespace(status_code=status_code, json=lambda: data, text=str(data))
+
+
+class RestProviderTestCase(unittest.TestCase):
+    """Tavily / SerpAPI REST 调用测试"""
+
+    def setUp(self) -> None:
+        self.client = unittest.mock.Mock()
+        patcher = unittest.mock.patch.object(search_service, 'get_search_http_client', return_value=self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tavily(self) -> None:
+        self.client.post.return_value = _json_response(200, {'results': [
+            {'title': '标题', 'content': '内容', 'url': 'https://www.example.com/a', 'published_date': '2024-03-01'},
+        ]})
+        response = TavilySearchProvider(['tk'])._do_search('贵州茅台', 'tk', max_results=3, days=3)
+        self.assertTrue(response.success)
+        self.assertEqual(response.results[0].source, 'example.com')
+        args, kwargs = self.client.post.call_args
+        self.assertEqual(args[0], TavilySearchProvider.API_ENDPOINT)
+        self.assertEqual(kwargs['headers']['Authorization'], 'Bearer tk')
+        self.assertEqual(kwargs['json']['days'], 3)
+
+        self.client.post.return_value = _json_response(432, {'detail': {'error': 'usage limit'}})
+        response = TavilySearchProvider(['tk'])._do_search('贵州茅台', 'tk', max_results=3)
+        self.assertFalse(response.success)
+        self.assertEqual(response.error_message, 'API 配额已用尽: usage limit')
+
+    def test_serpapi(self) -> None:
+        self.client.get.return_value = _json_response(200, {'organic_results': [
+            {'title': '标题', 'snippet': '摘要', 'link': 'https://a.com/1', 'source': 'A'},
+        ]})
+        response = SerpAPISearchProvider(['sk'])._do_search('AAPL', 'sk', max_results=3)
+        self.assertTrue(response.success)
+        self.assertEqual(response.results[0].url, 'https://a.com/1')
+        self.assertEqual(self.client.get.call_args.kwargs['params']['api_key'], 'sk')
+
+        self.client.get.return_value = _json_response(401, {'error': 'Invalid API key.'})
+        response = SerpAPISearchProvider(['sk'])._do_search('AAPL', 'sk', max_results=3)
+        self.assertFalse(response.success)
+        self.assertEqual(response.error_message, 'Invalid API key.')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+行业 / 大盘搜索跨股票归并单元测试
+===================================
+
+职责：
+1. 验证同行业多只股票并发情报搜索时，行业维度只搜索一次并分发给每只股票（news_intel 按每只股票均可查到）
+2. 验证 get_or_load 合并并发请求、按自然日缓存的维度当日有效
+3. 验证大盘新闻同一查询只搜索一次
+4. 验证所属行业解析（efinance 所属板块）与按股票缓存
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetcherManager
+from data_provider.efinance_fetcher import EfinanceFetcher
+from data_provider.persistent_cache import MemoryCacheBackend, PersistentMapping
+from src.config import Config
+from src.search_cache import SearchCache, search_cache_expiry
+from src.search_service import BaseSearchProvider, SearchResponse, SearchResult, SearchService
+from src.services.history_service import HistoryService
+from src.storage import DatabaseManager
+
+BANKS = [('601398', '工商银行'), ('601939', '建设银行'), ('601288', '农业银行'), ('600036', '招商银行')]
+
+
+class _CountingProvider(BaseSearchProvider):
+    """记录查询的假搜索引擎"""
+
+    def __init__(self, delay=0.05):
+        super().__init__(['k'], 'Bocha')
+        self.delay = delay
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results=5, days=7):
+        with self._lock:
+            self.queries.append(query)
+        time.sleep(self.delay)
+        return SearchResponse(
+            query=query, provider=self.name,
+            results=[SearchResult(title=query, snippet='', url=f'https://news.com/{query}', source='news.com')],
+        )
+
+    def _do_search(self, query, api_key, max_results, days=7):
+        raise NotImplementedError
+
+
+class SectorBatchingTestCase(unittest.TestCase):
+    """SearchService 行业 / 大盘归并测试"""
+
+    def setUp(self) -> None:
+        self.provider = _CountingProvider()
+        self.service = SearchService(cache=SearchCache(use_db=False))
+        self.service._providers = [self.provider]
+
+    def test_industry_shared_across_sector(self) -> None:
+        with ThreadPoolExecutor(max_workers=len(BANKS)) as executor:
+            reports = list(executor.map(
+                lambda stock: self.service.search_comprehensive_intel(stock[0], stock[1], max_searches=5, sector='银行'),
+                BANKS,
+            ))
+
+        industry_queries = [q for q in self.provider.queries if q.startswith('银行 行业')]
+        self.assertEqual(len(industry_queries), 1)
+        # 其余 4 个维度仍按个股搜索
+        self.assertEqual(len(self.provider.queries), 1 + 4 * len(BANKS))
+        for report in reports:
+            self.assertEqual(list(report)[-1], 'industry')
+            self.assertEqual(report['industry'].results[0].title, industry_queries[0])
+
+    def test_without_sector(self) -> None:
+        self.service.search_comprehensive_intel('601398', '工商银行', max_searches=5)
+        self.assertIn('工商银行 所在行业 竞争对手 市场份额 行业前景', self.provider.queries)
+
+    def test_market_news(self) -> None:
+        first = self.service.search_market_news('A股 大盘 复盘')
+        second = self.service.search_market_news('A股 大盘 复盘')
+        self.assertEqual(self.provider.queries, ['A股 大盘 复盘'])
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+
+
+class SectorNewsIntelTestCase(unittest.TestCase):
+    """行业结果持久化测试：只入库一次，每只成员股票按代码 / query_id 均可查到"""
+
+    def setUp(self) -> None:
+        self._temp_dir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_PATH"] = os.path.join(self._temp_dir.name, "test_sector_search.db")
+        Config._instance = None
+        DatabaseManager.reset_instance()
+        self.db = DatabaseManager.get_instance()
+        self.provider = _CountingProvider()
+        self.service = SearchService(cache=SearchCache())
+        self.service._providers = [self.provider]
+
+    def tearDown(self) -> None:
+        DatabaseManager.reset_instance()
+        self._temp_dir.cleanup()
+
+    def test_industry_news_visible_for_every_member(self) -> None:
+        with ThreadPoolExecutor(max_workers=len(BANKS)) as executor:
+            list(executor.map(
+                lambda stock: self.service.search_comprehensive_intel(
+                    stock[0], stock[1], max_searches=5, sector='银行', query_context={'query_id': f'q-{stock[0]}'},
+                ),
+                BANKS,
+            ))
+        # 未带 query_id 的分析（如定时任务）也按股票代码关联
+        self.service.search_sector_intel('银行', '601166', '兴业银行')
+
+        industry_query = next(q for q in self.provider.queries if q.startswith('银行 行业'))
+        industry_url = f'https://news.com/{industry_query}'
+        self.assertEqual(len(self.db.get_news_intel_by_search_query(industry_query, 'industry')), 1)
+        history = HistoryService(self.db)
+        for code, _ in BANKS:
+            self.assertIn(industry_url, [r.url for r in self.db.get_recent_news(code)])
+            self.assertIn(industry_url, [item['url'] for item in history.get_news_intel(f'q-{code}')])
+        self.assertIn(industry_url, [r.url for r in self.db.get_recent_news('601166')])
+
+
+class GetOrLoadTestCase(unittest.TestCase):
+    """SearchCache.get_or_load 测试"""
+
+    def test_single_flight(self) -> None:
+        cache = SearchCache(use_db=False)
+        provider = _CountingProvider(delay=0.2)
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            responses = list(executor.map(
+                lambda _: cache.get_or_load('银行 行业', 'industry', '601398', lambda: provider.search('银行 行业')),
+                range(5),
+            ))
+        self.assertEqual(len(provider.queries), 1)
+        self.assertTrue(all(r.results for r in responses))
+
+    def test_failure_not_shared(self) -> None:
+        cache = SearchCache(use_db=False)
+        failed = SearchResponse(query='q', results=[], provider='None', success=False)
+        self.assertFalse(cache.get_or_load('q', 'industry', '601398', lambda: failed).success)
+        self.assertIsNone(cache.get('q', 'industry', '601398'))
+
+    def test_daily_expiry(self) -> None:
+        fetched = datetime(2024, 3, 1, 10, 0)
+        self.assertEqual(search_cache_expiry(fetched, daily=True), datetime(2024, 3, 2))
+
+
+class StockSectorTestCase(unittest.TestCase):
+    """所属行业解析测试"""
+
+    def test_efinance_industry(self) -> None:
+        fetcher = EfinanceFetcher.__new__(EfinanceFetcher)
+        boards = pd.DataFrame({'板块名称': ['银行', '北京板块', 'HS300_'], '板块代码': ['BK0475', 'BK0150', 'BK0500']})
+        with unittest.mock.patch.object(fetcher, 'get_belong_board', return_value=boards):
+            self.assertEqual(fetcher.get_industry('601398'), '银行')
+        with unittest.mock.patch.object(fetcher, 'get_belong_board', return_value=None):
+            self.assertIsNone(fetcher.get_industry('601398'))
+
+    def test_manager_caches_sector(self) -> None:
+        fetcher = unittest.mock.Mock()
+        fetcher.name = 'EfinanceFetcher'
+        fetcher.priority = 0
+        fetcher.get_industry.return_value = '银行'
+        manager = DataFetcherManager(fetchers=[fetcher])
+        manager._stock_sector_cache = PersistentMapping('stock_sector', ttl=60, backend=MemoryCacheBackend())
+
+        self.assertEqual(manager.get_stock_sector('601398'), '银行')
+        self.assertEqual(manager.get_stock_sector('601398'), '银行')
+        self.assertEqual(fetcher.get_industry.call_count, 1)
+        self.assertIsNone(manager.get_stock_sector('AAPL'))
+        self.assertEqual(fetcher.get_industry.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
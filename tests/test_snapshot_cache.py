@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+全量快照缓存单元测试
+===================================
+
+职责：
+1. 验证并发未命中时只执行一次刷新（single-flight）
+2. 验证刷新期间其他调用方复用旧值（stale-while-revalidate）
+3. 验证刷新失败保留旧值、失败退避与统计计数
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.snapshot_cache import SingleFlightCache, get_snapshot_cache_stats
+
+
+class SingleFlightCacheTestCase(unittest.TestCase):
+    """SingleFlightCache 测试"""
+
+    def test_concurrent_miss_loads_once(self) -> None:
+        cache = SingleFlightCache('test_concurrent_miss', ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'snapshot'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_refresh(loader)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['snapshot'] * 5)
+        stats = cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['waits'], 4)
+        self.assertEqual(stats['refreshes'], 1)
+
+    def test_stale_value_served_while_refreshing(self) -> None:
+        cache = SingleFlightCache('test_stale', ttl=60)
+        cache.set('old', timestamp=time.time() - 61)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            started.set()
+            release.wait(2)
+            return 'new'
+
+        refresher = threading.Thread(target=cache.get_or_refresh, args=(slow_loader,))
+        refresher.start()
+        started.wait(2)
+
+        # 刷新进行中：立即返回旧值，不触发第二次刷新
+        self.assertEqual(cache.get_or_refresh(lambda: self.fail("不应重复刷新")), 'old')
+        release.set()
+        refresher.join()
+
+        self.assertEqual(cache.get_or_refresh(lambda: 'unused'), 'new')
+        stats = cache.stats()
+        self.assertEqual(stats['stale_hits'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_too_old_value_not_served(self) -> None:
+        cache = SingleFlightCache('test_too_old', ttl=10, max_stale=0)
+        cache.set('old', timestamp=time.time() - 11)
+        self.assertEqual(cache.get_or_refresh(lambda: None), None)
+        self.assertEqual(cache.stats()['refresh_failures'], 1)
+
+    def test_failed_refresh_keeps_stale_value(self) -> None:
+        cache = SingleFlightCache('test_failed_refresh', ttl=10)
+        cache.set('old', timestamp=time.time() - 11)
+
+        def broken_loader():
+            raise RuntimeError("upstream down")
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_refresh(broken_loader)
+        # 异常后刷新标记被清除，旧值仍在
+        self.assertEqual(cache.get_or_refresh(lambda: None), 'old')
+        self.assertFalse(cache.stats()['refreshing'])
+
+    def test_empty_frame_refresh_keeps_good_snapshot(self) -> None:
+        cache = SingleFlightCache('test_empty_refresh', ttl=10)
+        good = pd.DataFrame({'代码': ['600519'], '最新价': [1700.0]})
+        self.assertIs(cache.get_or_refresh(lambda: good), good)
+        good_timestamp = cache.timestamp
+
+        # 刷新函数失败时返回空 DataFrame（如 akshare 的 _fetch_stock_spot_em）
+        cache.set(good, timestamp=time.time() - 11)
+        stale_timestamp = cache.timestamp
+        self.assertIs(cache.get_or_refresh(lambda: pd.DataFrame()), good)
+        self.assertEqual(cache.timestamp, stale_timestamp)
+        self.assertLess(stale_timestamp, good_timestamp)
+        self.assertEqual(cache.stats()['refresh_failures'], 1)
+
+    def test_failure_backoff(self) -> None:
+        cache = SingleFlightCache('test_failure_backoff', ttl=10, failure_ttl=60)
+        calls = []
+
+        def failing_loader():
+            calls.append(1)
+            return pd.DataFrame()
+
+        self.assertIsNone(cache.get_or_refresh(failing_loader))
+        # 退避期内不再调用 loader
+        self.assertIsNone(cache.get_or_refresh(failing_loader))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cache.stats()['backoff_hits'], 1)
+
+        # 退避期过后重新刷新，成功后清除退避
+        cache._last_failure -= 61
+        self.assertEqual(cache.get_or_refresh(lambda: 'value'), 'value')
+        cache._timestamp -= 11
+        self.assertEqual(cache.get_or_refresh(lambda: 'fresh'), 'fresh')
+
+    def test_derive_rebuilds_after_set(self) -> None:
+        cache = SingleFlightCache('test_derive', ttl=60)
+        cache.set([1, 2])
+        first = cache.derive('total', sum)
+        self.assertEqual(first, 3)
+        self.assertEqual(cache.derive('total', lambda v: self.fail("不应重建")), 3)
+
+        cache.set([5])
+        self.assertEqual(cache.derive('total', sum), 5)
+
+    def test_registered_for_stats(self) -> None:
+        cache = SingleFlightCache('test_registered', ttl=60)
+        cache.get_or_refresh(lambda: 'value')
+        self.assertEqual(get_snapshot_cache_stats()['test_registered']['misses'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
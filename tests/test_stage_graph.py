@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+阶段依赖图执行器单元测试
+===================================
+
+职责：
+1. 验证独立阶段并发执行
+2. 验证依赖顺序与结果传递
+3. 验证阶段异常隔离与耗时记录
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.stage_graph import StageGraph
+
+
+class StageGraphTestCase(unittest.TestCase):
+    """StageGraph 测试"""
+
+    def test_independent_stages_run_concurrently(self) -> None:
+        graph = StageGraph(name="test")
+        for name in ("a", "b", "c"):
+            graph.add_stage(name, lambda deps: time.sleep(0.2) or name)
+
+        start = time.time()
+        graph.run()
+        elapsed = time.time() - start
+
+        # 三个 0.2s 阶段并发执行，总耗时接近最慢阶段而非总和
+        self.assertLess(elapsed, 0.45)
+        self.assertEqual(set(graph.timings().keys()), {"a", "b", "c"})
+        for value in graph.timings().values():
+            self.assertGreaterEqual(value, 0.19)
+
+    def test_dependency_receives_upstream_value(self) -> None:
+        order = []
+        lock = threading.Lock()
+
+        def record(name, value):
+            with lock:
+                order.append(name)
+            return value
+
+        graph = StageGraph(name="test")
+        graph.add_stage("context", lambda deps: record("context", {"rows": 3}))
+        graph.add_stage("trend", lambda deps: record("trend", deps["context"]["rows"] * 2), depends_on=["context"])
+        outputs = graph.run()
+
+        self.assertEqual(outputs["trend"], 6)
+        self.assertEqual(order, ["context", "trend"])
+
+    def test_stage_failure_is_isolated(self) -> None:
+        def boom(deps):
+            raise RuntimeError("upstream down")
+
+        graph = StageGraph(name="test")
+        graph.add_stage("realtime", boom)
+        graph.add_stage("chip", lambda deps: "chip")
+        graph.add_stage("intel", lambda deps: deps["realtime"] is None, depends_on=["realtime"])
+        outputs = graph.run()
+
+        self.assertIsNone(outputs["realtime"])
+        self.assertIsInstance(graph.results["realtime"].error, RuntimeError)
+        self.assertEqual(outputs["chip"], "chip")
+        # 非 required 依赖失败时，下游仍执行并收到 None
+        self.assertTrue(outputs["intel"])
+
+    def test_required_stage_failure_skips_downstream(self) -> None:
+        def boom(deps):
+            raise RuntimeError("db down")
+
+        graph = StageGraph(name="test")
+        graph.add_stage("context", boom, required=True)
+        graph.add_stage("trend", lambda deps: "trend", depends_on=["context"])
+        graph.add_stage("report", lambda deps: "report", depends_on=["trend"])
+        outputs = graph.run()
+
+        self.assertTrue(graph.results["trend"].skipped)
+        self.assertIsNone(outputs["trend"])
+        # 被跳过的阶段不是 required，下游仍会执行
+        self.assertEqual(outputs["report"], "report")
+
+    def test_unknown_dependency_rejected(self) -> None:
+        graph = StageGraph(name="test")
+        with self.assertRaises(ValueError):
+            graph.add_stage("trend", lambda deps: None, depends_on=["context"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+通达信长连接池单元测试
+===================================
+
+职责：
+1. 验证连接复用、连接数上限与探活
+2. 验证服务器按实测表现排序、失败服务器冷却
+3. 验证连接异常透明重连与 PytdxFetcher 批量接口
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetchError
+from data_provider.pytdx_fetcher import PytdxFetcher
+from data_provider.tdx_pool import TdxConnectionPool, reset_tdx_pools
+
+HOSTS = [("10.0.0.1", 7709), ("10.0.0.2", 7709), ("10.0.0.3", 7709)]
+
+
+class _FakeServer:
+    """模拟通达信服务器集群：记录建连次数，可指定不可用服务器"""
+
+    def __init__(self, down=(), connect_delay=None):
+        self.down = set(down)
+        self.connect_delay = connect_delay or {}
+        self.connects = []
+        self.broken_once = False
+
+    def factory(self):
+        return _FakeApi(self)
+
+
+class _FakeApi:
+    def __init__(self, server: _FakeServer):
+        self.server = server
+        self.alive = True
+
+    def connect(self, host, port, time_out=5):
+        time.sleep(self.server.connect_delay.get(host, 0.0))
+        if host in self.server.down:
+            return False
+        self.server.connects.append(host)
+        return True
+
+    def disconnect(self):
+        self.alive = False
+
+    def get_security_count(self, market):
+        if not self.alive:
+            raise ConnectionError("socket closed")
+        return 100
+
+    def get_security_bars(self, category, market, code, start, count):
+        if self.server.broken_once:
+            self.server.broken_once = False
+            self.alive = False
+            raise ConnectionError("connection reset")
+        if code == '000000':
+            return []
+        dates = pd.bdate_range(end='2024-03-01', periods=5)
+        return [
+            {'datetime': d.strftime('%Y-%m-%d 15:00'), 'open': 1.0, 'high': 1.0, 'low': 1.0,
+             'close': 1.0 + i, 'vol': 100.0, 'amount': 100.0}
+            for i, d in enumerate(dates)
+        ]
+
+    def to_df(self, data):
+        return pd.DataFrame(data)
+
+
+class TdxConnectionPoolTestCase(unittest.TestCase):
+    """TdxConnectionPool 测试"""
+
+    def test_connection_reused(self) -> None:
+        server = _FakeServer()
+        pool = TdxConnectionPool(HOSTS, server.factory, max_size=2)
+        for _ in range(5):
+            with pool.session() as api:
+                self.assertEqual(api.get_security_count(0), 100)
+        self.assertEqual(len(server.connects), 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_max_size_bounds_connections(self) -> None:
+        server = _FakeServer()
+        pool = TdxConnectionPool(HOSTS, server.factory, max_size=2)
+        barrier = threading.Barrier(4)
+
+        def _worker():
+            barrier.wait()
+            for _ in range(3):
+                with pool.session():
+                    time.sleep(0.01)
+
+        threads = [threading.Thread(target=_worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertLessEqual(len(server.connects), 2)
+
+    def test_checkout_timeout(self) -> None:
+        pool = TdxConnectionPool(HOSTS, _FakeServer().factory, max_size=1)
+        with pool.session():
+            with self.assertRaises(DataFetchError):
+                with pool.session(timeout=0.05):
+                    pass
+
+    def test_dead_idle_connection_replaced(self) -> None:
+        server = _FakeServer()
+        pool = TdxConnectionPool(HOSTS, server.factory, max_size=1, check_interval=0.0)
+        with pool.session() as api:
+            first = api
+        first.alive = False
+        with pool.session() as api:
+            self.assertIsNot(api, first)
+        self.assertEqual(len(server.connects), 2)
+
+    def test_hosts_ranked_by_latency_and_failures(self) -> None:
+        server = _FakeServer(down={"10.0.0.1"})
+        pool = TdxConnectionPool(HOSTS, server.factory, max_size=1)
+        with pool.session():
+            pass
+        # 失败服务器冷却期内排到最后
+        self.assertEqual(pool.ranked_hosts()[-1], ("10.0.0.1", 7709))
+        self.assertEqual(pool.ranked_hosts()[0], ("10.0.0.2", 7709))
+        self.assertEqual(server.connects, ["10.0.0.2"])
+
+    def test_all_hosts_down(self) -> None:
+        pool = TdxConnectionPool(HOSTS, _FakeServer(down={h for h, _ in HOSTS}).factory, max_size=1)
+        with self.assertRaises(DataFetchError):
+            with pool.session():
+                pass
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_call_reconnects_on_connection_error(self) -> None:
+        server = _FakeServer()
+        pool = TdxConnectionPool(HOSTS, server.factory, max_size=1)
+        server.broken_once = True
+        bars = pool.call(lambda api: api.get_security_bars(9, 1, '600519', 0, 5))
+        self.assertEqual(len(bars), 5)
+        self.assertEqual(len(server.connects), 2)
+
+    def test_business_error_keeps_connection(self) -> None:
+        server = _FakeServer()
+        pool = TdxConnectionPool(HOSTS, server.factory, max_size=1)
+
+        def _no_data(api):
+            raise DataFetchError("no data")
+
+        with self.assertRaises(DataFetchError):
+            pool.call(_no_data)
+        with pool.session():
+            pass
+        self.assertEqual(len(server.connects), 1)
+
+
+class PytdxBatchTestCase(unittest.TestCase):
+    """PytdxFetcher 批量接口测试"""
+
+    def setUp(self) -> None:
+        reset_tdx_pools()
+        self.addCleanup(reset_tdx_pools)
+        self.server = _FakeServer()
+        self.fetcher = PytdxFetcher(hosts=HOSTS)
+        self.fetcher._pool = TdxConnectionPool(HOSTS, self.server.factory, max_size=2)
+
+    def test_batch_single_connection(self) -> None:
+        codes = ['600519', '000001', '000000', 'AAPL', '300750']
+        result = self.fetcher.get_daily_data_batch(codes, end_date='2024-03-01', days=10)
+        self.assertEqual(sorted(result), ['000001', '300750', '600519'])
+        self.assertEqual(len(self.server.connects), 1)
+        self.assertIn('ma5', result['600519'].columns)
+
+    def test_batch_resumes_after_connection_error(self) -> None:
+        self.server.broken_once = True
+        result = self.fetcher.get_daily_data_batch(['600519', '000001'], end_date='2024-03-01', days=10)
+        self.assertEqual(sorted(result), ['000001', '600519'])
+        self.assertEqual(len(self.server.connects), 2)
+
+    def test_daily_data_uses_pool(self) -> None:
+        for _ in range(3):
+            df = self.fetcher.get_daily_data('600519', end_date='2024-03-01', days=10)
+            self.assertFalse(df.empty)
+        self.assertEqual(len(self.server.connects), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
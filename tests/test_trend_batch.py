@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+批量趋势分析单元测试
+===================================
+
+职责：
+1. 验证 analyze_batch 与逐只 analyze 结果一致（长表 / 字典两种输入，含价格取整导致均线相等的情况）
+2. 验证数据不足的股票返回“数据不足”结果
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.stock_analyzer import StockTrendAnalyzer
+
+
+def _frames(count=60, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(count):
+        n = int(rng.integers(20, 160))
+        close = 20 * np.exp(np.cumsum(rng.normal(0.001, 0.02, n)))
+        frames[f'{600000 + i}'] = pd.DataFrame({
+            'date': pd.bdate_range(end='2024-03-01', periods=n),
+            'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+            'volume': rng.uniform(1e5, 5e5, n),
+        })
+    return frames
+
+
+class TrendBatchTestCase(unittest.TestCase):
+    """StockTrendAnalyzer.analyze_batch 测试"""
+
+    def setUp(self) -> None:
+        self.analyzer = StockTrendAnalyzer()
+        self.frames = _frames()
+
+    def assertSameResult(self, single, batch) -> None:
+        expected, actual = single.to_dict(), batch.to_dict()
+        for key, value in expected.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(actual[key], value, places=8, msg=f"{single.code} {key}")
+            else:
+                self.assertEqual(actual[key], value, msg=f"{single.code} {key}")
+        np.testing.assert_allclose(batch.support_levels, single.support_levels)
+        np.testing.assert_allclose(batch.resistance_levels, single.resistance_levels)
+
+    def test_dict_input_matches_single(self) -> None:
+        results = self.analyzer.analyze_batch(self.frames)
+        self.assertEqual(sorted(results), sorted(self.frames))
+        for code, df in self.frames.items():
+            self.assertSameResult(self.analyzer.analyze(df, code), results[code])
+
+    def test_long_frame_input(self) -> None:
+        long_df = pd.concat(
+            [df.assign(code=code) for code, df in self.frames.items()], ignore_index=True
+        ).sample(frac=1.0, random_state=1)
+        results = self.analyzer.analyze_batch(long_df)
+        for code, df in list(self.frames.items())[:10]:
+            self.assertSameResult(self.analyzer.analyze(df, code), results[code])
+
+    def test_rounded_prices_match_single(self) -> None:
+        # A 股价格保留 2 位小数（低价股常见 1 位），均线易出现相等，求和顺序不同会翻转趋势判断
+        frames = {}
+        for code, df in _frames(count=400, seed=3).items():
+            decimals = 1 if int(code) % 2 else 2
+            close = df['close'].round(decimals)
+            frames[code] = df.assign(open=close, high=close, low=close, close=close)
+        results = self.analyzer.analyze_batch(frames)
+        for code, df in frames.items():
+            single = self.analyzer.analyze(df, code)
+            for key in ('ma5', 'ma10', 'ma20', 'ma60'):
+                self.assertEqual(getattr(results[code], key), getattr(single, key), msg=f"{code} {key}")
+            self.assertSameResult(single, results[code])
+
+    def test_insufficient_data(self) -> None:
+        frames = {'000001': self.frames['600000'].tail(10), '000002': pd.DataFrame()}
+        results = self.analyzer.analyze_batch(frames)
+        for code in frames:
+            self.assertEqual(results[code].risk_factors, ["数据不足，无法完成分析"])
+        self.assertEqual(self.analyzer.analyze_batch(pd.DataFrame()), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+yfinance 批量下载单元测试
+===================================
+
+职责：
+1. 验证多代码 yf.download 结果按代码拆分、标准化
+2. 验证指数行情一次下载
+3. 验证 DataFetcherManager 预取境外股票日线并在 get_daily_data 中命中
+"""
+
+import os
+import sys
+import types
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data_provider.base import DataFetcherManager
+from data_provider.fetcher_health import reset_fetcher_health_tracker
+from data_provider.yfinance_fetcher import YfinanceFetcher
+
+
+def _multi_download(symbols, periods=30, missing=()):
+    """构造 group_by='ticker' 布局的多代码下载结果"""
+    end = datetime.now()
+    dates = pd.bdate_range(end=end, periods=periods, name='Date')
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        close = np.linspace(10, 20, periods) + i
+        data = {
+            'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+            'Volume': np.full(periods, 1000.0),
+        }
+        if symbol in missing:
+            data = {k: np.full(periods, np.nan) for k in data}
+        frames[symbol] = pd.DataFrame(data, index=dates)
+    return pd.concat(frames, axis=1)
+
+
+class _FakeYfinance(types.ModuleType):
+    def __init__(self, missing=()):
+        super().__init__('yfinance')
+        self.calls = []
+        self.missing = missing
+
+    def download(self, tickers, **kwargs):
+        self.calls.append((list(tickers), kwargs))
+        return _multi_download(tickers, missing=self.missing)
+
+
+class YfinanceBatchTestCase(unittest.TestCase):
+    """YfinanceFetcher 批量接口测试"""
+
+    def setUp(self) -> None:
+        self.yf = _FakeYfinance(missing=('TSLA',))
+        patcher = mock.patch.dict(sys.modules, {'yfinance': self.yf})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fetcher = YfinanceFetcher()
+
+    def test_split_group_by_ticker_and_default_layout(self) -> None:
+        raw = _multi_download(['AAPL', 'MSFT'])
+        self.assertEqual(len(YfinanceFetcher._split_download(raw, 'AAPL')), 30)
+        swapped = raw.swaplevel(axis=1)
+        self.assertEqual(float(YfinanceFetcher._split_download(swapped, 'MSFT')['Close'].iloc[0]), 11.0)
+        self.assertIsNone(YfinanceFetcher._split_download(raw, 'NVDA'))
+
+    def test_batch_single_download(self) -> None:
+        result = self.fetcher.get_daily_data_batch(['AAPL', 'hk00700', 'TSLA'], days=20)
+        self.assertEqual(len(self.yf.calls), 1)
+        self.assertEqual(self.yf.calls[0][0], ['AAPL', '0700.HK', 'TSLA'])
+        self.assertEqual(sorted(result), ['AAPL', 'hk00700'])
+        df = result['AAPL']
+        self.assertIn('ma5', df.columns)
+        self.assertEqual(set(df['code']), {'AAPL'})
+        self.assertTrue((df['amount'] > 0).all())
+
+    def test_main_indices_single_download(self) -> None:
+        indices = self.fetcher.get_main_indices()
+        self.assertEqual(len(self.yf.calls), 1)
+        self.assertEqual(len(indices), 6)
+        self.assertEqual(indices[0]['code'], 'sh000001')
+
+
+class ManagerPrefetchDailyTestCase(unittest.TestCase):
+    """DataFetcherManager 境外日线预取测试"""
+
+    def setUp(self) -> None:
+        reset_fetcher_health_tracker()
+        self.addCleanup(reset_fetcher_health_tracker)
+        self.yf = _FakeYfinance()
+        patcher = mock.patch.dict(sys.modules, {'yfinance': self.yf})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fetcher = YfinanceFetcher()
+        self.manager = DataFetcherManager(fetchers=[self.fetcher])
+
+    def test_prefetch_then_hit(self) -> None:
+        count = self.manager.prefetch_daily_data(['AAPL', 'MSFT', '600519'], days=30)
+        self.assertEqual(count, 2)
+        self.assertEqual(self.yf.calls[0][0], ['AAPL', 'MSFT'])
+
+        with mock.patch.object(self.fetcher, 'get_daily_data') as single:
+            df, source = self.manager.get_daily_data('AAPL', days=10)
+            single.assert_not_called()
+        self.assertEqual(source, 'YfinanceFetcher')
+        cutoff = datetime.now() - timedelta(days=21)
+        self.assertTrue((pd.to_datetime(df['date']) >= cutoff).all())
+
+        # 预取数据只使用一次
+        with mock.patch.object(self.fetcher, 'get_daily_data', return_value=df) as single:
+            self.manager.get_daily_data('AAPL', days=10)
+            single.assert_called_once()
+
+    def test_prefetch_skips_single_foreign_code(self) -> None:
+        self.assertEqual(self.manager.prefetch_daily_data(['AAPL', '600519']), 0)
+        self.assertEqual(self.yf.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()